@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+from satimages_channels import ChannelStore
+from satimages_mock_server import generate_channels
+from satimages_protocol import FrameDecoder, PayloadStream, build_message, decode_payload
+from satimages_snapshot import ChannelSnapshot, write_snapshot
+
+# ✅ قياس أداء المسارات الساخنة في satimages_tab على قوائم قنوات اصطناعية
+# النتائج تُكتب كـ JSON لمقارنتها بين الإصدارات
+
+DEFAULT_SIZES = (1000, 10000, 50000)
+POPULATE_SLICE = 500  # نفس حجم شرائح تعبئة الجدول في satimages_tab
+FIRST_SCREEN = 40
+CHUNK_SIZE = 4096  # حجم قطع الاستقبال عند محاكاة وصول البيانات من المقبس
+SEARCH_KEYSTROKES = "sport"
+
+
+def measure(func, repeat: int) -> dict:
+    """تشغيل func عدة مرات وإرجاع أفضل زمن ومتوسطه (بالثواني)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"best": min(timings), "mean": statistics.fmean(timings), "runs": len(timings)}
+
+
+def encode_channel_list(channels: list) -> bytes:
+    body = zlib.compress(json.dumps(channels, ensure_ascii=False).encode("utf-8"))
+    return build_message(body)
+
+
+def feed_in_chunks(decoder: FrameDecoder, data: bytes) -> list:
+    frames = []
+    view = memoryview(data)
+    for offset in range(0, len(view), CHUNK_SIZE):
+        frames.extend(decoder.feed(view[offset:offset + CHUNK_SIZE]))
+    return frames
+
+
+def bench_protocol(channels: list, repeat: int) -> list:
+    size = len(channels)
+    message = encode_channel_list(channels)
+    payload = message[15:]
+    raw_json = json.dumps(channels, ensure_ascii=False).encode("utf-8")
+    results = []
+
+    def add(name, timing, nbytes=None):
+        entry = {"name": name, "size": size, **timing}
+        if nbytes:
+            entry["bytes"] = nbytes
+            entry["mb_per_s"] = nbytes / timing["best"] / 1e6 if timing["best"] else None
+        results.append(entry)
+
+    add("build_message", measure(lambda: encode_channel_list(channels), repeat), len(raw_json))
+    add("build_message_ranges", measure(
+        lambda: [build_message(f'{{"request":"0", "FromIndex":"{i}", "ToIndex":"{i + 249}"}}')
+                 for i in range(0, size, 250)], repeat))
+    add("frame_decode", measure(lambda: feed_in_chunks(FrameDecoder(), message), repeat), len(message))
+    add("zlib_json_decode", measure(lambda: decode_payload(payload), repeat), len(raw_json))
+
+    def stream_decode():
+        stream = PayloadStream()
+        for offset in range(0, len(payload), CHUNK_SIZE):
+            stream.feed(payload[offset:offset + CHUNK_SIZE])
+        return stream.close()
+
+    add("zlib_json_stream_decode", measure(stream_decode, repeat), len(raw_json))
+    add("frame_decode_streaming", measure(
+        lambda: feed_in_chunks(FrameDecoder(stream_payloads=True), message), repeat), len(raw_json))
+    return results
+
+
+def bench_snapshot(channels: list, repeat: int, workdir: str) -> list:
+    """فتح لقطة .ssnp وتحميلها كاملة إلى ChannelStore بشرائح التعبئة (وليس الشاشة الأولى فقط)"""
+    size = len(channels)
+    path = os.path.join(workdir, f"channels_{size}.ssnp")
+    write_snapshot(path, channels)
+
+    def open_first_screen():
+        with ChannelSnapshot(path) as snapshot:
+            return snapshot.store(0, FIRST_SCREEN)
+
+    def load(slice_store):
+        def run():
+            store = ChannelStore()
+            with ChannelSnapshot(path) as snapshot:
+                for start in range(0, len(snapshot), POPULATE_SLICE):
+                    slice_store(store, snapshot, start, start + POPULATE_SLICE)
+            return store
+        return run
+
+    return [
+        {"name": "snapshot_open_first_screen", "size": size, **measure(open_first_screen, repeat)},
+        {"name": "snapshot_full_load", "size": size, **measure(
+            load(lambda store, snapshot, start, end: store.extend_store(snapshot.store(start, end))), repeat)},
+        {"name": "snapshot_full_load_dicts", "size": size, **measure(
+            load(lambda store, snapshot, start, end: store.extend(snapshot[start:end])), repeat)},
+    ]
+
+
+def bench_gui(sizes: list, repeat: int, workdir: str) -> list:
+    """قياس دوال الواجهة (تتطلب PyQt6؛ تعمل بدون شاشة عبر المنصة offscreen)"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from unittest import mock
+    from PyQt6.QtWidgets import QApplication
+    import satimages_tab
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = satimages_tab.StarsatRemote()
+    results = []
+
+    def reset_table():
+        window.channel_model.clear()
+
+    def step(name, size, func):
+        if func is None:
+            return
+        results.append({"name": name, "size": size, **measure(func, repeat)})
+
+    def gui_method(name):
+        return getattr(window, name, None)  # بعض الدوال قد تُزال مع تطور الواجهة
+
+    with mock.patch.object(satimages_tab.QMessageBox, "information"), \
+         mock.patch.object(satimages_tab.QMessageBox, "critical"), \
+         mock.patch.object(satimages_tab.QMessageBox, "warning"):
+        for size in sizes:
+            channels = generate_channels(size)
+
+            def populate():
+                reset_table()
+                window.populate_channel_table(channels)
+                flush = gui_method("flush_channel_population") # التعبئة على شرائح: ننتظر اكتمالها
+                if flush is not None:
+                    flush()
+                app.processEvents()
+
+            step("populate_channel_table", size, populate)
+            populate() # الجدول ممتلئ لبقية القياسات
+
+            def type_search():
+                for length in range(1, len(SEARCH_KEYSTROKES) + 1):
+                    window.search_input.setText(SEARCH_KEYSTROKES[:length]) # textChanged -> filter_channels
+                window.search_input.clear()
+
+            timing = measure(type_search, repeat)
+            keystrokes = len(SEARCH_KEYSTROKES) + 1 # الكتابة حرفاً حرفاً ثم مسح الحقل
+            results.append({"name": "filter_channels_per_keystroke", "size": size,
+                            "best": timing["best"] / keystrokes, "mean": timing["mean"] / keystrokes,
+                            "runs": timing["runs"]})
+
+            tooltips = gui_method("setup_cell_tooltips")
+            step("setup_cell_tooltips", size, tooltips)
+
+            def wait_for_export(export):
+                def run():
+                    export()
+                    while getattr(window, "export_worker", None) is not None: # التصدير في خيط خلفي
+                        app.processEvents()
+                        time.sleep(0.001)
+                return run
+
+            for name, suffix in (("export_to_m3u", ".m3u"), ("export_to_csv", ".csv"),
+                                 ("export_to_excel", ".xlsx"), ("export_to_parquet", ".parquet"),
+                                 ("save_channels_to_file", ".json")):
+                export = gui_method(name)
+                if export is None:
+                    continue
+                path = os.path.join(workdir, f"{name}_{size}{suffix}")
+                with mock.patch.object(satimages_tab.QFileDialog, "getSaveFileName", return_value=(path, "")):
+                    step(name, size, wait_for_export(export))
+            reset_table()
+
+    window.close()
+    return results
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="قياس أداء بروتوكول وجدول ستارسات")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="أحجام القوائم مفصولة بفواصل")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--skip-gui", action="store_true", help="قياس طبقة البروتوكول فقط")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            print(f"⏱ protocol: {size} channels")
+            channels = generate_channels(size)
+            results.extend(bench_protocol(channels, args.repeat))
+            results.extend(bench_snapshot(channels, args.repeat, workdir))
+
+    gui_error = None
+    if not args.skip_gui:
+        try:
+            with tempfile.TemporaryDirectory() as workdir:
+                print("⏱ GUI benchmarks")
+                results.extend(bench_gui(sizes, args.repeat, workdir))
+        except ImportError as e:
+            gui_error = f"skipped: {e}"
+            print(f"⚠️ تم تخطي قياسات الواجهة: {e}")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "gui": gui_error or ("skipped" if args.skip_gui else "ok"),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for entry in results:
+        line = f"{entry['name']:<32}{entry['size']:>8}  best {entry['best'] * 1000:10.2f} ms"
+        if entry.get("mb_per_s"):
+            line += f"  {entry['mb_per_s']:8.1f} MB/s"
+        print(line)
+    print(f"✅ النتائج محفوظة في {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+# ✅ ذاكرة قنوات دائمة في SQLite بدل سلسلة JSON واحدة في QSettings (السجل في ويندوز)
+# - مفتاح كل صف: الرقم التسلسلي للجهاز + ServiceID
+# - لكل صف بصمة (hash) لمحتواه حتى تكتب المزامنة الصفوف المتغيرة فقط
+# - التطبيق يبدأ فوراً من الذاكرة ثم يطابقها مع الجهاز في الخلفية
+# لا يعتمد على Qt حتى يُستخدم من الواجهة ومن الأدوات بدون واجهة
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".starsat_remote", "channels.sqlite")
+VOLATILE_FIELDS = ("Playing",)  # يتغير مع كل تقليب ولا يعني أن القناة تغيرت
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS receivers (
+    serial TEXT PRIMARY KEY,
+    product TEXT,
+    channel_count INTEGER NOT NULL DEFAULT 0,
+    synced_at REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS channels (
+    serial TEXT NOT NULL,
+    service_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (serial, service_id)
+);
+CREATE INDEX IF NOT EXISTS channels_position ON channels (serial, position);
+"""
+
+
+def channel_hash(channel: dict) -> str:
+    """بصمة محتوى القناة (بدون الحقول المتغيرة باستمرار)"""
+    stable = {k: v for k, v in channel.items() if k not in VOLATILE_FIELDS}
+    encoded = json.dumps(stable, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+
+class ChannelDelta:
+    """
+    نتيجة مقارنة قائمة الجهاز بالذاكرة:
+    - changed: {الموضع: القناة} للقنوات التي تغير محتواها وبقي موضعها
+    - reordered: ترتيب ServiceID تغير (إضافة، حذف، نقل) فيلزم استبدال القائمة كلها
+    """
+
+    def __init__(self, changed: dict, reordered: bool, channels: list):
+        self.changed = changed
+        self.reordered = reordered
+        self.channels = channels
+
+    def __bool__(self):
+        return bool(self.changed) or self.reordered
+
+
+class ChannelCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # --- القراءة ---
+    def last_serial(self) -> str | None:
+        """آخر جهاز تمت مزامنته (لعرض قنواته عند بدء التشغيل قبل الاتصال)"""
+        row = self.conn.execute("SELECT serial FROM receivers ORDER BY synced_at DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def load(self, serial: str) -> list:
+        rows = self.conn.execute(
+            "SELECT data FROM channels WHERE serial = ? ORDER BY position", (serial,))
+        return [json.loads(data) for data, in rows]
+
+    def hashes(self, serial: str) -> list:
+        """[(service_id, hash)] بترتيب المواضع"""
+        return self.conn.execute(
+            "SELECT service_id, hash FROM channels WHERE serial = ? ORDER BY position", (serial,)).fetchall()
+
+    def count(self, serial: str) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM channels WHERE serial = ?", (serial,)).fetchone()[0]
+
+    # --- الكتابة ---
+    def save(self, serial: str, channels: list, product: str = None) -> int:
+        """حفظ القائمة كاملة؛ تُكتب فقط الصفوف التي تغير موضعها أو بصمتها. يعيد عدد الصفوف المكتوبة"""
+        stored = {sid: (position, digest) for position, (sid, digest) in enumerate(self.hashes(serial))}
+        seen = set()
+        rows = []
+        for position, channel in enumerate(channels):
+            service_id = str(channel.get("ServiceID", ""))
+            if service_id in seen:
+                continue  # المفتاح (serial, ServiceID) فريد؛ التكرار من الجهاز يُتجاهل
+            seen.add(service_id)
+            digest = channel_hash(channel)
+            if stored.get(service_id) != (position, digest):
+                rows.append((serial, service_id, position, digest, json.dumps(channel, ensure_ascii=False)))
+        removed = [(serial, sid) for sid in stored.keys() - seen]
+        with self.conn:
+            self.conn.executemany("DELETE FROM channels WHERE serial = ? AND service_id = ?", removed)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO channels (serial, service_id, position, hash, data) VALUES (?, ?, ?, ?, ?)",
+                rows)
+            self.conn.execute(
+                "INSERT INTO receivers (serial, product, channel_count, synced_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(serial) DO UPDATE SET product = COALESCE(excluded.product, product), "
+                "channel_count = excluded.channel_count, synced_at = excluded.synced_at",
+                (serial, product, len(seen), time.time()))
+        logging.info(f"channel cache: {serial} saved, {len(rows)} written, {len(removed)} removed")
+        return len(rows) + len(removed)
+
+    def clear(self, serial: str):
+        with self.conn:
+            self.conn.execute("DELETE FROM channels WHERE serial = ?", (serial,))
+            self.conn.execute("DELETE FROM receivers WHERE serial = ?", (serial,))
+
+    # --- المقارنة ---
+    def diff(self, serial: str, channels: list) -> ChannelDelta:
+        """مقارنة قائمة الجهاز بالمحفوظ: ما الذي يجب تطبيقه على الجدول"""
+        stored = self.hashes(serial)
+        device_ids = [str(channel.get("ServiceID", "")) for channel in channels]
+        if device_ids != [sid for sid, _ in stored]:
+            return ChannelDelta({}, True, channels)
+        changed = {position: channel for position, (channel, (_, digest)) in enumerate(zip(channels, stored))
+                   if channel_hash(channel) != digest}
+        return ChannelDelta(changed, False, channels)
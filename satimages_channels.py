@@ -0,0 +1,559 @@
+import sys
+from array import array
+from itertools import compress
+
+# ✅ مخزن قنوات عمودي مضغوط بدل قائمة قواميس الجهاز الخام
+# كل حقل في مصفوفة مستقلة (array / list) والأعلام الثنائية مجمعة في بتات،
+# مع فهرس من ServiceID و ServiceIndex إلى رقم الصف لتعديلات O(1)
+# لا يعتمد على Qt حتى يُستخدم من الواجهة ومن الأدوات بدون واجهة
+
+UNKNOWN_ID = '؟؟؟'
+
+KNOWN_FIELDS = frozenset((
+    "ServiceName", "ServiceID", "ServiceIndex", "Radio", "HD", "Scramble", "Lock", "EPG",
+    "VideoPID", "PMTPID", "AudioArray", "FavBit", "Playing",
+))
+
+
+def _as_int(value, default: int = 0) -> int:
+    """الجهاز قد يرسل الأرقام كنصوص ("0"/"1")"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class ChannelStore:
+    """
+    قائمة القنوات بتخزين عمودي:
+    - names / service_ids: نصوص مُدمجة (sys.intern)
+    - service_indexes / video_pids / pmt_pids / fav_bits: مصفوفات أرقام
+    - audio_pids + audio_offsets: كل أرقام PID في مصفوفة واحدة، ومسارات الصف row
+      هي audio_pids[audio_offsets[row]:audio_offsets[row + 1]]
+    - flags: بتات الحالة (راديو، HD، تشفير، قفل، EPG، تشغيل، مفضلة، تحديد)
+    - urls: None = الرابط الافتراضي، وإلا الرابط المستلم من الجهاز
+    الحقول غير المعروفة تُحفظ كما هي في extras حتى لا يفقد get() أي بيانات.
+    """
+
+    RADIO = 1
+    HD = 2
+    SCRAMBLED = 4
+    LOCKED = 8
+    EPG = 16
+    PLAYING = 32
+    FAVORITE = 64
+    SELECTED = 128
+    SERVICE_ID_INT = 256  # ServiceID وصل كرقم، يُعاد كرقم في get()
+
+    DEVICE_FLAGS = (("Radio", RADIO), ("HD", HD), ("Scramble", SCRAMBLED),
+                    ("Lock", LOCKED), ("EPG", EPG), ("Playing", PLAYING))
+
+    def __init__(self, channels=None, favorites=()):
+        self.revision = 0  # يزيد مع كل تعديل غير الإضافة في النهاية (حذف، ترتيب، تسمية)
+        self.clear()
+        if channels:
+            self.extend(channels, favorites)
+
+    def clear(self):
+        self.names = []
+        self.service_ids = []
+        self.service_indexes = array('l')
+        self.video_pids = array('l')
+        self.pmt_pids = array('l')
+        self.fav_bits = array('Q')
+        self.audio_pids = array('l')
+        self.audio_offsets = array('L', [0])
+        self.flags = array('H')
+        self.urls = []
+        self.extras = []
+        self._by_service_id = {}
+        self._by_service_index = {}
+        self._index_dirty = False
+        self.revision += 1
+
+    def __len__(self):
+        return len(self.names)
+
+    def __bool__(self):
+        return bool(self.names)
+
+    def __iter__(self):
+        return (self.get(row) for row in range(len(self.names)))
+
+    # --- الإضافة ---
+    def append(self, channel: dict, favorite: bool = False) -> int:
+        row = len(self.names)
+        service_id = channel.get("ServiceID", UNKNOWN_ID)
+        flags = self.SERVICE_ID_INT if isinstance(service_id, int) else 0
+        for key, bit in self.DEVICE_FLAGS:
+            if _as_int(channel.get(key, 0)):
+                flags |= bit
+        if favorite:
+            flags |= self.FAVORITE
+
+        extras = None
+        audio = channel.get("AudioArray") or []
+        if any(not isinstance(a, dict) or a.keys() != {"PID"} for a in audio):
+            extras = {"AudioArray": audio}  # مسارات صوت بحقول إضافية تُحفظ كما هي
+        if not channel.keys() <= KNOWN_FIELDS:
+            unknown = {k: v for k, v in channel.items() if k not in KNOWN_FIELDS}
+            extras = {**unknown, **(extras or {})}
+
+        service_id = sys.intern(str(service_id))
+        self.names.append(sys.intern(str(channel.get("ServiceName", UNKNOWN_ID))))
+        self.service_ids.append(service_id)
+        self.service_indexes.append(_as_int(channel.get("ServiceIndex", 0)))
+        self.video_pids.append(_as_int(channel.get("VideoPID", 0)))
+        self.pmt_pids.append(_as_int(channel.get("PMTPID", 0)))
+        self.fav_bits.append(max(_as_int(channel.get("FavBit", 0)), 0))
+        self.audio_pids.extend(_as_int(a.get("PID", 0)) if isinstance(a, dict) else 0 for a in audio)
+        self.audio_offsets.append(len(self.audio_pids))
+        self.flags.append(flags)
+        self.urls.append(None)
+        self.extras.append(extras)
+
+        if not self._index_dirty:
+            self._by_service_id.setdefault(service_id, row)
+            self._by_service_index.setdefault(self.service_indexes[row], row)
+        return row
+
+    def extend(self, channels, favorites=()):
+        favorites = set(favorites)
+        for channel in channels:
+            self.append(channel, str(channel.get("ServiceID", UNKNOWN_ID)) in favorites)
+
+    def extend_store(self, other: "ChannelStore"):
+        """إضافة صفوف مخزن آخر (مثل شريحة من لقطة .ssnp) بنسخ أعمدته بدون قواميس وسيطة"""
+        first = len(self.names)
+        base = len(self.audio_pids)
+        self.names.extend(other.names)
+        self.service_ids.extend(other.service_ids)
+        self.service_indexes.extend(other.service_indexes)
+        self.video_pids.extend(other.video_pids)
+        self.pmt_pids.extend(other.pmt_pids)
+        self.fav_bits.extend(other.fav_bits)
+        self.audio_pids.extend(other.audio_pids)
+        self.audio_offsets.extend(offset + base for offset in other.audio_offsets[1:])
+        self.flags.extend(other.flags)
+        self.urls.extend(other.urls)
+        self.extras.extend(other.extras)
+        if not self._index_dirty:
+            for row in range(first, len(self.names)):
+                self._by_service_id.setdefault(self.service_ids[row], row)
+                self._by_service_index.setdefault(self.service_indexes[row], row)
+
+    # --- القراءة ---
+    def get(self, row: int) -> dict:
+        """إعادة بناء قاموس القناة بنفس شكل رد الجهاز (للحفظ والتصدير)"""
+        flags = self.flags[row]
+        service_id = self.service_ids[row]
+        channel = {
+            "ServiceName": self.names[row],
+            "ServiceID": int(service_id) if flags & self.SERVICE_ID_INT else service_id,
+            "ServiceIndex": self.service_indexes[row],
+            "Radio": int(bool(flags & self.RADIO)),
+            "HD": int(bool(flags & self.HD)),
+            "Scramble": int(bool(flags & self.SCRAMBLED)),
+            "Lock": int(bool(flags & self.LOCKED)),
+            "EPG": int(bool(flags & self.EPG)),
+            "VideoPID": self.video_pids[row],
+            "PMTPID": self.pmt_pids[row],
+            "AudioArray": [{"PID": pid} for pid in self.audio(row)],
+            "FavBit": self.fav_bits[row],
+            "Playing": int(bool(flags & self.PLAYING)),
+        }
+        if self.extras[row]:
+            channel.update(self.extras[row])
+        return channel
+
+    def to_dicts(self) -> list:
+        return [self.get(row) for row in range(len(self.names))]
+
+    def audio(self, row: int) -> array:
+        return self.audio_pids[self.audio_offsets[row]:self.audio_offsets[row + 1]]
+
+    def audio_count(self, row: int) -> int:
+        return self.audio_offsets[row + 1] - self.audio_offsets[row]
+
+    def has(self, row: int, flag: int) -> bool:
+        return bool(self.flags[row] & flag)
+
+    def rows_with(self, flag: int) -> list:
+        return [row for row, flags in enumerate(self.flags) if flags & flag]
+
+    def row_for_service_id(self, service_id) -> int:
+        self._ensure_index()
+        return self._by_service_id.get(str(service_id), -1)
+
+    def row_for_service_index(self, service_index) -> int:
+        self._ensure_index()
+        return self._by_service_index.get(_as_int(service_index, -1), -1)
+
+    # --- التعديل ---
+    def set_flag(self, row: int, flag: int, enabled: bool):
+        if enabled:
+            self.flags[row] |= flag
+        else:
+            self.flags[row] &= ~flag & 0xFFFF
+
+    def set_name(self, row: int, name: str):
+        self.names[row] = sys.intern(name)
+        self.revision += 1
+
+    def set_url(self, row: int, url: str | None):
+        self.urls[row] = url
+
+    def replace(self, row: int, channel: dict):
+        """استبدال بيانات صف من رد الجهاز مع الإبقاء على حالته المحلية (المفضلة، التحديد، الرابط)"""
+        local = self.flags[row] & (self.FAVORITE | self.SELECTED)
+        url = self.urls[row]
+        fresh = ChannelStore([channel])
+        for column, value in zip(self._columns(), fresh._columns()):
+            column[row] = value[0]
+        self.flags[row] |= local
+        self.urls[row] = url
+        start, end = self.audio_offsets[row], self.audio_offsets[row + 1]
+        self.audio_pids[start:end] = fresh.audio_pids
+        shift = len(fresh.audio_pids) - (end - start)
+        if shift:
+            for i in range(row + 1, len(self.audio_offsets)):
+                self.audio_offsets[i] += shift
+        self._index_dirty = True
+        self.revision += 1
+
+    def remove(self, first: int, last: int):
+        """حذف الصفوف first..last (شاملة)"""
+        for column in self._columns():
+            del column[first:last + 1]
+        start, end = self.audio_offsets[first], self.audio_offsets[last + 1]
+        del self.audio_pids[start:end]
+        removed = end - start
+        self.audio_offsets = self.audio_offsets[:first + 1] + array(
+            'L', (offset - removed for offset in self.audio_offsets[last + 2:]))
+        self._index_dirty = True
+        self.revision += 1
+
+    def reorder(self, order: list):
+        """order[الصف الجديد] = الصف القديم"""
+        self.names = [self.names[row] for row in order]
+        self.service_ids = [self.service_ids[row] for row in order]
+        self.service_indexes = array('l', (self.service_indexes[row] for row in order))
+        self.video_pids = array('l', (self.video_pids[row] for row in order))
+        self.pmt_pids = array('l', (self.pmt_pids[row] for row in order))
+        self.fav_bits = array('Q', (self.fav_bits[row] for row in order))
+        audio_pids = array('l')
+        audio_offsets = array('L', [0])
+        for row in order:
+            audio_pids.extend(self.audio(row))
+            audio_offsets.append(len(audio_pids))
+        self.audio_pids, self.audio_offsets = audio_pids, audio_offsets
+        self.flags = array('H', (self.flags[row] for row in order))
+        self.urls = [self.urls[row] for row in order]
+        self.extras = [self.extras[row] for row in order]
+        self._index_dirty = True
+        self.revision += 1
+
+    def copy(self) -> "ChannelStore":
+        """نسخة مستقلة من الأعمدة (نسخ مصفوفات سريع) لقراءتها من خيط خلفي بينما يتغير الجدول"""
+        clone = ChannelStore()
+        clone.names = list(self.names)
+        clone.service_ids = list(self.service_ids)
+        clone.service_indexes = self.service_indexes[:]
+        clone.video_pids = self.video_pids[:]
+        clone.pmt_pids = self.pmt_pids[:]
+        clone.fav_bits = self.fav_bits[:]
+        clone.audio_pids = self.audio_pids[:]
+        clone.audio_offsets = self.audio_offsets[:]
+        clone.flags = self.flags[:]
+        clone.urls = list(self.urls)
+        clone.extras = list(self.extras)
+        clone._index_dirty = True
+        return clone
+
+    def restore(self, other: "ChannelStore"):
+        """استعادة أعمدة نسخة سابقة (من copy) في نفس الكائن الذي يشير إليه الجدول والفهرس"""
+        for column in ("names", "service_ids", "service_indexes", "video_pids", "pmt_pids", "fav_bits",
+                       "audio_pids", "audio_offsets", "flags", "urls", "extras"):
+            setattr(self, column, getattr(other, column))
+        self._index_dirty = True
+        self.revision += 1
+
+    # --- أدوات داخلية ---
+    def _columns(self):
+        return (self.names, self.service_ids, self.service_indexes, self.video_pids, self.pmt_pids,
+                self.fav_bits, self.flags, self.urls, self.extras)
+
+    def _ensure_index(self):
+        """الفهرس يُبنى من جديد مرة واحدة بعد الحذف أو إعادة الترتيب، لا عند كل بحث"""
+        if not self._index_dirty:
+            return
+        by_service_id = {}
+        by_service_index = {}
+        for row, service_id in enumerate(self.service_ids):
+            by_service_id.setdefault(service_id, row)
+            by_service_index.setdefault(self.service_indexes[row], row)
+        self._by_service_id = by_service_id
+        self._by_service_index = by_service_index
+        self._index_dirty = False
+
+
+def favorite_group_names(fav_bit: int, groups) -> list:
+    """أسماء المجموعات المفضلة من FavBit: البت الأدنى هو المجموعة الأولى (5 = 101 = المجموعتان 1 و 3)"""
+    return [name for i, name in enumerate(groups) if fav_bit >> i & 1]
+
+
+class ChannelRowFormatter:
+    """
+    نصوص أعمدة جدول القنوات من ChannelStore بدون Qt:
+    يرثها نموذج الجدول للعرض، وتُستخدم وحدها في التصدير من خيط خلفي.
+    """
+
+    HEADERS = [
+        "⭐", "اسم القناة", "معرف الخدمة", "رابط البث", "النوع", "الجودة", "الحماية",
+        "مقفلة؟", "دعم EPG؟", "عدد مسارات الصوت", "Video PID", "Audio PID(s)",
+        "PMT PID", "مفضلة (FavBit)", "قيد التشغيل (Playing)",
+        "مؤشر الخدمة (ServiceIndex)", "رقم", "تحديد", "📷 صورة"
+    ]
+
+    def __init__(self, store: ChannelStore = None, numbers=None, receiver_ip: str = "", favorite_group_names=None):
+        # كل المعاملات اختيارية: PyQt يستدعي هذا المُنشئ بدون معاملات عند الوراثة المتعددة في النموذج
+        self.store = store if store is not None else ChannelStore()
+        self._numbers = numbers  # None = الرقم مشتق من موقع الصف (row + 1)
+        self.receiver_ip = receiver_ip
+        self.favorite_group_names = favorite_group_names or (lambda fav_bit: [])
+
+    def text(self, row: int, col: int) -> str:
+        """نص الخلية كما كان يُعرض في عناصر QTableWidget"""
+        store = self.store
+        flags = store.flags[row]
+        if col == 1:
+            return store.names[row]
+        if col == 2:
+            return store.service_ids[row]
+        if col == 3:
+            return self.url(row)
+        if col == 4:
+            return "راديو" if flags & ChannelStore.RADIO else "تلفاز"
+        if col == 5:
+            return "HD" if flags & ChannelStore.HD else "SD"
+        if col == 6:
+            return "مشفرة" if flags & ChannelStore.SCRAMBLED else "مفتوحة"
+        if col == 7:
+            return "نعم" if flags & ChannelStore.LOCKED else "لا"
+        if col == 8:
+            return "نعم" if flags & ChannelStore.EPG else "لا"
+        if col == 9:
+            return str(store.audio_count(row))
+        if col == 10:
+            return str(store.video_pids[row])
+        if col == 11:
+            return ",".join(map(str, store.audio(row)))
+        if col == 12:
+            return str(store.pmt_pids[row])
+        if col == 13:
+            fav_groups = self.favorite_group_names(store.fav_bits[row])
+            return ", ".join(fav_groups) if fav_groups else "لا"
+        if col == 14:
+            return "نعم" if flags & ChannelStore.PLAYING else "لا"
+        if col == 15:
+            return str(store.service_indexes[row])
+        if col == 16:
+            return str(self.number(row))
+        return ""
+
+    def number(self, row: int) -> int:
+        """عمود "رقم": موقع الصف ما لم يُفرز الجدول (بعد الفرز يبقى الرقم مع قناته)"""
+        return row + 1 if self._numbers is None else self._numbers[row]
+
+    def row_texts(self, row: int) -> list:
+        return [self.text(row, col) for col in range(len(self.HEADERS))]
+
+    def service_id(self, row: int) -> str:
+        return self.store.service_ids[row]
+
+    def name(self, row: int) -> str:
+        return self.store.names[row]
+
+    def url(self, row: int) -> str:
+        url = self.store.urls[row]
+        if url is not None:
+            return url
+        channel_id = self.store.service_ids[row]
+        if self.receiver_ip and channel_id != UNKNOWN_ID:
+            return f"http://{self.receiver_ip}:8085/player.{channel_id}"
+        return ""
+
+
+class ChannelMoveBatch:
+    """
+    دفعة عمليات نقل تُجمع ثم تُطبق مرة واحدة:
+    - order: التبديل الناتج (order[الصف الجديد] = الصف القديم) لتطبيقه على الجدول بتغيير تخطيط واحد
+    - entries: عناصر array لطلبات 1005 بنفس ترتيب العمليات
+    - blocks: نفس العناصر مقسمة حسب العملية؛ كل كتلة طلب 1005 مستقل لأن الجهاز ينقل
+      كل عناصر الطلب معاً قبل هدف العنصر الأول
+    أرقام الصفوف في move / move_row هي مواقعها بعد العمليات السابقة في نفس الدفعة.
+    """
+
+    def __init__(self, service_ids):
+        self.service_ids = service_ids
+        self.order = list(range(len(service_ids)))
+        self.entries = []
+        self.blocks = []
+        self.moved = set()  # الصفوف المنقولة (بأرقامها قبل الدفعة)
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def service_id(self, row: int) -> str:
+        return self.service_ids[self.order[row]]
+
+    def move(self, rows, destination: int):
+        """نقل كتلة صفوف قبل destination (موقعه قبل النقل) مع الحفاظ على ترتيبها"""
+        moving = sorted(set(rows))
+        if not moving or destination in moving:
+            raise ValueError("لا يمكن نقل القنوات إلى موقع ضمن التحديد نفسه")
+        self._move(moving, destination, self.service_id(destination))
+
+    def move_row(self, old_row: int, new_row: int):
+        """
+        نقل قناة واحدة لتصبح في الموقع new_row (مثل pop ثم insert).
+        الجهاز يضع القناة قبل القناة الهدف، فالنقل للأسفل يستهدف القناة التي بعد new_row،
+        والنقل إلى آخر القائمة (لا قناة بعده) نقلان: قبل الأخيرة ثم الأخيرة قبلها.
+        """
+        last = len(self.order) - 1
+        if old_row == new_row:
+            return
+        if new_row < old_row:
+            self.move([old_row], new_row)
+        elif new_row < last:
+            self.move([old_row], new_row + 1)
+        else:
+            if old_row != last - 1:
+                self.move([old_row], last)
+            self.move([last], last - 1)
+
+    def _move(self, moving: list, destination: int, anchor: str):
+        moving_set = set(moving)
+        remaining = [old for row, old in enumerate(self.order) if row not in moving_set]
+        position = destination - sum(1 for row in moving if row < destination)
+        block = [self.order[row] for row in moving]
+        self.order = remaining[:position] + block + remaining[position:]
+        self.moved.update(block)
+        entries = [{"ProgramId": self.service_ids[old], "MoveToPosition": anchor, "TvState": "0"} for old in block]
+        self.entries.extend(entries)
+        self.blocks.append(entries)
+
+
+# ✅ فهرس تصفية محسوب مسبقاً: بت لكل صف لكل خاصية، وأسماء مُطبّعة للبحث
+# النتيجة عدد صحيح واحد (bitset) بدل فحص الصفوف واحداً واحداً في بايثون
+
+_ARABIC_FOLD = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ة": "ه", "ى": "ي", "ـ": None,
+    **{chr(code): None for code in range(0x064B, 0x0653)},  # التشكيل
+})
+_BIT_BYTES = {flag: bytes.maketrans(bytes(range(256)), bytes(0x31 if b & flag else 0x30 for b in range(256)))
+              for flag in (1, 2, 4, 8, 16, 32, 64, 128)}
+_ASCII_BITS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def normalize_name(text: str) -> str:
+    """توحيد الأحرف للبحث: حالة الأحرف اللاتينية، أشكال الألف والتاء المربوطة، التشكيل والتطويل"""
+    return text.casefold().translate(_ARABIC_FOLD)
+
+
+def rows_from_bits(bits: int, count: int) -> list:
+    """أرقام الصفوف التي بتها 1 (تصاعدياً)"""
+    if not bits:
+        return []
+    digits = format(bits, "b").encode("ascii")[::-1].translate(_ASCII_BITS)
+    return list(compress(range(count), digits[:count]))
+
+
+class ChannelFilterIndex:
+    """
+    تصفية القنوات بعمليات على أعداد صحيحة:
+    - flag_bits(flag): البت row = 1 إذا كان العلم مفعلاً في الصف (يُحسب بـ bytes.translate)
+    - name_bits(query): الصفوف التي يحتوي اسمها المُطبّع على النص، مع تضييق
+      نتيجة البحث السابق عندما يكمل المستخدم الكتابة
+    - match(): تجميع الشروط بـ & في bitset واحد
+    """
+
+    def __init__(self, store: ChannelStore):
+        self.store = store
+        self._names = []
+        self._revision = None
+        self._last_query = None
+        self._last_rows = []
+        self._last_count = 0
+
+    def all_bits(self) -> int:
+        return (1 << len(self.store)) - 1
+
+    def flag_bits(self, flag: int) -> int:
+        flags = self.store.flags
+        if not flags:
+            return 0
+        raw = flags.tobytes()
+        # كل عنصر 'H' بايتان؛ الأعلام المستخدمة للتصفية في البايت المنخفض
+        low = raw[0::2] if sys.byteorder == "little" else raw[1::2]
+        return int(low.translate(_BIT_BYTES[flag])[::-1], 2)
+
+    def name_bits(self, query: str) -> int:
+        query = normalize_name(query)
+        if not query:
+            return self.all_bits()
+        self._sync_names()
+        names = self._names
+        count = len(names)
+        if self._last_query and self._last_query in query:
+            # الصفوف التي لم تطابق النص الأقصر لن تطابق النص الأطول
+            candidates = self._last_rows + list(range(self._last_count, count))
+            rows = [row for row in candidates if query in names[row]]
+        else:
+            rows = list(compress(range(count), [query in name for name in names]))
+        self._last_query, self._last_rows, self._last_count = query, rows, count
+        if not rows:
+            return 0
+        digits = bytearray(b"0") * count
+        for row in rows:
+            digits[row] = 0x31
+        return int(digits[::-1], 2)
+
+    def match(self, search_text: str = "", require: int = 0, exclude: int = 0) -> int:
+        """require: أعلام يجب أن تكون مفعلة، exclude: أعلام يجب ألا تكون مفعلة"""
+        bits = self.all_bits()
+        flag = 1
+        while flag <= (require | exclude):
+            if require & flag:
+                bits &= self.flag_bits(flag)
+            elif exclude & flag:
+                bits &= ~self.flag_bits(flag)
+            flag <<= 1
+        if bits and search_text.strip():
+            bits &= self.name_bits(search_text.strip())
+        return bits
+
+    def match_range(self, first: int, last: int, search_text: str = "", require: int = 0, exclude: int = 0) -> list:
+        """
+        نفس شروط match() لصفوف first..last فقط (شاملة)، بعد تغير بياناتها (تسمية، قفل، استبدال):
+        أرقام الصفوف المطابقة تصاعدياً بدون حساب بتات الجدول كله
+        """
+        flags = self.store.flags
+        rows = [row for row in range(first, last + 1) if flags[row] & require == require and not flags[row] & exclude]
+        query = normalize_name(search_text.strip())
+        if query and rows:
+            names = self.store.names
+            rows = [row for row in rows if query in normalize_name(names[row])]
+        return rows
+
+    def _sync_names(self):
+        store = self.store
+        if self._revision != store.revision:
+            self._names = [normalize_name(name) for name in store.names]
+            self._revision = store.revision
+            self._last_query = None
+        elif len(self._names) < len(store):
+            self._names.extend(normalize_name(name) for name in store.names[len(self._names):])
@@ -0,0 +1,241 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from satimages_channels import ChannelRowFormatter, ChannelStore, favorite_group_names
+from satimages_edits import EditTransaction
+from satimages_export import EXPORT_FORMATS, export_channels
+from satimages_sessions import (
+    ReceiverManager, delete_edit, edit_operation, export_operation, fetch_operation, lock_edit, move_edit,
+    parse_receiver, then, urls_operation
+)
+
+# ✅ تشغيل عمليات satimages_tab بدون واجهة (مهام مجدولة مثل توليد M3U ليلاً وتدقيق القنوات):
+# - نفس البروتوكول والنقل (ReceiverSession) ومخزن القنوات والتصدير، بدون أي استيراد من Qt
+# - عدة أجهزة (-r متكرر أو STARSAT_RECEIVERS) تُنفذ بالتوازي، و {name} في مسار الإخراج يعطي ملفاً لكل جهاز
+# - التقدم على stderr، وسطر نتيجة لكل جهاز على stdout، ورمز الخروج 1 إذا فشل أي جهاز
+#
+# أمثلة:
+#   python satimages_cli.py -r salon=192.168.1.50 export --output "/srv/iptv/{name}.m3u"
+#   python satimages_cli.py -r 192.168.1.50 fetch --output channels.ssnp --cache
+#   python satimages_cli.py -r 192.168.1.50 delete ids.txt --dry-run
+#   python satimages_cli.py -r 192.168.1.50 move moves.txt        # كل سطر: ServiceID الموقع_الجديد
+
+RECEIVERS_ENV = "STARSAT_RECEIVERS"  # "name=ip:port,ip2" بديل -r
+
+
+def read_lines(path: str) -> list:
+    """أسطر الملف (أو stdin عند "-") بدون الفارغة والتعليقات (#)"""
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8-sig")
+    try:
+        lines = [line.split("#", 1)[0].strip() for line in stream]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return [line for line in lines if line]
+
+
+def read_service_ids(path: str) -> list:
+    """ServiceID في أول حقل من كل سطر (يقبل ملف CSV مصدّر من الجدول: "1001","اسم",...)"""
+    return [line.replace(",", " ").replace(";", " ").split()[0].strip('"') for line in read_lines(path)]
+
+
+def read_moves(path: str) -> list:
+    """[(ServiceID, الموقع الجديد بدءاً من 1)] من أسطر "ServiceID الموقع" """
+    moves = []
+    for number, line in enumerate(read_lines(path), 1):
+        fields = line.replace(",", " ").replace(";", " ").split()
+        if len(fields) < 2 or not fields[1].isdigit():
+            raise ValueError(f"{path}:{number}: expected 'ServiceID position', got {line!r}")
+        moves.append((fields[0].strip('"'), int(fields[1])))
+    return moves
+
+
+def output_path(template: str, session) -> str:
+    """{name} / {ip} / {port} في مسار الإخراج لملف منفصل لكل جهاز"""
+    name = "".join(c if c.isalnum() or c in "-_" else "_" for c in session.name)
+    return template.format(name=name, ip=session.ip, port=session.port)
+
+
+class ProgressPrinter:
+    """سطر تقدم لكل جهاز على stderr، بحد أقصى سطر كل interval ثانية للجهاز"""
+
+    def __init__(self, enabled: bool = True, interval: float = 1.0):
+        self.enabled = enabled
+        self.interval = interval
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, key: str, done: int, total: int):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if done != total and now - self._last.get(key, 0) < self.interval:
+                return
+            self._last[key] = now
+            sys.stderr.write(f"⏳ {key}: {done}/{total or '؟'}\n")
+            sys.stderr.flush()
+
+
+def dry_run_operation(edit):
+    """بناء المعاملة من قائمة الجهاز وعرض طلباتها بدون إرسال"""
+    def operation(session, progress):
+        def build(store):
+            transaction = EditTransaction()
+            edit(transaction, store)
+            transaction.sent = tuple(code for code, _ in transaction.requests())
+            return transaction
+        return then(session.fetch_channels(progress=progress), build)
+    return operation
+
+
+def describe(result) -> str:
+    if isinstance(result, EditTransaction):
+        summary = result.summary() or "لا يوجد ما يتغير"
+        return f"{summary} ({', '.join(result.sent) or '-'})"
+    if isinstance(result, dict):  # روابط البث
+        return f"{len(result)} رابط"
+    if isinstance(result, ChannelStore):
+        return f"{len(result)} قناة"
+    if isinstance(result, int):
+        return f"{result} قناة"
+    return str(result)
+
+
+# --- الأوامر ---
+def build_operation(args):
+    """العملية التي تُشغّل على كل جهاز، ودالة اختيارية تُستدعى بعدها لكل نتيجة ناجحة"""
+    if args.command == "fetch":
+        return fetch_operation(args.batch_size, args.window), save_fetched
+    if args.command == "export":
+        kind = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+        if kind not in EXPORT_FORMATS:
+            raise ValueError(f"unknown export format {kind!r}; use --format {'/'.join(EXPORT_FORMATS)}")
+        return export_operation(kind, lambda session: output_path(args.output, session)), None
+    if args.command == "urls":
+        return urls_operation(args.interval), save_urls
+    if args.command in ("delete", "lock", "unlock"):
+        service_ids = read_service_ids(args.file)
+        edit = delete_edit(service_ids) if args.command == "delete" else lock_edit(service_ids, args.command == "lock")
+    elif args.command == "move":
+        edit = move_edit(read_moves(args.file))
+    else:
+        raise ValueError(f"unknown command: {args.command}")
+    return (dry_run_operation(edit) if args.dry_run else edit_operation(edit)), None
+
+
+def save_fetched(args, session, store):
+    """حفظ القائمة المجلوبة: ملف (.ssnp لقطة ثنائية أو .json) و/أو ذاكرة SQLite للواجهة"""
+    if args.output:
+        path = output_path(args.output, session)
+        if path.endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(store.to_dicts(), f, ensure_ascii=False)
+        else:
+            from satimages_snapshot import write_snapshot
+            write_snapshot(path, store, ())
+    if args.cache:
+        from satimages_cache import ChannelCache, DEFAULT_CACHE_PATH
+        info = session.device_info if isinstance(session.device_info, dict) else {}
+        serial = info.get("SerialNumber")
+        if not serial:
+            raise ValueError("the receiver did not report a SerialNumber; cannot key the channel cache")
+        cache = ChannelCache(args.cache_path or DEFAULT_CACHE_PATH)
+        try:
+            cache.save(serial, store.to_dicts(), info.get("ProductName"))
+        finally:
+            cache.close()
+
+
+def save_urls(args, session, urls):
+    """--output: قائمة M3U بالروابط المحدثة، وإلا "ServiceID الرابط" على stdout"""
+    if args.output:
+        groups = list(session.favorite_groups)
+        source = ChannelRowFormatter(session.channels, receiver_ip=session.ip,
+                                     favorite_group_names=lambda fav_bit: favorite_group_names(fav_bit, groups))
+        export_channels("m3u", output_path(args.output, session), source)
+        return
+    for service_id, url in urls.items():
+        print(f"{service_id}\t{url}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="تشغيل عمليات أجهزة ستارسات بدون واجهة")
+    parser.add_argument("-r", "--receiver", action="append", type=parse_receiver, default=[],
+                        help="name=ip:port أو ip:port (يمكن تكراره للتنفيذ على عدة أجهزة بالتوازي)")
+    parser.add_argument("--batch-size", type=int, default=250)
+    parser.add_argument("--window", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=10, help="مهلة الاتصال بالثواني")
+    parser.add_argument("-q", "--quiet", action="store_true", help="بدون أسطر التقدم")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fetch = commands.add_parser("fetch", help="جلب كل القنوات")
+    fetch.add_argument("--output", help="ملف .ssnp أو .json ({name} لملف لكل جهاز)")
+    fetch.add_argument("--cache", action="store_true", help="حفظ القائمة في ذاكرة القنوات (SQLite) للواجهة")
+    fetch.add_argument("--cache-path")
+
+    export = commands.add_parser("export", help="جلب القنوات وتصديرها")
+    export.add_argument("--output", required=True, help="مسار الملف ({name} لملف لكل جهاز)")
+    export.add_argument("--format", choices=sorted(EXPORT_FORMATS), help="افتراضياً من امتداد الملف")
+
+    for name, text in (("delete", "حذف"), ("lock", "قفل"), ("unlock", "فتح")):
+        command = commands.add_parser(name, help=f"{text} القنوات المذكورة في ملف (ServiceID في كل سطر، - لـ stdin)")
+        command.add_argument("file")
+        command.add_argument("--dry-run", action="store_true", help="عرض الطلبات بدون إرسال")
+    move = commands.add_parser("move", help="نقل القنوات من ملف (سطر لكل قناة: ServiceID الموقع_الجديد)")
+    move.add_argument("file")
+    move.add_argument("--dry-run", action="store_true", help="عرض الطلبات بدون إرسال")
+
+    urls = commands.add_parser("urls", help="تحديث روابط البث لكل القنوات")
+    urls.add_argument("--output", help="ملف M3U بالروابط المحدثة (وإلا تُطبع)")
+    urls.add_argument("--interval", type=float, default=0.05, help="فاصل بين طلبات التقليب بالثواني")
+
+    args = parser.parse_args(argv)
+    if not args.receiver and os.environ.get(RECEIVERS_ENV):
+        args.receiver = [parse_receiver(text) for text in os.environ[RECEIVERS_ENV].split(",") if text.strip()]
+    if not args.receiver:
+        parser.error(f"no receiver: use -r/--receiver or set {RECEIVERS_ENV}")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stderr)
+    try:
+        operation, after = build_operation(args)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    manager = ReceiverManager(timeout=args.timeout)
+    started = time.perf_counter()
+    try:
+        results = manager.run(args.receiver, operation, progress=ProgressPrinter(not args.quiet)).result()
+        failed = False
+        for key, result in results.items():
+            session = manager.sessions[key]
+            if not isinstance(result, BaseException) and after is not None:
+                try:
+                    after(args, session, result)
+                except (OSError, ValueError) as e:
+                    result = e
+            if isinstance(result, BaseException):
+                failed = True
+                print(f"❌ {session.name} ({key}): {result}")
+            else:
+                print(f"✅ {session.name} ({key}): {describe(result)}")
+    finally:
+        manager.close_all()
+    logging.info(f"{args.command} finished in {time.perf_counter() - started:.2f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
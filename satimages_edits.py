@@ -0,0 +1,303 @@
+import json
+import logging
+
+from satimages_channels import ChannelStore
+from satimages_protocol import build_message
+
+# ✅ تعديلات القنوات على الجهاز كمعاملات مجمعة بدل طلب لكل إجراء:
+# - التعديلات المتتالية تُجمع في معاملة مفتوحة ثم تُرسل بأقل عدد من الطلبات
+#   (1001 إعادة تسمية، 1003 قفل/فتح، 1005 نقل، 1002 حذف) كل منها بمصفوفة array و TotalNum
+# - الطلبات تُرسل متتالية دون انتظار (pipelining) وكل طلب ينتظر رد {"success": ...} (النوع ack)
+# - الواجهة تطبق التعديل محلياً فوراً؛ الرفض الصريح ({"success": "0"}) فقط يعيد القنوات التي عدلها
+#   الطلب المرفوض إلى حالتها المحفوظة قبل المعاملة (EditUndo)، أما غياب الرد (مهلة أو انقطاع)
+#   فلا يعني أن الجهاز لم ينفذ التعديل
+# لا يعتمد على Qt حتى يُستخدم من الواجهة ومن الأدوات بدون واجهة
+
+# ترتيب الإرسال: الحذف أخيراً حتى تبقى القنوات المستخدمة كهدف للنقل موجودة عند تنفيذه
+REQUEST_ORDER = ("1001", "1003", "1005", "1002")
+
+
+class EditRejected(Exception):
+    """رد الجهاز على طلب تعديل كان رفضاً صريحاً"""
+
+
+class EditUnconfirmed(Exception):
+    """لم يصل رد مفهوم على طلب تعديل: حالته على الجهاز مجهولة"""
+
+
+class EditTransaction:
+    """
+    تعديلات معلقة مدمجة لكل قناة:
+    - rename: آخر اسم فقط
+    - set_locked: 1003 يبدّل حالة القفل على الجهاز، فيُرسل فقط إذا اختلفت الحالة النهائية عن الأصلية
+    - move: كتل 1005 بترتيب تنفيذها (طلب لكل كتلة)، و move_order ترتيب ServiceID في الجدول بعد آخر نقل
+    - delete: يلغي أي تعديل سابق لنفس القناة
+    snapshot (نسخة ChannelStore) تحفظه الواجهة قبل أول تعديل للتراجع عند الرفض.
+    """
+
+    def __init__(self, snapshot=None):
+        self.snapshot = snapshot
+        self.names = {}
+        self.locks = {}
+        self.lock_base = {}
+        self.move_blocks = []
+        self.move_order = None
+        self.deleted = {}
+        self.results = {}  # رقم الطلب -> None (نجح) أو الخطأ (أول رفض يغلب إذا تكرر الرقم)
+        self.answered = 0
+        self.sent = ()
+
+    # --- جمع التعديلات ---
+    def rename(self, service_id: str, name: str):
+        self.names[service_id] = name
+
+    def set_locked(self, service_id: str, locked: bool, current: bool):
+        self.lock_base.setdefault(service_id, current)
+        self.locks[service_id] = locked
+
+    def move(self, blocks, order_after):
+        self.move_blocks.extend(list(block) for block in blocks)
+        self.move_order = list(order_after)
+
+    @property
+    def move_entries(self) -> list:
+        return [entry for block in self.move_blocks for entry in block]
+
+    def delete(self, service_id: str):
+        self.deleted[service_id] = None
+        self.names.pop(service_id, None)
+        self.locks.pop(service_id, None)
+
+    # --- الطلبات ---
+    def requests(self) -> list:
+        """[(رقم الطلب، الحمولة)] بترتيب REQUEST_ORDER بدون الطلبات الفارغة (1005 قد يتكرر، مرة لكل كتلة)"""
+        arrays = {
+            "1001": [[{"ProgramId": sid, "ProgramName": name, "TvState": "0"} for sid, name in self.names.items()]],
+            "1003": [[{"ProgramId": sid, "TvState": "0"} for sid, locked in self.locks.items()
+                      if locked != self.lock_base[sid]]],
+            "1005": [[entry for entry in block if entry["ProgramId"] not in self.deleted] for block in self.move_blocks],
+            "1002": [[{"ProgramId": sid} for sid in self.deleted]],
+        }
+        requests = []
+        for code in REQUEST_ORDER:
+            for items in arrays[code]:
+                if not items:
+                    continue
+                payload = {"request": code, "array": items, "TotalNum": str(len(items))}
+                if code == "1002":
+                    payload["TvState"] = "0"
+                requests.append((code, payload))
+        return requests
+
+    def record(self, code: str, error: Exception | None):
+        """تسجيل رد أحد الطلبات المرسلة"""
+        self.answered += 1
+        previous = self.results.get(code)
+        if previous is None or (isinstance(error, EditRejected) and not isinstance(previous, EditRejected)):
+            self.results[code] = error
+
+    @property
+    def done(self) -> bool:
+        return self.answered == len(self.sent)
+
+    @property
+    def failed(self) -> dict:
+        return {code: error for code, error in self.results.items() if error is not None}
+
+    @property
+    def rejected(self) -> dict:
+        """الطلبات التي رفضها الجهاز صراحة (يمكن التراجع عنها محلياً)"""
+        return {code: error for code, error in self.results.items() if isinstance(error, EditRejected)}
+
+    @property
+    def unconfirmed(self) -> dict:
+        """الطلبات التي لم يصل ردها: قد يكون الجهاز نفذها، فالحل إعادة المزامنة لا التراجع"""
+        return {code: error for code, error in self.results.items()
+                if error is not None and not isinstance(error, EditRejected)}
+
+    @property
+    def acknowledged(self) -> list:
+        return [code for code, error in self.results.items() if error is None]
+
+    def summary(self) -> str:
+        parts = [(len(self.names), "إعادة تسمية"),
+                 (sum(1 for sid, locked in self.locks.items() if locked != self.lock_base[sid]), "قفل/فتح"),
+                 (sum(1 for entry in self.move_entries if entry["ProgramId"] not in self.deleted), "نقل"),
+                 (len(self.deleted), "حذف")]
+        return "، ".join(f"{count} {label}" for count, label in parts if count)
+
+
+def reply_error(code: str, reply) -> Exception | None:
+    """
+    None إذا أكد الجهاز الطلب، و EditRejected فقط عند {"success": "0"} لنفس الطلب
+    (الرد الذي يحمل رقم طلب آخر ليس رفضاً لهذا الطلب)، و EditUnconfirmed لأي رد آخر.
+    """
+    if isinstance(reply, list) and reply:
+        reply = reply[0]
+    if not isinstance(reply, dict):
+        return EditUnconfirmed(f"request {code}: unexpected reply {reply!r:.200}")
+    success = str(reply.get("success"))
+    if "request" in reply and str(reply["request"]) != code:
+        return EditUnconfirmed(f"request {code}: reply belongs to request {reply['request']}")
+    if success == "1":
+        return None
+    if success == "0":
+        return EditRejected(f"request {code} rejected: {reply}")
+    return EditUnconfirmed(f"request {code}: unexpected reply {reply!r:.200}")
+
+
+def receiver_move_order(service_ids, blocks) -> list:
+    """
+    الترتيب (order[الصف الجديد] = الصف القديم) بعد تنفيذ كتل 1005 كما ينفذها الجهاز:
+    كل عناصر الكتلة تُنقل معاً بترتيبها الحالي قبل هدف العنصر الأول
+    """
+    order = list(range(len(service_ids)))
+    for block in blocks:
+        ids = {entry["ProgramId"] for entry in block}
+        anchor = block[0]["MoveToPosition"] if block else None
+        moving = [row for row in order if service_ids[row] in ids]
+        remaining = [row for row in order if service_ids[row] not in ids]
+        targets = [i for i, row in enumerate(remaining) if service_ids[row] == anchor]
+        if moving and targets:
+            order = remaining[:targets[0]] + moving + remaining[targets[0]:]
+    return order
+
+
+class EditUndo:
+    """
+    التراجع عن الطلبات المرفوضة على القنوات التي عدلتها فقط، بدل استعادة اللقطة كاملة،
+    حتى تبقى الصفوف التي أضافتها التعبئة أو المزامنة بعد فتح المعاملة:
+    - names / locks: القيم الأصلية لكل ServiceID
+    - restore(store): صفوف اللقطة للقنوات التي رُفض حذفها [(القناة, مفضلة, الرابط)]، تُضاف في آخر الجدول
+    - order(store): الترتيب بعد الإضافة (order[الصف الجديد] = الصف القديم) أو None إذا لم يتغير
+    """
+
+    def __init__(self, transaction: EditTransaction, codes):
+        snapshot = transaction.snapshot
+        self.names = {}
+        self.locks = {}
+        self.deleted = []
+        self.snapshot_ids = list(snapshot.service_ids)
+        self.moves = "1005" in codes and bool(transaction.move_blocks)
+        self._snapshot = snapshot
+        if "1001" in codes:
+            for service_id in transaction.names:
+                row = snapshot.row_for_service_id(service_id)
+                if row >= 0:
+                    self.names[service_id] = snapshot.names[row]
+        if "1003" in codes:
+            self.locks = {service_id: transaction.lock_base[service_id] for service_id in transaction.locks}
+        if "1002" in codes:
+            self.deleted = list(transaction.deleted)
+
+    def __bool__(self):
+        return bool(self.names or self.locks or self.deleted or self.moves)
+
+    def rebase(self, pending: EditTransaction):
+        """
+        المعاملة المفتوحة التالية بُنيت فوق التعديلات المرفوضة: حالتها الأساسية (اللقطة و lock_base)
+        تصبح الحالة بعد التراجع، وتعديلاتها على نفس القنوات تبقى في الجدول
+        """
+        for service_id in pending.locks.keys() & self.locks.keys():
+            pending.lock_base[service_id] = self.locks[service_id]
+        if pending.snapshot is not None:
+            self.apply(pending.snapshot)
+        for service_id in pending.names:
+            self.names.pop(service_id, None)
+        for service_id in pending.locks:
+            self.locks.pop(service_id, None)
+
+    def apply(self, store: ChannelStore):
+        """التراجع على مخزن بدون واجهة (نموذج الجدول يطبق نفس الخطوات مع إشاراته)"""
+        for service_id, name in self.names.items():
+            row = store.row_for_service_id(service_id)
+            if row >= 0:
+                store.set_name(row, name)
+        for service_id, locked in self.locks.items():
+            row = store.row_for_service_id(service_id)
+            if row >= 0:
+                store.set_flag(row, ChannelStore.LOCKED, locked)
+        for channel, favorite, url in self.restore(store):
+            store.set_url(store.append(channel, favorite), url)
+        order = self.order(store)
+        if order is not None:
+            store.reorder(order)
+
+    def restore(self, store: ChannelStore) -> list:
+        snapshot = self._snapshot
+        restored = []
+        for service_id in self.deleted:
+            row = snapshot.row_for_service_id(service_id)
+            if row >= 0 and store.row_for_service_id(service_id) < 0:
+                restored.append((snapshot.get(row), snapshot.has(row, ChannelStore.FAVORITE), snapshot.urls[row]))
+        return restored
+
+    def order(self, store: ChannelStore) -> list | None:
+        ids = store.service_ids
+        position = {service_id: i for i, service_id in enumerate(self.snapshot_ids)}
+        if self.moves:
+            # قنوات اللقطة تعود لترتيبها فيها، وما أُضيف بعدها يبقى بعدها بنفس ترتيبه
+            order = sorted(range(len(store)), key=lambda row: position.get(ids[row], len(position) + row))
+        else:
+            # القناة المعادة توضع بعد أقرب قناة سبقتها في اللقطة، وبقية الصفوف لا تتحرك
+            restored = {service_id for service_id in self.deleted if service_id in position}
+            order = [row for row in range(len(store)) if ids[row] not in restored]
+            for service_id in sorted(restored, key=position.__getitem__):
+                placed = {ids[row]: i for i, row in enumerate(order)}
+                before = next((placed[sid] for sid in reversed(self.snapshot_ids[:position[service_id]])
+                               if sid in placed), -1)
+                order.insert(before + 1, store.row_for_service_id(service_id))
+        return None if order == list(range(len(store))) else order
+
+
+class ChannelEditQueue:
+    """
+    طابور المعاملات: معاملة مفتوحة تجمع التعديلات، ومعاملة واحدة فقط قيد الإرسال.
+    submit(message, callback) يرسل طلباً ينتظر رد ack ويستدعي callback(future) عند وصوله أو فشله.
+    snapshot() يُستدعى عند فتح معاملة جديدة، و on_done(transaction) عند اكتمال كل ردودها.
+    كل الدوال و callback الردود يجب أن تعمل في نفس الخيط (خيط الواجهة في التطبيق).
+    """
+
+    def __init__(self, submit, snapshot=None, on_done=None):
+        self.submit = submit
+        self.snapshot = snapshot or (lambda: None)
+        self.on_done = on_done or (lambda transaction: None)
+        self.pending = None
+        self.in_flight = None
+
+    def transaction(self) -> EditTransaction:
+        """المعاملة المفتوحة (تُنشأ مع حفظ الحالة الحالية إن لم توجد)"""
+        if self.pending is None:
+            self.pending = EditTransaction(self.snapshot())
+        return self.pending
+
+    def flush(self) -> bool:
+        """إرسال المعاملة المفتوحة إن لم تكن هناك معاملة قيد الإرسال"""
+        if self.in_flight is not None or self.pending is None:
+            return False
+        transaction, self.pending = self.pending, None
+        requests = transaction.requests()
+        transaction.sent = tuple(code for code, _ in requests)
+        if not requests:
+            self.on_done(transaction)
+            return False
+        self.in_flight = transaction
+        for code, payload in requests:
+            logging.info(f"edit transaction: sending {code} with {payload['TotalNum']} item(s)")
+            message = build_message(json.dumps(payload, ensure_ascii=False))
+            self.submit(message, lambda future, code=code: self._acknowledged(transaction, code, future))
+        return True
+
+    def _acknowledged(self, transaction: EditTransaction, code: str, future):
+        error = future.exception()
+        if error is None:
+            error = reply_error(code, future.result())
+        elif not isinstance(error, EditRejected):
+            error = EditUnconfirmed(f"request {code}: {error}")
+        transaction.record(code, error)
+        if not transaction.done:
+            return
+        if transaction is self.in_flight:
+            self.in_flight = None
+        self.on_done(transaction)
+        self.flush()
@@ -0,0 +1,124 @@
+import csv
+import os
+import threading
+
+# ✅ تصدير قائمة القنوات (M3U / CSV / Excel / Parquet) على دفعات بدون بناء نسخة كاملة من الجدول:
+# - المصدر ChannelRowFormatter على نسخة عمودية من المخزن، والنصوص تُحسب لكل دفعة ثم تُكتب وتُنسى
+# - الكتابة في ملف مؤقت (.part) يحل محل الملف المطلوب عند النجاح فقط، فالإلغاء أو الخطأ لا يترك ملفاً ناقصاً
+# - مكتبات Excel و Parquet اختيارية وتُستورد عند الحاجة فقط
+# لا يعتمد على Qt حتى يُستخدم من الواجهة (في خيط خلفي) ومن الأدوات بدون واجهة
+
+CHUNK_ROWS = 2000
+DEFAULT_GROUP = "Starsat"  # group-title للقنوات التي ليست في أي مجموعة مفضلة
+
+EXPORT_FORMATS = {
+    # النوع: (الوصف، الامتداد، فلتر نافذة الحفظ)
+    "m3u": ("M3U", ".m3u", "M3U Files (*.m3u);;All Files (*)"),
+    "csv": ("CSV", ".csv", "CSV Files (*.csv);;All Files (*)"),
+    "xlsx": ("Excel", ".xlsx", "Excel Files (*.xlsx);;All Files (*)"),
+    "parquet": ("Parquet", ".parquet", "Parquet Files (*.parquet);;All Files (*)"),
+}
+
+
+def _chunks(total: int, progress=None, cancelled: threading.Event = None, chunk: int = CHUNK_ROWS):
+    """(start, end) لكل دفعة مع إبلاغ التقدم بعد كتابتها، ويتوقف عند ضبط cancelled"""
+    for start in range(0, total, chunk):
+        if cancelled is not None and cancelled.is_set():
+            return
+        end = min(start + chunk, total)
+        yield start, end
+        if progress is not None:
+            progress(end, total)
+
+
+def _columns(source) -> range:
+    return range(len(source.HEADERS))
+
+
+def export_m3u(path: str, source, progress=None, cancelled=None) -> int:
+    """قائمة IPTV: group-title من أسماء المجموعات المفضلة للقناة (مفصولة بـ ; عند تعددها)"""
+    store = source.store
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write("#EXTM3U\n")
+        for start, end in _chunks(len(store), progress, cancelled):
+            lines = []
+            for row in range(start, end):
+                stream_url = source.url(row)
+                if not stream_url:  # فقط إذا كان هناك رابط بث
+                    continue
+                groups = source.favorite_group_names(store.fav_bits[row])
+                group = ";".join(groups).replace('"', "'") if groups else DEFAULT_GROUP
+                lines.append(f'#EXTINF:-1 tvg-id="{store.service_ids[row]}" group-title="{group}",'
+                             f'{store.names[row]}\n{stream_url}\n')
+            f.writelines(lines)
+            written += len(lines)
+    return written
+
+
+def export_csv(path: str, source, progress=None, cancelled=None) -> int:
+    columns = _columns(source)
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(source.HEADERS)
+        for start, end in _chunks(len(source.store), progress, cancelled):
+            writer.writerows([source.text(row, col) for col in columns] for row in range(start, end))
+    return len(source.store)
+
+
+def export_xlsx(path: str, source, progress=None, cancelled=None) -> int:
+    """Excel بكاتب openpyxl المتدفق (write_only): الصفوف تُكتب إلى القرص ولا تبقى في الذاكرة"""
+    try:
+        from openpyxl import Workbook
+    except ImportError as e:
+        raise ImportError("التصدير إلى Excel يحتاج مكتبة openpyxl (pip install openpyxl)") from e
+    columns = _columns(source)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Channels")
+    sheet.append(source.HEADERS)
+    for start, end in _chunks(len(source.store), progress, cancelled):
+        for row in range(start, end):
+            sheet.append([source.text(row, col) for col in columns])
+    workbook.save(path)
+    return len(source.store)
+
+
+def export_parquet(path: str, source, progress=None, cancelled=None) -> int:
+    """Parquet عبر pyarrow: كل دفعة مجموعة صفوف (row group) مستقلة"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("التصدير إلى Parquet يحتاج مكتبة pyarrow (pip install pyarrow)") from e
+    columns = _columns(source)
+    schema = pa.schema([(header, pa.string()) for header in source.HEADERS])
+    with pq.ParquetWriter(path, schema) as writer:
+        for start, end in _chunks(len(source.store), progress, cancelled):
+            arrays = [pa.array([source.text(row, col) for row in range(start, end)], pa.string())
+                      for col in columns]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    return len(source.store)
+
+
+EXPORTERS = {
+    "m3u": export_m3u,
+    "csv": export_csv,
+    "xlsx": export_xlsx,
+    "parquet": export_parquet,
+}
+
+
+def export_channels(kind: str, path: str, source, progress=None, cancelled: threading.Event = None):
+    """تصدير كامل إلى path؛ يعيد عدد الصفوف المكتوبة، أو None إذا أُلغي"""
+    partial = path + ".part"
+    try:
+        written = EXPORTERS[kind](partial, source, progress, cancelled)
+        if cancelled is not None and cancelled.is_set():
+            os.remove(partial)
+            return None
+        os.replace(partial, path)
+        return written
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
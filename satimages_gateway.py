@@ -0,0 +1,596 @@
+import argparse
+import base64
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from satimages_edits import EditRejected, EditUnconfirmed
+from satimages_protocol import ReconnectSupervisor, build_message
+from satimages_sessions import (
+    DEFAULT_RECEIVER_PORT, ReceiverSession, delete_edit, lock_edit, parse_receiver, rename_edit, then
+)
+
+# ✅ بوابة محلية: اتصال واحد بكل جهاز يتشاركه عدة عملاء (الواجهة، السكربتات) عبر HTTP و WebSocket
+# - المصافحة وأوامر التهيئة مرة واحدة لكل جهاز بدل مرة لكل عميل
+# - معلومات الجهاز والمجموعات المفضلة وقائمة القنوات تُقرأ من الجهاز مرة وتُخدم بعدها من الذاكرة
+#   (القائمة تُرمَّز JSON مرة واحدة لكل نسخة)، و refresh يفرض القراءة من الجهاز
+# - القراءات المتزامنة لنفس البيانات تنتظر نفس الطلب بدل تكراره
+# - أوامر كل العملاء تمر عبر نفس الجلسة (RequestTracker يطابق الردود)، وما يرسله الجهاز من تلقاء
+#   نفسه وتغيرات الاتصال تُبث لمشتركي WebSocket
+# لا يعتمد على Qt حتى يُستخدم من الواجهة ومن الأدوات بدون واجهة
+
+DEFAULT_GATEWAY_PORT = 8765
+EDIT_REQUESTS = frozenset(("1001", "1002", "1003", "1005"))  # أوامر تغير القائمة على الجهاز
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+WS_MAX_MESSAGE = 1 << 20  # أقصى حجم لرسالة WebSocket من العميل (الأوامر صغيرة)
+
+# GET /receivers                          الأجهزة وحالة اتصالها
+# GET /receivers/<r>/info|favorites|channels[?refresh=1]
+# POST /receivers/<r>/command             {"message": {...}, "reply": "ack"}  (بدون reply: إرسال فقط)
+# POST /receivers/<r>/keys                {"keys": ["13", "14"], "interval": 0.4}
+# POST /receivers/<r>/edits               {"rename": {sid: name}, "lock": [...], "unlock": [...], "delete": [...]}
+# GET /ws                                 نفس العمليات كرسائل {"id", "op", "receiver", ...} والرد {"id", "result"|"error"}
+# مع --token يجب أن يحمل كل طلب "Authorization: Bearer <token>" أو ?token=<token> (لـ WebSocket من المتصفح)،
+# والاستماع على عنوان غير محلي مرفوض بدون token لأن /command يمرر أوامر خام مثل الحذف (1002)
+HTTP_ROUTES = {
+    ("GET", "info"): "info",
+    ("GET", "favorites"): "favorites",
+    ("GET", "channels"): "channels",
+    ("POST", "command"): "command",
+    ("POST", "keys"): "keys",
+    ("POST", "edits"): "edits",
+}
+
+
+class GatewayError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def is_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == "localhost"
+
+
+def resolved(value) -> Future:
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def error_status(error: BaseException) -> int:
+    if isinstance(error, GatewayError):
+        return error.status
+    if isinstance(error, EditRejected):
+        return 409
+    if isinstance(error, (TimeoutError, FutureTimeout, EditUnconfirmed)):
+        return 504
+    if isinstance(error, ConnectionError):
+        return 502
+    if isinstance(error, (ValueError, KeyError, TypeError)):
+        return 400
+    return 500
+
+
+class GatewayReceiver:
+    """جهاز واحد خلف البوابة: الجلسة الصاعدة، البيانات المخزنة، وإعادة الاتصال عند الانقطاع"""
+
+    def __init__(self, gateway, session: ReceiverSession):
+        self.gateway = gateway
+        self.session = session
+        session.on_push = lambda session, parsed: gateway.broadcast(
+            session.key, {"type": "push", "receiver": session.key, "data": parsed})
+        session.on_state = self._state_changed
+        self.supervisor = ReconnectSupervisor(max_attempts=10)
+        self._lock = threading.Lock()
+        self._values = {}    # info / favorites / channels (JSON جاهز بالبايتات)
+        self._inflight = {}  # القراءة الجارية من الجهاز -> Future يشترك فيه كل من يطلبها
+        self.loaded_at = {}
+
+    @property
+    def key(self) -> str:
+        return self.session.key
+
+    def describe(self) -> dict:
+        session = self.session
+        return {
+            "key": session.key, "name": session.name, "state": session.state,
+            "error": str(session.error) if session.error else None,
+            "channels": len(session.channels) if session.channels is not None else None,
+            "cached": {name: self.loaded_at[name] for name in self._values if name in self.loaded_at},
+        }
+
+    # --- القراءات المخزنة ---
+    def cached(self, name: str, load, refresh: bool = False) -> Future:
+        """القيمة المخزنة، أو قراءة واحدة من الجهاز يشترك فيها كل الطالبين حتى تكتمل"""
+        with self._lock:
+            if not refresh and name in self._values:
+                return resolved(self._values[name])
+            future = self._inflight.get(name)
+            if future is not None:
+                return future
+            future = self._inflight[name] = Future()
+        # خارج القفل: القراءة قد تكتمل فوراً (من نسخة الجلسة) وتحتاج القفل نفسه
+        then(self.session.open(), lambda _: load()).add_done_callback(lambda f: self._loaded(name, f, future))
+        return future
+
+    def _loaded(self, name: str, source: Future, future: Future):
+        error = source.exception()
+        with self._lock:
+            self._inflight.pop(name, None)
+            if error is None:
+                self._values[name] = source.result()
+                self.loaded_at[name] = time.time()
+        if error is None:
+            future.set_result(source.result())
+        else:
+            future.set_exception(error)
+
+    def invalidate(self, *names):
+        with self._lock:
+            for name in names:
+                self._values.pop(name, None)
+
+    def info(self, refresh: bool = False) -> Future:
+        return self.cached("info", self.session.read_device_info, refresh)
+
+    def favorites(self, refresh: bool = False) -> Future:
+        return self.cached("favorites", self.session.read_favorite_groups, refresh)
+
+    def channels(self, refresh: bool = False) -> Future:
+        """
+        القائمة كـ JSON جاهز: بعد التعديلات تُرمَّز من نسخة الجلسة المحدثة محلياً بدون الرجوع للجهاز،
+        ومن الجهاز فقط عند refresh أو إذا لم تُجلب بعد (أو بعد نقل غيّر الترتيب).
+        """
+        def load():
+            store = None if refresh else self.session.channels
+            if store is not None:
+                return self._encode(store)
+            return then(self.session.fetch_channels(self.gateway.batch_size, self.gateway.window), self._encode)
+        return self.cached("channels", load, refresh)
+
+    def _encode(self, store) -> bytes:
+        body = json.dumps(store.to_dicts(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            if isinstance(self.session.device_info, dict):
+                self._values["info"] = self.session.device_info
+                self.loaded_at["info"] = time.time()
+        self.gateway.broadcast(self.key, {"type": "channels", "receiver": self.key, "count": len(store)})
+        return body
+
+    # --- الأوامر ---
+    def command(self, params: dict) -> Future:
+        message = params.get("message")
+        if not isinstance(message, dict) or "request" not in message:
+            raise GatewayError(400, 'command needs {"message": {"request": ...}}')
+        code = str(message["request"])
+        data = build_message(json.dumps(message, ensure_ascii=False))
+        reply = params.get("reply")
+
+        def send(session):
+            if reply:
+                return session.request(data, reply, params.get("timeout"))
+            session.send(data)
+            return {"sent": True}
+        future = then(self.session.open(), send)
+        if code in EDIT_REQUESTS:
+            # تعديل خام لا يُعرف أثره على القائمة المحلية: الجلب التالي من الجهاز
+            future.add_done_callback(lambda f: self._list_changed(drop_store=True))
+        return future
+
+    def keys(self, params: dict) -> Future:
+        keys = [str(key) for key in params.get("keys") or []]
+        if not keys:
+            raise GatewayError(400, 'keys needs {"keys": [...]}')
+        interval = float(params.get("interval", 0.4))
+        return then(self.session.open(), lambda session: session.send_key_sequence(keys, interval))
+
+    def edits(self, params: dict) -> Future:
+        edits = []
+        if params.get("rename"):
+            edits.append(rename_edit(params["rename"]))
+        if params.get("lock"):
+            edits.append(lock_edit(params["lock"], True))
+        if params.get("unlock"):
+            edits.append(lock_edit(params["unlock"], False))
+        if params.get("delete"):
+            edits.append(delete_edit(params["delete"]))
+        if not edits:
+            raise GatewayError(400, "edits needs rename, lock, unlock or delete")
+
+        def edit(transaction, store):
+            for apply in edits:
+                apply(transaction, store)
+
+        def done(transaction):
+            return {"sent": list(transaction.sent), "summary": transaction.summary()}
+        future = then(then(self.session.open(), lambda session: session.apply_edits(edit)), done)
+        future.add_done_callback(lambda f: self._list_changed())
+        return future
+
+    def _list_changed(self, drop_store: bool = False):
+        if drop_store:
+            self.session.channels = None
+        self.invalidate("channels")
+        self.gateway.broadcast(self.key, {"type": "edited", "receiver": self.key})
+
+    # --- الاتصال ---
+    def _state_changed(self, session: ReceiverSession):
+        self.gateway.broadcast(session.key, {"type": "state", "receiver": session.key, "state": session.state,
+                                             "error": str(session.error) if session.error else None})
+        if session.connected:
+            self.supervisor.reset()
+        elif session.error is not None and not self.supervisor.cancelled:
+            threading.Thread(target=self._reconnect, name=f"gateway-reconnect-{session.key}", daemon=True).start()
+
+    def _reconnect(self):
+        delay = self.supervisor.next_delay()
+        if delay is None:
+            logging.warning(f"gateway: {self.key} reconnect attempts exhausted; reconnecting on next request")
+            self.supervisor.reset()
+            return
+        if self.supervisor.wait(delay) and self.session.state == "disconnected":
+            logging.info(f"gateway: reconnecting to {self.key}")
+            self.session.open()  # الفشل يعيد استدعاء _state_changed فتُجدول المحاولة التالية
+
+    def close(self):
+        self.supervisor.cancel()
+        self.session.close()
+
+
+class WebSocketClient:
+    """
+    اتصال WebSocket واحد (RFC 6455، رسائل نصية فقط) فوق مقبس طلب HTTP.
+    إطارات العميل يجب أن تكون مقنّعة، والرسالة لا تتجاوز max_message بايت؛ وإلا يُغلق الاتصال.
+    """
+
+    def __init__(self, rfile, wfile, max_message: int = WS_MAX_MESSAGE):
+        self.rfile = rfile
+        self.wfile = wfile
+        self.max_message = max_message
+        self.receivers = None  # None = كل الأجهزة، أو مجموعة مفاتيح بعد subscribe
+        self.closed = False
+        self._send_lock = threading.Lock()
+
+    def wants(self, receiver_key: str) -> bool:
+        return self.receivers is None or receiver_key in self.receivers
+
+    def send(self, data: bytes, opcode: int = 0x1) -> bool:
+        """إرسال إطار (من أي خيط)؛ يعيد False إذا انقطع العميل"""
+        length = len(data)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        with self._send_lock:
+            if self.closed:
+                return False
+            try:
+                self.wfile.write(header + data)
+                self.wfile.flush()
+                return True
+            except OSError:
+                self.closed = True
+                return False
+
+    def _read_exact(self, size: int) -> bytes:
+        data = self.rfile.read(size)
+        if len(data) < size:
+            raise ConnectionError("websocket closed")
+        return data
+
+    def _fail(self, code: int, reason: str):
+        """إغلاق بخطأ بروتوكول: 1002 (إطار غير صالح) أو 1009 (رسالة كبيرة)"""
+        self.send(struct.pack("!H", code) + reason.encode("utf-8"), 0x8)
+        self.closed = True
+        raise ConnectionError(f"websocket: {reason}")
+
+    def receive(self) -> bytes | None:
+        """الرسالة النصية التالية (بعد تجميع الأجزاء)، أو None عند الإغلاق"""
+        message = bytearray()
+        while True:
+            first, second = self._read_exact(2)
+            opcode, length = first & 0x0F, second & 0x7F
+            if length == 126:
+                length, = struct.unpack("!H", self._read_exact(2))
+            elif length == 127:
+                length, = struct.unpack("!Q", self._read_exact(8))
+            if not second & 0x80:
+                self._fail(1002, "client frames must be masked")
+            if len(message) + length > self.max_message:
+                self._fail(1009, "message too big")  # قبل القراءة حتى لا يُحجز طول يختاره العميل
+            mask = self._read_exact(4)
+            payload = self._read_exact(length)
+            if length:
+                # فك القناع دفعة واحدة بعملية XOR على عدد صحيح بدل حلقة لكل بايت
+                repeated = (mask * (length // 4 + 1))[:length]
+                payload = (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(length, "big")
+            if opcode == 0x8:
+                self.send(payload[:2], 0x8)
+                self.closed = True
+                return None
+            if opcode == 0x9:
+                self.send(payload, 0xA)
+                continue
+            if opcode == 0xA:
+                continue
+            message += payload
+            if first & 0x80:
+                return bytes(message)
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "StarsatGateway/1.0"
+
+    def log_message(self, format, *args):
+        logging.debug(f"gateway: {self.address_string()} {format % args}")
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str):
+        gateway = self.server.gateway
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if not gateway.authorized(self.headers.get("Authorization"), parse_qs(url.query).get("token", [None])[0]):
+            self.close_connection = True
+            self._respond(401, {"error": "missing or invalid token"})
+            return
+        if method == "GET" and parts == ["ws"]:
+            self._websocket()
+            return
+        try:
+            params = {}
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                params = json.loads(self.rfile.read(length).decode("utf-8"))
+                if not isinstance(params, dict):
+                    raise GatewayError(400, "request body must be a JSON object")
+            query = parse_qs(url.query)
+            if query.get("refresh", ["0"])[0] not in ("", "0", "false"):
+                params["refresh"] = True
+            if parts == ["receivers"] and method == "GET":
+                op, receiver = "receivers", None
+            elif len(parts) == 3 and parts[0] == "receivers" and (method, parts[2]) in HTTP_ROUTES:
+                op, receiver = HTTP_ROUTES[(method, parts[2])], parts[1]
+            else:
+                raise GatewayError(404, f"no route for {method} {url.path}")
+            result = gateway.call(op, receiver, params).result(gateway.timeout)
+            self._respond(200, result)
+        except Exception as e:
+            if not isinstance(e, GatewayError):
+                logging.warning(f"gateway: {method} {self.path} failed: {e!r}")
+            self._respond(error_status(e), {"error": str(e) or type(e).__name__})
+
+    def _respond(self, status: int, result):
+        body = result if isinstance(result, bytes) else json.dumps(result, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _websocket(self):
+        key = self.headers.get("Sec-WebSocket-Key")
+        if "websocket" not in (self.headers.get("Upgrade") or "").lower() or not key:
+            self._respond(400, {"error": "websocket upgrade expected"})
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode("ascii")).digest()).decode("ascii")
+        self.send_response(101, "Switching Protocols")
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+        client = WebSocketClient(self.rfile, self.wfile)
+        self.server.gateway.serve_websocket(client)
+
+
+class GatewayHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class StarsatGateway:
+    """
+    البوابة: جهاز GatewayReceiver لكل جهاز مُعرّف (بالمفتاح ip:port أو بالاسم)
+    وخادم HTTP/WebSocket محلي تُنفذ عبره نفس العمليات من call().
+    token (اختياري) يُطلب من كل عميل، وهو إلزامي إذا لم يكن العنوان loopback.
+    """
+
+    def __init__(self, devices, address=("127.0.0.1", DEFAULT_GATEWAY_PORT), batch_size: int = 250,
+                 window: int = 4, timeout: float = 120, token: str | None = None):
+        self.token = token or None
+        self.batch_size = batch_size
+        self.window = window
+        self.timeout = timeout  # أقصى انتظار لرد طلب HTTP (جلب قائمة كبيرة لأول مرة)
+        self.receivers = {}
+        self.names = {}
+        for device in devices:
+            session = ReceiverSession(device["ip"], device.get("port", DEFAULT_RECEIVER_PORT), device.get("name"))
+            self.receivers[session.key] = GatewayReceiver(self, session)
+            self.names[session.name] = session.key
+        self.clients = set()
+        self._clients_lock = threading.Lock()
+        self.server = GatewayHTTPServer(address, GatewayHandler)
+        if self.token is None and not is_loopback(self.server.server_address[0]):
+            self.server.server_close()
+            raise ValueError(f"refusing to listen on {self.server.server_address[0]} without a token")
+        self.server.gateway = self
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def authorized(self, authorization: str | None, query_token: str | None = None) -> bool:
+        if self.token is None:
+            return True
+        supplied = query_token
+        if authorization and authorization.lower().startswith("bearer "):
+            supplied = authorization[7:].strip()
+        return supplied is not None and hmac.compare_digest(supplied.encode("utf-8"), self.token.encode("utf-8"))
+
+    def receiver(self, ref: str) -> GatewayReceiver:
+        target = self.receivers.get(ref) or self.receivers.get(self.names.get(ref))
+        if target is None:
+            raise GatewayError(404, f"unknown receiver: {ref}")
+        return target
+
+    def call(self, op: str, receiver: str = None, params: dict = None) -> Future:
+        """تنفيذ عملية واحدة (مشتركة بين HTTP و WebSocket)؛ يعيد Future بالنتيجة"""
+        params = params or {}
+        try:
+            if op == "receivers":
+                return resolved([target.describe() for target in self.receivers.values()])
+            target = self.receiver(receiver)
+            refresh = bool(params.get("refresh"))
+            if op == "info":
+                return target.info(refresh)
+            if op == "favorites":
+                return target.favorites(refresh)
+            if op == "channels":
+                return target.channels(refresh)
+            if op == "command":
+                return target.command(params)
+            if op == "keys":
+                return target.keys(params)
+            if op == "edits":
+                return target.edits(params)
+            raise GatewayError(400, f"unknown operation: {op}")
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+            return future
+
+    # --- WebSocket ---
+    def serve_websocket(self, client: WebSocketClient):
+        with self._clients_lock:
+            self.clients.add(client)
+        try:
+            while not client.closed:
+                data = client.receive()
+                if data is None:
+                    break
+                self._ws_message(client, data)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            client.closed = True
+            with self._clients_lock:
+                self.clients.discard(client)
+
+    def _ws_message(self, client: WebSocketClient, data: bytes):
+        try:
+            message = json.loads(data.decode("utf-8"))
+            request_id, op = message.get("id"), message.get("op")
+        except (ValueError, AttributeError):
+            client.send(b'{"error":"invalid JSON message"}')
+            return
+        if op == "subscribe":
+            receivers = message.get("receivers")
+            try:
+                client.receivers = None if receivers is None else {self.receiver(ref).key for ref in receivers}
+            except GatewayError as e:
+                client.send(json.dumps({"id": request_id, "error": str(e), "status": e.status}).encode("utf-8"))
+                return
+            subscribed = self.receivers if client.receivers is None else client.receivers
+            client.send(self._reply(request_id, {"subscribed": sorted(subscribed)}))
+            return
+        # الرد يصل عند اكتماله، فعدة طلبات من نفس العميل تكون معلقة معاً
+        future = self.call(op, message.get("receiver"), message)
+        future.add_done_callback(lambda f: client.send(self._reply_future(request_id, f)))
+
+    @staticmethod
+    def _reply(request_id, result) -> bytes:
+        prefix = b'{"id":' + json.dumps(request_id).encode("utf-8") + b',"result":'
+        body = result if isinstance(result, bytes) else json.dumps(result, ensure_ascii=False).encode("utf-8")
+        return prefix + body + b"}"
+
+    def _reply_future(self, request_id, future: Future) -> bytes:
+        error = future.exception()
+        if error is None:
+            return self._reply(request_id, future.result())
+        return json.dumps({"id": request_id, "error": str(error) or type(error).__name__,
+                           "status": error_status(error)}, ensure_ascii=False).encode("utf-8")
+
+    def broadcast(self, receiver_key: str, event: dict):
+        """بث حدث لكل عملاء WebSocket المشتركين في هذا الجهاز"""
+        with self._clients_lock:
+            clients = [client for client in self.clients if client.wants(receiver_key)]
+        if not clients:
+            return
+        data = json.dumps(event, ensure_ascii=False).encode("utf-8")
+        for client in clients:
+            client.send(data)
+
+    # --- التشغيل ---
+    def start(self):
+        """تشغيل الخادم في خيط خلفي"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="starsat-gateway", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        for target in self.receivers.values():
+            target.close()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="بوابة محلية تتشارك اتصالاً واحداً بكل جهاز ستارسات")
+    parser.add_argument("receivers", nargs="+", type=parse_receiver, help="name=ip:port أو ip:port")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_GATEWAY_PORT)
+    parser.add_argument("--batch-size", type=int, default=250)
+    parser.add_argument("--window", type=int, default=4)
+    parser.add_argument("--prefetch", action="store_true", help="جلب قوائم القنوات عند البدء")
+    parser.add_argument("--token", default=os.environ.get("SATIMAGES_GATEWAY_TOKEN"),
+                        help="رمز يطلب من كل عميل (إلزامي مع --host غير محلي)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        gateway = StarsatGateway(args.receivers, (args.host, args.port), args.batch_size, args.window,
+                                 token=args.token)
+    except ValueError as e:
+        parser.error(f"{e}; pass --token or set SATIMAGES_GATEWAY_TOKEN")
+    if args.prefetch:
+        for key in gateway.receivers:
+            gateway.call("channels", key)
+    logging.info(f"Starsat gateway on http://{args.host}:{gateway.port} for {', '.join(gateway.receivers)}")
+    try:
+        gateway.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.stop()
+
+
+if __name__ == "__main__":
+    main()
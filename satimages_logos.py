@@ -0,0 +1,116 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import Qt, QObject, QTimer, pyqtSignal
+from PyQt6.QtGui import QIcon, QImage, QPixmap
+
+# ✅ شعارات القنوات: images/<ServiceID>.png أو images/default.png
+# - كل ملف يُفك مرة واحدة في ذاكرة LRU محدودة (الصورة الافتراضية مشتركة بين آلاف القنوات)
+# - الفك والتحجيم في خيط خلفي (QImage آمن خارج خيط الواجهة، QPixmap لا)
+# - الطلبات تأتي من data() للصفوف الظاهرة فقط، والأحدث أولاً حتى لا يتأخر ما على الشاشة عند التمرير السريع
+
+LOGO_DIRECTORY = "images"
+DEFAULT_LOGO = "default.png"
+LOGO_SIZE = 100
+CACHE_LIMIT = 512        # أقصى عدد صور مفكوكة في الذاكرة
+PENDING_LIMIT = 256      # الطلبات الأقدم من هذا (صفوف مُرّ عليها بالتمرير) تُهمل
+REFRESH_DELAY_MS = 30    # تجميع إشعارات الصور الجاهزة في إعادة رسم واحدة
+
+
+class ChannelLogoCache(QObject):
+    logos_ready = pyqtSignal()  # صور جديدة جاهزة (مجمعة)
+    _loaded = pyqtSignal(str, str, object)  # من الخيط الخلفي: service_id، المسار، QImage أو None
+
+    def __init__(self, directory: str = LOGO_DIRECTORY, size: int = LOGO_SIZE, limit: int = CACHE_LIMIT, parent=None):
+        super().__init__(parent)
+        self.directory = directory
+        self.size = size
+        self.limit = limit
+        self._paths = {}                 # ServiceID -> مسار الملف (بعد التحقق من وجوده)
+        self._icons = OrderedDict()      # مسار الملف -> QIcon (الأحدث استخداماً في النهاية)
+        self._decoded = set()            # نسخة من مفاتيح _icons يقرأها الخيط الخلفي
+        self._pending = deque(maxlen=PENDING_LIMIT)
+        self._requested = set()
+        self._lock = threading.Lock()
+        self._draining = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="satimages-logos")
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(REFRESH_DELAY_MS)
+        self._refresh_timer.timeout.connect(self.logos_ready)
+        self._loaded.connect(self._on_loaded)
+
+    def icon(self, service_id: str):
+        """الأيقونة إذا كانت جاهزة، وإلا None مع طلب تحميلها في الخلفية"""
+        path = self._paths.get(service_id)
+        if path is not None:
+            icon = self._icons.get(path)
+            if icon is not None:
+                self._icons.move_to_end(path)
+                return icon
+        self._request(service_id)
+        return None
+
+    def clear(self):
+        """نسيان المسارات والصور (مثلاً بعد تغيير ملفات مجلد الصور)"""
+        self._paths.clear()
+        self._icons.clear()
+        self._decoded.clear()
+
+    def shutdown(self):
+        with self._lock:
+            self._pending.clear()
+            self._requested.clear()
+        self._executor.shutdown(wait=False)
+
+    # --- التحميل في الخلفية ---
+    def _request(self, service_id: str):
+        with self._lock:
+            if service_id in self._requested:
+                return
+            if len(self._pending) == self._pending.maxlen:
+                self._requested.discard(self._pending[0])
+            self._pending.append(service_id)
+            self._requested.add(service_id)
+            if self._draining:
+                return
+            self._draining = True
+        self._executor.submit(self._drain)
+
+    def _drain(self):
+        sent = set()  # ملفات فُكت في هذه الدفعة ولم تصل بعد إلى خيط الواجهة
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._draining = False
+                    return
+                service_id = self._pending.pop()  # الأحدث أولاً = الصفوف الظاهرة الآن
+            path = self._resolve(service_id)
+            image = None
+            if path not in self._decoded and path not in sent:
+                sent.add(path)
+                image = QImage(path)
+                if not image.isNull():
+                    image = image.scaled(self.size, self.size, Qt.AspectRatioMode.KeepAspectRatio)
+            self._loaded.emit(service_id, path, image)
+
+    def _resolve(self, service_id: str) -> str:
+        path = os.path.join(self.directory, f"{service_id}.png")
+        if not os.path.exists(path):
+            path = os.path.join(self.directory, DEFAULT_LOGO)
+        return path
+
+    def _on_loaded(self, service_id: str, path: str, image):
+        with self._lock:
+            self._requested.discard(service_id)
+        self._paths[service_id] = path
+        if image is not None and path not in self._icons:
+            self._icons[path] = QIcon(QPixmap.fromImage(image))
+            self._decoded.add(path)
+            while len(self._icons) > self.limit:
+                evicted, _ = self._icons.popitem(last=False)
+                self._decoded.discard(evicted)
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start()
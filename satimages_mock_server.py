@@ -0,0 +1,292 @@
+import argparse
+import json
+import logging
+import random
+import socket
+import socketserver
+import threading
+import time
+import zlib
+
+from satimages_protocol import FrameDecoder, build_gcdh_message, build_message
+
+# ✅ خادم محلي يحاكي جهاز ستارسات (المنفذ 20000) لاختبار العميل وقياس أدائه بدون جهاز حقيقي
+# يتحدث نفس التأطير (Start…End أو GCDH) ويرسل قوائم القنوات كـ JSON مضغوط بـ zlib
+
+DEFAULT_PORT = 20000
+
+GROUP_NAMES = ["أخبار", "رياضة", "أفلام", "أطفال", "وثائقي", "ديني", "موسيقى", "منوعات"]
+NAME_WORDS = ["Al", "Sport", "News", "Cinema", "Kids", "Music", "Drama", "Quran", "Doc", "Live",
+              "HD", "Plus", "One", "Max", "Arabia", "Gulf", "Nile", "Sat", "TV", "FM"]
+
+
+def generate_channels(count: int, seed: int = 0) -> list:
+    """توليد قائمة قنوات اصطناعية بنفس حقول الجهاز الحقيقي"""
+    rng = random.Random(seed)
+    channels = []
+    for index in range(count):
+        radio = 1 if rng.random() < 0.15 else 0
+        audio_count = rng.randint(1, 3)
+        name = " ".join(rng.choice(NAME_WORDS) for _ in range(rng.randint(1, 3)))
+        channels.append({
+            "ServiceName": f"{name} {index + 1}",
+            "ServiceID": 1000 + index,
+            "ServiceIndex": index + 1,
+            "Radio": radio,
+            "HD": 0 if radio else int(rng.random() < 0.4),
+            "Scramble": int(rng.random() < 0.2),
+            "Lock": 0,
+            "EPG": int(rng.random() < 0.6),
+            "VideoPID": 0 if radio else rng.randint(32, 8190),
+            "PMTPID": rng.randint(32, 8190),
+            "AudioArray": [{"PID": rng.randint(32, 8190)} for _ in range(audio_count)],
+            "FavBit": rng.getrandbits(len(GROUP_NAMES)) if rng.random() < 0.1 else 0,
+            "Playing": 0,
+        })
+    return channels
+
+
+class MockReceiver:
+    """
+    حالة الجهاز المحاكى والرد على الطلبات.
+    أرقام طلبات معلومات الجهاز والمجموعات المفضلة غير موثقة، لذلك هي قابلة للتغيير.
+    """
+
+    DEVICE_INFO_REQUEST = "16"
+    FAV_GROUPS_REQUEST = "20"
+
+    def __init__(self, channels: list, host: str = "127.0.0.1"):
+        self.channels = channels
+        self.host = host
+        self.lock = threading.Lock()
+        self.commands = []  # سجل الطلبات المستلمة (للتحقق في اختبارات التراجع)
+
+    def _find(self, program_id) -> int:
+        program_id = str(program_id)
+        for index, channel in enumerate(self.channels):
+            if str(channel["ServiceID"]) == program_id:
+                return index
+        return -1
+
+    def _reindex(self):
+        for index, channel in enumerate(self.channels):
+            channel["ServiceIndex"] = index + 1
+
+    def handle(self, request: dict):
+        """يعيد كائن الرد (يُحوّل إلى JSON) أو None إذا كان الطلب بلا رد"""
+        code = str(request.get("request", ""))
+        items = request.get("array") or []
+        with self.lock:
+            self.commands.append(request)
+
+            if code == "0":
+                start = int(request.get("FromIndex", 0))
+                end = int(request.get("ToIndex", start))
+                return self.channels[start:end + 1]
+
+            if code == self.DEVICE_INFO_REQUEST:
+                return {
+                    "ProductName": "Starsat Mock",
+                    "SoftwareVersion": "mock-1.0",
+                    "SerialNumber": "MOCK00000001",
+                    "ChannelNum": str(len(self.channels)),
+                    "MaxNumOfPrograms": "100000",
+                }
+
+            if code == self.FAV_GROUPS_REQUEST:
+                return {"favGroupNames": GROUP_NAMES}
+
+            if code == "12":
+                return {"request": "12", "TvState": "0"}
+
+            if code == "1009":
+                index = self._find(request.get("ProgramId"))
+                if index < 0:
+                    return {"success": "0"}
+                for channel in self.channels:
+                    channel["Playing"] = 0
+                channel = self.channels[index]
+                channel["Playing"] = 1
+                return {"success": "1", "url": f"http://{self.host}:8085/player.{channel['ServiceID']}"}
+
+            if code == "1001":
+                for item in items:
+                    index = self._find(item.get("ProgramId"))
+                    if index >= 0:
+                        self.channels[index]["ServiceName"] = item.get("ProgramName", "")
+                return {"success": "1"}
+
+            if code == "1002":
+                ids = {str(item.get("ProgramId")) for item in items}
+                self.channels = [c for c in self.channels if str(c["ServiceID"]) not in ids]
+                self._reindex()
+                return {"success": "1"}
+
+            if code == "1003":
+                for item in items:
+                    index = self._find(item.get("ProgramId"))
+                    if index >= 0:
+                        self.channels[index]["Lock"] = 0 if self.channels[index]["Lock"] else 1
+                return {"success": "1"}
+
+            if code == "1005":
+                self._move(items)
+                return {"success": "1"}
+
+        return None # 998 (المصافحة) و 1040 (المفاتيح) وبقية الطلبات بلا رد
+
+    def _move(self, items: list):
+        """MoveToPosition: معرف القناة الهدف، أو رقم موقع (يبدأ من 1)"""
+        if not items:
+            return
+        ids = [str(item.get("ProgramId")) for item in items]
+        target = str(items[0].get("MoveToPosition", ""))
+        target_index = self._find(target)
+        if target_index < 0 and target.isdigit():
+            target_index = int(target) - 1
+        if target_index < 0:
+            return
+        moving = [c for c in self.channels if str(c["ServiceID"]) in ids]
+        # موقع الإدراج يُحسب بعد إزالة القنوات المنقولة
+        position = sum(1 for c in self.channels[:target_index] if str(c["ServiceID"]) not in ids)
+        remaining = [c for c in self.channels if str(c["ServiceID"]) not in ids]
+        self.channels = remaining[:position] + moving + remaining[position:]
+        self._reindex()
+
+
+class MockStarsatServer(socketserver.ThreadingTCPServer):
+    """
+    خادم الجهاز المحاكى مع حقن الأعطال:
+    - latency: تأخير ثابت قبل كل رد (ثوانٍ) و latency_jitter: تأخير عشوائي إضافي
+    - fragment: تقسيم كل رد إلى قطع عشوائية لا تتجاوز هذا الحجم (بايت)
+    - disconnect_after: قطع الاتصال بعد عدد من الردود في كل جلسة
+    - drop_rate: احتمال قطع الاتصال بدل إرسال أي رد
+    - framing: "start" أو "gcdh" ، و compress لضغط ردود JSON بـ zlib
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", DEFAULT_PORT), channels=None, latency: float = 0.0,
+                 latency_jitter: float = 0.0, fragment: int = 0, disconnect_after: int = 0,
+                 drop_rate: float = 0.0, framing: str = "start", compress: bool = True, seed: int = 0):
+        super().__init__(address, MockSessionHandler)
+        self.receiver = MockReceiver(channels if channels is not None else generate_channels(10000, seed),
+                                     host=self.server_address[0])
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.fragment = fragment
+        self.disconnect_after = disconnect_after
+        self.drop_rate = drop_rate
+        self.framing = framing
+        self.compress = compress
+        self.rng = random.Random(seed)
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def encode(self, response) -> bytes:
+        body = json.dumps(response, ensure_ascii=False).encode("utf-8")
+        if self.compress:
+            body = zlib.compress(body)
+        return build_gcdh_message(body) if self.framing == "gcdh" else build_message(body)
+
+    def start(self):
+        """تشغيل الخادم في خيط خلفي (للاختبارات والقياس)"""
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-starsat", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+
+class MockSessionHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        decoder = FrameDecoder()
+        responses_sent = 0
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                data = self.request.recv(65536)
+            except OSError:
+                return
+            if not data:
+                return
+            for frame in decoder.feed(data):
+                if frame.kind == "raw":
+                    continue
+                try:
+                    request = json.loads(bytes(frame.payload).decode("utf-8"))
+                except ValueError:
+                    continue # المصافحة XML أو بيانات غير مفهومة
+                response = server.receiver.handle(request)
+                if response is None:
+                    continue
+                if server.drop_rate and server.rng.random() < server.drop_rate:
+                    logging.info("mock: dropping connection (drop_rate)")
+                    return
+                if server.latency or server.latency_jitter:
+                    time.sleep(server.latency + server.rng.random() * server.latency_jitter)
+                if not self._send(server.encode(response)):
+                    return
+                responses_sent += 1
+                if server.disconnect_after and responses_sent >= server.disconnect_after:
+                    logging.info(f"mock: disconnecting after {responses_sent} responses")
+                    return
+
+    def _send(self, message: bytes) -> bool:
+        server = self.server
+        try:
+            if server.fragment <= 0:
+                self.request.sendall(message)
+                return True
+            view = memoryview(message)
+            while view:
+                size = server.rng.randint(1, server.fragment)
+                self.request.sendall(view[:size])
+                view = view[size:]
+            return True
+        except OSError:
+            return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="خادم محلي يحاكي جهاز ستارسات")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--channels", type=int, default=10000, help="عدد القنوات الاصطناعية")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="تأخير كل رد بالثواني")
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--fragment", type=int, default=0, help="أقصى حجم لقطعة الإرسال (0 = بدون تقسيم)")
+    parser.add_argument("--disconnect-after", type=int, default=0, help="قطع الاتصال بعد N رد")
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--framing", choices=("start", "gcdh"), default="start")
+    parser.add_argument("--no-compress", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = MockStarsatServer(
+        (args.host, args.port), generate_channels(args.channels, args.seed),
+        latency=args.latency, latency_jitter=args.latency_jitter, fragment=args.fragment,
+        disconnect_after=args.disconnect_after, drop_rate=args.drop_rate,
+        framing=args.framing, compress=not args.no_compress, seed=args.seed,
+    )
+    logging.info(f"mock Starsat receiver on {args.host}:{server.port} with {args.channels} channels")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1051 @@
+import codecs
+import heapq
+import itertools
+import json
+import logging
+import math
+import random
+import re
+import selectors
+import socket
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future
+
+# ✅ طبقة بروتوكول أجهزة ستارسات - لا تعتمد على Qt حتى يمكن استخدامها من أي مكان
+
+FRAME_START = b"Start"
+FRAME_END = b"End"
+FRAME_HEADER_SIZE = 15  # Start + 7 أرقام + End
+GCDH_MAGIC = b"GCDH"
+GCDH_HEADER_SIZE = 16
+MAX_FRAME_SIZE = 64 * 1024 * 1024  # أي طول أكبر من هذا يعتبر رأساً تالفاً
+
+
+def build_message(body: str | bytes) -> bytes:
+    try:
+        body_bytes = body.encode('utf-8') if isinstance(body, str) else body
+        length = len(body_bytes)
+        header = f"Start{length:07d}End"
+        return header.encode('ascii') + body_bytes
+    except Exception as e:
+        logging.error(f"Error in build_message: {e}")
+        return b"Start0000000End"
+
+def build_gcdh_message(body: bytes) -> bytes:
+    """تأطير رسالة برأس GCDH (الكلمة السحرية + الطول 32 بت + 8 بايت محجوزة)"""
+    return GCDH_MAGIC + struct.pack(">I", len(body)) + bytes(GCDH_HEADER_SIZE - 8) + body
+
+def generate_handshake() -> bytes:
+    xml = ("<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+           "<Command request=\"998\">"
+           "<data>PythonQtClient</data>"
+           "<uuid>da9c9e4b-64b7-4bf2-8a26-5550d58c42d1-02:00:00:00:00:00</uuid>"
+           "</Command>")
+    return build_message(xml)
+
+def decompress_zlib(data: bytes) -> str | None:
+    try:
+        decompressed_data = zlib.decompress(data)
+        return decompressed_data.decode('utf-8', errors='replace')
+    except zlib.error:
+        return None
+    except Exception as e:
+        logging.error(f"Decompression error: {e}")
+        return None
+
+def _gcdh_body_length(header: bytes) -> int | None:
+    """استخراج طول البيانات من رأس GCDH (الحقل 32 بت بعد الكلمة السحرية)"""
+    big, = struct.unpack_from(">I", header, 4)
+    if 0 < big <= MAX_FRAME_SIZE:
+        return big
+    little, = struct.unpack_from("<I", header, 4)
+    if 0 < little <= MAX_FRAME_SIZE:
+        return little
+    return None # طول غير معروف: تعامل مع البيانات التالية كتدفق خام
+
+
+class Frame:
+    """رسالة مكتملة مستلمة من الجهاز"""
+    __slots__ = ("kind", "payload", "decoded")
+
+    def __init__(self, kind: str, payload, decoded=None):
+        self.kind = kind        # "start" أو "gcdh" أو "raw" (بيانات بدون رأس)
+        self.payload = payload  # bytes أو bytearray (فارغ إذا فُكت الرسالة أثناء وصولها)
+        self.decoded = decoded  # (نوع البيانات, النص, البيانات المحللة) عند استخدام stream_payloads
+
+    def __repr__(self):
+        return f"Frame({self.kind!r}, {len(self.payload)} bytes)"
+
+
+class FrameDecoder:
+    """
+    مفكك رسائل تدريجي: يقرأ الرأس ثم ينتظر N بايت بالضبط داخل bytearray
+    محجوز مسبقاً، ولا يعيد فحص أي بايت تمت معالجته.
+    البيانات التي لا تبدأ برأس معروف تُمرر كما هي كرسائل "raw".
+    """
+
+    def __init__(self, stream_payloads: bool = False):
+        self._header = bytearray()  # بايتات الرأس غير المكتملة فقط (16 بايت كحد أقصى)
+        self._kind = None
+        self._body = None
+        self._view = None
+        self._filled = 0
+        # عند التفعيل يُفك ضغط المحتوى ويُحلل أثناء وصوله بدلاً من تخزينه كاملاً
+        self.stream_payloads = stream_payloads
+        self._stream = None
+        self._length = 0
+
+    def reset(self):
+        self._header.clear()
+        self._kind = self._body = self._view = self._stream = None
+        self._filled = self._length = 0
+
+    @property
+    def pending_body(self) -> int:
+        """عدد البايتات المتبقية لإكمال الرسالة الحالية"""
+        return self._length - self._filled if self._kind is not None else 0
+
+    def feed(self, data: bytes) -> list:
+        frames = []
+        mv = memoryview(data)
+        pos, end = 0, len(mv)
+        while pos < end:
+            if self._stream is not None:
+                n = min(self._length - self._filled, end - pos)
+                self._stream.feed(mv[pos:pos + n])
+                self._filled += n
+                pos += n
+                if self._filled == self._length:
+                    frames.append(Frame(self._kind, b"", self._stream.close()))
+                    self._kind = self._stream = None
+                    self._filled = self._length = 0
+                continue
+            if self._body is not None:
+                n = min(self._length - self._filled, end - pos)
+                self._view[self._filled:self._filled + n] = mv[pos:pos + n]
+                self._filled += n
+                pos += n
+                if self._filled == self._length:
+                    frames.append(Frame(self._kind, self._body))
+                    self._kind = self._body = self._view = None
+                    self._filled = self._length = 0
+                continue
+
+            if not self._header:
+                # البحث عن بداية رأس؛ كل ما قبله بيانات خام
+                raw_end = self._find_header_start(mv, pos, end)
+                if raw_end > pos:
+                    frames.append(Frame("raw", bytes(mv[pos:raw_end])))
+                    pos = raw_end
+                    continue
+
+            needed = GCDH_HEADER_SIZE if (self._header[:1] or mv[pos:pos + 1]) == GCDH_MAGIC[:1] \
+                else FRAME_HEADER_SIZE
+            take = min(needed - len(self._header), end - pos)
+            self._header += mv[pos:pos + take]
+            pos += take
+            if not self._header_is_possible():
+                # ليس رأساً: البايت الأول خام والباقي يعاد فحصه
+                frames.append(Frame("raw", bytes(self._header[:1])))
+                rest = bytes(self._header[1:])
+                self._header.clear()
+                frames.extend(self.feed(rest))
+                continue
+            if len(self._header) < needed:
+                continue
+
+            length = self._parse_header()
+            self._kind = "gcdh" if self._header.startswith(GCDH_MAGIC) else "start"
+            self._header.clear()
+            if length == 0:
+                frames.append(Frame(self._kind, bytearray()))
+                self._kind = None
+            elif length < 0:
+                self._kind = None # رأس GCDH بدون طول معروف: ما بعده تدفق خام
+            elif self.stream_payloads:
+                self._stream = PayloadStream()
+                self._length, self._filled = length, 0
+            else:
+                self._body = bytearray(length)
+                self._view = memoryview(self._body)
+                self._length, self._filled = length, 0
+        return frames
+
+    @staticmethod
+    def _find_header_start(mv: memoryview, pos: int, end: int) -> int:
+        chunk = mv[pos:end].tobytes()
+        candidates = [i for i in (chunk.find(FRAME_START), chunk.find(GCDH_MAGIC)) if i >= 0]
+        if candidates:
+            return pos + min(candidates)
+        # قد ينتهي الجزء ببداية رأس مقطوعة
+        for size in range(min(len(FRAME_START) - 1, len(chunk)), 0, -1):
+            tail = chunk[-size:]
+            if FRAME_START.startswith(tail) or GCDH_MAGIC.startswith(tail):
+                return end - size
+        return end
+
+    def _header_is_possible(self) -> bool:
+        head = bytes(self._header)
+        if head[:1] == GCDH_MAGIC[:1]:
+            return GCDH_MAGIC.startswith(head[:4])
+        digits = head[5:12]
+        return FRAME_START.startswith(head[:5]) and (not digits or digits.isdigit()) and \
+            FRAME_END.startswith(head[12:15])
+
+    def _parse_header(self) -> int:
+        head = bytes(self._header)
+        if head.startswith(GCDH_MAGIC):
+            length = _gcdh_body_length(head)
+            return -1 if length is None else length
+        return int(head[5:12])
+
+
+def is_channel_list(parsed_data) -> bool:
+    """هل البيانات المفكوكة عبارة عن قائمة قنوات؟"""
+    return isinstance(parsed_data, list) and \
+        (len(parsed_data) == 0 or (isinstance(parsed_data[0], dict) and 'ServiceName' in parsed_data[0]))
+
+def decode_payload(payload) -> tuple:
+    """
+    تصنيف محتوى رسالة مكتملة مرة واحدة فقط.
+    يعيد (نوع البيانات, النص, البيانات المحللة أو None).
+    """
+    data = bytes(payload)
+    if data.startswith(b'\x78\x9c') or data.startswith(b'\x78\x01') or data.startswith(b'\x78\xda'):
+        text = decompress_zlib(data)
+        if text is not None:
+            try:
+                return "zlib_json", text, json.loads(text)
+            except json.JSONDecodeError:
+                return "zlib_raw", text, None
+
+    text = data.decode('utf-8', errors='replace').strip()
+    if text.startswith('<?xml'):
+        return "xml", text, None
+    if text.startswith('{') or text.startswith('['):
+        try:
+            return "json", text, json.loads(text)
+        except json.JSONDecodeError:
+            pass
+    if data.startswith(b'\x5b\x5b'):
+        return "unknown_[[", f"{data[:100]!r}...", None
+    return "raw", text, None
+
+
+class JsonStreamDecoder:
+    """
+    محلل JSON تدريجي: إذا كانت البيانات مصفوفة (مثل قائمة القنوات) يُحلل كل عنصر
+    مرة واحدة فور اكتماله ويُحذف نصه من الذاكرة، وإلا يُحلل النص عند الإغلاق.
+    """
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._decoder = json.JSONDecoder()
+        self._mode = None   # "array" أو "other"
+        self._text = ""     # نص العنصر غير المكتمل فقط
+        self._chunks = []
+        self._items = []
+        self._closed_array = False
+
+    def feed(self, data):
+        self._feed_text(self._utf8.decode(bytes(data)))
+
+    def _feed_text(self, text: str):
+        if not text:
+            return
+        if self._mode is None:
+            text = text.lstrip()
+            if not text:
+                return
+            if text[0] == '[':
+                self._mode = "array"
+                text = text[1:]
+            else:
+                self._mode = "other"
+        if self._mode == "other":
+            self._chunks.append(text)
+            return
+        self._text += text
+        self._parse_items()
+
+    def _parse_items(self):
+        text, pos, n = self._text, 0, len(self._text)
+        while pos < n and not self._closed_array:
+            while pos < n and text[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= n:
+                break
+            if text[pos] == ']':
+                self._closed_array = True
+                pos += 1
+                break
+            try:
+                item, item_end = self._decoder.raw_decode(text, pos)
+            except json.JSONDecodeError:
+                break # العنصر لم يكتمل بعد
+            if item_end == n and not isinstance(item, (dict, list, str)):
+                break # قد يكون رقماً مقطوعاً
+            self._items.append(item)
+            pos = item_end
+        self._text = text[pos:]
+
+    def close(self) -> tuple:
+        """يعيد (النص أو None للمصفوفات, البيانات المحللة)"""
+        self._feed_text(self._utf8.decode(b"", final=True))
+        if self._mode == "array":
+            if not self._closed_array:
+                raise json.JSONDecodeError("Unterminated array", self._text, 0)
+            return None, self._items
+        text = "".join(self._chunks).strip()
+        return text, json.loads(text)
+
+
+class PayloadStream:
+    """
+    فك ضغط وتحليل محتوى رسالة واحدة أثناء وصول بايتاتها باستخدام zlib.decompressobj،
+    بحيث تكون تكلفة الجلب خطية في حجم البيانات ولا تُخزن النسخة المضغوطة كاملة.
+    """
+
+    def __init__(self):
+        self._zlib = None
+        self._json = None
+        self._plain = None   # للمحتوى غير JSON (XML وغيره)
+        self._first = None
+        self.compressed = False
+        self.failed = False
+
+    @property
+    def eof(self) -> bool:
+        """هل انتهى تدفق zlib (للبيانات الخام بدون رأس)"""
+        return self.failed or (self._zlib is not None and self._zlib.eof)
+
+    @property
+    def unused_data(self) -> bytes:
+        return self._zlib.unused_data if self._zlib is not None else b""
+
+    def feed(self, chunk):
+        if not chunk:
+            return
+        if self._first is None:
+            self._first = bytes(chunk[:1])
+            if self._first == b'\x78':
+                self.compressed = True
+                self._zlib = zlib.decompressobj()
+        if self._zlib is not None:
+            if self._zlib.eof or self.failed:
+                return
+            try:
+                self._feed_plain(self._zlib.decompress(chunk))
+            except zlib.error as e:
+                logging.error(f"Streaming decompression error: {e}")
+                self.failed = True
+        elif not self.failed:
+            self._feed_plain(chunk)
+
+    def _feed_plain(self, data):
+        if not data:
+            return
+        if self._json is None and self._plain is None:
+            head = bytes(data[:64]).lstrip()
+            if not head:
+                return
+            if head[:1] in (b'{', b'['):
+                self._json = JsonStreamDecoder()
+            else:
+                self._plain = bytearray()
+        if self._json is not None:
+            self._json.feed(data)
+        else:
+            self._plain += data
+
+    def close(self) -> tuple:
+        """يعيد (نوع البيانات, النص أو None, البيانات المحللة أو None)"""
+        prefix = "zlib_" if self.compressed else ""
+        if self.failed:
+            return f"{prefix}raw", "", None
+        if self._zlib is not None:
+            self._feed_plain(self._zlib.flush())
+        if self._json is not None:
+            try:
+                text, parsed = self._json.close()
+                return f"{prefix}json", text, parsed
+            except json.JSONDecodeError:
+                return f"{prefix}raw", "", None
+        data = bytes(self._plain or b"")
+        if self.compressed:
+            return "zlib_raw", data.decode('utf-8', errors='replace'), None
+        return decode_payload(data)
+
+
+class TimerHandle:
+    __slots__ = ("deadline", "callback", "cancelled")
+
+    def __init__(self, deadline: float, callback):
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class StarsatTransport:
+    """
+    نقل قائم على الأحداث لاتصال الجهاز: كل الإدخال/الإخراج يتم عبر selectors،
+    والأوامر القادمة من الخيوط الأخرى توقظ الحلقة فوراً عبر أنبوب إيقاظ
+    (socketpair). الاتصال الخامل لا يستهلك أي وقت معالج.
+    """
+
+    RECV_SIZE = 65536
+
+    def __init__(self, ip: str, port: int, frame_handler=None):
+        self.ip, self.port = ip, port
+        self.frame_handler = frame_handler  # يُستدعى لكل Frame من خيط الإدخال/الإخراج
+        self.decoder = FrameDecoder(stream_payloads=True)
+        self.sock = None
+        self.selector = None
+        self.running = False
+        self._wake_r = self._wake_w = None
+        self._lock = threading.Lock()
+        self._outbox = deque()        # رسائل من خيوط أخرى بانتظار الإرسال
+        self._callbacks = deque()     # دوال مطلوب تنفيذها داخل خيط الحلقة
+        self._out_buf = bytearray()   # ما تبقى من بايتات لم يقبلها المقبس بعد
+        self._timers = []
+        self._timer_seq = itertools.count()
+        self._writing = False
+
+    def open(self, timeout: float = 10):
+        self.sock = socket.create_connection((self.ip, self.port), timeout=timeout)
+        self.sock.setblocking(False)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) # إرسال الأوامر الصغيرة فوراً
+        self.selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self.selector.register(self._wake_r, selectors.EVENT_READ)
+        self.selector.register(self.sock, selectors.EVENT_READ)
+        self.decoder.reset()
+        self._out_buf.clear()
+        self._writing = False
+        self.running = True
+
+    def close(self):
+        self.running = False
+        for obj in (self.sock, self._wake_r, self._wake_w):
+            if obj is not None:
+                try: obj.close()
+                except Exception: pass
+        if self.selector is not None:
+            try: self.selector.close()
+            except Exception: pass
+        self.sock = self.selector = self._wake_r = self._wake_w = None
+
+    # --- واجهات آمنة للاستدعاء من أي خيط ---
+    def send(self, data: bytes):
+        with self._lock:
+            self._outbox.append(bytes(data))
+        self.wake()
+
+    def call_soon_threadsafe(self, callback):
+        with self._lock:
+            self._callbacks.append(callback)
+        self.wake()
+
+    def stop(self):
+        self.running = False
+        self.wake()
+
+    def wake(self):
+        wake_w = self._wake_w
+        if wake_w is not None:
+            try: wake_w.send(b"\0")
+            except (BlockingIOError, OSError): pass # الحلقة مستيقظة بالفعل أو مغلقة
+
+    # --- مؤقتات تعمل داخل خيط الحلقة ---
+    def call_later(self, delay: float, callback) -> TimerHandle:
+        handle = TimerHandle(time.monotonic() + delay, callback)
+        heapq.heappush(self._timers, (handle.deadline, next(self._timer_seq), handle))
+        return handle
+
+    def _next_timeout(self):
+        while self._timers and self._timers[0][2].cancelled:
+            heapq.heappop(self._timers)
+        if not self._timers:
+            return None # لا مؤقتات: انتظار بلا حدود حتى وصول بيانات أو إيقاظ
+        return max(0.0, self._timers[0][0] - time.monotonic())
+
+    def _run_timers(self):
+        now = time.monotonic()
+        while self._timers and self._timers[0][0] <= now:
+            _, _, handle = heapq.heappop(self._timers)
+            if not handle.cancelled:
+                handle.callback()
+
+    # --- الحلقة الرئيسية ---
+    def run(self):
+        """تشغيل الحلقة حتى الإيقاف؛ ترفع ConnectionError عند انقطاع الاتصال"""
+        while self.running:
+            self._drain_pending()
+            if not self.running:
+                break
+            events = self.selector.select(self._next_timeout())
+            for key, mask in events:
+                if key.fileobj is self._wake_r:
+                    try:
+                        while self._wake_r.recv(4096): pass
+                    except (BlockingIOError, OSError): pass
+                    continue
+                if mask & selectors.EVENT_READ:
+                    self._read_ready()
+                if mask & selectors.EVENT_WRITE and self.running:
+                    self._flush()
+            self._run_timers()
+
+    def _drain_pending(self):
+        with self._lock:
+            callbacks, self._callbacks = self._callbacks, deque()
+            while self._outbox:
+                self._out_buf += self._outbox.popleft()
+        for callback in callbacks:
+            callback()
+        if self._out_buf:
+            self._flush()
+
+    def write(self, data: bytes):
+        """إرسال من داخل خيط الحلقة"""
+        self._out_buf += data
+        self._flush()
+
+    def _flush(self):
+        try:
+            while self._out_buf:
+                sent = self.sock.send(self._out_buf)
+                del self._out_buf[:sent]
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            raise ConnectionError(f"send failed: {e}") from e
+        want_write = bool(self._out_buf)
+        if want_write != self._writing:
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if want_write else 0)
+            self.selector.modify(self.sock, events)
+            self._writing = want_write
+
+    def _read_ready(self):
+        while self.running:
+            try:
+                data = self.sock.recv(self.RECV_SIZE)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                raise ConnectionError(f"recv failed: {e}") from e
+            if not data:
+                raise ConnectionError("connection closed by peer")
+            for frame in self.decoder.feed(data):
+                if self.frame_handler is not None:
+                    self.frame_handler(frame)
+            if len(data) < self.RECV_SIZE:
+                return
+
+
+def classify_response(parsed_data) -> str | None:
+    """
+    تحديد نوع الرد لمطابقته مع الطلب المنتظر.
+    البروتوكول لا يحمل معرّف طلب، لذلك تتم المطابقة حسب نوع الرد وبترتيب الإرسال.
+    "ack" قد يكون أيضاً رد 1009 بدون رابط (انظر REPLY_KINDS).
+    """
+    if is_channel_list(parsed_data):
+        return "channel_list"
+    if isinstance(parsed_data, list) and parsed_data:
+        if all(isinstance(item, str) for item in parsed_data):
+            return "fav_groups"
+        parsed_data = parsed_data[0]
+    if not isinstance(parsed_data, dict):
+        return None
+    if all(k in parsed_data for k in ("ProductName", "SoftwareVersion", "SerialNumber")):
+        return "device_info"
+    if "favGroupNames" in parsed_data:
+        return "fav_groups"
+    if "url" in parsed_data:
+        return "stream_url"
+    if "success" in parsed_data:
+        return "ack"
+    return None
+
+
+# أنواع الطلبات التي قد يخصها الرد حسب شكله: {"success": ...} بدون url يأتي ردًا على
+# التعديلات وأيضاً على 1009 (قناة غير موجودة، أو بث RTSP بدون رابط)
+REPLY_KINDS = {"ack": ("ack", "stream_url")}
+
+
+def stream_url_request(service_id: str) -> bytes:
+    """أمر الانتقال إلى قناة (1009)؛ الجهاز يرد برابط البث"""
+    return build_message(f'{{"request":"1009", "TvState":"0", "ProgramId":"{service_id}"}}')
+
+
+def stream_url_matcher(service_id: str):
+    """
+    match لطلب 1009: هل الرقم في آخر الرابط (player.<id> أو prognumber=<id>) هو ServiceID المطلوب؟
+    يعيد None إذا لم يحمل الرد رابطاً برقم فلا يمكن الحكم.
+    """
+    wanted = str(service_id).lstrip("0") or "0"
+
+    def match(parsed_data) -> bool | None:
+        if isinstance(parsed_data, list) and parsed_data:
+            parsed_data = parsed_data[0]
+        url = parsed_data.get("url") if isinstance(parsed_data, dict) else None
+        found = re.search(r"(\d+)\D*$", url) if isinstance(url, str) else None
+        if found is None:
+            return None
+        return (found.group(1).lstrip("0") or "0") == wanted
+    return match
+
+
+def favorite_groups_from_reply(parsed_data) -> list | None:
+    """أسماء المجموعات المفضلة من رد الطلب 20 بأشكاله: {"favGroupNames": [...]}، [{...}]، أو قائمة نصوص"""
+    if isinstance(parsed_data, list) and parsed_data and all(isinstance(item, str) for item in parsed_data):
+        return list(parsed_data)
+    if isinstance(parsed_data, list) and parsed_data:
+        parsed_data = parsed_data[0]
+    if isinstance(parsed_data, dict) and "favGroupNames" in parsed_data:
+        return list(parsed_data["favGroupNames"] or [])
+    return None
+
+
+class LatencyHistogram:
+    """
+    نافذة متحركة لأزمنة الاستجابة (بالمللي ثانية) مع النسب المئوية p50/p95/p99.
+    آمنة للقراءة من خيط الواجهة أثناء الكتابة من خيط الإدخال/الإخراج.
+    """
+
+    def __init__(self, size: int = 120):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        self.last = None
+
+    def add(self, latency_ms: float):
+        with self._lock:
+            self._samples.append(latency_ms)
+            self.last = latency_ms
+
+    def add_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+            self.last = None
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self.timeouts = 0
+            self.last = None
+
+    @staticmethod
+    def _percentile(ordered: list, percent: float) -> float | None:
+        if not ordered:
+            return None
+        rank = max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1)) # nearest-rank
+        return ordered[rank]
+
+    def percentile(self, percent: float) -> float | None:
+        with self._lock:
+            ordered = sorted(self._samples)
+        return self._percentile(ordered, percent)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            ordered = sorted(self._samples)
+            last, timeouts = self.last, self.timeouts
+        return {
+            "count": len(ordered),
+            "last": last,
+            "min": ordered[0] if ordered else None,
+            "max": ordered[-1] if ordered else None,
+            "p50": self._percentile(ordered, 50),
+            "p95": self._percentile(ordered, 95),
+            "p99": self._percentile(ordered, 99),
+            "timeouts": timeouts,
+        }
+
+
+class PendingRequest:
+    __slots__ = ("message", "kind", "timeout", "match", "future", "timer", "sent_at", "seq", "late_until")
+
+    def __init__(self, message: bytes, kind: str, timeout: float, match=None):
+        self.message = message
+        self.kind = kind
+        self.timeout = timeout
+        self.match = match      # match(reply) -> True/False أو None إذا لا يمكن الحكم
+        self.future = Future()
+        self.timer = None
+        self.sent_at = None
+        self.seq = None         # ترتيب الإرسال على السلك
+        self.late_until = None  # بعد انتهاء المهلة: حتى متى قد يصل رده المتأخر
+
+
+class RequestTracker:
+    """
+    تتبع الطلبات المرسلة وربط كل رد بطلبه.
+    لكل طلب خانة انتظار ومهلة، ويتم حل الـ Future الخاص به عند وصول الرد المطابق،
+    مما يسمح بإرسال عدة طلبات دون انتظار رد كل منها (pipelining).
+    الطلبات من نفس النوع تُطابق بترتيب إرسالها (FIFO)، والرد الذي قد يخص أكثر من نوع
+    (REPLY_KINDS) يذهب لأقدم طلب منتظر منها. النوع "any" (لفحص زمن الاستجابة)
+    يكتمل بأول رد لا يخص طلباً آخر دون أن يستهلكه، فيبقى الرد متاحاً لبقية المعالجة.
+    الطلب الذي انتهت مهلته يبقى "متأخراً" لمهلة أخرى: رده إن وصل يُسقط بدل أن يُعطى
+    للطلب التالي من نوعه (بمطابقة match إن أمكن، وإلا بعدّ الطلبات المتأخرة).
+    عند اكتمال الطلب يحمل الـ Future الخاصية round_trip (بالثواني).
+    يعمل بالكامل داخل خيط StarsatTransport؛ فقط submit آمنة من الخيوط الأخرى.
+    """
+
+    DEFAULT_TIMEOUT = 10.0
+
+    def __init__(self, transport: StarsatTransport, default_timeout: float = DEFAULT_TIMEOUT):
+        self.transport = transport
+        self.default_timeout = default_timeout
+        self._pending = {}  # نوع الرد -> deque من PendingRequest
+        self._queued = set()  # طلبات لم يصل دورها في خيط الإدخال/الإخراج بعد
+        self._late = []  # طلبات انتهت مهلتها وقد يصل ردها لاحقاً
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.closed_error = None
+        self.dropped = 0  # ردود متأخرة أُسقطت
+
+    def submit(self, message: bytes, kind: str, timeout: float | None = None, callback=None,
+               match=None) -> Future:
+        """
+        إرسال طلب وانتظار رده؛ callback (إن وجد) يستدعى بالـ Future من خيط الإدخال/الإخراج.
+        match(reply) (اختياري) يميز رد هذا الطلب عن ردود طلبات أخرى من نفس النوع.
+        """
+        request = PendingRequest(message, kind, timeout or self.default_timeout, match)
+        if callback is not None:
+            request.future.add_done_callback(callback)
+        with self._lock:
+            if self.closed_error is not None:
+                request.future.set_exception(self.closed_error)
+                return request.future
+            self._queued.add(request)
+        self.transport.call_soon_threadsafe(lambda: self._start(request))
+        return request.future
+
+    def pending(self, kind: str | None = None) -> int:
+        if kind is not None:
+            return len(self._pending.get(kind, ()))
+        return sum(len(queue) for queue in self._pending.values())
+
+    def _start(self, request: PendingRequest):
+        with self._lock:
+            self._queued.discard(request)
+        if request.future.done() or not request.future.set_running_or_notify_cancel():
+            return # أُلغي قبل الإرسال
+        # التسجيل يسبق الإرسال حتى يكون ترتيب الخانات مطابقاً لترتيب الطلبات على السلك
+        self._pending.setdefault(request.kind, deque()).append(request)
+        request.timer = self.transport.call_later(request.timeout, lambda: self._expire(request))
+        request.sent_at = time.monotonic()
+        request.seq = next(self._seq)
+        try:
+            self.transport.write(request.message)
+        except ConnectionError as e:
+            self._finish(request, error=e)
+            raise
+
+    def _expire(self, request: PendingRequest):
+        if request.kind != "any":
+            request.late_until = time.monotonic() + request.timeout
+            self._late.append(request)
+        self._finish(request, error=TimeoutError(f"no response to '{request.kind}' request within {request.timeout:g}s"))
+
+    def _finish(self, request: PendingRequest, result=None, error: Exception | None = None):
+        queue = self._pending.get(request.kind)
+        if queue is not None:
+            try: queue.remove(request)
+            except ValueError: return # تم حله مسبقاً
+        if request.timer is not None:
+            request.timer.cancel()
+        if request.sent_at is not None:
+            request.future.round_trip = time.monotonic() - request.sent_at
+        if error is not None:
+            request.future.set_exception(error)
+        else:
+            request.future.set_result(result)
+
+    def resolve(self, parsed_data) -> bool:
+        """تمرير رد مستلم؛ يعيد True إذا كان يخص طلباً منتظراً (أو طلباً انتهت مهلته)"""
+        kind = classify_response(parsed_data)
+        kinds = REPLY_KINDS.get(kind, (kind,))
+        heads = [queue[0] for queue in (self._pending.get(k) for k in kinds) if queue]
+        head = min(heads, key=lambda request: request.seq) if heads else None
+        if self._drop_late(kinds, head, parsed_data):
+            return True
+        if head is not None:
+            self._finish(head, result=parsed_data)
+            return True
+        observers = self._pending.get("any")
+        if observers:
+            self._finish(observers[0], result=parsed_data)
+        return False
+
+    def _drop_late(self, kinds, head: PendingRequest | None, parsed_data) -> bool:
+        """هل الرد متأخر لطلب انتهت مهلته؟ إن كان كذلك يُحذف ذلك الطلب من قائمة المتأخرة"""
+        now = time.monotonic()
+        self._late = [request for request in self._late if request.late_until > now]
+        late = [request for request in self._late if request.kind in kinds]
+        if not late:
+            return False
+        verdict = head.match(parsed_data) if head is not None and head.match is not None else None
+        if verdict:
+            return False
+        # الرد الذي يعرّف طلبه (مثل ServiceID في الرابط) يُنسب لذلك الطلب المتأخر،
+        # وإلا فهو رد أقدم طلب متأخر لأن الجهاز يرد بترتيب الطلبات
+        owner = next((request for request in late
+                      if request.match is not None and request.match(parsed_data)), late[0])
+        self._late.remove(owner)
+        self.dropped += 1
+        logging.info(f"dropping late reply to timed-out '{owner.kind}' request")
+        return True
+
+    def fail_all(self, error: Exception):
+        """إفشال كل الطلبات المنتظرة (مثلاً عند انقطاع الاتصال)"""
+        with self._lock:
+            self.closed_error = error
+            queued, self._queued = self._queued, set()
+        for request in queued:
+            if request.future.set_running_or_notify_cancel():
+                request.future.set_exception(error)
+        self._late = []
+        pending, self._pending = self._pending, {}
+        for queue in pending.values():
+            for request in queue:
+                if request.timer is not None:
+                    request.timer.cancel()
+                if not request.future.done():
+                    request.future.set_exception(error)
+
+
+def key_message(key_value: str) -> bytes:
+    """أمر ضغط مفتاح ريموت (1040)"""
+    return build_message(f'{{"array":[{{"KeyValue":"{key_value}"}}],"request":"1040"}}')
+
+
+class KeySequencer:
+    """
+    إرسال تسلسل مفاتيح ريموت (مثل أرقام القناة) من خيط الإدخال/الإخراج بفاصل زمني بينها،
+    بدل sleep في خيط الواجهة.
+    - start() يعيد Future: True عند إرسال كل المفاتيح، False إذا أُلغي أو حل محله تسلسل أحدث،
+      و ConnectionError عند انقطاع الاتصال
+    - تسلسل جديد يحل محل السابق غير المكتمل فلا تتداخل أرقام قناتين على الجهاز
+    start و cancel آمنتان من أي خيط؛ الباقي داخل خيط StarsatTransport.
+    """
+
+    def __init__(self, transport: StarsatTransport):
+        self.transport = transport
+        self._lock = threading.Lock()
+        self._generation = 0   # رقم آخر تسلسل طُلب (أي تسلسل أقدم منه مستبدل)
+        self._active = None    # [generation, deque المفاتيح, الفاصل, Future, TimerHandle]
+        self.closed_error = None
+
+    def start(self, keys, interval: float = 0.4) -> Future:
+        future = Future()
+        with self._lock:
+            if self.closed_error is not None:
+                future.set_exception(self.closed_error)
+                return future
+            self._generation += 1
+            generation = self._generation
+        keys = deque(keys)
+        self.transport.call_soon_threadsafe(lambda: self._begin(generation, keys, interval, future))
+        return future
+
+    def cancel(self):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        self.transport.call_soon_threadsafe(lambda: self._stop_older(generation))
+
+    def fail_all(self, error: Exception):
+        """عند انقطاع الاتصال: المؤقتات لن تعمل بعد الآن"""
+        with self._lock:
+            self.closed_error = error
+        active, self._active = self._active, None
+        if active is not None and not active[3].done():
+            active[3].set_exception(error)
+
+    def _begin(self, generation: int, keys: deque, interval: float, future: Future):
+        self._stop_older(generation)
+        if generation != self._generation:
+            future.set_result(False)  # حل محله تسلسل أحدث قبل أن يبدأ
+            return
+        self._active = [generation, keys, interval, future, None]
+        self._send_next()
+
+    def _stop_older(self, generation: int):
+        active = self._active
+        if active is not None and active[0] < generation:
+            self._active = None
+            if active[4] is not None:
+                active[4].cancel()
+            active[3].set_result(False)
+
+    def _send_next(self):
+        active = self._active
+        if active is None:
+            return
+        _, keys, interval, future, _ = active
+        if keys:
+            try:
+                self.transport.write(key_message(keys.popleft()))
+            except ConnectionError as e:
+                self.fail_all(e)
+                raise
+        if keys:
+            active[4] = self.transport.call_later(interval, self._send_next)
+        else:
+            self._active = None
+            future.set_result(True)
+
+
+def channel_range_request(from_index: int, to_index: int) -> bytes:
+    return build_message(f'{{"request":"0", "FromIndex":"{from_index}", "ToIndex":"{to_index}"}}')
+
+
+class ChannelFetchPipeline:
+    """
+    جلب قائمة القنوات كاملة على شكل نطاقات FromIndex/ToIndex مع إبقاء window طلبات معلقة.
+    النتائج تُسلَّم بالترتيب مهما كان ترتيب اكتمالها.
+    العدد الكلي (ChannelNum من معلومات الجهاز) إن كان معروفاً يحدد النطاقات مسبقاً،
+    ونهاية القائمة الفعلية تُعرف من أول دفعة ناقصة.
+
+    submit(message, callback) يرسل الطلب ويستدعي callback(future) عند وصول الرد؛
+    كل دوال الأنبوب يجب أن تُستدعى من نفس الخيط الذي تصل فيه الردود.
+    """
+
+    def __init__(self, submit, batch_size: int, window: int = 4, total: int | None = None,
+                 start: int = 0, on_batch=None, on_done=None, on_error=None):
+        self.submit = submit
+        self.batch_size = max(1, batch_size)
+        self.window = max(1, window)
+        self.total = total if total and total > 0 else None
+        self.next_from = start        # بداية النطاق التالي الذي سيُطلب
+        self.deliver_from = start     # بداية النطاق التالي الذي سيُسلَّم بالترتيب
+        self.received = 0             # عدد القنوات المسلّمة في هذا الجلب
+        self.on_batch = on_batch      # on_batch(channels, from_index)
+        self.on_done = on_done        # on_done(received)
+        self.on_error = on_error      # on_error(error, from_index)
+        self.end_at = None            # نهاية القائمة الفعلية عند اكتشافها
+        self._outstanding = {}        # بداية النطاق -> نهايته (غير شاملة)
+        self._completed = {}          # بداية النطاق -> (نهايته, القنوات)
+        self.running = False
+
+    @property
+    def limit(self) -> int | None:
+        return self.end_at if self.end_at is not None else self.total
+
+    def start(self):
+        self.running = True
+        self._fill()
+        if not self._outstanding:
+            self._finish()
+
+    def cancel(self):
+        self.running = False
+        self._outstanding.clear()
+        self._completed.clear()
+
+    def _fill(self):
+        while self.running and len(self._outstanding) < self.window:
+            limit = self.limit
+            if limit is not None and self.next_from >= limit:
+                break
+            from_index = self.next_from
+            end = from_index + self.batch_size if limit is None else min(from_index + self.batch_size, limit)
+            self.next_from = end
+            self._outstanding[from_index] = end
+            self.submit(channel_range_request(from_index, end - 1),
+                        lambda f, from_index=from_index: self._on_response(from_index, f))
+
+    def _on_response(self, from_index: int, future):
+        if not self.running or from_index not in self._outstanding:
+            return
+        end = self._outstanding.pop(from_index)
+        error = future.exception()
+        if error is not None:
+            self.cancel()
+            if self.on_error:
+                self.on_error(error, from_index)
+            return
+        channels = (future.result() or [])[:end - from_index]
+        if len(channels) < end - from_index:
+            # دفعة ناقصة: هنا تنتهي القائمة (قد يكون ChannelNum أكبر من العدد الفعلي)
+            if self.end_at is None or from_index + len(channels) < self.end_at:
+                self.end_at = from_index + len(channels)
+        elif self.end_at is None and self.total is not None and end >= self.total:
+            self.total = None # ChannelNum قديم والقائمة أطول منه: متابعة حتى أول دفعة ناقصة
+        self._completed[from_index] = (end, channels)
+        self._deliver()
+        if self.running:
+            self._fill()
+            if not self._outstanding:
+                self._finish()
+
+    def _deliver(self):
+        while self.running and self.deliver_from in self._completed:
+            from_index = self.deliver_from
+            self.deliver_from, channels = self._completed.pop(from_index)
+            if self.end_at is not None:
+                channels = channels[:max(0, self.end_at - from_index)]
+            self.received += len(channels)
+            if channels and self.on_batch:
+                self.on_batch(channels, from_index)
+
+    def _finish(self):
+        self.running = False
+        self._completed.clear()
+        if self.on_done:
+            self.on_done(self.received)
+
+
+class ReconnectSupervisor:
+    """
+    جدولة محاولات إعادة الاتصال بتأخير أسي مع jitter عشوائي.
+    الانتظار يتم عبر threading.Event، لذلك cancel() ينهيه فوراً من أي خيط.
+    """
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 30.0, factor: float = 2.0,
+                 jitter: float = 0.5, max_attempts: int = 5):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter              # نسبة العشوائية حول التأخير (0.5 = ±50%)
+        self.max_attempts = max_attempts  # 0 = تعطيل إعادة الاتصال
+        self.attempts = 0
+        self._cancelled = threading.Event()
+
+    def reset(self):
+        """بعد اتصال ناجح: العودة لأقصر تأخير"""
+        self.attempts = 0
+
+    def next_delay(self) -> float | None:
+        """تأخير المحاولة التالية، أو None إذا استُنفدت المحاولات"""
+        if self.cancelled or self.attempts >= self.max_attempts:
+            return None
+        delay = min(self.max_delay, self.base_delay * (self.factor ** self.attempts))
+        self.attempts += 1
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def wait(self, delay: float) -> bool:
+        """الانتظار حتى موعد المحاولة؛ يعيد False إذا أُلغي الانتظار"""
+        return not self._cancelled.wait(delay)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def rearm(self):
+        self._cancelled.clear()
+        self.attempts = 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
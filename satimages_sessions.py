@@ -0,0 +1,562 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from satimages_channels import ChannelMoveBatch, ChannelRowFormatter, ChannelStore, UNKNOWN_ID, favorite_group_names
+from satimages_edits import ChannelEditQueue, EditRejected, EditTransaction, EditUnconfirmed
+from satimages_export import export_channels
+from satimages_protocol import (
+    build_message, decode_payload, favorite_groups_from_reply, generate_handshake, ChannelFetchPipeline,
+    KeySequencer, RequestTracker, StarsatTransport, stream_url_matcher, stream_url_request
+)
+from satimages_urls import UrlRefreshPlan, probe_all, stream_url_from_reply
+
+# ✅ إدارة عدة أجهزة في نفس الوقت:
+# - لكل جهاز جلسة ReceiverSession بنقل StarsatTransport وحلقة أحداث في خيط خاص بها
+# - كل عملية على الجلسة (معلومات الجهاز، المجموعات المفضلة، جلب القنوات، التعديلات، التصدير) تعيد Future
+# - ReceiverManager يشغّل نفس العملية على الأجهزة المحددة بالتوازي مع تقدم لكل جهاز،
+#   وفشل جهاز لا يوقف البقية: نتيجته في القاموس المجمع هي الخطأ نفسه
+# لا يعتمد على Qt حتى يُستخدم من الواجهة ومن الأدوات بدون واجهة
+
+DEFAULT_RECEIVER_PORT = 20000
+DEVICE_INFO_REQUEST = "16"
+FAV_GROUPS_REQUEST = "20"
+HANDSHAKE_DELAY = 0.1  # مهلة معالجة المصافحة قبل أول طلب (كما في NetworkThread)
+
+
+def then(future: Future, fn) -> Future:
+    """
+    Future بنتيجة fn(result) بعد اكتمال future؛ إذا أعادت fn بدورها Future يُنتظر هو أيضاً.
+    الخطأ يمر كما هو دون استدعاء fn.
+    """
+    out = Future()
+
+    def settle(source: Future):
+        try:
+            error = source.exception()
+        except BaseException as e:  # CancelledError
+            error = e
+        if error is not None:
+            out.set_exception(error)
+        else:
+            out.set_result(source.result())
+
+    def first_done(source: Future):
+        try:
+            error = source.exception()
+        except BaseException as e:
+            error = e
+        if error is not None:
+            out.set_exception(error)
+            return
+        try:
+            result = fn(source.result())
+        except Exception as e:
+            out.set_exception(e)
+            return
+        if isinstance(result, Future):
+            result.add_done_callback(settle)
+        else:
+            out.set_result(result)
+
+    future.add_done_callback(first_done)
+    return out
+
+
+def in_thread(fn, name: str = None) -> Future:
+    """تشغيل عمل طويل (كتابة ملف) في خيط مستقل حتى لا يوقف حلقة أحداث الجلسة"""
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
+
+
+class ReceiverSession:
+    """
+    اتصال واحد بجهاز: المصافحة وحلقة الأحداث في خيط خاص، وكل عملية تعيد Future.
+    الدوال العامة آمنة من أي خيط؛ callbacks التقدم تُستدعى من خيط الجلسة.
+    الجلسة لا تعيد الاتصال تلقائياً: open() بعد الانقطاع يبدأ اتصالاً جديداً.
+    """
+
+    def __init__(self, ip: str, port, name: str = None, timeout: float = 10):
+        self.ip, self.port = ip, int(port)
+        self.name = name or ip
+        self.timeout = timeout
+        self.state = "idle"  # idle / connecting / connected / disconnected
+        self.error = None    # سبب آخر انقطاع
+        self.transport = self.tracker = self.key_sequencer = None
+        self.device_info = None
+        self.favorite_groups = []
+        self.channels = None  # ChannelStore من آخر جلب كامل
+        self.on_push = None   # on_push(session, parsed) لما يرسله الجهاز دون طلب (من خيط الجلسة)
+        self.on_state = None  # on_state(session) عند الاتصال والانقطاع
+        self._lock = threading.Lock()
+        self._ready = None
+        self._closing = False
+
+    @property
+    def key(self) -> str:
+        return f"{self.ip}:{self.port}"
+
+    @property
+    def connected(self) -> bool:
+        return self.state == "connected"
+
+    # --- الاتصال ---
+    def open(self) -> Future:
+        """بدء الاتصال إن لم يكن قائماً؛ Future يكتمل بالجلسة بعد المصافحة"""
+        with self._lock:
+            if self.state in ("connecting", "connected"):
+                return self._ready
+            self._ready = ready = Future()
+            self.state = "connecting"
+            self._closing = False
+        threading.Thread(target=self._run, args=(ready,), name=f"receiver-{self.key}", daemon=True).start()
+        return ready
+
+    def close(self):
+        with self._lock:
+            self._closing = True
+            transport = self.transport
+        if transport is not None:
+            transport.stop()
+
+    def _run(self, ready: Future):
+        transport = StarsatTransport(self.ip, self.port, self._handle_frame)
+        try:
+            transport.open(timeout=self.timeout)
+        except OSError as e:
+            self._finished(ready, ConnectionError(f"{self.key}: {e}"))
+            return
+        tracker, key_sequencer = RequestTracker(transport), KeySequencer(transport)
+        with self._lock:
+            self.transport, self.tracker, self.key_sequencer = transport, tracker, key_sequencer
+            closing = self._closing
+        error = ConnectionAbortedError(f"{self.key}: session closed")
+        try:
+            if not closing:
+                transport.write(generate_handshake())
+                transport.call_later(HANDSHAKE_DELAY, lambda: self._handshake_done(ready))
+                transport.run()
+        except ConnectionError as e:
+            error = e
+            logging.warning(f"receiver {self.key}: connection lost: {e}")
+        except Exception as e:
+            error = ConnectionError(f"{self.key}: {e}")
+            logging.error(f"receiver {self.key}: unexpected error: {e}")
+        finally:
+            tracker.fail_all(error)
+            key_sequencer.fail_all(error)
+            transport.close()
+            self._finished(ready, error)
+
+    def _handshake_done(self, ready: Future):
+        with self._lock:
+            self.state = "connected"
+            self.error = None
+        ready.set_result(self)
+        if self.on_state is not None:
+            self.on_state(self)
+
+    def _finished(self, ready: Future, error: Exception):
+        with self._lock:
+            self.state = "disconnected"
+            self.error = None if self._closing else error
+            self.transport = None
+        if not ready.done():
+            ready.set_exception(error)
+        if self.on_state is not None:
+            self.on_state(self)
+
+    def _handle_frame(self, frame):
+        if frame.kind == "raw":
+            return  # الأجهزة القديمة بلا تأطير مدعومة في الاتصال الرئيسي فقط
+        _, _, parsed_data = frame.decoded or decode_payload(frame.payload)
+        if parsed_data is not None and not self.tracker.resolve(parsed_data) and self.on_push is not None:
+            self.on_push(self, parsed_data)
+
+    # --- الطلبات ---
+    def request(self, message: bytes, kind: str, timeout: float | None = None, callback=None,
+                match=None) -> Future:
+        tracker = self.tracker
+        if tracker is None or not self.connected:
+            future = Future()
+            future.set_exception(ConnectionError(f"{self.key}: not connected"))
+            return future
+        return tracker.submit(message, kind, timeout, callback, match)
+
+    def send(self, message: bytes):
+        """إرسال أمر لا ينتظر رداً"""
+        transport = self.transport
+        if transport is None or not self.connected:
+            raise ConnectionError(f"{self.key}: not connected")
+        transport.send(message)
+
+    def send_key_sequence(self, keys, interval: float = 0.4) -> Future:
+        if self.key_sequencer is None or not self.connected:
+            future = Future()
+            future.set_exception(ConnectionError(f"{self.key}: not connected"))
+            return future
+        return self.key_sequencer.start(keys, interval)
+
+    def read_device_info(self) -> Future:
+        def store(reply):
+            if isinstance(reply, list) and reply:
+                reply = reply[0]
+            self.device_info = reply
+            return reply
+        return then(self.request(build_message(f'{{"request":"{DEVICE_INFO_REQUEST}"}}'), "device_info"), store)
+
+    def read_favorite_groups(self) -> Future:
+        def store(reply):
+            groups = favorite_groups_from_reply(reply)
+            if groups is None:
+                raise ValueError(f"{self.key}: unexpected favourite groups reply: {reply!r:.200}")
+            self.favorite_groups = groups
+            return groups
+        return then(self.request(build_message(f'{{"request":"{FAV_GROUPS_REQUEST}"}}'), "fav_groups"), store)
+
+    def fetch_channels(self, batch_size: int = 250, window: int = 4, progress=None) -> Future:
+        """
+        جلب القائمة كاملة بنفس أنبوب الواجهة (ChannelFetchPipeline) داخل خيط الجلسة.
+        العدد الكلي من ChannelNum؛ progress(received, total) بعد كل دفعة (total = 0 إذا كان مجهولاً).
+        """
+        def start(info):
+            future = Future()
+            store = ChannelStore()
+            try:
+                total = int(info.get("ChannelNum"))
+            except (AttributeError, TypeError, ValueError):
+                total = 0
+
+            def on_batch(channels, from_index):
+                store.extend(channels)
+                if progress is not None:
+                    expected = pipeline.limit or total
+                    progress(len(store), max(expected, len(store)) if expected else 0)
+
+            def on_done(received):
+                self.channels = store
+                future.set_result(store)
+
+            pipeline = ChannelFetchPipeline(
+                lambda message, callback: self.tracker.submit(message, "channel_list", callback=callback),
+                batch_size, window, total or None, on_batch=on_batch, on_done=on_done,
+                on_error=lambda error, from_index: future.set_exception(error))
+            self.transport.call_soon_threadsafe(pipeline.start)
+            return future
+        return then(self.read_device_info(), start)
+
+    def apply_edits(self, edit, progress=None) -> Future:
+        """
+        تطبيق تعديل على الجهاز كمعاملة واحدة عبر ChannelEditQueue.
+        edit(transaction, store) يملأ المعاملة حسب قائمة هذا الجهاز (تُجلب أولاً إن لم تكن موجودة)،
+        لأن نفس القناة قد تكون مقفلة على جهاز ومفتوحة على آخر.
+        الـ Future يكتمل بالمعاملة، أو بـ EditRejected إذا رفض الجهاز أي طلب،
+        أو بـ EditUnconfirmed إذا لم يصل رد بعض الطلبات (القائمة تُجلب من جديد في العملية التالية).
+        progress يخص جلب القائمة فقط عند الحاجة إليه.
+        """
+        def start(store):
+            future = Future()
+
+            def done(transaction: EditTransaction):
+                self._apply_to_store(transaction)
+                if transaction.rejected:
+                    future.set_exception(EditRejected("; ".join(str(e) for e in transaction.rejected.values())))
+                elif transaction.unconfirmed:
+                    future.set_exception(EditUnconfirmed("; ".join(str(e) for e in transaction.unconfirmed.values())))
+                else:
+                    future.set_result(transaction)
+
+            def run():
+                # داخل خيط الجلسة: المعاملة وردودها في نفس الخيط كما يشترط ChannelEditQueue
+                try:
+                    queue = ChannelEditQueue(
+                        lambda message, callback: self.tracker.submit(message, "ack", callback=callback),
+                        on_done=done)
+                    edit(queue.transaction(), store)
+                    queue.flush()
+                except Exception as e:
+                    future.set_exception(e)
+            self.transport.call_soon_threadsafe(run)
+            return future
+        if self.channels is None:
+            return then(self.fetch_channels(progress=progress), start)
+        return start(self.channels)
+
+    def _apply_to_store(self, transaction: EditTransaction):
+        """إبقاء القائمة المحلية مطابقة للجهاز بعد الطلبات المقبولة فقط"""
+        store = self.channels
+        if store is None:
+            return
+        acknowledged = set(transaction.acknowledged)
+        if "1005" in acknowledged or transaction.unconfirmed:
+            self.channels = None  # الترتيب تغير أو الحالة مجهولة على الجهاز: الجلب التالي يعيد بناء القائمة
+            return
+        if "1001" in acknowledged:
+            for sid, name in transaction.names.items():
+                row = store.row_for_service_id(sid)
+                if row >= 0:
+                    store.set_name(row, name)
+        if "1003" in acknowledged:
+            for sid, locked in transaction.locks.items():
+                row = store.row_for_service_id(sid)
+                if row >= 0:
+                    store.set_flag(row, ChannelStore.LOCKED, locked)
+        if "1002" in acknowledged:
+            rows = sorted((store.row_for_service_id(sid) for sid in transaction.deleted), reverse=True)
+            for row in rows:
+                if row >= 0:
+                    store.remove(row, row)
+
+    def export(self, kind: str, path: str, progress=None, cancelled: threading.Event = None) -> Future:
+        """
+        تصدير قائمة هذا الجهاز (المجموعات المفضلة ثم القنوات إن لم تُجلب) إلى ملف؛
+        الكتابة في خيط مستقل، والـ Future يكتمل بعدد الصفوف أو None عند الإلغاء.
+        """
+        def write(store):
+            groups = list(self.favorite_groups)
+            source = ChannelRowFormatter(store.copy(), receiver_ip=self.ip,
+                                         favorite_group_names=lambda fav_bit: favorite_group_names(fav_bit, groups))
+            return in_thread(lambda: export_channels(kind, path, source, progress, cancelled),
+                             name=f"export-{self.key}")
+
+        def channels(_):
+            if self.channels is not None:
+                return write(self.channels)
+            return then(self.fetch_channels(), write)
+        return then(self.read_favorite_groups(), channels)
+
+
+    def refresh_urls(self, progress=None, interval: float = 0.05, cancelled: threading.Event = None) -> Future:
+        """
+        روابط البث لكل القنوات بخطة UrlRefreshPlan (عينة، تحقق متوازٍ، ثم طلب ما فشل فقط)
+        في خيط مستقل لأن التقليب طلب بعد طلب. النتيجة {ServiceID: الرابط} وتُحفظ في القائمة أيضاً.
+        """
+        def zap(service_id: str):
+            try:
+                reply = self.request(stream_url_request(service_id), "stream_url",
+                                     match=stream_url_matcher(service_id)).result()
+                return stream_url_from_reply(reply, service_id, self.ip)
+            except (ConnectionError, TimeoutError) as e:
+                if not self.connected:
+                    raise
+                logging.warning(f"receiver {self.key}: no stream url for {service_id}: {e}")
+                return None
+
+        def run(store: ChannelStore) -> dict:
+            plan = UrlRefreshPlan([sid for sid in store.service_ids if sid != UNKNOWN_ID], self.ip)
+            urls = {}
+            while plan.phase != "done" and not (cancelled is not None and cancelled.is_set()):
+                if plan.phase == "probe":
+                    for service_id, url, ok in probe_all(plan.probe_candidates(), cancelled=cancelled):
+                        plan.record_probe(service_id, ok)
+                        if ok:
+                            urls[service_id] = url
+                        if progress is not None:
+                            progress(plan.done, plan.total)
+                    plan.finish_probe()
+                    continue
+                service_id = plan.next_zap()
+                if service_id is None:
+                    break
+                url = zap(service_id)
+                plan.record_zap(service_id, url)
+                if url:
+                    urls[service_id] = url
+                if progress is not None:
+                    progress(plan.done, plan.total)
+                time.sleep(interval)
+            for service_id, url in urls.items():
+                row = store.row_for_service_id(service_id)
+                if row >= 0:
+                    store.set_url(row, url)
+            return urls
+
+        def start(store):
+            return in_thread(lambda: run(store), name=f"urls-{self.key}")
+        if self.channels is None:
+            return then(self.fetch_channels(), start)
+        return start(self.channels)
+
+
+class ReceiverResults(dict):
+    """{مفتاح الجهاز: النتيجة أو الخطأ} لعملية شُغّلت على عدة أجهزة"""
+
+    @property
+    def succeeded(self) -> dict:
+        return {key: result for key, result in self.items() if not isinstance(result, BaseException)}
+
+    @property
+    def failed(self) -> dict:
+        return {key: result for key, result in self.items() if isinstance(result, BaseException)}
+
+    def summary(self) -> str:
+        return f"✅ {len(self.succeeded)} ❌ {len(self.failed)}"
+
+
+class ReceiverManager:
+    """
+    جلسات مفتوحة لعدة أجهزة (مفتاح كل جلسة ip:port) تبقى مفتوحة بين العمليات،
+    وتشغيل عملية واحدة على مجموعة منها بالتوازي.
+    الأجهزة بنفس شكل connected_devices في الإعدادات: {'name', 'ip', 'port'}.
+    """
+
+    def __init__(self, timeout: float = 10):
+        self.timeout = timeout
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def session(self, device: dict) -> ReceiverSession:
+        key = f"{device['ip']}:{int(device['port'])}"
+        with self._lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = self.sessions[key] = ReceiverSession(
+                    device["ip"], device["port"], device.get("name"), self.timeout)
+            elif device.get("name"):
+                session.name = device["name"]
+            return session
+
+    def close(self, device: dict):
+        with self._lock:
+            session = self.sessions.pop(f"{device['ip']}:{int(device['port'])}", None)
+        if session is not None:
+            session.close()
+
+    def close_all(self):
+        with self._lock:
+            sessions, self.sessions = list(self.sessions.values()), {}
+        for session in sessions:
+            session.close()
+
+    def run(self, devices, operation, progress=None, on_result=None) -> Future:
+        """
+        operation(session, progress) -> Future لكل جهاز بعد فتح جلسته، وكل الأجهزة بالتوازي.
+        progress(key, done, total) و on_result(key, result_or_error) تُستدعى من خيوط الجلسات.
+        الـ Future المعاد يكتمل بـ ReceiverResults بعد انتهاء كل الأجهزة (ولا يفشل هو نفسه).
+        """
+        sessions = [self.session(device) for device in devices]
+        results = ReceiverResults()
+        aggregate = Future()
+        remaining = [len(sessions)]
+        lock = threading.Lock()
+        if not sessions:
+            aggregate.set_result(results)
+            return aggregate
+
+        def finished(key: str, future: Future):
+            try:
+                result = future.result()
+            except BaseException as e:
+                result = e
+                logging.warning(f"receiver {key}: {e}")
+            if on_result is not None:
+                on_result(key, result)
+            with lock:
+                results[key] = result
+                remaining[0] -= 1
+                complete = remaining[0] == 0
+            if complete:
+                aggregate.set_result(results)
+
+        for session in sessions:
+            report = None
+            if progress is not None:
+                report = lambda done, total, key=session.key: progress(key, done, total)
+            future = then(session.open(), lambda session, report=report: operation(session, report))
+            future.add_done_callback(lambda f, key=session.key: finished(key, f))
+        return aggregate
+
+
+def parse_receiver(text: str) -> dict:
+    """"name=ip:port" أو "ip:port" أو "ip" (المنفذ الافتراضي 20000) بشكل connected_devices"""
+    name, _, address = text.rpartition("=")
+    ip, _, port = address.strip().partition(":")
+    if not ip:
+        raise ValueError(f"invalid receiver: {text!r}")
+    return {"name": name.strip() or ip, "ip": ip, "port": int(port or DEFAULT_RECEIVER_PORT)}
+
+
+# --- عمليات جاهزة للتشغيل عبر ReceiverManager.run ---
+def connect_operation():
+    return lambda session, progress: session.read_device_info()
+
+
+def fetch_operation(batch_size: int = 250, window: int = 4):
+    return lambda session, progress: session.fetch_channels(batch_size, window, progress)
+
+
+def favorite_groups_operation():
+    return lambda session, progress: session.read_favorite_groups()
+
+
+def export_operation(kind: str, path_for, cancelled: threading.Event = None):
+    """path_for(session) يحدد ملف كل جهاز"""
+    return lambda session, progress: session.export(kind, path_for(session), progress, cancelled)
+
+
+def delete_edit(service_ids):
+    service_ids = [str(sid) for sid in service_ids]
+
+    def edit(transaction: EditTransaction, store: ChannelStore):
+        for sid in service_ids:
+            if store.row_for_service_id(sid) >= 0:
+                transaction.delete(sid)
+    return edit
+
+
+def rename_edit(names: dict):
+    names = {str(sid): name for sid, name in names.items()}
+
+    def edit(transaction: EditTransaction, store: ChannelStore):
+        for sid, name in names.items():
+            if store.row_for_service_id(sid) >= 0:
+                transaction.rename(sid, name)
+    return edit
+
+
+def lock_edit(service_ids, locked: bool):
+    """1003 يبدّل الحالة، فالقناة تُرسل فقط إذا اختلفت حالتها على هذا الجهاز عن المطلوب"""
+    service_ids = [str(sid) for sid in service_ids]
+
+    def edit(transaction: EditTransaction, store: ChannelStore):
+        for sid in service_ids:
+            row = store.row_for_service_id(sid)
+            if row >= 0:
+                transaction.set_locked(sid, locked, store.has(row, ChannelStore.LOCKED))
+    return edit
+
+
+def move_edit(moves):
+    """
+    moves: [(ServiceID, الموقع الجديد بدءاً من 1)] تُطبق بالترتيب، وكل نقل طلب 1005 في نفس المعاملة.
+    الجهاز يضع القناة قبل القناة الهدف؛ ChannelMoveBatch.move_row يختار الهدف المناسب لكل اتجاه.
+    """
+    moves = [(str(sid), int(position)) for sid, position in moves]
+
+    def edit(transaction: EditTransaction, store: ChannelStore):
+        batch = ChannelMoveBatch(store.service_ids)
+        last = len(store) - 1
+        for sid, position in moves:
+            row = store.row_for_service_id(sid)
+            if row >= 0:
+                batch.move_row(batch.order.index(row), min(max(position - 1, 0), last))
+        if batch:
+            transaction.move(batch.blocks, [store.service_ids[row] for row in batch.order])
+    return edit
+
+
+def urls_operation(interval: float = 0.05, cancelled: threading.Event = None):
+    return lambda session, progress: session.refresh_urls(progress, interval, cancelled)
+
+
+def edit_operation(edit):
+    return lambda session, progress: session.apply_edits(edit, progress)
@@ -0,0 +1,245 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from satimages_channels import ChannelStore
+
+# ✅ لقطة قنوات ثنائية مضغوطة (.ssnp) بديلة لـ JSON المنسق:
+#   [رأس] [سجلات ثابتة الطول] [أرقام PID الصوت] [جدول النصوص UTF-8] [فهرس ServiceID] [تذييل]
+# التذييل في آخر الملف يحدد مواضع الأقسام، فيُفتح الملف عبر mmap ولا يُفك إلا الصف المطلوب
+# لا يعتمد على Qt حتى يُستخدم من الواجهة ومن الأدوات بدون واجهة
+
+MAGIC = b"SSNP"
+FOOTER_MAGIC = b"SSNE"
+VERSION = 1
+SNAPSHOT_EXTENSION = ".ssnp"
+
+HEADER = struct.Struct("<4sHH")  # magic, version, reserved
+# name_off, name_len, sid_off, sid_len, extra_off, extra_len, ServiceIndex, VideoPID, PMTPID, FavBit,
+# flags (بتات ChannelStore), audio_off, audio_count
+RECORD = struct.Struct("<IHIHIIiiiQHIH")
+AUDIO = struct.Struct("<i")
+INDEX = struct.Struct("<I")
+# records_off, count, record_size, audio_off, audio_count, strings_off, strings_len, index_off,
+# favorites_off, favorites_len, magic
+FOOTER = struct.Struct("<QIHQIQQQII4s")
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def is_snapshot(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def write_snapshot(path: str, channels, favorites=()) -> int:
+    """كتابة لقطة من ChannelStore (أو قائمة قواميس القنوات)؛ يعيد عدد القنوات"""
+    store = channels if isinstance(channels, ChannelStore) else ChannelStore(channels)
+    strings = bytearray()
+    offsets = {}
+
+    def intern(text: str) -> tuple:
+        # النصوص المكررة (أسماء متشابهة، معرفات) تُخزن مرة واحدة
+        if text not in offsets:
+            encoded = text.encode("utf-8")
+            offsets[text] = (len(strings), len(encoded))
+            strings.extend(encoded)
+        return offsets[text]
+
+    count = len(store)
+    records = bytearray(RECORD.size * count)
+    for row in range(count):
+        name_off, name_len = intern(store.names[row])
+        sid_off, sid_len = intern(store.service_ids[row])
+        extra_off = extra_len = 0
+        if store.extras[row]:
+            extra_off, extra_len = intern(json.dumps(store.extras[row], ensure_ascii=False))
+        RECORD.pack_into(records, row * RECORD.size, name_off, name_len, sid_off, sid_len, extra_off, extra_len,
+                         store.service_indexes[row], store.video_pids[row], store.pmt_pids[row],
+                         store.fav_bits[row], store.flags[row] & ~ChannelStore.SELECTED & 0xFFFF,
+                         store.audio_offsets[row], store.audio_count(row))
+    favorites_off, favorites_len = intern(json.dumps(list(favorites), ensure_ascii=False))
+    audio = array("i", store.audio_pids)
+    index = array("I", sorted(range(count), key=store.service_ids.__getitem__))
+    if struct.pack("=H", 1) != struct.pack("<H", 1):
+        audio.byteswap()
+        index.byteswap()
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0))
+        records_off = f.tell()
+        f.write(records)
+        audio_off = f.tell()
+        f.write(audio.tobytes())
+        strings_off = f.tell()
+        f.write(strings)
+        index_off = f.tell()
+        f.write(index.tobytes())
+        f.write(FOOTER.pack(records_off, count, RECORD.size, audio_off, len(audio), strings_off, len(strings),
+                            index_off, favorites_off, favorites_len, FOOTER_MAGIC))
+    return count
+
+
+class ChannelSnapshot:
+    """
+    قراءة لقطة عبر mmap: الفتح يقرأ التذييل فقط، وكل صف يُفك عند طلبه.
+    يتصرف كقائمة قواميس للقراءة (len، فهرسة، شرائح) حتى يُمرر مباشرة لتعبئة الجدول.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:  # ملف فارغ
+            self._file.close()
+            raise SnapshotError(f"ملف لقطة غير صالح: {path}") from e
+        if len(self._map) < HEADER.size + FOOTER.size or self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise SnapshotError(f"ملف لقطة غير صالح: {path}")
+        magic, version, _ = HEADER.unpack_from(self._map, 0)
+        footer = FOOTER.unpack_from(self._map, len(self._map) - FOOTER.size)
+        if version != VERSION or footer[-1] != FOOTER_MAGIC or footer[2] != RECORD.size:
+            self.close()
+            raise SnapshotError(f"إصدار لقطة غير مدعوم: {path}")
+        (self._records_off, self._count, _, self._audio_off, _, self._strings_off, _,
+         self._index_off, favorites_off, favorites_len, _) = footer
+        self.favorites = json.loads(self._string(favorites_off, favorites_len))
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.get(row) for row in range(*key.indices(self._count))]
+        if key < 0:
+            key += self._count
+        if not 0 <= key < self._count:
+            raise IndexError(key)
+        return self.get(key)
+
+    def __iter__(self):
+        return (self.get(row) for row in range(self._count))
+
+    # --- فك الصفوف ---
+    def _record(self, row: int) -> tuple:
+        return RECORD.unpack_from(self._map, self._records_off + row * RECORD.size)
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_off + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def name(self, row: int) -> str:
+        name_off, name_len = self._record(row)[:2]
+        return self._string(name_off, name_len)
+
+    def service_id(self, row: int) -> str:
+        sid_off, sid_len = self._record(row)[2:4]
+        return self._string(sid_off, sid_len)
+
+    def get(self, row: int) -> dict:
+        """القناة بنفس شكل ChannelStore.get ورد الجهاز"""
+        (name_off, name_len, sid_off, sid_len, extra_off, extra_len, service_index, video_pid, pmt_pid,
+         fav_bits, flags, audio_off, audio_count) = self._record(row)
+        service_id = self._string(sid_off, sid_len)
+        start = self._audio_off + audio_off * AUDIO.size
+        audio = [{"PID": pid} for pid, in AUDIO.iter_unpack(self._map[start:start + audio_count * AUDIO.size])]
+        channel = {
+            "ServiceName": self._string(name_off, name_len),
+            "ServiceID": int(service_id) if flags & ChannelStore.SERVICE_ID_INT else service_id,
+            "ServiceIndex": service_index,
+            "Radio": int(bool(flags & ChannelStore.RADIO)),
+            "HD": int(bool(flags & ChannelStore.HD)),
+            "Scramble": int(bool(flags & ChannelStore.SCRAMBLED)),
+            "Lock": int(bool(flags & ChannelStore.LOCKED)),
+            "EPG": int(bool(flags & ChannelStore.EPG)),
+            "VideoPID": video_pid,
+            "PMTPID": pmt_pid,
+            "AudioArray": audio,
+            "FavBit": fav_bits,
+            "Playing": int(bool(flags & ChannelStore.PLAYING)),
+        }
+        if extra_len:
+            channel.update(json.loads(self._string(extra_off, extra_len)))
+        return channel
+
+    def store(self, start: int = 0, end: int | None = None) -> ChannelStore:
+        """
+        الصفوف start..end (غير شاملة) كأعمدة ChannelStore مباشرة، بدون بناء قاموس لكل قناة
+        (لتعبئة الجدول شريحةً شريحة)
+        """
+        end = self._count if end is None else min(end, self._count)
+        store = ChannelStore()
+        if start >= end:
+            return store
+        first = self._records_off + start * RECORD.size
+        records = list(RECORD.iter_unpack(self._map[first:first + (end - start) * RECORD.size]))
+        (name_offs, name_lens, sid_offs, sid_lens, extra_offs, extra_lens, service_indexes, video_pids,
+         pmt_pids, fav_bits, flags, audio_offs, audio_counts) = zip(*records)
+        # نطاق جدول النصوص الذي تستخدمه هذه الصفوف فقط (النصوص مكتوبة بترتيب أول ظهور)
+        spans = [(off, off + length) for offs, lens in ((name_offs, name_lens), (sid_offs, sid_lens),
+                                                      (extra_offs, extra_lens))
+                 for off, length in zip(offs, lens) if length]
+        low = min((start for start, _ in spans), default=0)
+        strings = self._map[self._strings_off + low:self._strings_off + max((stop for _, stop in spans), default=low)]
+
+        def texts(offs, lens) -> list:
+            return [strings[off - low:off - low + length].decode("utf-8") if length else ""
+                    for off, length in zip(offs, lens)]
+
+        store.names = list(map(sys.intern, texts(name_offs, name_lens)))
+        store.service_ids = list(map(sys.intern, texts(sid_offs, sid_lens)))
+        store.extras = [json.loads(text) if text else None for text in texts(extra_offs, extra_lens)]
+        store.service_indexes = array("l", service_indexes)
+        store.video_pids = array("l", video_pids)
+        store.pmt_pids = array("l", pmt_pids)
+        store.fav_bits = array("Q", fav_bits)
+        store.flags = array("H", flags)
+        store.urls = [None] * (end - start)
+        audio_first = audio_offs[0]
+        audio_end = audio_offs[-1] + audio_counts[-1]
+        audio = array("i")
+        audio.frombytes(self._map[self._audio_off + audio_first * AUDIO.size:self._audio_off + audio_end * AUDIO.size])
+        if struct.pack("=H", 1) != struct.pack("<H", 1):
+            audio.byteswap()
+        store.audio_pids = array("l", audio)
+        store.audio_offsets = array("L", [0])
+        store.audio_offsets.extend(off - audio_first + count for off, count in zip(audio_offs, audio_counts))
+        store._index_dirty = True
+        return store
+
+    def find(self, service_id) -> int:
+        """رقم صف القناة بالبحث الثنائي في فهرس ServiceID، أو -1"""
+        service_id = str(service_id)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            row, = INDEX.unpack_from(self._map, self._index_off + middle * INDEX.size)
+            if self.service_id(row) < service_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count:
+            row, = INDEX.unpack_from(self._map, self._index_off + low * INDEX.size)
+            if self.service_id(row) == service_id:
+                return row
+        return -1
@@ -1,254 +1,220 @@
 
 import sys
 import socket
-import zlib
 import json
 import time
 import subprocess
 import os
 import logging
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_left
+from collections import deque
 import vlc
-import time
 from PyQt6.QtGui import QIntValidator
 
-from queue import Queue
-from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor  # ✅ للفحص المتوازي
 from PyQt6.QtCore import QSize
 # ✅ استيرادات PyQt6 الأساسية
 from PyQt6.QtCore import (
-    Qt, QThread, pyqtSignal, pyqtSlot, QSettings, QTimer, QObject
+    Qt, QThread, pyqtSignal, pyqtSlot, QSettings, QTimer, QObject, QAbstractTableModel, QModelIndex,
+    QAbstractProxyModel, QPersistentModelIndex
 )
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QGridLayout, QPushButton, QLabel, QLineEdit, QTextEdit,
-    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
-    QComboBox, QCheckBox, QMenuBar, QMenu, QFileDialog, QSizePolicy,
-    QTabWidget, QGroupBox, QDialog, QDialogButtonBox, QFormLayout, QTextBrowser,
+    QTableWidget, QTableWidgetItem, QTableView, QHeaderView, QAbstractItemView,
+    QComboBox, QCheckBox, QMenu, QFileDialog,
+    QTabWidget, QGroupBox, QDialog, QDialogButtonBox, QFormLayout,
     QMessageBox, QInputDialog, QScrollArea, QProgressBar, QListWidget, QFrame   # ✅ أُضيفت QListWidget
 )
-from PyQt6.QtGui import QIcon, QKeySequence, QAction, QPalette, QColor, QFont
+from PyQt6.QtGui import QIcon, QKeySequence, QAction, QColor, QFont
+from satimages_protocol import (
+    build_message, generate_handshake, key_message, ChannelFetchPipeline, KeySequencer, LatencyHistogram,
+    PayloadStream, ReconnectSupervisor, RequestTracker, StarsatTransport, decode_payload, stream_url_matcher,
+    stream_url_request
+)
+from satimages_channels import (
+    ChannelFilterIndex, ChannelMoveBatch, ChannelRowFormatter, ChannelStore, UNKNOWN_ID, favorite_group_names,
+    rows_from_bits,
+)
+from satimages_export import EXPORT_FORMATS, export_channels
+from satimages_edits import ChannelEditQueue, EditTransaction, EditUndo, receiver_move_order
+from satimages_sessions import (
+    ReceiverManager, connect_operation, delete_edit, edit_operation, export_operation, favorite_groups_operation,
+    fetch_operation, lock_edit
+)
+from satimages_logos import ChannelLogoCache
+from satimages_urls import UrlRefreshPlan, probe_all
+from satimages_cache import ChannelCache, DEFAULT_CACHE_PATH
+from satimages_snapshot import SNAPSHOT_EXTENSION, ChannelSnapshot, is_snapshot, write_snapshot
+from concurrent.futures import Future
 # بقية الكود هنا...
 
 # إعداد نظام تسجيل الأخطاء
 logging.basicConfig(filename='starsat_remote.log', level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
-def build_message(body: str | bytes) -> bytes:
-    try:
-        body_bytes = body.encode('utf-8') if isinstance(body, str) else body
-        length = len(body_bytes)
-        header = f"Start{length:07d}End"
-        return header.encode('ascii') + body_bytes
-    except Exception as e:
-        logging.error(f"Error in build_message: {e}")
-        return b"Start0000000End"
-
-def generate_handshake() -> bytes:
-    xml = ("<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
-           "<Command request=\"998\">"
-           "<data>PythonQtClient</data>"
-           "<uuid>da9c9e4b-64b7-4bf2-8a26-5550d58c42d1-02:00:00:00:00:00</uuid>"
-           "</Command>")
-    return build_message(xml)
-
-def decompress_zlib(data: bytes) -> str | None:
-    try:
-        decompressed_data = zlib.decompress(data)
-        return decompressed_data.decode('utf-8', errors='replace')
-    except zlib.error:
-        return None
-    except Exception as e:
-        logging.error(f"Decompression error: {e}")
-        return None
-
 class NetworkThread(QThread):
     connected_signal = pyqtSignal()
     disconnected_signal = pyqtSignal()
     message_signal = pyqtSignal(str)
     data_signal = pyqtSignal(str, str) # نوع البيانات، المحتوى
-    channel_data_signal = pyqtSignal(list) # قائمة القنوات المستلمة
+    response_signal = pyqtSignal(object, object) # دالة الاستدعاء، الـ Future الخاص بالطلب
     connection_status_signal = pyqtSignal(bool) # True للاتصال, False لقطع الاتصال
     ping_result_signal = pyqtSignal(float) # زمن الاستجابة بالمللي ثانية, -1 للخطأ
+    PROBE_TIMEOUT = 2.0 # مهلة فحص جودة الاتصال بالثواني
 
     def __init__(self, ip, port):
         super().__init__()
         self.ip, self.port = ip, port
-        self.socket, self.running = None, False
-        self.received_buffer, self.command_queue = b'', Queue()
-        self.expecting_channel_list = False # هل نتوقع قائمة قنوات حاليًا
-        self.reconnect_attempts = 0
+        self.transport, self.tracker, self.running = None, None, False
+        self.key_sequencer = None # تسلسلات مفاتيح الأرقام تُرسل من خيط الإدخال/الإخراج
+        self.received_buffer = b''
+        self.raw_zlib_stream = None # تدفق zlib بدون رأس قيد الاستقبال
+        self.response_signal.connect(self.deliver_response) # تنفيذ دوال الردود في خيط الواجهة
         self.max_reconnect_attempts = 5 # عدد محاولات إعادة الاتصال
+        self.supervisor = ReconnectSupervisor(max_attempts=self.max_reconnect_attempts)
+        self.connect_count = 0 # عدد مرات نجاح الاتصال (أكثر من 1 = إعادة اتصال)
+        self.probe_future = None # آخر فحص لجودة الاتصال قيد الانتظار
+        self.latency = LatencyHistogram() # أزمنة الاستجابة الأخيرة (p50/p95/p99)
         self.ping_timer = QTimer()
         self.ping_timer.timeout.connect(self.check_connection_quality)
         self.ping_timer.setInterval(5000) # فحص جودة الاتصال كل 5 ثوانٍ
 
     def run(self):
         self.running = True
-        self.received_buffer = b''
-        self.expecting_channel_list = False
-        self.connect_to_device()
+        self.supervisor.rearm()
+        while self.running:
+            self.received_buffer = b''
+            self.raw_zlib_stream = None
+            self.connect_to_device()
+            if not self.running or not self.wait_before_reconnect():
+                break
+        self.running = False
+
+    def wait_before_reconnect(self) -> bool:
+        """انتظار غير حاجب (قابل للإلغاء فوراً) قبل محاولة الاتصال التالية"""
+        # تحقق من إعدادات إعادة الاتصال التلقائي
+        if hasattr(QApplication.instance(), 'auto_reconnect') and not QApplication.instance().auto_reconnect:
+            self.message_signal.emit("🚫 إعادة الاتصال التلقائي معطلة.")
+            return False
+        self.supervisor.max_attempts = self.max_reconnect_attempts
+        delay = self.supervisor.next_delay()
+        if delay is None:
+            if not self.supervisor.cancelled:
+                self.message_signal.emit("🚫 فشلت جميع محاولات إعادة الاتصال.")
+            return False
+        self.message_signal.emit(
+            f"♻️ محاولة إعادة الاتصال ({self.supervisor.attempts}/{self.max_reconnect_attempts}) بعد {delay:.1f} ثانية..."
+        )
+        return self.supervisor.wait(delay) and self.running
 
     def connect_to_device(self):
         try:
             self.message_signal.emit(f"⏳ جارٍ الاتصال بـ {self.ip}:{self.port}...")
-            self.socket = socket.create_connection((self.ip, self.port), timeout=10)
-            self.socket.settimeout(1.0) # مهلة للقراءة
+            self.transport = StarsatTransport(self.ip, self.port, self.handle_frame)
+            self.transport.open(timeout=10)
+            self.tracker = RequestTracker(self.transport)
+            self.key_sequencer = KeySequencer(self.transport)
             self.message_signal.emit("✅ تم الاتصال الأولي")
-            self.socket.sendall(generate_handshake())
+            self.transport.write(generate_handshake())
             self.message_signal.emit("🤝 تم إرسال المصافحة")
-            time.sleep(0.1) # إعطاء الجهاز وقتًا للمعالجة
-
-            # أوامر تهيئة إضافية قد يحتاجها الجهاز
-            init_cmds = ["16", "20", "22", "24", "15", "12"] # مثال لأوامر طلب معلومات أساسية
-            for cmd_req in init_cmds:
-                if not self.running: break
-                try:
-                    cmd_msg_body = f'{{"request":"{cmd_req}"}}'
-                    self.socket.sendall(build_message(cmd_msg_body))
-                    time.sleep(0.01)
-                except Exception as send_err:
-                    self.message_signal.emit(f"❌ خطأ إرسال طلب أولي {cmd_req}: {send_err}")
-                    self.stop() # إيقاف الخيط إذا فشل الإرسال
-                    break
+            # إعطاء الجهاز وقتًا لمعالجة المصافحة دون إيقاف الخيط
+            self.transport.call_later(0.1, self.send_init_commands)
 
             if not self.running: # إذا تم الإيقاف أثناء التهيئة
                 raise ConnectionAbortedError("Stopped during init")
 
+            self.connect_count += 1
+            self.supervisor.reset() # إعادة تعيين عداد المحاولات عند النجاح
             self.connected_signal.emit() # إرسال إشارة نجاح الاتصال
             self.connection_status_signal.emit(True)
-            self.reconnect_attempts = 0 # إعادة تعيين عداد المحاولات عند النجاح
             self.ping_timer.start() # بدء فحص جودة الاتصال
             self.main_loop()
 
         except Exception as e:
-            self.message_signal.emit(f"❌ خطأ في الاتصال: {e}")
+            if self.running:
+                self.message_signal.emit(f"❌ خطأ في الاتصال: {e}")
             self.handle_connection_error()
 
-    def main_loop(self):
-        while self.running:
-            # إرسال الأوامر من قائمة الانتظار
-            while not self.command_queue.empty():
-                if not self.running: break
-                cmd_data = self.command_queue.get()
-
-                if isinstance(cmd_data, tuple) and cmd_data[0] == "fetch_channels":
-                    self.expecting_channel_list = True
-                    cmd_to_send = cmd_data[1] # الأمر الفعلي
-                else:
-                    cmd_to_send = cmd_data # الأمر هو البيانات مباشرة
-
-                try:
-                    self.socket.sendall(cmd_to_send)
-                except Exception as send_err:
-                    self.message_signal.emit(f"❌ خطأ في إرسال الأمر: {send_err}")
-                    self.handle_connection_error()
-                    break # الخروج من حلقة إرسال الأوامر
-                finally:
-                    self.command_queue.task_done()
-            if not self.running: break # التحقق مرة أخرى قبل الاستقبال
-
-            # استقبال البيانات
-            try:
-                data = self.socket.recv(4096)
-                if not data: # قطع الاتصال من الطرف الآخر
-                    self.message_signal.emit("🔌 قطع الاتصال من الطرف الآخر.")
-                    self.handle_connection_error()
-                    break
-                self.received_buffer += data
-
-                # معالجة المخزن المؤقت للبيانات المستلمة
-                processed_something = True # للدخول في الحلقة الداخلية أول مرة
-                while processed_something and len(self.received_buffer) > 0 and self.running:
-                    processed_something = False # افتراض عدم المعالجة في هذه الدورة
-                    original_buffer_len = len(self.received_buffer)
-
-                    # 1. التحقق من رأس GCDH (إذا كان جهازك يستخدمه)
-                    if self.received_buffer.startswith(b'GCDH') and len(self.received_buffer) >= 16:
-                        # تجاهل رأس GCDH (16 بايت)
-                        self.received_buffer = self.received_buffer[16:]
-                        processed_something = True
-                        continue # العودة لبداية حلقة المعالجة
-
-                    # 2. التحقق من بيانات zlib المضغوطة (تبدأ عادة بـ 0x78 0x9c)
-                    elif self.received_buffer.startswith(b'\x78\x9c'): # Zlib header
-                        decompressed_string = decompress_zlib(self.received_buffer)
-                        if decompressed_string is not None:
-                            self.received_buffer = b'' # تم استهلاك المخزن المؤقت
-                            processed_something = True
-                            is_channel_list_parsed = False
-                            try:
-                                # محاولة تحليل البيانات المفكوكة كـ JSON
-                                parsed_data = json.loads(decompressed_string)
-                                # التحقق إذا كانت هذه هي قائمة القنوات المتوقعة
-                                if self.expecting_channel_list and isinstance(parsed_data, list) and \
-                                   (len(parsed_data) == 0 or (len(parsed_data) > 0 and isinstance(parsed_data[0], dict) and 'ServiceName' in parsed_data[0])):
-                                    self.channel_data_signal.emit(parsed_data)
-                                    self.expecting_channel_list = False # لم نعد نتوقع قائمة قنوات
-                                    is_channel_list_parsed = True
-                                elif not is_channel_list_parsed: # إذا لم تكن قائمة قنوات، أرسلها كـ JSON عام
-                                    self.data_signal.emit("zlib_json", decompressed_string)
-                            except json.JSONDecodeError: # إذا لم تكن JSON صالح
-                                if not is_channel_list_parsed: # ولم تكن قائمة قنوات تم تحليلها
-                                    self.data_signal.emit("zlib_raw", decompressed_string)
-                                # إذا كنا نتوقع قائمة قنوات وفشل التحليل كـ JSON، يجب إعادة تعيين العلامة
-                                if self.expecting_channel_list and not is_channel_list_parsed:
-                                    self.expecting_channel_list = False # تجنب التعليق في هذا الوضع
-                        # إذا فشل فك الضغط (decompressed_string is None)، اترك المخزن كما هو للمحاولة التالية
-                        else: pass # لا يمكن فك الضغط، قد تكون البيانات غير كاملة
-
-                    # 3. التحقق من بيانات تبدأ بـ [[ (قد تكون خاصة بالجهاز)
-                    elif self.received_buffer.startswith(b'\x5b\x5b'): # '[['
-                        self.data_signal.emit("unknown_[[", f"{self.received_buffer[:100]!r}...") # أرسل عينة
-                        if len(self.received_buffer) < 500: # إذا كانت صغيرة، افترض أنها كاملة
-                           self.received_buffer = b''
-                           processed_something = True
-                        else: pass # اتركها إذا كانت كبيرة، قد تكون غير كاملة
-
-                    # 4. التحقق من بيانات XML
-                    elif self.received_buffer.strip().startswith(b'<?xml'):
-                        try:
-                            xml_content = self.received_buffer.decode('utf-8', errors='replace')
-                            # تحقق بسيط من اكتمال XML (وجود علامة إغلاق في السطر الأخير)
-                            if '>' in xml_content.splitlines()[-1]:
-                                self.data_signal.emit("xml", xml_content)
-                                self.received_buffer = b''
-                                processed_something = True
-                            else: pass # XML غير مكتمل
-                        except Exception: pass # خطأ في فك التشفير أو التحليل
-
-                    # 5. التحقق من بيانات JSON غير مضغوطة
-                    elif self.received_buffer.strip().startswith(b'{') or \
-                         self.received_buffer.strip().startswith(b'['):
-                        try:
-                            json_str = self.received_buffer.decode('utf-8', errors='replace').strip()
-                            # تحقق بسيط من اكتمال JSON
-                            if (json_str.startswith('{') and json_str.endswith('}')) or \
-                               (json_str.startswith('[') and json_str.endswith(']')):
-                                json.loads(json_str) # محاولة التحليل للتحقق من الصحة
-                                self.data_signal.emit("json", json_str)
-                                self.received_buffer = b''
-                                processed_something = True
-                            else: pass # JSON غير مكتمل
-                        except Exception: pass # خطأ في فك التشفير أو التحليل
-
-                    # إذا لم تتم معالجة أي شيء ولم يتغير طول المخزن، اخرج من الحلقة الداخلية
-                    if not processed_something and len(self.received_buffer) == original_buffer_len:
-                        break
-
-            except socket.timeout:
-                pass # مهلة القراءة طبيعية إذا لم يكن هناك بيانات
-            except socket.error as e:
-                self.message_signal.emit(f"❌ خطأ في استقبال البيانات: {e}")
-                self.handle_connection_error()
-                break # الخروج من حلقة الاستقبال الرئيسية
-            except Exception as e:
-                self.message_signal.emit(f"❌ خطأ غير متوقع في الاستقبال: {e}")
-                logging.error(f"Unexpected receive error: {e} - Buffer: {self.received_buffer[:200]!r}")
-                self.handle_connection_error() # محاولة معالجة الخطأ
-                break
+    def send_init_commands(self):
+        # أوامر تهيئة إضافية قد يحتاجها الجهاز
+        init_cmds = ["16", "20", "22", "24", "15", "12"] # مثال لأوامر طلب معلومات أساسية
+        for cmd_req in init_cmds:
+            self.transport.write(build_message(f'{{"request":"{cmd_req}"}}'))
 
-            time.sleep(0.05) # استراحة قصيرة لمنع استهلاك وحدة المعالجة المركزية
+    def main_loop(self):
+        # كل الإرسال والاستقبال يتم داخل حلقة الأحداث؛ لا يوجد انتظار دوري
+        try:
+            self.transport.run()
+        except ConnectionError as e:
+            if self.running:
+                self.message_signal.emit(f"🔌 انقطع الاتصال: {e}")
+        except Exception as e:
+            self.message_signal.emit(f"❌ خطأ غير متوقع في الاستقبال: {e}")
+            logging.error(f"Unexpected receive error: {e} - Buffer: {self.received_buffer[:200]!r}")
+        # سواء انقطع الاتصال أو تم الإيقاف: تنظيف الجلسة؛ قرار إعادة المحاولة يعود لـ run
+        self.handle_connection_error()
+
+    def handle_frame(self, frame):
+        """معالجة رسالة مكتملة (تم تحديد حدودها من الرأس) مرة واحدة فقط"""
+        if frame.kind == "raw":
+            self.received_buffer += frame.payload
+            self.process_raw_buffer()
+            return
+        self.dispatch_payload(*(frame.decoded or decode_payload(frame.payload)))
+
+    def dispatch_payload(self, data_type: str, text: str | None, parsed_data):
+        if parsed_data is not None and self.tracker and self.tracker.resolve(parsed_data):
+            return # رد على طلب منتظر، تم تسليمه لصاحبه
+        if text is None: # المصفوفات المحللة تدريجياً لا تحتفظ بنصها
+            text = json.dumps(parsed_data, ensure_ascii=False)
+        self.data_signal.emit(data_type, text)
+
+    def process_raw_buffer(self):
+        """معالجة البيانات التي وصلت بدون رأس (أجهزة قديمة لا تؤطر الردود)"""
+        processed_something = True # للدخول في الحلقة الداخلية أول مرة
+        while processed_something and len(self.received_buffer) > 0 and self.running:
+            processed_something = False # افتراض عدم المعالجة في هذه الدورة
+
+            # 1. بيانات zlib المضغوطة (تبدأ عادة بـ 0x78 0x9c): فك ضغط تدريجي لكل بايت مرة واحدة
+            if self.raw_zlib_stream is not None or self.received_buffer.startswith(b'\x78\x9c'):
+                if self.raw_zlib_stream is None:
+                    self.raw_zlib_stream = PayloadStream()
+                self.raw_zlib_stream.feed(self.received_buffer)
+                self.received_buffer = b'' # تم استهلاك المخزن المؤقت
+                if self.raw_zlib_stream.eof:
+                    stream, self.raw_zlib_stream = self.raw_zlib_stream, None
+                    self.received_buffer = stream.unused_data # بداية الرسالة التالية إن وجدت
+                    self.dispatch_payload(*stream.close())
+                    processed_something = True
+
+            # 2. بيانات تبدأ بـ [[ (قد تكون خاصة بالجهاز)
+            elif self.received_buffer.startswith(b'\x5b\x5b'): # '[['
+                self.data_signal.emit("unknown_[[", f"{self.received_buffer[:100]!r}...") # أرسل عينة
+                if len(self.received_buffer) < 500: # إذا كانت صغيرة، افترض أنها كاملة
+                    self.received_buffer = b''
+                    processed_something = True
+
+            # 3. بيانات XML
+            elif self.received_buffer.strip().startswith(b'<?xml'):
+                xml_content = self.received_buffer.decode('utf-8', errors='replace')
+                # تحقق بسيط من اكتمال XML (وجود علامة إغلاق في السطر الأخير)
+                if '>' in xml_content.splitlines()[-1]:
+                    self.data_signal.emit("xml", xml_content)
+                    self.received_buffer = b''
+                    processed_something = True
+
+            # 4. بيانات JSON غير مضغوطة (تحليلها فقط عند اكتمال الأقواس)
+            elif self.received_buffer.strip()[:1] in (b'{', b'[') and \
+                 self.received_buffer.strip()[-1:] in (b'}', b']'):
+                decoded = decode_payload(self.received_buffer)
+                if decoded[0] == "json":
+                    self.received_buffer = b''
+                    processed_something = True
+                    self.dispatch_payload(*decoded)
 
     # def handle_connection_error(self):
         # self.connection_status_signal.emit(False)
@@ -272,67 +238,87 @@ class NetworkThread(QThread):
     def handle_connection_error(self):
         self.connection_status_signal.emit(False)
         self.ping_timer.stop()
-        if self.socket:
-            try: self.socket.close()
-            except Exception: pass
-        self.socket = None
+        error = ConnectionError("connection lost") if self.running else ConnectionAbortedError("network thread stopped")
+        if self.tracker:
+            self.tracker.fail_all(error)
+        if self.key_sequencer:
+            self.key_sequencer.fail_all(error)
+        if self.transport:
+            self.transport.close()
+        self.transport = None
         self.disconnected_signal.emit()
-        
-        # تحقق من إعدادات إعادة الاتصال التلقائي
-        if hasattr(QApplication.instance(), 'auto_reconnect') and not QApplication.instance().auto_reconnect:
-            self.message_signal.emit("🚫 إعادة الاتصال التلقائي معطلة.")
-            self.running = False
-            return
-            
-        # محاولة إعادة الاتصال التلقائي
-        if self.running and self.reconnect_attempts < self.max_reconnect_attempts:
-            self.reconnect_attempts += 1
-            self.message_signal.emit(f"♻️ محاولة إعادة الاتصال ({self.reconnect_attempts}/{self.max_reconnect_attempts})...")
-            time.sleep(5 * self.reconnect_attempts)
-            if self.running:
-                self.connect_to_device()
-        elif self.running:
-            self.message_signal.emit("🚫 فشلت جميع محاولات إعادة الاتصال.")
-            self.running = False
+
     def check_connection_quality(self):
-        if not self.running or not self.socket:
+        if not self.running or not self.tracker:
             return
+        if self.probe_future is not None and not self.probe_future.done():
+            return # فحص سابق لم يكتمل بعد
+        # الفحص طلب عادي عبر متتبع الطلبات؛ لا قراءة مباشرة من المقبس
+        self.probe_future = self.tracker.submit(
+            build_message('{"request":"12"}'), "any", timeout=self.PROBE_TIMEOUT, callback=self.finish_probe
+        )
 
-        try:
-            start_time = time.time()
-            cmd_msg_body = '{"request":"12"}' # أمر بسيط للتحقق
-            self.socket.sendall(build_message(cmd_msg_body))
-            self.socket.settimeout(2.0) # مهلة قصيرة للـ ping
-            # لا نتوقع بالضرورة استجابة محددة، مجرد نجاح الإرسال والاستقبال البسيط
-            _ = self.socket.recv(16) # محاولة قراءة أي شيء صغير كإقرار
-            self.socket.settimeout(1.0) # إعادة المهلة الافتراضية
-            latency = (time.time() - start_time) * 1000
+    def finish_probe(self, future):
+        error = future.exception()
+        if error is None:
+            latency = future.round_trip * 1000
+            self.latency.add(latency)
             self.ping_result_signal.emit(latency)
-        except socket.timeout: # هذا طبيعي إذا كان الأمر لا يرسل إقرارًا فوريًا
-            latency = (time.time() - start_time) * 1000 # قياس وقت الإرسال على الأقل
-            self.ping_result_signal.emit(latency) # إرسال زمن الوصول حتى لو كان هناك مهلة قراءة
-        except Exception: # أي خطأ آخر يعني فشل الـ ping
+        elif isinstance(error, TimeoutError):
+            self.latency.add_timeout()
             self.ping_result_signal.emit(-1)
 
-    def send_command(self, command_data: bytes | tuple):
-        if self.running:
-            self.command_queue.put(command_data)
+    def send_command(self, command_data: bytes):
+        if self.running and self.transport:
+            self.transport.send(command_data)
+        else:
+            self.message_signal.emit("⚠️ لا يمكن الإرسال، الخيط متوقف.")
+
+    def send_request(self, command_data: bytes, kind: str, callback=None, timeout: float | None = None,
+                     match=None):
+        """
+        إرسال طلب ينتظر رداً من نوع محدد (channel_list, stream_url, device_info, ...).
+        يعيد Future، و callback (إن وجد) يستدعى بالـ Future في خيط الواجهة.
+        match (اختياري) يميز رد هذا الطلب عن ردود متأخرة لطلبات سابقة من نفس النوع.
+        """
+        if not (self.running and self.transport and self.tracker):
+            self.message_signal.emit("⚠️ لا يمكن الإرسال، الخيط متوقف.")
+            future = Future()
+            future.set_exception(ConnectionError("network thread is not running"))
         else:
+            future = self.tracker.submit(command_data, kind, timeout, match=match)
+        if callback is not None:
+            future.add_done_callback(lambda f: self.response_signal.emit(callback, f))
+        return future
+
+    def send_key_sequence(self, keys, interval: float = 0.4, callback=None):
+        """
+        إرسال مفاتيح متتالية بفاصل interval ثانية دون حجز خيط الواجهة؛ تسلسل جديد يلغي السابق.
+        يعيد Future (True اكتمل، False أُلغي أو استُبدل)، و callback يستدعى به في خيط الواجهة.
+        """
+        if not (self.running and self.transport and self.key_sequencer):
             self.message_signal.emit("⚠️ لا يمكن الإرسال، الخيط متوقف.")
+            future = Future()
+            future.set_exception(ConnectionError("network thread is not running"))
+        else:
+            future = self.key_sequencer.start(keys, interval)
+        if callback is not None:
+            future.add_done_callback(lambda f: self.response_signal.emit(callback, f))
+        return future
+
+    @pyqtSlot(object, object)
+    def deliver_response(self, callback, future):
+        try:
+            callback(future)
+        except Exception as e:
+            logging.error(f"Response callback failed: {e}")
 
     def stop(self):
         self.running = False
         self.ping_timer.stop() # إيقاف مؤقت الـ ping
-        # مسح قائمة الأوامر المعلقة لتجنب محاولة الإرسال بعد الإيقاف
-        while not self.command_queue.empty():
-            try:
-                self.command_queue.get_nowait()
-                self.command_queue.task_done()
-            except:
-                break
-        if self.socket:
-            try: self.socket.close()
-            except Exception: pass
+        self.supervisor.cancel() # إنهاء انتظار إعادة الاتصال فوراً إن وجد
+        if self.transport:
+            self.transport.stop() # إيقاظ الحلقة لتنتهي فوراً
         self.message_signal.emit("🛑 تم إيقاف خيط الشبكة.")
 
 class ScannerWorker(QObject):
@@ -361,6 +347,56 @@ class ScannerWorker(QObject):
             active_hosts = list(filter(None, futures))
         self.result_ready.emit(active_hosts)
 
+class UrlProbeWorker(QObject):
+    """التحقق من روابط البث المستنتجة في خيط مستقل (طلبات HEAD / OPTIONS متوازية)"""
+    probed = pyqtSignal(list)     # [(service_id, url, ok)] على دفعات لتقليل تحديثات الجدول
+    finished = pyqtSignal(bool)   # False إذا أُلغي قبل الانتهاء
+
+    def __init__(self, candidates: list):
+        super().__init__()
+        self.candidates = candidates
+        self.cancelled = threading.Event()
+
+    def run(self):
+        batch = []
+        last_emit = time.monotonic()
+        for result in probe_all(self.candidates, cancelled=self.cancelled):
+            batch.append(result)
+            if len(batch) >= 100 or time.monotonic() - last_emit > 0.2:
+                self.probed.emit(batch)
+                batch, last_emit = [], time.monotonic()
+        if batch:
+            self.probed.emit(batch)
+        self.finished.emit(not self.cancelled.is_set())
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+class ExportWorker(QObject):
+    """كتابة ملف التصدير في خيط مستقل على دفعات حتى لا تتجمد الواجهة مع القوائم الكبيرة"""
+    progress = pyqtSignal(int, int)   # الصفوف المكتوبة، الإجمالي
+    finished = pyqtSignal(int, str)   # عدد الصفوف (-1 إذا أُلغي)، رسالة الخطأ أو ""
+
+    def __init__(self, kind: str, path: str, source: ChannelRowFormatter):
+        super().__init__()
+        self.kind = kind
+        self.path = path
+        self.source = source
+        self.cancelled = threading.Event()
+
+    def run(self):
+        try:
+            written = export_channels(self.kind, self.path, self.source, self.progress.emit, self.cancelled)
+        except Exception as e:
+            logging.exception(f"export to {self.kind} failed")
+            self.finished.emit(-1, str(e))
+            return
+        self.finished.emit(-1 if written is None else written, "")
+
+    def cancel(self):
+        self.cancelled.set()
+
 class ScannerDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -404,6 +440,224 @@ class ScannerDialog(QDialog):
             self.parent().ip_input.setText(item.text())
         self.accept()
 
+class MultiReceiverDialog(QDialog):
+    """
+    تشغيل عملية واحدة على عدة أجهزة محفوظة بالتوازي (جلسة مستقلة لكل جهاز عبر ReceiverManager)
+    مع حالة وتقدم ونتيجة لكل جهاز. الجلسات تبقى مفتوحة بعد إغلاق النافذة حتى "قطع الكل".
+    """
+    # تُطلق من خيوط الجلسات؛ الاتصال بين الخيوط يجعل المعالجة في خيط الواجهة
+    progress_signal = pyqtSignal(str, int, int)   # الجهاز، المنجز، الكلي (0 = غير معروف)
+    result_signal = pyqtSignal(str, object)       # الجهاز، النتيجة أو الخطأ
+    finished_signal = pyqtSignal(str, object)     # وصف العملية، ReceiverResults
+
+    COLUMNS = ["✔", "الجهاز", "العنوان", "الحالة", "التقدم", "النتيجة"]
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setWindowTitle("🖧 عدة أجهزة")
+        self.resize(760, 400)
+        self.manager = parent.receiver_manager
+        self.running = None  # وصف العملية الجارية
+        self.devices = []
+        self.rows = {}  # ip:port -> رقم الصف
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(5, QHeaderView.ResizeMode.Stretch)
+        self.load_devices(parent.connected_devices)
+
+        self.action_buttons = []
+        actions = QGridLayout()
+        for index, (text, handler) in enumerate([
+            ("🔌 اتصال", self.connect_selected),
+            ("📡 جلب القنوات", self.fetch_selected),
+            ("⭐ قراءة المفضلة", self.read_groups_selected),
+            ("📤 تصدير M3U", self.export_selected),
+            ("🔒 قفل المحددة", lambda: self.edit_selected("lock")),
+            ("🔓 فتح المحددة", lambda: self.edit_selected("unlock")),
+            ("🗑️ حذف المحددة", lambda: self.edit_selected("delete")),
+        ]):
+            button = QPushButton(text)
+            button.clicked.connect(handler)
+            actions.addWidget(button, index // 4, index % 4)
+            self.action_buttons.append(button)
+        self.close_all_btn = QPushButton("⛔ قطع الكل")
+        self.close_all_btn.clicked.connect(self.close_all)
+        actions.addWidget(self.close_all_btn, 1, 3)
+
+        self.summary_label = QLabel("حدد الأجهزة ثم اختر العملية")
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.table)
+        layout.addLayout(actions)
+        layout.addWidget(self.summary_label)
+
+        self.progress_signal.connect(self.handle_progress)
+        self.result_signal.connect(self.handle_result)
+        self.finished_signal.connect(self.handle_finished)
+
+    def load_devices(self, devices):
+        """إعادة بناء الجدول من الأجهزة المحفوظة (مع الإبقاء على حالة الجلسات المفتوحة)"""
+        if self.running:
+            return
+        self.devices, self.rows = [], {}
+        self.table.setRowCount(0)
+        for device in devices:
+            try:
+                key = f"{device['ip']}:{int(device['port'])}"
+            except (KeyError, TypeError, ValueError):
+                logging.warning(f"multi receiver: skipping invalid device {device}")
+                continue
+            if key in self.rows:
+                continue
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            check = QTableWidgetItem()
+            check.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
+            check.setCheckState(Qt.CheckState.Checked)
+            self.table.setItem(row, 0, check)
+            self.table.setItem(row, 1, QTableWidgetItem(str(device.get('name', key))))
+            self.table.setItem(row, 2, QTableWidgetItem(key))
+            session = self.manager.sessions.get(key)
+            self.table.setItem(row, 3, QTableWidgetItem("✅ متصل" if session and session.connected else "—"))
+            self.table.setCellWidget(row, 4, QProgressBar())
+            self.table.setItem(row, 5, QTableWidgetItem(""))
+            self.devices.append(device)
+            self.rows[key] = row
+
+    def selected_devices(self) -> list:
+        return [device for row, device in enumerate(self.devices)
+                if self.table.item(row, 0).checkState() == Qt.CheckState.Checked]
+
+    def set_row(self, key: str, state: str = None, result: str = None):
+        row = self.rows.get(key)
+        if row is None:
+            return
+        if state is not None:
+            self.table.item(row, 3).setText(state)
+        if result is not None:
+            self.table.item(row, 5).setText(result)
+            self.table.item(row, 5).setToolTip(result)
+
+    # --- العمليات ---
+    def run_operation(self, label: str, operation, devices=None):
+        if self.running:
+            QMessageBox.information(self, "عدة أجهزة", f"العملية \"{self.running}\" ما زالت جارية.")
+            return
+        devices = devices if devices is not None else self.selected_devices()
+        if not devices:
+            QMessageBox.warning(self, "عدة أجهزة", "يرجى تحديد جهاز واحد على الأقل.")
+            return
+        self.running = label
+        for button in self.action_buttons + [self.close_all_btn]:
+            button.setEnabled(False)
+        for device in devices:
+            key = f"{device['ip']}:{int(device['port'])}"
+            self.set_row(key, "⏳ جارٍ...", "")
+            bar = self.table.cellWidget(self.rows[key], 4)
+            bar.setRange(0, 0)  # غير محدد حتى يصل أول تقدم
+        self.summary_label.setText(f"⏳ {label} على {len(devices)} جهاز...")
+        future = self.manager.run(devices, operation, progress=self.progress_signal.emit,
+                                  on_result=self.result_signal.emit)
+        future.add_done_callback(lambda f: self.finished_signal.emit(label, f.result()))
+
+    def connect_selected(self):
+        self.run_operation("الاتصال", connect_operation())
+
+    def fetch_selected(self):
+        parent = self.parent()
+        self.run_operation("جلب القنوات", fetch_operation(parent.batch_size, parent.fetch_window))
+
+    def read_groups_selected(self):
+        self.run_operation("قراءة المجموعات المفضلة", favorite_groups_operation())
+
+    def export_selected(self):
+        folder = QFileDialog.getExistingDirectory(self, "مجلد ملفات M3U")
+        if not folder:
+            return
+
+        def path_for(session):
+            name = "".join(c if c.isalnum() or c in "-_" else "_" for c in session.name)
+            return os.path.join(folder, f"{name}_{session.ip.replace('.', '-')}_{session.port}.m3u")
+        self.run_operation("تصدير M3U", export_operation("m3u", path_for))
+
+    def edit_selected(self, action: str):
+        """تطبيق قفل/فتح/حذف القنوات المحددة في الجدول الرئيسي (حسب ServiceID) على كل الأجهزة المحددة"""
+        model = self.parent().channel_model
+        service_ids = [model.service_id(row) for row in model.selected_rows()]
+        service_ids = [sid for sid in service_ids if sid != UNKNOWN_ID]
+        if not service_ids:
+            QMessageBox.warning(self, "عدة أجهزة", "حدد القنوات أولاً من عمود التحديد في جدول القنوات.")
+            return
+        devices = self.selected_devices()
+        if action == "delete":
+            reply = QMessageBox.question(
+                self, "تأكيد الحذف",
+                f"حذف {len(service_ids)} قناة من {len(devices)} جهاز؟ لا يمكن التراجع عن هذه العملية.",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+            self.run_operation("حذف القنوات", edit_operation(delete_edit(service_ids)), devices)
+        else:
+            locked = action == "lock"
+            self.run_operation("قفل القنوات" if locked else "فتح القنوات",
+                               edit_operation(lock_edit(service_ids, locked)), devices)
+
+    def close_all(self):
+        self.manager.close_all()
+        for key in self.rows:
+            self.set_row(key, "—", "")
+        self.summary_label.setText("⛔ تم قطع كل الجلسات")
+
+    # --- النتائج (في خيط الواجهة) ---
+    def handle_progress(self, key: str, done: int, total: int):
+        row = self.rows.get(key)
+        if row is None:
+            return
+        bar = self.table.cellWidget(row, 4)
+        bar.setRange(0, total)
+        bar.setValue(done if total else 0)
+
+    def handle_result(self, key: str, result):
+        row = self.rows.get(key)
+        if row is None:
+            return
+        bar = self.table.cellWidget(row, 4)
+        bar.setRange(0, 1)
+        if isinstance(result, BaseException):
+            bar.setValue(0)
+            self.set_row(key, "❌ فشل", str(result))
+            return
+        bar.setValue(1)
+        self.set_row(key, "✅ متصل", self.describe(result))
+        if isinstance(result, ChannelStore):
+            self.parent().cache_receiver_channels(self.manager.sessions.get(key), result)
+
+    @staticmethod
+    def describe(result) -> str:
+        if isinstance(result, ChannelStore):
+            return f"{len(result)} قناة"
+        if isinstance(result, EditTransaction):
+            return result.summary() or "لا يوجد ما يتغير على هذا الجهاز"
+        if isinstance(result, dict):  # معلومات الجهاز
+            return (f"{result.get('ProductName', '؟')} - {result.get('SoftwareVersion', '؟')} - "
+                    f"{result.get('ChannelNum', '؟')} قناة")
+        if isinstance(result, list):  # المجموعات المفضلة
+            return f"{len(result)} مجموعة: " + "، ".join(result)
+        if isinstance(result, int):
+            return f"تم تصدير {result} قناة"
+        if result is None:
+            return "أُلغي"
+        return str(result)
+
+    def handle_finished(self, label: str, results):
+        self.running = None
+        for button in self.action_buttons + [self.close_all_btn]:
+            button.setEnabled(True)
+        self.summary_label.setText(f"{label}: {results.summary()}")
+        self.parent().update_output(f"🖧 {label} على {len(results)} جهاز: {results.summary()}")
+
+
 class SettingsManager:
     def __init__(self):
         self.settings = QSettings("StarsatRemote", "StarsatRemoteApp")
@@ -532,6 +786,11 @@ class SettingsManager:
             logging.error(f"خطأ في حفظ القنوات: {e}")
             self.settings.setValue("channels", "[]")
 
+    def clear_channels(self):
+        """حذف القائمة القديمة من QSettings بعد نقلها إلى ذاكرة القنوات (SQLite)"""
+        if self.settings.contains("channels"):
+            self.settings.remove("channels")
+
     def load_channels(self):
         channels_json = self.settings.value("channels", "[]")
 
@@ -576,6 +835,468 @@ class SettingsManager:
                     continue
         return result
 
+
+class ChannelTableModel(QAbstractTableModel, ChannelRowFormatter):
+    """
+    نموذج جدول القنوات: كل عمود يُحسب عند الطلب من ChannelStore داخل data()
+    فلا تُنشأ أي عناصر إلا للخلايا الظاهرة في العرض.
+    المفضلة وخانة التحديد و"قيد التشغيل" بتات في أعلام المخزن لكل صف.
+    نصوص الأعمدة (text / url) من ChannelRowFormatter.
+    """
+
+    FAVORITE_COLUMN = 0
+    NAME_COLUMN = 1
+    SERVICE_ID_COLUMN = 2
+    URL_COLUMN = 3
+    LOCK_COLUMN = 7
+    PLAYING_COLUMN = 14
+    NUMBER_COLUMN = 16
+    SELECT_COLUMN = 17
+    IMAGE_COLUMN = 18
+    NUMERIC_COLUMNS = (2, 9, 10, 12, 15, 16)
+
+    # بتات الحالة لكل صف
+    FAVORITE = ChannelStore.FAVORITE
+    SELECTED = ChannelStore.SELECTED
+    PLAYING = ChannelStore.PLAYING
+
+    SCRAMBLED_BACKGROUND = QColor(255, 228, 196)
+    SCRAMBLED_FOREGROUND = QColor(0, 0, 0)
+
+    favorite_toggled = pyqtSignal(int, bool)  # (الصف، الحالة الجديدة)
+
+    def __init__(self, store: ChannelStore, favorite_group_names=None, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.favorite_group_names = favorite_group_names or (lambda fav_bit: [])
+        self.receiver_ip = ""
+        self._numbers = None  # عمود "رقم": None = موقع الصف، وبعد الفرز أو الحذف يُثبت مع كل قناة
+        self.logos = ChannelLogoCache(parent=self)
+        self.logos.logos_ready.connect(self._refresh_icons)
+
+    # --- واجهة Qt ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        if index.column() in (self.FAVORITE_COLUMN, self.SELECT_COLUMN):
+            return Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled
+        return Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.text(row, col)
+        if role == Qt.ItemDataRole.CheckStateRole:
+            if col == self.FAVORITE_COLUMN:
+                return Qt.CheckState.Checked if self.is_favorite(row) else Qt.CheckState.Unchecked
+            if col == self.SELECT_COLUMN:
+                return Qt.CheckState.Checked if self.is_selected(row) else Qt.CheckState.Unchecked
+            return None
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if col == self.SERVICE_ID_COLUMN or col >= 4:
+                return Qt.AlignmentFlag.AlignCenter
+            return None
+        if role in (Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ForegroundRole):
+            if col != self.IMAGE_COLUMN and self.store.flags[row] & ChannelStore.SCRAMBLED:
+                if role == Qt.ItemDataRole.BackgroundRole:
+                    return self.SCRAMBLED_BACKGROUND
+                return self.SCRAMBLED_FOREGROUND
+            return None
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self.icon(row) if col == self.IMAGE_COLUMN else None
+        if role == Qt.ItemDataRole.ToolTipRole:
+            # التلميح يُنشأ فقط للخلية التي يقف عليها المؤشر: اسم العمود ثم محتواها
+            return f"{self.HEADERS[col]}\n----------------\n{self.text(row, col)}"
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.CheckStateRole:
+            return False
+        checked = Qt.CheckState(value) == Qt.CheckState.Checked
+        row, col = index.row(), index.column()
+        if col == self.FAVORITE_COLUMN:
+            self.store.set_flag(row, self.FAVORITE, checked)
+            self.dataChanged.emit(index, index, [role])
+            self.favorite_toggled.emit(row, checked)
+            return True
+        if col == self.SELECT_COLUMN:
+            self.store.set_flag(row, self.SELECTED, checked)
+            self.dataChanged.emit(index, index, [role])
+            return True
+        return False
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """فرز فعلي للصفوف داخل النموذج، فيبقى رقم الصف في العرض هو نفسه في النموذج"""
+        if not self.store:
+            return
+        flags = self.store.flags
+        if column == self.FAVORITE_COLUMN:
+            key = lambda row: flags[row] & self.FAVORITE
+        elif column == self.SELECT_COLUMN:
+            key = lambda row: flags[row] & self.SELECTED
+        elif column in self.NUMERIC_COLUMNS:
+            def key(row):
+                value = self.text(row, column)
+                return (0, int(value), "") if value.isdigit() else (1, 0, value)
+        else:
+            key = lambda row: self.text(row, column)
+        order_rows = sorted(range(len(self.store)), key=key,
+                            reverse=order == Qt.SortOrder.DescendingOrder)
+        self._apply_order(order_rows, renumber=False)
+
+    # --- قراءة البيانات ---
+    def export_source(self) -> ChannelRowFormatter:
+        """نسخة ثابتة من البيانات يقرأها خيط التصدير (أسماء المجموعات تُحسب هنا في خيط الواجهة)"""
+        store = self.store.copy()
+        groups = {fav_bits: self.favorite_group_names(fav_bits) for fav_bits in set(store.fav_bits)}
+        numbers = None if self._numbers is None else self._numbers[:]
+        return ChannelRowFormatter(store, numbers, self.receiver_ip, groups.__getitem__)
+
+    def row_for_service_id(self, service_id: str) -> int:
+        return self.store.row_for_service_id(service_id)
+
+    def is_favorite(self, row: int) -> bool:
+        return self.store.has(row, self.FAVORITE)
+
+    def is_selected(self, row: int) -> bool:
+        return self.store.has(row, self.SELECTED)
+
+    def is_playing(self, row: int) -> bool:
+        return self.store.has(row, self.PLAYING)
+
+    def selected_rows(self) -> list:
+        """الصفوف المحددة بخانة الاختيار (عمود التحديد)"""
+        return self.store.rows_with(self.SELECTED)
+
+    def icon(self, row: int):
+        """شعار القناة حسب ServiceID (يبقى معها عند النقل والفرز)؛ None حتى يجهز في الخلفية"""
+        return self.logos.icon(self.store.service_ids[row])
+
+    # --- التعديل ---
+    def append_channels(self, channels_batch, favorites=()):
+        """قائمة قنوات بشكل رد الجهاز، أو ChannelStore جاهز (شريحة من لقطة .ssnp، المفضلة في أعلامه)"""
+        if not channels_batch:
+            return
+        first = len(self.store)
+        self.beginInsertRows(QModelIndex(), first, first + len(channels_batch) - 1)
+        if isinstance(channels_batch, ChannelStore):
+            self.store.extend_store(channels_batch)
+        else:
+            self.store.extend(channels_batch, favorites)
+        if self._numbers is not None:
+            self._numbers.extend(range(first + 1, len(self.store) + 1))
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.store.clear()
+        self._numbers = None
+        self.endResetModel()
+
+    def set_url(self, row: int, url: str):
+        self.store.set_url(row, url)
+        self._emit_cell_changed(row, self.URL_COLUMN)
+
+    def set_name(self, row: int, name: str):
+        self.store.set_name(row, name)
+        self._emit_cell_changed(row, self.NAME_COLUMN)
+
+    def set_locked(self, row: int, locked: bool):
+        self.store.set_flag(row, ChannelStore.LOCKED, locked)
+        self._emit_cell_changed(row, self.LOCK_COLUMN)
+
+    def replace_rows(self, changes: dict):
+        """تطبيق قنوات تغير محتواها على الجهاز ({الصف: القناة}) بإشارة dataChanged واحدة"""
+        if not changes:
+            return
+        for row, channel in changes.items():
+            self.store.replace(row, channel)
+        self.dataChanged.emit(self.index(min(changes), 0),
+                              self.index(max(changes), len(self.HEADERS) - 1))
+
+    def set_playing_row(self, selected_row: int):
+        """وضع علامة التشغيل على صف واحد فقط وإزالتها من البقية"""
+        for row in self.store.rows_with(self.PLAYING):
+            self.store.set_flag(row, self.PLAYING, False)
+        if 0 <= selected_row < len(self.store):
+            self.store.set_flag(selected_row, self.PLAYING, True)
+        if self.store:
+            self.dataChanged.emit(self.index(0, self.PLAYING_COLUMN),
+                                  self.index(len(self.store) - 1, self.PLAYING_COLUMN))
+
+    def remove_rows(self, rows):
+        """حذف صفوف (بأي ترتيب) على شكل نطاقات متصلة من الأسفل للأعلى"""
+        rows = sorted(set(rows), reverse=True)
+        if self._numbers is None and rows:  # القنوات الباقية تحتفظ بأرقامها كما كانت
+            self._numbers = array('I', range(1, len(self.store) + 1))
+        i = 0
+        while i < len(rows):
+            last = first = rows[i]
+            i += 1
+            while i < len(rows) and rows[i] == first - 1:
+                first = rows[i]
+                i += 1
+            self.beginRemoveRows(QModelIndex(), first, last)
+            self.store.remove(first, last)
+            del self._numbers[first:last + 1]
+            self.endRemoveRows()
+
+    def move_batch(self) -> ChannelMoveBatch:
+        """دفعة نقل فارغة على ترتيب الجدول الحالي (تُملأ بـ move / move_row ثم تُطبق بـ apply_moves)"""
+        return ChannelMoveBatch(self.store.service_ids)
+
+    def apply_moves(self, batch: ChannelMoveBatch, deselect: bool = False):
+        """كل عمليات الدفعة كتبديل واحد وتغيير تخطيط واحد؛ عمود "رقم" يعود مشتقاً من الموقع"""
+        if len(batch.order) != len(self.store):
+            raise ValueError("دفعة النقل لا تطابق عدد صفوف الجدول")
+        if deselect:
+            for row in batch.moved:
+                self.store.set_flag(row, self.SELECTED, False)
+        self._apply_order(batch.order)
+
+    def snapshot(self) -> ChannelStore:
+        """نسخة المخزن الحالية للتراجع عن التعديلات إذا رفضها الجهاز"""
+        return self.store.copy()
+
+    def undo_edits(self, undo: EditUndo):
+        """
+        التراجع عن تعديلات مرفوضة على قنواتها فقط: بدون إعادة تعيين النموذج، فالصفوف التي أضافتها
+        التعبئة بعد فتح المعاملة والدفعات التي لم تُضف بعد تبقى كما هي
+        """
+        store = self.store
+        for service_id, name in undo.names.items():
+            row = store.row_for_service_id(service_id)
+            if row >= 0:
+                self.set_name(row, name)
+        for service_id, locked in undo.locks.items():
+            row = store.row_for_service_id(service_id)
+            if row >= 0:
+                self.set_locked(row, locked)
+        restored = undo.restore(store)
+        if restored:
+            first = len(store)
+            self.beginInsertRows(QModelIndex(), first, first + len(restored) - 1)
+            for channel, favorite, url in restored:
+                store.set_url(store.append(channel, favorite), url)
+            if self._numbers is not None:
+                self._numbers.extend(range(first + 1, len(store) + 1))
+            self.endInsertRows()
+        order = undo.order(store)
+        if order is not None:
+            self._apply_order(order)
+
+    def replay_moves(self, blocks):
+        """تطبيق كتل 1005 على الجدول كما ينفذها الجهاز (لمعاملة بُنيت فوق نقل مرفوض)"""
+        order = receiver_move_order(self.store.service_ids, blocks)
+        if order != list(range(len(self.store))):
+            self._apply_order(order)
+
+    # --- أدوات داخلية ---
+    def _refresh_icons(self):
+        # العرض يعيد رسم الصفوف الظاهرة فقط مهما كان النطاق
+        if self.store:
+            self.dataChanged.emit(self.index(0, self.IMAGE_COLUMN),
+                                  self.index(len(self.store) - 1, self.IMAGE_COLUMN),
+                                  [Qt.ItemDataRole.DecorationRole])
+
+    def _emit_cell_changed(self, row: int, col: int):
+        index = self.index(row, col)
+        self.dataChanged.emit(index, index)
+
+    def _apply_order(self, order: list, renumber: bool = True):
+        """إعادة ترتيب كل بيانات الصفوف حسب order (order[جديد] = قديم) بتغيير تخطيط واحد"""
+        self.layoutAboutToBeChanged.emit()
+        self.store.reorder(order)
+        if renumber:
+            self._numbers = None
+        else:
+            numbers = self._numbers
+            self._numbers = array('I', (row + 1 if numbers is None else numbers[row] for row in order))
+
+        new_row_of = [0] * len(order)
+        for new_row, old_row in enumerate(order):
+            new_row_of[old_row] = new_row
+        old_indexes = self.persistentIndexList()
+        self.changePersistentIndexList(
+            old_indexes, [self.index(new_row_of[i.row()], i.column()) for i in old_indexes])
+        self.layoutChanged.emit()
+
+
+class ChannelFilterProxyModel(QAbstractProxyModel):
+    """
+    عرض مُصفّى لـ ChannelTableModel: الصفوف الظاهرة محسوبة مسبقاً في _rows
+    (أرقام صفوف المصدر تصاعدياً) من ChannelFilterIndex.
+    تغيير التصفية = إعادة تعيين واحدة للنموذج بدل setRowHidden أو filterAcceptsRow لكل صف.
+    الترتيب يتم في نموذج المصدر نفسه (نفس سلوك الجدول قبل التصفية).
+    """
+
+    def __init__(self, source: ChannelTableModel, parent=None):
+        super().__init__(parent)
+        self.filter_index = ChannelFilterIndex(source.store)
+        self.criteria = ("", 0, 0)  # (نص البحث، أعلام مطلوبة، أعلام مستبعدة)
+        self._rows = []
+        self._pending_removal = None
+        self._layout_sources = None
+        self.setSourceModel(source)
+        source.rowsInserted.connect(self._source_rows_inserted)
+        source.rowsAboutToBeRemoved.connect(self._source_rows_about_to_be_removed)
+        source.rowsRemoved.connect(self._source_rows_removed)
+        source.layoutAboutToBeChanged.connect(self._source_layout_about_to_be_changed)
+        source.layoutChanged.connect(self._source_layout_changed)
+        source.modelAboutToBeReset.connect(self.beginResetModel)
+        source.modelReset.connect(self._source_model_reset)
+        source.dataChanged.connect(self._source_data_changed)
+        self._refilter()
+
+    # --- التصفية ---
+    def set_filter(self, search_text: str = "", require: int = 0, exclude: int = 0) -> bool:
+        """تطبيق شروط جديدة؛ يعيد False إذا لم تتغير الصفوف الظاهرة (بدون أي إعادة رسم)"""
+        self.criteria = (search_text, require, exclude)
+        rows = rows_from_bits(self.filter_index.match(search_text, require, exclude), self.sourceModel().rowCount())
+        if rows == self._rows:
+            return False
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+        return True
+
+    def is_filtered(self) -> bool:
+        return len(self._rows) != self.sourceModel().rowCount()
+
+    def _refilter(self):
+        self._rows = rows_from_bits(self.filter_index.match(*self.criteria), self.sourceModel().rowCount())
+
+    # --- واجهة QAbstractProxyModel ---
+    def mapToSource(self, proxy_index: QModelIndex) -> QModelIndex:
+        if not proxy_index.isValid() or proxy_index.row() >= len(self._rows):
+            return QModelIndex()
+        return self.sourceModel().index(self._rows[proxy_index.row()], proxy_index.column())
+
+    def mapFromSource(self, source_index: QModelIndex) -> QModelIndex:
+        if not source_index.isValid():
+            return QModelIndex()
+        row = self.proxy_row(source_index.row())
+        return self.index(row, source_index.column()) if row >= 0 else QModelIndex()
+
+    def proxy_row(self, source_row: int) -> int:
+        """صف العرض لصف المصدر، أو -1 إذا كان مخفياً بالتصفية"""
+        position = bisect_left(self._rows, source_row)
+        if position < len(self._rows) and self._rows[position] == source_row:
+            return position
+        return -1
+
+    def index(self, row: int, column: int, parent=QModelIndex()) -> QModelIndex:
+        if parent.isValid() or not (0 <= row < len(self._rows)) or not (0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()) -> QModelIndex:
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self.sourceModel().columnCount()
+
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    # --- متابعة تغييرات المصدر ---
+    def _source_rows_inserted(self, parent, first: int, last: int):
+        # الإضافة دائماً في نهاية المصدر، لذلك الصفوف الجديدة الظاهرة تُضاف في نهاية العرض
+        bits = self.filter_index.match(*self.criteria) >> first
+        new_rows = rows_from_bits(bits, last - first + 1)
+        if not new_rows:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(new_rows) - 1)
+        self._rows.extend(row + first for row in new_rows)
+        self.endInsertRows()
+
+    def _source_rows_about_to_be_removed(self, parent, first: int, last: int):
+        start = bisect_left(self._rows, first)
+        end = bisect_left(self._rows, last + 1)
+        self._pending_removal = (start, end, last - first + 1)
+        if end > start:
+            self.beginRemoveRows(QModelIndex(), start, end - 1)
+
+    def _source_rows_removed(self, parent, first: int, last: int):
+        start, end, count = self._pending_removal
+        self._pending_removal = None
+        self._rows[start:] = [row - count for row in self._rows[end:]]
+        if end > start:
+            self.endRemoveRows()
+
+    def _source_layout_about_to_be_changed(self, *args):
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        self._layout_sources = (persistent, [QPersistentModelIndex(self.mapToSource(i)) for i in persistent])
+
+    def _source_layout_changed(self, *args):
+        persistent, sources = self._layout_sources or ([], [])
+        self._layout_sources = None
+        self._refilter()
+        self.changePersistentIndexList(
+            persistent, [self.mapFromSource(self.sourceModel().index(s.row(), s.column())) if s.isValid()
+                         else QModelIndex() for s in sources])
+        self.layoutChanged.emit()
+
+    def _refilter_range(self, first: int, last: int):
+        """إخفاء صفوف المصدر first..last التي لم تعد مطابقة وإظهار التي أصبحت مطابقة"""
+        start = bisect_left(self._rows, first)
+        end = bisect_left(self._rows, last + 1)
+        visible = self._rows[start:end]
+        matching = self.filter_index.match_range(first, last, *self.criteria)
+        if matching == visible:
+            return
+        keep = set(matching)
+        for row in reversed(visible):
+            if row not in keep:
+                position = bisect_left(self._rows, row)
+                self.beginRemoveRows(QModelIndex(), position, position)
+                del self._rows[position]
+                self.endRemoveRows()
+        shown = set(visible)
+        for row in matching:
+            if row not in shown:
+                position = bisect_left(self._rows, row)
+                self.beginInsertRows(QModelIndex(), position, position)
+                self._rows.insert(position, row)
+                self.endInsertRows()
+
+    def _source_model_reset(self):
+        self._refilter()
+        self.endResetModel()
+
+    def _source_data_changed(self, top_left: QModelIndex, bottom_right: QModelIndex, roles=None):
+        first, last = top_left.row(), bottom_right.row()
+        search_text, require, exclude = self.criteria
+        name_changed = top_left.column() <= ChannelTableModel.NAME_COLUMN <= bottom_right.column()
+        if require or exclude or (search_text.strip() and name_changed):
+            # التسمية أو القفل أو الاستبدال من المزامنة قد يغير نتيجة التصفية لهذه الصفوف
+            self._refilter_range(first, last)
+        start = bisect_left(self._rows, first)
+        end = bisect_left(self._rows, last + 1)
+        if end > start:
+            self.dataChanged.emit(self.index(start, top_left.column()),
+                                  self.index(end - 1, bottom_right.column()), roles or [])
+
+
 class StarsatRemote(QMainWindow):
     DIGIT_COMMAND_MAP = { # Key codes for digits 0-9
         "0": "12", "1": "13", "2": "14", "3": "15", "4": "16",
@@ -584,6 +1305,16 @@ class StarsatRemote(QMainWindow):
     def open_scanner_dialog(self):
         dialog = ScannerDialog(self)
         dialog.exec()
+    def open_multi_receiver_dialog(self):
+        if not self.connected_devices:
+            QMessageBox.information(self, "عدة أجهزة", "لا توجد أجهزة محفوظة. أضف الأجهزة أولاً من \"إضافة جهاز\".")
+            return
+        if self.multi_receiver_dialog is None:
+            self.multi_receiver_dialog = MultiReceiverDialog(self)
+        else:
+            self.multi_receiver_dialog.load_devices(self.connected_devices)
+        self.multi_receiver_dialog.show()
+        self.multi_receiver_dialog.raise_()
     def __init__(self):
         super().__init__()
         self.settings_manager = SettingsManager()
@@ -592,7 +1323,7 @@ class StarsatRemote(QMainWindow):
         self.current_font_size = 9
         self.favorite_groups = []
         self.favorites = []
-        self.channels = [] # القائمة الداخلية لبيانات القنوات
+        self.channels = ChannelStore() # بيانات القنوات (مخزن عمودي يعرضه channel_model)
         self.connected_devices = []
         self.current_device_index = -1
         self.embedded_instance = None  # ← تمت إضافته هنا
@@ -604,15 +1335,63 @@ class StarsatRemote(QMainWindow):
         self.is_fetching_all = False # لجلب جميع القنوات
         self.current_fetch_from = 0
         self.batch_size = 25
+        self.fetch_window = 4 # عدد طلبات نطاقات القنوات المعلقة في نفس الوقت
+        self.fetch_pipeline = None
+        self.device_channel_count = None # ChannelNum من معلومات الجهاز
+        self.device_serial = None # SerialNumber من معلومات الجهاز (مفتاح ذاكرة القنوات)
+        self.device_product = None
+        self.cache_serial = None # الجهاز الذي يعرض الجدول قنواته من الذاكرة
+        self.sync_pipeline = None # مزامنة الذاكرة مع الجهاز في الخلفية
+        self.sync_channels = []
+        self.sync_replace_all = False # استبدال الجدول بقائمة الجهاز حتى لو طابقت الذاكرة (بعد تعديلات غير مؤكدة)
+        self.sync_result = None # قائمة الجهاز بانتظار انتهاء التعبئة والتعديلات الجارية لتطبيقها
+        self.sync_edit_generation = 0
+        self.edit_generation = 0 # عدد معاملات التعديل المكتملة (لمعرفة هل سبقتها قائمة المزامنة)
+        self.sync_apply_timer = QTimer(self)
+        self.sync_apply_timer.setSingleShot(True)
+        self.sync_apply_timer.setInterval(200)
+        self.sync_apply_timer.timeout.connect(self.apply_channel_sync)
+        try:
+            self.channel_cache = ChannelCache(self.settings_manager.settings.value("channel_cache_path", DEFAULT_CACHE_PATH))
+        except (OSError, sqlite3.Error) as e:
+            logging.error(f"تعذر فتح ذاكرة القنوات: {e}")
+            self.channel_cache = None
+        self.resume_state = None # العمل الذي قطعه انقطاع الاتصال ليُستأنف بعد إعادة الاتصال
         self.connected = False
         self.is_expanded = False
         # متغيرات جديدة لتحديث روابط البث لجميع القنوات
         self.is_updating_all_urls = False
-        self.current_url_update_index = 0
+        self.url_plan = None # خطة تحديث الروابط الجارية (عينة، تحقق متوازٍ، ثم طلب ما فشل)
+        self.url_zap_current = None
+        self.url_probe_worker = None
         self.url_update_timer = QTimer(self)
         self.url_update_timer.timeout.connect(self.process_next_url_update)
         self.url_update_delay = 10 # تأخير بالمللي ثانية بين كل طلب تحديث رابط
-        self.last_requested_service_id_for_url = None # لتتبع القناة التي طلب رابطها مؤخراً
+        self.export_worker = None # التصدير الجاري في الخلفية (ExportWorker)
+        self.export_shows_progress = False
+        # ✅ جلسات مستقلة لعدة أجهزة (بجانب الاتصال الرئيسي) لتشغيل العمليات عليها بالتوازي
+        self.receiver_manager = ReceiverManager()
+        self.multi_receiver_dialog = None
+        # الواجهة قد تكون تبويباً داخل نافذة أخرى فلا يصلها closeEvent: الجلسات تُغلق عند خروج التطبيق
+        QApplication.instance().aboutToQuit.connect(self.receiver_manager.close_all)
+        # ✅ تعديلات القنوات (تسمية، قفل، نقل، حذف) تُجمع لحظة ثم تُرسل كطلبات مجمعة تنتظر تأكيد الجهاز
+        self.edit_queue = ChannelEditQueue(self.submit_edit_request, snapshot=lambda: self.channel_model.snapshot(),
+                                           on_done=self.handle_edit_transaction_done)
+        self.edit_flush_timer = QTimer(self)
+        self.edit_flush_timer.setSingleShot(True)
+        self.edit_flush_timer.setInterval(150)
+        self.edit_flush_timer.timeout.connect(self.edit_queue.flush)
+        # ✅ تعبئة الجدول على شرائح صغيرة في كل دورة أحداث بدل الدفعة كاملة مرة واحدة
+        self.populate_queue = deque()  # (قائمة القنوات، موضع البداية فيها)
+        self.populate_slice = 250      # عدد الصفوف في كل شريحة
+        self.populate_budget = 0.008   # أقصى زمن (ثانية) للتعبئة في كل دورة، أقل من إطار واحد
+        self.populate_timer = QTimer(self)
+        self.populate_timer.setInterval(0)
+        self.populate_timer.timeout.connect(self.process_populate_queue)
+        self.post_populate_timer = QTimer(self) # تحديث واحد (تصفية، إحصائيات، أزرار) بعد انتهاء التعبئة
+        self.post_populate_timer.setSingleShot(True)
+        self.post_populate_timer.setInterval(100)
+        self.post_populate_timer.timeout.connect(self.finish_channel_population)
         self.dark_mode = self.settings_manager.settings.value("dark_mode", False, type=bool)
 
         self.init_ui()
@@ -761,6 +1540,10 @@ class StarsatRemote(QMainWindow):
         self.remove_device_btn.clicked.connect(self.remove_device)
         conn_layout.addWidget(self.remove_device_btn, 3, 1)
 
+        self.multi_receiver_btn = QPushButton("🖧 عدة أجهزة")
+        self.multi_receiver_btn.clicked.connect(self.open_multi_receiver_dialog)
+        conn_layout.addWidget(self.multi_receiver_btn, 3, 2)
+
    
     # إضافة هذا بعد الأزرار الموجودة
         self.auto_reconnect_checkbox = QCheckBox("إعادة الاتصال التلقائي")
@@ -1160,9 +1943,14 @@ class StarsatRemote(QMainWindow):
         self.export_m3u_btn.setIcon(QIcon.fromTheme("text-x-m3u"))
         self.export_m3u_btn.clicked.connect(self.export_to_m3u)
 
+        self.export_parquet_btn = QPushButton("Parquet", self)
+        self.export_parquet_btn.setIcon(QIcon.fromTheme("x-office-spreadsheet"))
+        self.export_parquet_btn.clicked.connect(self.export_to_parquet)
+
         export_layout.addWidget(self.export_m3u_btn)
         export_layout.addWidget(self.export_excel_btn)
         export_layout.addWidget(self.export_csv_btn)
+        export_layout.addWidget(self.export_parquet_btn)
         export_layout.addWidget(self.export_json_btn)
         export_layout.addWidget(self.export_html_btn)
         
@@ -1294,24 +2082,22 @@ class StarsatRemote(QMainWindow):
 
         layout.addWidget(filter_group)
 # اااااااا
-        self.channel_table = QTableWidget()
-        # self.channel_table.setColumnCount(25)  # زيادة بمقدار 1
-        self.channel_table.setColumnCount(19)  # كان 18، أصبح 19
-        self.channel_table.setHorizontalHeaderLabels([
-        "⭐", "اسم القناة", "معرف الخدمة", "رابط البث", "النوع", "الجودة", "الحماية", 
-        "مقفلة؟", "دعم EPG؟", "عدد مسارات الصوت", "Video PID", "Audio PID(s)", 
-        "PMT PID", "مفضلة (FavBit)", "قيد التشغيل (Playing)", 
-        "مؤشر الخدمة (ServiceIndex)", "رقم", "تحديد", "📷 صورة"  # العمود الجديد
-        ])
+        self.channel_model = ChannelTableModel(self.channels, self.get_favorite_group_names, self)
+        self.channel_model.favorite_toggled.connect(self.handle_favorite_toggled)
+        self.channel_model.modelAboutToBeReset.connect(self.cancel_channel_population) # مسح الجدول يلغي ما لم يُضف بعد
+        self.channel_proxy = ChannelFilterProxyModel(self.channel_model, self)
+        self.channel_table = QTableView()
+        self.channel_table.setModel(self.channel_proxy)
         header = self.channel_table.horizontalHeader()
         header.setSectionsMovable(True)
         header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         self.channel_table.setIconSize(QSize(100, 100))  # هنا
+        self.channel_table.verticalHeader().setDefaultSectionSize(40)
         self.channel_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.channel_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        self.channel_table.itemClicked.connect(self.handle_favorite_click)
-        self.channel_table.itemDoubleClicked.connect(self.channel_selected)
-        self.channel_table.currentItemChanged.connect(self.update_channel_action_buttons_state)
+        self.channel_table.setSortingEnabled(True)
+        self.channel_table.doubleClicked.connect(self.channel_selected)
+        self.channel_table.selectionModel().currentChanged.connect(self.update_channel_action_buttons_state)
         header = self.channel_table.horizontalHeader()
         header.setFixedHeight(60)
         # تفعيل قائمة السياق
@@ -1627,7 +2413,7 @@ class StarsatRemote(QMainWindow):
                 QTabBar::tab:hover {
                     background: #606060;
                 }
-                QTableWidget {
+                QTableView {
                     gridline-color: #555555;
                     background-color: #252525;
                     color: white;
@@ -1709,9 +2495,18 @@ class StarsatRemote(QMainWindow):
         self.vlc_path_input.setText(self.settings_manager.settings.value("vlc_path", r"C:\Program Files\VideoLAN\VLC\vlc.exe"))
         self.record_path_input.setText(self.settings_manager.settings.value("record_path", os.path.expanduser("~/Videos")))
         self.batch_size = int(self.settings_manager.settings.value("batch_size", 250))
+        self.fetch_window = int(self.settings_manager.settings.value("fetch_window", 4))
 
-        self.channels = self.settings_manager.load_channels()
         self.favorites = self.settings_manager.load_favorites()
+        self.channel_model.receiver_ip = ip
+        self.channel_model.clear()
+        # البدء فوراً من ذاكرة آخر جهاز؛ الحفظ القديم في QSettings للترقية فقط
+        serial = self.channel_cache.last_serial() if self.channel_cache else None
+        if serial:
+            self.cache_serial = serial
+            self.channel_model.append_channels(self.channel_cache.load(serial), self.favorites)
+        else:
+            self.channel_model.append_channels(self.settings_manager.load_channels(), self.favorites)
         self.update_stats()
 
     def update_device_selector(self):
@@ -1750,33 +2545,7 @@ class StarsatRemote(QMainWindow):
         self.device_selector.blockSignals(False)
 
     def export_to_csv(self):
-        file_path, _ = QFileDialog.getSaveFileName(
-            self,
-            "حفظ ملف CSV",
-            "",
-            "CSV Files (*.csv);;All Files (*)"
-        )
-
-        if file_path:
-            if not file_path.lower().endswith('.csv'):
-                file_path += '.csv'
-
-            with open(file_path, 'w', encoding='utf-8-sig') as f:
-                # كتابة العناوين
-                headers = []
-                for col in range(self.channel_table.columnCount()):
-                    headers.append(self.channel_table.horizontalHeaderItem(col).text())
-                f.write(','.join(headers) + '\n')
-
-                # كتابة البيانات
-                for row in range(self.channel_table.rowCount()):
-                    row_data = []
-                    for col in range(self.channel_table.columnCount()):
-                        item = self.channel_table.item(row, col)
-                        row_data.append(f'"{item.text()}"' if item else '""')
-                    f.write(','.join(row_data) + '\n')
-
-            self.update_output(f"✅ تم التصدير إلى CSV: {file_path}")
+        self.export_channels_to_file("csv")
 
     def export_to_json(self):
         import json
@@ -1791,13 +2560,12 @@ class StarsatRemote(QMainWindow):
             if not file_path.lower().endswith('.json'):
                 file_path += '.json'
 
+            model = self.channel_model
             data = {
-                "headers": [self.channel_table.horizontalHeaderItem(col).text()
-                           for col in range(self.channel_table.columnCount())],
+                "headers": list(model.HEADERS),
                 "rows": [
-                    [self.channel_table.item(row, col).text() if self.channel_table.item(row, col) else ""
-                    for col in range(self.channel_table.columnCount())]
-                    for row in range(self.channel_table.rowCount())
+                    [model.text(row, col) for col in range(model.columnCount())]
+                    for row in range(model.rowCount())
                 ]
             }
 
@@ -1835,8 +2603,9 @@ class StarsatRemote(QMainWindow):
             <tr>
 """
             # العناوين
-            for col in range(self.channel_table.columnCount()):
-                html += f"<th>{self.channel_table.horizontalHeaderItem(col).text()}</th>"
+            model = self.channel_model
+            for header in model.HEADERS:
+                html += f"<th>{header}</th>"
 
             html += """
             </tr>
@@ -1844,11 +2613,10 @@ class StarsatRemote(QMainWindow):
         <tbody>
 """
             # البيانات
-            for row in range(self.channel_table.rowCount()):
+            for row in range(model.rowCount()):
                 html += "<tr>"
-                for col in range(self.channel_table.columnCount()):
-                    item = self.channel_table.item(row, col)
-                    html += f"<td>{item.text() if item else ''}</td>"
+                for col in range(model.columnCount()):
+                    html += f"<td>{model.text(row, col)}</td>"
                 html += "</tr>"
 
             html += """
@@ -1887,11 +2655,12 @@ class StarsatRemote(QMainWindow):
                           stream_url TEXT)''')
 
             # إدراج البيانات
-            for row in range(self.channel_table.rowCount()):
-                fav = "نعم" if self.channel_table.item(row, 0).checkState() == Qt.Checked else "لا"
-                name = self.channel_table.item(row, 1).text()
-                service_id = self.channel_table.item(row, 2).text()
-                url = self.channel_table.item(row, 3).text()
+            model = self.channel_model
+            for row in range(model.rowCount()):
+                fav = "نعم" if model.is_favorite(row) else "لا"
+                name = model.name(row)
+                service_id = model.service_id(row)
+                url = model.url(row)
 
                 c.execute("INSERT INTO channels VALUES (NULL,?,?,?,?)",
                           (fav, name, service_id, url))
@@ -1901,22 +2670,6 @@ class StarsatRemote(QMainWindow):
 
             self.update_output(f"✅ تم التصدير إلى SQLite: {file_path}")
 
-    def setup_cell_tooltips(self):
-        """تعيين تلميحات للخلايا تعرض اسم العمود والمحتوى"""
-        for row in range(self.channel_table.rowCount()):
-            for col in range(self.channel_table.columnCount()):
-                item = self.channel_table.item(row, col)
-                if item:
-                    # الحصول على اسم العمود من العنوان
-                    header = self.channel_table.horizontalHeaderItem(col)
-                    header_text = header.text() if header else f"Column {col}"
-
-                    # تعيين التلميح
-                    item.setToolTip(
-                        f"{header_text}\n"  # السطر الأول: اسم العمود
-                        f"----------------\n"
-                        f"{item.text()}"     # السطر الثاني: محتوى الخلية
-                    )
     def enable_header_word_wrap(self):
         """تمكين التفاف النص في رأس الجدول"""
         header = self.channel_table.horizontalHeader()
@@ -1972,51 +2725,72 @@ class StarsatRemote(QMainWindow):
         for column, width in column_widths.items():
             self.channel_table.setColumnWidth(column, width * 20)
     def export_to_m3u(self):
-        """تصدير القنوات إلى ملف بصيغة M3U"""
-        file_path, _ = QFileDialog.getSaveFileName(
-            self,
-            "حفظ ملف M3U",
-            "",
-            "M3U Files (*.m3u);;All Files (*)"
-        )
+        """تصدير القنوات إلى ملف بصيغة M3U (group-title من المجموعات المفضلة)"""
+        self.export_channels_to_file("m3u")
 
-        if not file_path:
-            return
+    def export_to_excel(self):
+        self.export_channels_to_file("xlsx")
 
-        if not file_path.lower().endswith('.m3u'):
-            file_path += '.m3u'
+    def export_to_parquet(self):
+        self.export_channels_to_file("parquet")
 
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                # كتابة رأس الملف
-                f.write("#EXTM3U\n")
-
-                # كتابة كل قناة
-                for row in range(self.channel_table.rowCount()):
-                    name_item = self.channel_table.item(row, 1)  # اسم القناة
-                    url_item = self.channel_table.item(row, 3)   # رابط البث
-                    type_item = self.channel_table.item(row, 4)  # النوع (تلفاز/راديو)
-
-                    if name_item and url_item and type_item:
-                        channel_name = name_item.text()
-                        stream_url = url_item.text()
-                        channel_type = type_item.text()
-
-                        if stream_url:  # فقط إذا كان هناك رابط بث
-                            # كتابة معلومات القناة
-                            f.write(f"#EXTINF:-1 group-title=\"Starsat\",{channel_name}\n")
-                            f.write(f"{stream_url}\n")
-
-            self.update_output(f"✅ تم التصدير إلى M3U: {file_path}")
-            QMessageBox.information(self, "نجاح", f"تم إنشاء ملف M3U بنجاح:\n{file_path}")
-        except Exception as e:
-            self.update_output(f"❌ خطأ في التصدير إلى M3U: {str(e)}")
-            QMessageBox.critical(self, "خطأ", f"فشل في حفظ الملف:\n{str(e)}")
+    def export_channels_to_file(self, kind: str):
+        """اختيار المسار ثم الكتابة في الخلفية عبر ExportWorker"""
+        if self.export_worker is not None:
+            self.update_output("⚠️ يوجد تصدير قيد التنفيذ، انتظر انتهاءه أولاً.")
+            return
+        label, extension, file_filter = EXPORT_FORMATS[kind]
+        file_path, _ = QFileDialog.getSaveFileName(self, f"حفظ ملف {label}", "", file_filter)
+        if not file_path:
+            return
+        if not file_path.lower().endswith(extension):
+            file_path += extension
+
+        source = self.channel_model.export_source()
+        thread = QThread(self)
+        worker = ExportWorker(kind, file_path, source)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.progress.connect(self.handle_export_progress)
+        worker.finished.connect(lambda written, error, w=worker: self.handle_export_finished(w, written, error))
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        self.export_worker = worker
+        self.export_shows_progress = not self.progress_bar.isVisible()  # لا نأخذ الشريط من التحميل أو تحديث الروابط
+        if self.export_shows_progress:
+            self.progress_bar.setRange(0, max(len(source.store), 1))
+            self.progress_bar.setValue(0)
+            self.progress_bar.setFormat(f"%p% - تصدير {label}: %v/%m")
+            self.progress_bar.setVisible(True)
+        self.update_output(f"📤 جاري التصدير إلى {label}: {len(source.store)} قناة...")
+        thread.start()
+
+    @pyqtSlot(int, int)
+    def handle_export_progress(self, written: int, total: int):
+        if self.export_shows_progress:
+            self.progress_bar.setValue(written)
+
+    def handle_export_finished(self, worker, written: int, error: str):
+        if worker is not self.export_worker:
+            return
+        self.export_worker = None
+        if self.export_shows_progress:
+            self.progress_bar.setVisible(False)
+        label = EXPORT_FORMATS[worker.kind][0]
+        if error:
+            self.update_output(f"❌ خطأ في التصدير إلى {label}: {error}")
+            QMessageBox.critical(self, "خطأ", f"فشل في حفظ الملف:\n{error}")
+        elif written < 0:
+            self.update_output(f"⏹️ أُلغي التصدير إلى {label}.")
+        else:
+            self.update_output(f"✅ تم التصدير إلى {label} ({written} قناة): {worker.path}")
+            QMessageBox.information(self, "نجاح", f"تم حفظ الملف بنجاح:\n{worker.path}")
 
     def show_playing_channels(self):
-        for row in range(self.channel_table.rowCount()):
-            playing_item = self.channel_table.item(row, 14)
-            if playing_item and playing_item.text().strip() == "نعم":
+        model = self.channel_model
+        for row in range(model.rowCount()):
+            if model.is_playing(row):
                 dialog = QDialog(self)
                 dialog.setWindowTitle(f"تفاصيل القناة (الصف {row + 1})")
                 layout = QVBoxLayout(dialog)
@@ -2024,7 +2798,7 @@ class StarsatRemote(QMainWindow):
                 table = QTableWidget()
                 table.setColumnCount(2)
                 table.setHorizontalHeaderLabels(["اسم الحقل", "القيمة"])
-                table.setRowCount(self.channel_table.columnCount())
+                table.setRowCount(model.columnCount())
                 table.horizontalHeader().setStretchLastSection(True)
                 table.verticalHeader().setVisible(False)
 
@@ -2034,11 +2808,8 @@ class StarsatRemote(QMainWindow):
 
                 table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
 
-                for col in range(self.channel_table.columnCount()):
-                    header_item = self.channel_table.horizontalHeaderItem(col)
-                    item = self.channel_table.item(row, col)
-                    header = header_item.text() if header_item else f"عمود {col + 1}"
-                    value = item.text().strip() if item else ""
+                for col, header in enumerate(model.HEADERS):
+                    value = model.text(row, col).strip()
 
                     table.setItem(col, 0, QTableWidgetItem(header))
                     table.setItem(col, 1, QTableWidgetItem(value))
@@ -2063,8 +2834,7 @@ class StarsatRemote(QMainWindow):
                 btn_box.addButton(ok_btn, QDialogButtonBox.ButtonRole.AcceptRole)
                 layout.addWidget(btn_box)
 
-                self.channel_table.selectRow(row)
-                self.channel_table.scrollToItem(self.channel_table.item(row, 1), QAbstractItemView.ScrollHint.PositionAtCenter)
+                self.select_channel_row(row, center=True)
 
                 dialog.resize(600, 500)
                 dialog.exec()
@@ -2082,62 +2852,24 @@ class StarsatRemote(QMainWindow):
 
         if reply == QMessageBox.StandardButton.Yes:
             # مسح الجدول المرئي
-            self.channel_table.setRowCount(0)
+            self.channel_model.clear()
 
-            # مسح البيانات الداخلية
-            self.channels = []
+            # مسح البيانات الداخلية (القنوات نفسها مُسحت مع النموذج)
             self.favorites = []
 
             # تحديث الإحصائيات
             self.update_stats()
 
             # مسح التفضيلات المحفوظة
-            self.settings_manager.save_channels([])
+            self.settings_manager.clear_channels()
             self.settings_manager.save_favorites([])
+            if self.channel_cache is not None and self.cache_serial:
+                self.channel_cache.clear(self.cache_serial)
+                self.cache_serial = None
 
             self.update_output("✅ تم مسح جميع بيانات القنوات بنجاح")
 
 
-    def export_to_excel(self):
-        try:
-            # إنشاء DataFrame من بيانات الجدول
-            data = []
-            for row in range(self.channel_table.rowCount()):
-                row_data = []
-                for column in range(self.channel_table.columnCount()):
-                    item = self.channel_table.item(row, column)
-                    row_data.append(item.text() if item else "")
-                data.append(row_data)
-
-            # أسماء الأعمدة
-            headers = [self.channel_table.horizontalHeaderItem(i).text()
-                      for i in range(self.channel_table.columnCount())]
-
-            import pandas as pd
-            df = pd.DataFrame(data, columns=headers)
-
-            # اختيار مسار الحفظ
-            file_path, _ = QFileDialog.getSaveFileName(
-                self,
-                "حفظ ملف Excel",
-                "",
-                "Excel Files (*.xlsx);;All Files (*)"
-            )
-
-            if file_path:
-                # التأكد من أن الملف ينتهي بـ .xlsx
-                if not file_path.lower().endswith('.xlsx'):
-                    file_path += '.xlsx'
-
-                df.to_excel(file_path, index=False)
-                self.update_output(f"✅ تم تصدير البيانات إلى: {file_path}")
-                QMessageBox.information(self, "نجاح", "تم حفظ الملف بنجاح!")
-
-        except Exception as e:
-            self.update_output(f"❌ خطأ في التصدير إلى Excel: {str(e)}")
-            QMessageBox.critical(self, "خطأ", f"فشل في حفظ الملف:\n{str(e)}")
-
-
     def add_device(self):
         name, ok = QInputDialog.getText(self, "إضافة جهاز", "اسم الجهاز:")
         if not ok or not name.strip():
@@ -2237,10 +2969,10 @@ class StarsatRemote(QMainWindow):
         self.settings_manager.save_device_settings(ip, port_str)
 
         self.connect_btn.setEnabled(False)
+        self.resume_state = None
 
         self.output.clear()
-        self.channel_table.setRowCount(0)
-        self.channels = []
+        self.channel_model.clear()
         self.update_stats()
         self.update_output(f"⏳ جارٍ الاتصال بـ {ip}:{port_str}...")
         
@@ -2252,12 +2984,12 @@ class StarsatRemote(QMainWindow):
         self.network_thread.disconnected_signal.connect(self.handle_disconnected)
         self.network_thread.message_signal.connect(self.update_output)
         self.network_thread.data_signal.connect(self.handle_received_data)
-        self.network_thread.channel_data_signal.connect(self.populate_channel_table)
         self.network_thread.connection_status_signal.connect(self.update_connection_status)
         self.network_thread.ping_result_signal.connect(self.update_ping_status)
         self.network_thread.start()
 
     def disconnect_from_device(self):
+        self.resume_state = None
         if self.is_updating_all_urls:
             self.stop_updating_all_urls()
         if self.is_fetching_all:
@@ -2277,14 +3009,23 @@ class StarsatRemote(QMainWindow):
             self.connection_status_label.setStyleSheet("color: lightgreen;")
             self.fetch_channels_btn.setEnabled(True)
             self.fetch_all_btn.setEnabled(True)
-            self.update_all_urls_btn.setEnabled(self.channel_table.rowCount() > 0)
+            self.update_all_urls_btn.setEnabled(self.channel_model.rowCount() > 0)
             self.disconnect_btn.setEnabled(True)
             if hasattr(self, 'fetch_and_update_btn'):
                 self.fetch_and_update_btn.setEnabled(True)
             self.connect_btn.setEnabled(False)
             self.digit_input.setEnabled(True)
             self.go_button.setEnabled(True)
+            if self.resume_state:
+                self.resume_interrupted_work()
         else:
+            if self.is_fetching_all or self.is_updating_all_urls:
+                # حفظ موضع العمل الجاري (current_fetch_from أو مؤشر تحديث الروابط) لاستئنافه بعد إعادة الاتصال
+                self.resume_state = {"fetch": self.is_fetching_all, "urls": self.is_updating_all_urls}
+                if self.fetch_pipeline is not None:
+                    self.fetch_pipeline.cancel()
+                    self.fetch_pipeline = None
+            self.cancel_channel_sync() # تُعاد بعد الاتصال عند وصول معلومات الجهاز
             self.connection_status_label.setText("❌ غير متصل")
             self.connection_status_label.setStyleSheet("color: red;")
             self.fetch_channels_btn.setEnabled(False)
@@ -2294,6 +3035,7 @@ class StarsatRemote(QMainWindow):
             self.is_fetching_all = False
             self.is_updating_all_urls = False
             self.url_update_timer.stop()
+            self.cancel_url_probe() # ما لم يُفحص يبقى في url_plan ويُستأنف بعد إعادة الاتصال
             self.progress_bar.setVisible(False)
             self.disconnect_btn.setEnabled(False)
             if hasattr(self, 'fetch_and_update_btn'):
@@ -2303,7 +3045,41 @@ class StarsatRemote(QMainWindow):
             self.go_button.setEnabled(False)
         self.update_channel_action_buttons_state()
 
+    def resume_interrupted_work(self):
+        """استئناف الجلب أو تحديث الروابط من حيث توقف بعد إعادة الاتصال"""
+        state, self.resume_state = self.resume_state, None
+        self.fetch_channels_btn.setEnabled(False)
+        self.fetch_all_btn.setEnabled(False)
+        self.update_all_urls_btn.setEnabled(False)
+        self.stop_fetch_btn.setEnabled(True)
+        self.progress_bar.setVisible(True)
+
+        if state["fetch"]:
+            self.update_output(f"♻️ استئناف جلب القنوات من {self.current_fetch_from}...")
+            self.is_fetching_all = True
+            self.start_fetch_pipeline()
+        elif state["urls"] and self.url_plan is not None:
+            self.update_output(f"♻️ استئناف تحديث الروابط ({self.url_plan.done}/{self.url_plan.total})...")
+            if self.url_zap_current is not None: # الطلب الذي قطعه الانقطاع يُعاد
+                self.url_plan.retry(self.url_zap_current)
+                self.url_zap_current = None
+            self.is_updating_all_urls = True
+            self.progress_bar.setRange(0, self.url_plan.total)
+            self.progress_bar.setValue(self.url_plan.done)
+            self.progress_bar.setFormat("%p% - تحديث الروابط: %v/%m")
+            self.process_next_url_update()
+
     def update_ping_status(self, latency):
+        if self.network_thread:
+            stats = self.network_thread.latency.snapshot()
+            if stats["count"]:
+                self.ping_status_label.setToolTip(
+                    f"آخر {stats['count']} قياس\n"
+                    f"p50: {stats['p50']:.1f} ms\n"
+                    f"p95: {stats['p95']:.1f} ms\n"
+                    f"p99: {stats['p99']:.1f} ms\n"
+                    f"المهلات المنتهية: {stats['timeouts']}"
+                )
         if latency >= 0:
             self.ping_status_label.setText(f"زمن الاستجابة: {latency:.1f} ms")
             if latency < 100: self.ping_status_label.setStyleSheet("color: lightgreen;")
@@ -2319,18 +3095,16 @@ class StarsatRemote(QMainWindow):
             return
 
         self.update_output(f"📡 طلب أول {self.batch_size} قناة...")
-        self.channel_table.setRowCount(0)
-        self.channels = []
+        self.channel_model.clear()
         self.is_fetching_all = False
         self.is_updating_all_urls = False
         self.url_update_timer.stop()
         self.progress_bar.setVisible(False)
-        self.setup_cell_tooltips()
 
         try:
             request_body = f'{{"request":"0", "FromIndex":"0", "ToIndex":"{self.batch_size -1}"}}'
             channel_command = build_message(request_body)
-            self.network_thread.send_command(("fetch_channels", channel_command))
+            self.network_thread.send_request(channel_command, "channel_list", self.handle_channel_batch_response)
         except Exception as e:
             self.update_output(f"❌ خطأ أثناء إعداد طلب القنوات: {e}")
 
@@ -2345,8 +3119,7 @@ class StarsatRemote(QMainWindow):
 
         self.is_fetching_all = True
         self.current_fetch_from = 0
-        self.channel_table.setRowCount(0)
-        self.channels = []
+        self.channel_model.clear()
 
         self.fetch_channels_btn.setEnabled(False)
         self.fetch_all_btn.setEnabled(False)
@@ -2358,25 +3131,172 @@ class StarsatRemote(QMainWindow):
         self.progress_bar.setVisible(True)
 
         self.update_output("⏳ بدء جلب جميع القنوات...")
-        self.fetch_next_batch()
+        self.start_fetch_pipeline()
 
-    def fetch_next_batch(self):
+    def start_fetch_pipeline(self):
         if not self.is_fetching_all or not self.connected:
             self.stop_fetching_all()
             return
+        self.cancel_channel_sync() # الجلب الكامل يغني عن المزامنة
 
-        to_index = self.current_fetch_from + self.batch_size - 1
-        self.update_output(f"📡 جلب القنوات من {self.current_fetch_from} إلى {to_index}...")
+        total = self.device_channel_count
+        if total:
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(min(self.current_fetch_from, total))
+            self.progress_bar.setFormat("%p% - تحميل القنوات: %v/%m")
+        else:
+            self.progress_bar.setRange(0, 0) # العدد غير معروف بعد: مؤشر انشغال بدل تقدير وهمي
+        self.update_output(f"📡 جلب القنوات من {self.current_fetch_from} على دفعات من {self.batch_size} ({self.fetch_window} طلبات متزامنة)...")
 
+        self.fetch_pipeline = ChannelFetchPipeline(
+            lambda message, callback: self.network_thread.send_request(message, "channel_list", callback),
+            self.batch_size, window=self.fetch_window, total=total, start=self.current_fetch_from,
+            on_batch=self.handle_fetched_batch, on_done=self.handle_fetch_done, on_error=self.handle_fetch_error
+        )
+        self.fetch_pipeline.start()
+
+    def handle_fetched_batch(self, channels: list, from_index: int):
+        """دفعة مكتملة بالترتيب من أنبوب الجلب"""
+        self.populate_channel_table(channels)
+        self.current_fetch_from = from_index + len(channels)
+        if self.progress_bar.maximum() > 0:
+            if self.current_fetch_from > self.progress_bar.maximum(): # ChannelNum أقل من العدد الفعلي
+                self.progress_bar.setMaximum(self.current_fetch_from)
+            self.progress_bar.setValue(self.current_fetch_from)
+
+    def handle_fetch_done(self, received: int):
+        self.fetch_pipeline = None
+        self.flush_channel_population()
+        self.save_channel_cache()
+        self.update_output(f"🏁 اكتمل جلب جميع القنوات. الإجمالي: {len(self.channels)}.")
+        self.progress_bar.setRange(0, max(1, self.current_fetch_from))
+        self.progress_bar.setValue(self.progress_bar.maximum())
+        self.stop_fetching_all()
+
+        QTimer.singleShot(2000, lambda: self.progress_bar.setVisible(False) if not (self.is_fetching_all or self.is_updating_all_urls) else None)
+
+    def handle_fetch_error(self, error: Exception, from_index: int):
+        self.fetch_pipeline = None
+        self.update_output(f"❌ خطأ في طلب القنوات من {from_index}: {error}")
+        self.stop_fetching_all()
+
+    # --- ذاكرة القنوات والمزامنة مع الجهاز ---
+    def save_channel_cache(self):
+        """حفظ الجدول في ذاكرة الجهاز المتصل (الصفوف المتغيرة فقط تُكتب)"""
+        if self.channel_cache is None or not self.device_serial:
+            return
         try:
-            request_body = f'{{"request":"0", "FromIndex":"{self.current_fetch_from}", "ToIndex":"{to_index}"}}'
-            channel_command = build_message(request_body)
-            self.network_thread.send_command(("fetch_channels", channel_command))
-        except Exception as e:
-            self.update_output(f"❌ خطأ في طلب القنوات: {e}")
-            self.stop_fetching_all()
+            written = self.channel_cache.save(self.device_serial, self.channels.to_dicts(), self.device_product)
+            self.cache_serial = self.device_serial
+            self.settings_manager.clear_channels() # اكتملت الترقية: الذاكرة هي المرجع من الآن
+            logging.info(f"ذاكرة القنوات: {written} صف محدث للجهاز {self.device_serial}")
+        except sqlite3.Error as e:
+            self.update_output(f"⚠️ تعذر حفظ ذاكرة القنوات: {e}")
+
+    def cache_receiver_channels(self, session, store: ChannelStore):
+        """حفظ قائمة جلبتها جلسة عدة أجهزة في الذاكرة حتى يبدأ الاتصال بذلك الجهاز لاحقاً منها"""
+        info = session.device_info if session is not None else None
+        if self.channel_cache is None or not isinstance(info, dict) or not info.get("SerialNumber"):
+            return
+        try:
+            self.channel_cache.save(info["SerialNumber"], store.to_dicts(), info.get("ProductName"))
+        except sqlite3.Error as e:
+            self.update_output(f"⚠️ تعذر حفظ ذاكرة القنوات للجهاز {session.name}: {e}")
+
+    def start_channel_sync(self, replace_all: bool = False):
+        """جلب القائمة من الجهاز في الخلفية ومقارنتها بالذاكرة بدل مسح الجدول وإعادة جلبه"""
+        self.sync_replace_all = self.sync_replace_all or replace_all
+        if (self.channel_cache is None or not self.device_serial or not self.connected
+                or self.is_fetching_all or self.sync_pipeline is not None):
+            return
+        if self.cache_serial != self.device_serial:
+            # جهاز مختلف عن المعروض: عرض ذاكرته أولاً
+            self.channel_model.clear()
+            self.channel_model.append_channels(self.channel_cache.load(self.device_serial), self.favorites)
+            self.cache_serial = self.device_serial
+            self.update_stats()
+        self.update_output(f"🔄 مزامنة {self.channel_model.rowCount()} قناة من الذاكرة مع الجهاز في الخلفية...")
+        self.sync_channels = []
+        self.sync_pipeline = ChannelFetchPipeline(
+            lambda message, callback: self.network_thread.send_request(message, "channel_list", callback),
+            self.batch_size, window=self.fetch_window, total=self.device_channel_count,
+            on_batch=lambda channels, from_index: self.sync_channels.extend(channels),
+            on_done=self.handle_sync_done, on_error=self.handle_sync_error
+        )
+        self.sync_edit_generation = self.edit_generation
+        self.sync_pipeline.start()
+
+    def handle_sync_done(self, received: int):
+        self.sync_pipeline = None
+        self.sync_result, self.sync_channels = self.sync_channels, []
+        self.apply_channel_sync()
+
+    def apply_channel_sync(self):
+        """تطبيق قائمة المزامنة على الجدول بعد أن يخلو من تعبئة أو تعديلات لم يؤكدها الجهاز بعد"""
+        if self.sync_result is None:
+            return
+        edits = self.edit_queue
+        if self.populate_queue or edits.pending is not None or edits.in_flight is not None:
+            self.sync_apply_timer.start() # استبدال الصفوف الآن يمحو التعديل المتفائل أو يتداخل مع الشرائح
+            return
+        channels, self.sync_result = self.sync_result, None
+        if self.edit_generation != self.sync_edit_generation:
+            # اكتملت تعديلات أثناء المزامنة: القائمة المجلوبة قد تكون أقدم منها
+            self.update_output("🔄 تغيرت القنوات أثناء المزامنة، إعادة المزامنة...")
+            self.start_channel_sync()
+            return
+        replace_all, self.sync_replace_all = self.sync_replace_all, False
+        delta = self.channel_cache.diff(self.device_serial, channels)
+        if replace_all:
+            self.update_output(f"🔄 تحديث الجدول من قائمة الجهاز ({len(channels)} قناة)...")
+            self.channel_model.clear()
+            self.channel_model.append_channels(channels, self.favorites)
+            self.filter_channels()
+        elif not delta:
+            self.update_output("✅ القنوات في الذاكرة مطابقة للجهاز.")
+        elif delta.reordered or self.channel_model.rowCount() != len(channels):
+            # إضافة أو حذف أو نقل على الجهاز: استبدال القائمة مرة واحدة
+            self.update_output(f"🔄 تغير ترتيب القنوات على الجهاز، تحديث الجدول ({len(channels)} قناة)...")
+            self.channel_model.clear()
+            self.channel_model.append_channels(channels, self.favorites)
+            self.filter_channels()
+        else:
+            self.channel_model.replace_rows(delta.changed)
+            self.update_output(f"✅ تمت المزامنة: {len(delta.changed)} قناة تغيرت من أصل {len(channels)}.")
+        try:
+            self.channel_cache.save(self.device_serial, channels, self.device_product)
+        except sqlite3.Error as e:
+            self.update_output(f"⚠️ تعذر حفظ ذاكرة القنوات: {e}")
+        self.update_stats()
+
+    def handle_sync_error(self, error: Exception, from_index: int):
+        self.sync_pipeline = None
+        self.sync_channels = []
+        self.update_output(f"⚠️ توقفت مزامنة القنوات عند {from_index}: {error}")
+
+    def cancel_channel_sync(self):
+        if self.sync_pipeline is not None:
+            self.sync_pipeline.cancel()
+            self.sync_pipeline = None
+        self.sync_channels = []
+        self.sync_result = None
+        self.sync_apply_timer.stop()
+
+    def handle_channel_batch_response(self, future):
+        """استلام رد طلب قائمة القنوات المطابق له"""
+        error = future.exception()
+        if error is not None:
+            self.update_output(f"❌ لم يصل رد طلب القنوات: {error}")
+            if self.is_fetching_all:
+                self.stop_fetching_all()
+            return
+        self.populate_channel_table(future.result())
 
     def stop_fetching_all(self):
+        self.resume_state = None
+        if self.fetch_pipeline is not None:
+            self.fetch_pipeline.cancel()
+            self.fetch_pipeline = None
         if self.is_fetching_all:
             self.is_fetching_all = False
             self.update_output("⏹ توقف جلب القنوات.")
@@ -2384,13 +3304,14 @@ class StarsatRemote(QMainWindow):
         if self.is_updating_all_urls:
             self.is_updating_all_urls = False
             self.url_update_timer.stop()
+            self.cancel_url_probe()
+            self.url_plan = None
             self.update_output("⏹ توقف تحديث روابط البث.")
-            self.last_requested_service_id_for_url = None
 
         if self.connected:
             self.fetch_channels_btn.setEnabled(True)
             self.fetch_all_btn.setEnabled(True)
-            self.update_all_urls_btn.setEnabled(self.channel_table.rowCount() > 0)
+            self.update_all_urls_btn.setEnabled(self.channel_model.rowCount() > 0)
         else:
             self.fetch_channels_btn.setEnabled(False)
             self.fetch_all_btn.setEnabled(False)
@@ -2402,182 +3323,69 @@ class StarsatRemote(QMainWindow):
 
     @pyqtSlot(list)
     def populate_channel_table(self, channels_batch: list):
-        import os
-        from PyQt6.QtGui import QPixmap, QIcon, QColor
-        from PyQt6.QtCore import Qt
-    
-        batch_size_received = len(channels_batch)
-        self.update_output(f"📊 تعبئة الجدول بـ {batch_size_received} قناة جديدة...")
-        self.channel_table.setSortingEnabled(False)
-        receiver_ip = self.ip_input.text().strip()
-    
-        if not self.is_fetching_all:
-            self.channels = list(channels_batch)
-        else:
-            self.channels.extend(channels_batch)
-    
-        self.favorites = self.settings_manager.load_favorites()
-    
-        starting_row_index = self.channel_table.rowCount()
-        last_column_index = self.channel_table.columnCount() - 1  # العمود الأخير
-    
-        for i, channel_data in enumerate(channels_batch):
-            channel_name = channel_data.get('ServiceName', '؟؟؟')
-            channel_id = str(channel_data.get('ServiceID', '؟؟؟'))
-            initial_stream_url = ""
-    
-            if receiver_ip and channel_id != '؟؟؟':
-                initial_stream_url = f"http://{receiver_ip}:8085/player.{channel_id}"
-    
-            current_row_count = starting_row_index + i
-            self.channel_table.insertRow(current_row_count)
-    
-            fav_item = QTableWidgetItem()
-            fav_item.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
-            fav_item.setCheckState(Qt.CheckState.Checked if channel_id in self.favorites else Qt.CheckState.Unchecked)
-            self.channel_table.setItem(current_row_count, 0, fav_item)
-    
-            name_item = QTableWidgetItem(channel_name)
-            self.channel_table.setItem(current_row_count, 1, name_item)
-    
-            id_item = QTableWidgetItem(channel_id)
-            id_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.channel_table.setItem(current_row_count, 2, id_item)
-    
-            url_item = QTableWidgetItem(initial_stream_url)
-            self.channel_table.setItem(current_row_count, 3, url_item)
-    
-            radio_flag = channel_data.get("Radio", 0)
-            type_item = QTableWidgetItem("راديو" if radio_flag else "تلفاز")
-            type_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.channel_table.setItem(current_row_count, 4, type_item)
-    
-            hd_flag = channel_data.get("HD", 0)
-            quality_item = QTableWidgetItem("HD" if hd_flag else "SD")
-            quality_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.channel_table.setItem(current_row_count, 5, quality_item)
-    
-            scramble_flag = channel_data.get("Scramble", 0)
-            scramble_text = "مشفرة" if scramble_flag else "مفتوحة"
-            scramble_item = QTableWidgetItem(scramble_text)
-            scramble_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.channel_table.setItem(current_row_count, 6, scramble_item)
-    
-            for col in range(self.channel_table.columnCount() - 1):
-                cell_item = self.channel_table.item(current_row_count, col)
-                if cell_item and scramble_flag:
-                    cell_item.setBackground(QColor(255, 228, 196))
-                    cell_item.setForeground(QColor(0, 0, 0))
-    
-            lock_flag = channel_data.get("Lock", 0)
-            lock_text = "نعم" if lock_flag else "لا"
-            lock_item = QTableWidgetItem(lock_text)
-            lock_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.channel_table.setItem(current_row_count, 7, lock_item)
-    
-            epg_flag = channel_data.get("EPG", 0)
-            epg_text = "نعم" if epg_flag else "لا"
-            epg_item = QTableWidgetItem(epg_text)
-            epg_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.channel_table.setItem(current_row_count, 8, epg_item)
-    
-# اااااااا
-    
-            audio_array = channel_data.get("AudioArray", [])
-            audio_count = len(audio_array)
-            audio_count_item = QTableWidgetItem(str(audio_count))
-            audio_count_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.channel_table.setItem(current_row_count, 9, audio_count_item)
-    
-            video_pid = channel_data.get("VideoPID", 0)
-            video_pid_item = QTableWidgetItem(str(video_pid))
-            video_pid_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.channel_table.setItem(current_row_count, 10, video_pid_item)
-    
-            audio_pids = ",".join(str(a.get("PID", "?")) for a in audio_array)
-            audio_pids_item = QTableWidgetItem(audio_pids)
-            audio_pids_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.channel_table.setItem(current_row_count, 11, audio_pids_item)
-    
-            pmt_pid = channel_data.get("PMTPID", 0)
-            pmt_pid_item = QTableWidgetItem(str(pmt_pid))
-            pmt_pid_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.channel_table.setItem(current_row_count, 12, pmt_pid_item)
-    
-            favbit = channel_data.get("FavBit", 0)
-            fav_groups = self.get_favorite_group_names(favbit)
-            fav_text = ", ".join(fav_groups) if fav_groups else "لا"
-            favbit_item = QTableWidgetItem(fav_text)
-            favbit_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.channel_table.setItem(current_row_count, 13, favbit_item)
-    
-            playing = channel_data.get("Playing", 0)
-            playing_item = QTableWidgetItem("نعم" if playing else "لا")
-            playing_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.channel_table.setItem(current_row_count, 14, playing_item)
-
-    
+        """إضافة دفعة إلى طابور التعبئة؛ الصفوف تُضاف على شرائح في process_populate_queue"""
+        if not channels_batch:
+            self.release_populate_batch(channels_batch)
+            return
+        self.update_output(f"📊 تعبئة الجدول بـ {len(channels_batch)} قناة جديدة...")
 
-     
-            service_index = channel_data.get("ServiceIndex", 0)
-            service_index_item = QTableWidgetItem(str(service_index))
-            service_index_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.channel_table.setItem(current_row_count, 15, service_index_item)
-    
-            auto_index = current_row_count + 1
-            auto_index_item = QTableWidgetItem(str(auto_index))
-            auto_index_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.channel_table.setItem(current_row_count, 16, auto_index_item)
-            # إضافة خانة تحديد في العمود الأخير
-            select_item = QTableWidgetItem()
-            select_item.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
-            select_item.setCheckState(Qt.CheckState.Unchecked)
-            self.channel_table.setItem(current_row_count, 17, select_item)  # العمود 18 للتحديد    
-            
-            # 🔷 الصورة في العمود الأخير - برقم الصف
-            row_number = current_row_count + 1
-            image_name = str(row_number)
-    
-            image_path = f"images/{image_name}.png"
-            if not os.path.exists(image_path):
-                image_path = "images/default.png"
-    
-            pixmap = QPixmap(image_path).scaled(100, 100, Qt.AspectRatioMode.KeepAspectRatio)
-            image_item = QTableWidgetItem()
-            image_item.setIcon(QIcon(pixmap))
-            self.channel_table.setItem(current_row_count, 18, image_item) # العمود 17 للصورة
-            self.channel_table.setRowHeight(current_row_count, 40)
-        self.setup_cell_tooltips()
-        self.channel_table.setSortingEnabled(True)
-        self.update_output(f"✅ إجمالي القنوات في الجدول الآن: {self.channel_table.rowCount()}.")
-        self.update_stats()
+        self.favorites = self.settings_manager.load_favorites()
+        self.channel_model.receiver_ip = self.ip_input.text().strip()
+        self.populate_queue.append((channels_batch, 0))
+        self.post_populate_timer.stop()
+        if not self.populate_timer.isActive():
+            self.populate_timer.start()
+
+    def process_populate_queue(self, budget: float | None = None):
+        """إضافة شرائح من الطابور حتى تنفد الميزانية الزمنية لهذه الدورة"""
+        deadline = time.perf_counter() + (self.populate_budget if budget is None else budget)
+        while self.populate_queue:
+            channels_batch, start = self.populate_queue.popleft()
+            end = min(start + self.populate_slice, len(channels_batch))
+            # الخلايا تُحسب عند العرض من مخزن القنوات؛ هنا نضيف الصفوف فقط
+            if isinstance(channels_batch, ChannelSnapshot):
+                # شريحة اللقطة تُفك عموداً عموداً إلى ChannelStore بدون قاموس لكل قناة
+                self.channel_model.append_channels(channels_batch.store(start, end))
+            else:
+                self.channel_model.append_channels(channels_batch[start:end], self.favorites)
+            if end < len(channels_batch):
+                self.populate_queue.appendleft((channels_batch, end))
+            else:
+                self.release_populate_batch(channels_batch)
+            if time.perf_counter() >= deadline:
+                return
+        self.populate_timer.stop()
+        self.post_populate_timer.start()
+
+    def flush_channel_population(self):
+        """إضافة كل ما تبقى في الطابور فوراً (عند الحاجة إلى الجدول كاملاً)"""
+        if self.populate_queue:
+            self.process_populate_queue(budget=float("inf"))
+        if self.post_populate_timer.isActive():
+            self.post_populate_timer.stop()
+            self.finish_channel_population()
+
+    def cancel_channel_population(self):
+        for channels_batch, _ in self.populate_queue:
+            self.release_populate_batch(channels_batch)
+        self.populate_queue.clear()
+        self.populate_timer.stop()
+        self.post_populate_timer.stop()
+
+    @staticmethod
+    def release_populate_batch(channels_batch):
+        """لقطة .ssnp تبقى مفتوحة بـ mmap أثناء التعبئة؛ تُغلق بعد آخر شريحة حتى لا يبقى الملف مقفلاً (ويندوز)"""
+        if isinstance(channels_batch, ChannelSnapshot):
+            channels_batch.close()
+
+    def finish_channel_population(self):
+        """التحديثات التي كانت تتكرر بعد كل دفعة تُنفذ مرة واحدة بعد آخر شريحة"""
+        self.update_output(f"✅ إجمالي القنوات في الجدول الآن: {self.channel_model.rowCount()}.")
         self.filter_channels()
         self.update_stats()
-    
+
         if self.connected:
-            self.update_all_urls_btn.setEnabled(self.channel_table.rowCount() > 0)
-    
-        if self.is_fetching_all:
-            self.current_fetch_from += batch_size_received
-            if batch_size_received < self.batch_size and batch_size_received > 0:
-                self.progress_bar.setRange(0, self.current_fetch_from)
-                self.progress_bar.setValue(self.current_fetch_from)
-            elif batch_size_received > 0:
-                if self.progress_bar.maximum() == 100:
-                    estimated_total = 5000
-                    progress_val = min(100, int((self.current_fetch_from / estimated_total) * 100))
-                    self.progress_bar.setValue(progress_val)
-                else:
-                    self.progress_bar.setValue(self.current_fetch_from)
-    
-            if batch_size_received == 0 or batch_size_received < self.batch_size:
-                self.update_output(f"🏁 اكتمل جلب جميع القنوات. الإجمالي: {len(self.channels)}.")
-                self.progress_bar.setValue(self.progress_bar.maximum())
-                self.stop_fetching_all()
-    
-                QTimer.singleShot(2000, lambda: self.progress_bar.setVisible(False) if not (self.is_fetching_all or self.is_updating_all_urls) else None)
-            else:
-                QTimer.singleShot(100, self.fetch_next_batch)
+            self.update_all_urls_btn.setEnabled(self.channel_model.rowCount() > 0)
 
 
     # --- دوال جديدة لتحديث روابط البث لجميع القنوات ---
@@ -2585,18 +3393,20 @@ class StarsatRemote(QMainWindow):
         if not self.connected or not self.network_thread or not self.network_thread.isRunning():
             QMessageBox.warning(self, "غير متصل", "يرجى الاتصال بالجهاز أولاً.")
             return
-        if self.channel_table.rowCount() == 0:
+        if self.channel_model.rowCount() == 0:
             QMessageBox.information(self, "لا قنوات", "لا توجد قنوات في الجدول لتحديث روابطها.")
             return
         if self.is_fetching_all:
              QMessageBox.warning(self, "عملية جارية", "يتم حاليًا جلب قائمة القنوات. يرجى الانتظار أو الإيقاف أولاً.")
              return
 
+        model = self.channel_model
+        service_ids = (model.service_id(row) for row in range(model.rowCount()))
+        self.url_plan = UrlRefreshPlan([sid for sid in service_ids if sid and sid != UNKNOWN_ID],
+                                       self.ip_input.text().strip())
         self.is_updating_all_urls = True
-        self.current_url_update_index = 0
-        self.last_requested_service_id_for_url = None
 
-        self.progress_bar.setRange(0, self.channel_table.rowCount())
+        self.progress_bar.setRange(0, self.url_plan.total)
         self.progress_bar.setValue(0)
         self.progress_bar.setFormat("%p% - تحديث الروابط: %v/%m")
         self.progress_bar.setVisible(True)
@@ -2606,62 +3416,98 @@ class StarsatRemote(QMainWindow):
         self.update_all_urls_btn.setEnabled(False) # تعطيل نفسه أثناء التشغيل
         self.stop_fetch_btn.setEnabled(True) # زر الإيقاف يمكنه إيقاف هذه العملية
 
-        self.update_output("⏳ بدء تحديث روابط البث لجميع القنوات...")
+        self.update_output(f"⏳ بدء تحديث روابط البث لجميع القنوات: طلب {len(self.url_plan.sample_ids)} قنوات كعينة لمعرفة نمط الروابط...")
         self.process_next_url_update()
 
     def process_next_url_update(self):
-        if not self.is_updating_all_urls or not self.connected:
+        if not self.is_updating_all_urls or not self.connected or self.url_plan is None:
             self.stop_updating_all_urls()
-            self.setup_cell_tooltips()
             return
 
-        if self.current_url_update_index >= self.channel_table.rowCount():
+        plan = self.url_plan
+        if plan.phase == "probe":
+            self.start_url_probe()
+            return
+
+        service_id = plan.next_zap()
+        if service_id is None:
             self.stop_updating_all_urls()
             self.update_output("🏁 اكتمل تحديث جميع روابط البث.")
             QMessageBox.information(self, "اكتمل", "تم تحديث جميع روابط البث.")
-            self.setup_cell_tooltips()
-
             return
 
-        row = self.current_url_update_index
-        service_id_item = self.channel_table.item(row, 2)
-        channel_name_item = self.channel_table.item(row, 1)
-
-        if service_id_item and channel_name_item:
-            service_id = service_id_item.text()
-            channel_name = channel_name_item.text()
+        row = self.channel_model.row_for_service_id(service_id)
+        channel_name = self.channel_model.name(row) if row >= 0 else service_id
+        self.url_zap_current = service_id
+        self.update_output(f"🔄 طلب رابط البث للقناة: {channel_name} (ID: {service_id}) - {plan.done + 1}/{plan.total}")
+        if not self.change_channel(service_id, channel_name):
+            plan.record_zap(service_id, None)
+            QTimer.singleShot(self.url_update_delay, self.process_next_url_update)
+
+    def start_url_probe(self):
+        """التحقق المتوازي من الروابط المستنتجة من نمط العينة"""
+        plan = self.url_plan
+        candidates = plan.probe_candidates()
+        self.update_output(f"🧩 نمط الروابط: {plan.template} - التحقق من {len(candidates)} رابط بالتوازي...")
+        thread = QThread(self)
+        worker = UrlProbeWorker(candidates)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.probed.connect(lambda results, w=worker: self.handle_url_probe_results(w, results))
+        worker.finished.connect(lambda completed, w=worker: self.handle_url_probe_finished(w, completed))
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        self.url_probe_worker = worker
+        thread.start()
+
+    def handle_url_probe_results(self, worker, results: list):
+        # دفعات عامل أُلغي قد تبقى في طابور الأحداث بعد الإيقاف أو إعادة البدء: لا تخص الخطة الحالية
+        plan = self.url_plan
+        if worker is not self.url_probe_worker or plan is None:
+            return
+        for service_id, url, ok in results:
+            plan.record_probe(service_id, ok)
+            if ok:
+                row = self.channel_model.row_for_service_id(service_id)
+                if row >= 0:
+                    self.channel_model.set_url(row, url)
+        self.progress_bar.setValue(plan.done)
+
+    def handle_url_probe_finished(self, worker, completed: bool):
+        if worker is not self.url_probe_worker:
+            return
+        self.url_probe_worker = None
+        if not completed or not self.is_updating_all_urls or self.url_plan is None:
+            return
+        plan = self.url_plan
+        plan.finish_probe()
+        self.update_output(f"✅ تم التحقق من {plan.verified} رابط؛ {len(plan.failed)} قناة ستُطلب من الجهاز مباشرة.")
+        self.process_next_url_update()
 
-            if service_id and service_id != '؟؟؟':
-                self.update_output(f"🔄 طلب رابط البث للقناة: {channel_name} (ID: {service_id}) - {row + 1}/{self.channel_table.rowCount()}")
-                self.last_requested_service_id_for_url = service_id # تتبع هذه القناة
-                self.change_channel(service_id, channel_name)
-                self.progress_bar.setValue(self.current_url_update_index + 1)
-            else:
-                self.process_next_url_update()
-        else:
-            self.process_next_url_update()
-            self.setup_cell_tooltips()
+    def cancel_url_probe(self):
+        if self.url_probe_worker is not None:
+            self.url_probe_worker.cancel()
+            self.url_probe_worker = None
 
     def stop_updating_all_urls(self):
+        self.resume_state = None
+        self.cancel_url_probe()
+        self.url_plan = None
         if not self.is_updating_all_urls: return
-        self.setup_cell_tooltips()
 
         self.is_updating_all_urls = False
         self.url_update_timer.stop()
-        self.last_requested_service_id_for_url = None
         self.update_output("⏹ توقف تحديث روابط البث.")
-        self.setup_cell_tooltips()
 
         if self.connected:
             self.fetch_channels_btn.setEnabled(True)
             self.fetch_all_btn.setEnabled(True)
-            self.update_all_urls_btn.setEnabled(self.channel_table.rowCount() > 0 and not self.is_fetching_all and not self.is_updating_all_urls)
+            self.update_all_urls_btn.setEnabled(self.channel_model.rowCount() > 0 and not self.is_fetching_all and not self.is_updating_all_urls)
         self.stop_fetch_btn.setEnabled(False)
-        self.setup_cell_tooltips()
 
         if not self.is_fetching_all:
             self.progress_bar.setVisible(False)
-            self.setup_cell_tooltips()
     @pyqtSlot(str, str)
     def handle_received_data(self, data_type: str, content: str):
         cleaned_content = content.strip()
@@ -2687,53 +3533,6 @@ class StarsatRemote(QMainWindow):
             self.show_device_info(parsed_json_data)
             return
     
-        # ✅ معالجة تحديث رابط البث
-        if isinstance(parsed_json_data, dict) and \
-           parsed_json_data.get("success") == "1" and \
-           "url" in parsed_json_data and \
-           self.last_requested_service_id_for_url is not None:
-    
-            received_url = parsed_json_data['url']
-            found_and_updated = False
-    
-            for row in range(self.channel_table.rowCount()):
-                service_id_item = self.channel_table.item(row, 2)
-                url_item = self.channel_table.item(row, 3)
-                if service_id_item and url_item and service_id_item.text() == self.last_requested_service_id_for_url:
-                    url_item.setText(received_url)
-                    found_and_updated = True
-                    break
-    
-            if self.is_updating_all_urls:
-                self.current_url_update_index += 1
-                self.progress_bar.setValue(self.current_url_update_index)
-                QTimer.singleShot(self.url_update_delay, self.process_next_url_update)
-    
-            if not found_and_updated:
-                if parsed_json_data.get("success") == "1" and "url" not in parsed_json_data:
-                    fallback_sid = self.last_requested_service_id_for_url.lstrip("0")
-                    rtsp_url = f"rtsp://{self.ip_input.text().strip()}:554/?prognumber={fallback_sid}"
-                    self.update_output(f"🌐 لم يتم استلام رابط بث، تم توليد رابط RTSP بديل: {rtsp_url}")
-    
-                    for row in range(self.channel_table.rowCount()):
-                        service_id_item = self.channel_table.item(row, 2)
-                        url_item = self.channel_table.item(row, 3)
-                        if service_id_item and url_item and service_id_item.text() == self.last_requested_service_id_for_url:
-                            url_item.setText(rtsp_url)
-                            break
-    
-                    if self.is_updating_all_urls:
-                        self.current_url_update_index += 1
-                        self.progress_bar.setValue(self.current_url_update_index)
-                        QTimer.singleShot(self.url_update_delay, self.process_next_url_update)
-    
-                    self.last_requested_service_id_for_url = None
-                else:
-                    self.update_output(f"⚠️ تم استلام رابط ({received_url}) ولكن لم يتم العثور على قناة مطابقة لـ ID: {self.last_requested_service_id_for_url}")
-    
-            if self.is_updating_all_urls:
-                self.last_requested_service_id_for_url = None
-    
         # ✅ معالجة بيانات المجموعات المفضلة (الجزء الجديد)
         try:
             # قد تأتي البيانات في شكل قائمة تحتوي على كائن واحد
@@ -2775,14 +3574,13 @@ class StarsatRemote(QMainWindow):
         self.fav_groups_list.setToolTip(tooltip_text)
         
         # تمييز المجموعة الأولى بلون خفيف (اختياري)
-        if self.favorite_groups:
-            item = self.fav_groups_list.item(0)
-            # item.setBackground(QColor(240, 248, 255))  # لون أزرق فاتح                     
+        # if self.favorite_groups:
+        #     self.fav_groups_list.item(0).setBackground(QColor(240, 248, 255))  # لون أزرق فاتح
 
     def filter_channels(self):
-        """تطبيق عوامل التصفية الحالية على الجدول"""
+        """تطبيق عوامل التصفية الحالية على الجدول (حساب bitset ثم إعادة تعيين واحدة للعرض)"""
         # الحصول على قيم التصفية الحالية
-        search_text = self.search_input.text().strip().lower()
+        search_text = self.search_input.text().strip()
         category = self.category_filter.currentText()
         channel_type = self.type_filter.currentText()
         quality = self.quality_filter.currentText()
@@ -2790,91 +3588,27 @@ class StarsatRemote(QMainWindow):
         locked = self.lock_filter.currentText()
         epg = self.epg_filter.currentText()
 
-        # إذا كانت جميع عوامل التصفية في وضعها الافتراضي
-        if (not search_text and
-            category == "جميع القنوات" and
-            channel_type == "كل الأنواع" and
-            quality == "كل الجودات" and
-            scramble == "كل الحمايات" and
-            locked == "كل الحالات" and
-            epg == "كل الحالات"):
-
-            # إظهار جميع الصفوف
-            for row in range(self.channel_table.rowCount()):
-                self.channel_table.setRowHidden(row, False)
-            return
-
-        # تطبيق التصفية على كل صف
-        for row in range(self.channel_table.rowCount()):
-            # الحصول على بيانات الصف
-            name_item = self.channel_table.item(row, 1)
-            channel_name = name_item.text().lower() if name_item else ""
-
-            fav_item = self.channel_table.item(row, 0)
-            is_favorite = fav_item.checkState() == Qt.CheckState.Checked if fav_item else False
-
-            type_item = self.channel_table.item(row, 4)
-            channel_type_val = type_item.text() if type_item else ""
-
-            quality_item = self.channel_table.item(row, 5)
-            quality_val = quality_item.text() if quality_item else ""
-
-            scramble_item = self.channel_table.item(row, 6)
-            scramble_val = scramble_item.text() if scramble_item else ""
-
-            lock_item = self.channel_table.item(row, 7)
-            lock_val = lock_item.text() if lock_item else ""
-
-            epg_item = self.channel_table.item(row, 8)
-            epg_val = epg_item.text() if epg_item else ""
-
-            playing_item = self.channel_table.item(row, 14)
-            is_playing = playing_item.text() == "نعم" if playing_item else False
-
-            # تطبيق معايير التصفية
-            name_match = not search_text or search_text in channel_name
-
-            category_match = True
-            if category == "المفضلة":
-                category_match = is_favorite
-            elif category == "قيد التشغيل فقط":
-                category_match = is_playing
-
-            type_match = True
-            if channel_type == "تلفاز":
-                type_match = channel_type_val == "تلفاز"
-            elif channel_type == "راديو":
-                type_match = channel_type_val == "راديو"
-
-            quality_match = True
-            if quality == "HD":
-                quality_match = quality_val == "HD"
-            elif quality == "SD":
-                quality_match = quality_val == "SD"
-
-            scramble_match = True
-            if scramble == "مشفرة":
-                scramble_match = scramble_val == "مشفرة"
-            elif scramble == "مفتوحة":
-                scramble_match = scramble_val == "مفتوحة"
-
-            lock_match = True
-            if locked == "مقفولة":
-                lock_match = lock_val == "نعم"
-            elif locked == "غير مقفولة":
-                lock_match = lock_val == "لا"
-
-            epg_match = True
-            if epg == "بدون دعم EPG":
-                epg_match = epg_val == "لا"
-            elif epg == "بدعم EPG":
-                epg_match = epg_val == "نعم"
-
-            # تحديد إذا كان يجب إظهار الصف أم لا
-            show_row = (name_match and category_match and type_match and
-                       quality_match and scramble_match and lock_match and epg_match)
+        # كل اختيار يتحول إلى علم مطلوب أو مستبعد
+        require = exclude = 0
+        choices = (
+            (category == "المفضلة", False, ChannelStore.FAVORITE),
+            (category == "قيد التشغيل فقط", False, ChannelStore.PLAYING),
+            (channel_type == "راديو", channel_type == "تلفاز", ChannelStore.RADIO),
+            (quality == "HD", quality == "SD", ChannelStore.HD),
+            (scramble == "مشفرة", scramble == "مفتوحة", ChannelStore.SCRAMBLED),
+            (locked == "مقفولة", locked == "غير مقفولة", ChannelStore.LOCKED),
+            (epg == "بدعم EPG", epg == "بدون دعم EPG", ChannelStore.EPG),
+        )
+        for required, excluded, flag in choices:
+            if required:
+                require |= flag
+            elif excluded:
+                exclude |= flag
 
-            self.channel_table.setRowHidden(row, not show_row)
+        # الاحتفاظ بالقناة الحالية محددة إذا بقيت ظاهرة بعد التصفية
+        current_row = self.current_channel_row()
+        if self.channel_proxy.set_filter(search_text, require, exclude) and current_row >= 0:
+            self.select_channel_row(current_row)
 
     def clear_all_filters(self):
         """إعادة تعيين جميع عوامل التصفية وعرض جميع القنوات"""
@@ -2888,9 +3622,7 @@ class StarsatRemote(QMainWindow):
         self.epg_filter.setCurrentIndex(0)       # كل الحالات
 
         # عرض جميع الصفوف
-        for row in range(self.channel_table.rowCount()):
-            self.channel_table.setRowHidden(row, False)
-        self.setup_cell_tooltips()
+        self.filter_channels()
 
         self.update_output("تم إلغاء جميع عوامل التصفية وعرض جميع القنوات")
     def toggle_advanced_filters(self, enabled):
@@ -2899,7 +3631,6 @@ class StarsatRemote(QMainWindow):
         self.scramble_filter.setEnabled(enabled)
         self.lock_filter.setEnabled(enabled)
         self.epg_filter.setEnabled(enabled)
-        self.setup_cell_tooltips()
 
     def update_stats(self):
         """ ✨ دالة معدلة: تحديث جميع الإحصائيات بما في ذلك شريط الحالة """
@@ -2917,51 +3648,65 @@ class StarsatRemote(QMainWindow):
         self.favorite_count_label.setText(f"المفضلة: {total_favorites}")
         self.device_count_label.setText(f"الأجهزة المحفوظة: {total_devices}")
     
-        self.setup_cell_tooltips()
 
-    @pyqtSlot(QTableWidgetItem, QTableWidgetItem)
-    def update_channel_action_buttons_state(self, current_item=None, previous_item=None):
+    def current_channel_row(self) -> int:
+        """صف القناة الحالية في الجدول (صف المصدر)، أو -1 إذا لم يُحدد شيء"""
+        index = self.channel_proxy.mapToSource(self.channel_table.currentIndex())
+        return index.row() if index.isValid() else -1
+
+    def selected_channel_rows(self) -> list:
+        """الصفوف المحددة في الجدول (تحديد العرض، لا خانة الاختيار) كصفوف المصدر"""
+        return sorted({self.channel_proxy.mapToSource(index).row()
+                       for index in self.channel_table.selectionModel().selectedIndexes()})
+
+    def select_channel_row(self, row: int, center: bool = False) -> bool:
+        """تحديد صف مصدر في الجدول؛ يعيد False إذا كان مخفياً بالتصفية"""
+        proxy_row = self.channel_proxy.proxy_row(row)
+        if proxy_row < 0:
+            return False
+        self.channel_table.selectRow(proxy_row)
+        hint = QAbstractItemView.ScrollHint.PositionAtCenter if center else QAbstractItemView.ScrollHint.EnsureVisible
+        self.channel_table.scrollTo(self.channel_proxy.index(proxy_row, 1), hint)
+        return True
+
+    @pyqtSlot(QModelIndex, QModelIndex)
+    def update_channel_action_buttons_state(self, current_index=None, previous_index=None):
         is_enabled = False
-        if self.connected and self.channel_table.currentRow() >= 0:
-            selected_row = self.channel_table.currentRow()
-            service_id_item = self.channel_table.item(selected_row, 2)
-            if service_id_item and service_id_item.text() and service_id_item.text() != '؟؟؟':
+        selected_row = self.current_channel_row()
+        if self.connected and selected_row >= 0:
+            service_id = self.channel_model.service_id(selected_row)
+            if service_id and service_id != '؟؟؟':
                 is_enabled = True
 
         self.goto_channel_btn.setEnabled(is_enabled)
         self.play_vlc_btn.setEnabled(is_enabled)
         self.record_btn.setEnabled(is_enabled)
         if self.connected:
-            self.update_all_urls_btn.setEnabled(self.channel_table.rowCount() > 0 and not self.is_fetching_all and not self.is_updating_all_urls)
-
+            self.update_all_urls_btn.setEnabled(self.channel_model.rowCount() > 0 and not self.is_fetching_all and not self.is_updating_all_urls)
 
-    @pyqtSlot(QTableWidgetItem)
-    def handle_favorite_click(self, item: QTableWidgetItem):
-        if item.column() == 0:
-            row_index = item.row()
-            service_id_item = self.channel_table.item(row_index, 2)
-            if not service_id_item: return
 
-            service_id = service_id_item.text()
-            if not service_id or service_id == '؟؟؟': return
+    @pyqtSlot(int, bool)
+    def handle_favorite_toggled(self, row_index: int, checked: bool):
+        service_id = self.channel_model.service_id(row_index)
+        if not service_id or service_id == '؟؟؟': return
 
-            if item.checkState() == Qt.CheckState.Checked:
-                if service_id not in self.favorites: self.favorites.append(service_id)
-            else:
-                if service_id in self.favorites: self.favorites.remove(service_id)
+        if checked:
+            if service_id not in self.favorites: self.favorites.append(service_id)
+        else:
+            if service_id in self.favorites: self.favorites.remove(service_id)
 
-            self.settings_manager.save_favorites(self.favorites)
-            self.update_stats()
-            if self.category_filter.currentText() == "المفضلة":
-                self.filter_channels()
+        self.settings_manager.save_favorites(self.favorites)
+        self.update_stats()
+        if self.category_filter.currentText() == "المفضلة":
+            self.filter_channels()
 
-    @pyqtSlot(QTableWidgetItem)
-    def channel_selected(self, item: QTableWidgetItem):
+    @pyqtSlot(QModelIndex)
+    def channel_selected(self, index: QModelIndex):
         if not self.connected:
             self.update_output("⚠️ يرجى الاتصال بالرسيفر أولاً.")
             return
     
-        row_index = item.row()
+        row_index = self.channel_proxy.mapToSource(index).row()
     
         try:
             self.send_row_number(row_index)
@@ -2972,54 +3717,51 @@ class StarsatRemote(QMainWindow):
         if not self.connected:
             return
     
-        current_row = row_index
-        service_id_item = self.channel_table.item(current_row, 2)
-        channel_name_item = self.channel_table.item(current_row, 1)
-        service_index_item = self.channel_table.item(current_row, 16)  # العمود 23
-    
-        if service_id_item and channel_name_item:
-            service_id = service_id_item.text()
-            channel_name = channel_name_item.text()
-            old_url = self.channel_table.item(current_row, 3).text() if self.channel_table.item(current_row, 3) else ""
-    
-            if not service_index_item or not service_index_item.text().isdigit():
-                self.update_output(f"⚠️ ServiceIndex غير صالح أو مفقود للقناة: '{channel_name}'")
-                return
-    
-            service_index = service_index_item.text()
-    
-            if service_id and service_id != '؟؟؟':
-                self.last_requested_service_id_for_url = service_id
-                try:
-                    change_cmd_body = f'{{"request":"1009", "TvState":"0", "ProgramId":"{service_id}"}}'
-                    change_message = build_message(change_cmd_body)
-                    self.network_thread.send_command(change_message)
-                    self.update_output(f"📺 أمر الانتقال إلى: {channel_name} (ID: {service_id})")
-                except Exception as e:
-                    self.update_output(f"❌ خطأ إرسال أمر تغيير القناة: {e}")
-                    return
-            else:
-                self.update_output(f"⚠️ معرف الخدمة غير صالح للقناة المحددة: '{channel_name}'.")
+        model = self.channel_model
+        if not 0 <= row_index < model.rowCount():
+            self.update_output("⚠️ لم يتم العثور على بيانات القناة للصف المحدد.")
+            return
+
+        service_id = model.service_id(row_index)
+        channel_name = model.name(row_index)
+        old_url = model.url(row_index)
+        service_index = model.text(row_index, model.NUMBER_COLUMN)
+
+        if not service_index.isdigit():
+            self.update_output(f"⚠️ ServiceIndex غير صالح أو مفقود للقناة: '{channel_name}'")
+            return
+
+        if service_id and service_id != '؟؟؟':
+            if not self.change_channel(service_id, channel_name):
                 return
         else:
-            self.update_output("⚠️ لم يتم العثور على بيانات القناة للصف المحدد.")
+            self.update_output(f"⚠️ معرف الخدمة غير صالح للقناة المحددة: '{channel_name}'.")
             return
     
-        digits = list(str(service_index))
+        keys = [self.DIGIT_COMMAND_MAP[digit] for digit in service_index if digit in self.DIGIT_COMMAND_MAP]
         self.update_output(f"🔢 إرسال ServiceIndex {service_index}...")
-        for digit in digits:
-            if digit in self.DIGIT_COMMAND_MAP:
-                key_code = self.DIGIT_COMMAND_MAP[digit]
-                self.send_key(key_code)
-                QApplication.processEvents()
-                time.sleep(0.4)
-    
-        QTimer.singleShot(3000, lambda: self.show_action_report(
+        # الأرقام تُرسل من خيط الشبكة بفاصل 0.4 ثانية؛ اختيار قناة أخرى قبل الانتهاء يلغي هذا التسلسل
+        self.network_thread.send_key_sequence(keys, 0.4, callback=lambda future: self.handle_row_number_sent(
+            future,
             channel_name=channel_name,
             service_id=service_id,
             row_number=service_index,  # ✅ استخدم ServiceIndex بدل row_index + 1
+            old_url=old_url
+        ))
+
+    def handle_row_number_sent(self, future, channel_name, service_id, row_number, old_url):
+        error = future.exception()
+        if error is not None:
+            self.update_output(f"❌ لم تكتمل أرقام القناة '{channel_name}': {error}")
+            return
+        if not future.result():
+            return # حل محله تسلسل أحدث (قناة أخرى)
+        QTimer.singleShot(3000, lambda: self.show_action_report(
+            channel_name=channel_name,
+            service_id=service_id,
+            row_number=row_number,
             old_url=old_url,
-            new_url=self.channel_table.item(current_row, 3).text() if self.channel_table.item(current_row, 3) else ""
+            new_url=self._stream_url_for(service_id)
         ))
     def show_action_report(self, channel_name, service_id, row_number, old_url, new_url):
         log_report = f"""
@@ -3087,7 +3829,7 @@ class StarsatRemote(QMainWindow):
             open_embedded_btn = msg.addButton("تشغيل المدمج", QMessageBox.ButtonRole.ActionRole)
             open_embedded_btn.clicked.connect(lambda: self.play_selected_embedded_with_url(new_url, channel_name))
     
-        cancel_btn = msg.addButton("إلغاء", QMessageBox.ButtonRole.RejectRole)
+        msg.addButton("إلغاء", QMessageBox.ButtonRole.RejectRole)
         msg.addButton(QMessageBox.StandardButton.Ok)
     
         msg.exec()
@@ -3124,13 +3866,12 @@ class StarsatRemote(QMainWindow):
             self.update_output(f"❌ فشل تشغيل المدمج: {e}")    
         # إغلاق الرسالة بعد الضغط على الزر
     def update_playing_column(self, selected_row):
-        for row in range(self.channel_table.rowCount()):
-            playing_item = self.channel_table.item(row, 14)
-            if playing_item:
-                if row == selected_row:
-                    playing_item.setText("نعم")
-                else:
-                    playing_item.setText("لا")
+        self.channel_model.set_playing_row(selected_row)
+
+    def _stream_url_for(self, service_id: str) -> str:
+        """رابط البث الحالي للقناة (بمعرفها لأن موقع صفها قد يتغير)"""
+        row = self.channel_model.row_for_service_id(service_id)
+        return self.channel_model.url(row) if row >= 0 else ""
     def open_vlc(self, stream_url, channel_name):
         vlc_path = self.vlc_path_input.text().strip()
         if not vlc_path or not os.path.exists(vlc_path):
@@ -3154,12 +3895,12 @@ class StarsatRemote(QMainWindow):
             QMessageBox.warning(self, "خطأ", "لم يتم العثور على مسار VLC الصحيح!")
 
     def send_goto_channel(self, row_index):
-        self.channel_table.selectRow(row_index)
+        self.select_channel_row(row_index)
 
         self.go_to_selected_channel()
 
     def send_play_vlc(self, row_index):
-        self.channel_table.selectRow(row_index)
+        self.select_channel_row(row_index)
 
         self.play_selected_in_vlc()
 
@@ -3168,46 +3909,74 @@ class StarsatRemote(QMainWindow):
             QMessageBox.warning(self, "غير متصل", "يرجى الاتصال بالجهاز أولاً.")
             return
 
-        current_row = self.channel_table.currentRow()
+        current_row = self.current_channel_row()
         if current_row < 0:
             QMessageBox.information(self, "تنبيه", "لم يتم تحديد قناة في الجدول.")
             return
 
-        service_id_item = self.channel_table.item(current_row, 2)
-        channel_name_item = self.channel_table.item(current_row, 1)
+        service_id = self.channel_model.service_id(current_row)
+        channel_name = self.channel_model.name(current_row)
 
-        if service_id_item and channel_name_item:
-            service_id = service_id_item.text()
-            channel_name = channel_name_item.text()
-
-            if service_id and service_id != '؟؟؟':
-                self.last_requested_service_id_for_url = service_id
-                self.change_channel(service_id, channel_name)
-            else:
-                self.update_output(f"⚠️ معرف الخدمة غير صالح للقناة المحددة: '{channel_name}'.")
+        if service_id and service_id != '؟؟؟':
+            self.change_channel(service_id, channel_name)
         else:
-            self.update_output("⚠️ لم يتم العثور على بيانات القناة للصف المحدد.")
+            self.update_output(f"⚠️ معرف الخدمة غير صالح للقناة المحددة: '{channel_name}'.")
 
-    def change_channel(self, service_id: str, channel_name: str):
+    def change_channel(self, service_id: str, channel_name: str) -> bool:
         try:
-            change_cmd_body = f'{{"request":"1009", "TvState":"0", "ProgramId":"{service_id}"}}'
-            change_message = build_message(change_cmd_body)
-            self.network_thread.send_command(change_message)
+            # رد الجهاز (رابط البث) يُربط بهذه القناة تحديداً حتى لو أُرسلت عدة طلبات
+            future = self.network_thread.send_request(
+                stream_url_request(service_id), "stream_url",
+                lambda f: self.handle_stream_url_response(service_id, f),
+                match=stream_url_matcher(service_id)
+            )
+            if future.done() and future.exception() is not None:
+                return False
             self.update_output(f"📺 أمر الانتقال إلى: {channel_name} (ID: {service_id})")
+            return True
         except Exception as e:
             self.update_output(f"❌ خطأ إرسال أمر تغيير القناة: {e}")
+            return False
+
+    def handle_stream_url_response(self, service_id: str, future):
+        """تحديث رابط البث للقناة التي طُلب رابطها"""
+        error = future.exception()
+        received_url = None
+        if error is not None:
+            self.update_output(f"⚠️ لم يصل رابط البث للقناة ID: {service_id}: {error}")
+        else:
+            response = future.result()
+            if isinstance(response, list):
+                response = response[0]
+            received_url = response.get("url") or ""
+            if response.get("success") == "1" and not received_url:
+                fallback_sid = service_id.lstrip("0")
+                received_url = f"rtsp://{self.ip_input.text().strip()}:554/?prognumber={fallback_sid}"
+                self.update_output(f"🌐 لم يتم استلام رابط بث، تم توليد رابط RTSP بديل: {received_url}")
+
+            row = self.channel_model.row_for_service_id(service_id)
+            if not received_url:
+                # {"success": "0"}: لم يصل رابط، فالرابط الحالي للقناة يبقى كما هو
+                self.update_output(f"⚠️ لم يرسل الجهاز رابط بث للقناة ID: {service_id}")
+            elif row >= 0:
+                self.channel_model.set_url(row, received_url)
+            else:
+                self.update_output(f"⚠️ تم استلام رابط ({received_url}) ولكن لم يتم العثور على قناة مطابقة لـ ID: {service_id}")
+
+        if self.is_updating_all_urls and self.url_plan is not None and service_id == self.url_zap_current:
+            self.url_zap_current = None
+            self.url_plan.record_zap(service_id, received_url or None)
+            self.progress_bar.setValue(self.url_plan.done)
+            QTimer.singleShot(self.url_update_delay, self.process_next_url_update)
 
     def play_selected_in_vlc(self):
-        current_row = self.channel_table.currentRow()
+        current_row = self.current_channel_row()
         if current_row < 0:
             QMessageBox.information(self, "تنبيه", "يرجى تحديد قناة من الجدول لتشغيلها.")
             return
 
-        channel_name_item = self.channel_table.item(current_row, 1)
-        url_item = self.channel_table.item(current_row, 3)
-
-        channel_name = channel_name_item.text() if channel_name_item else "قناة غير معروفة"
-        stream_url = url_item.text() if url_item and url_item.text() else ""
+        channel_name = self.channel_model.name(current_row)
+        stream_url = self.channel_model.url(current_row)
 
         if stream_url:
             self.update_output(f"🎬 محاولة تشغيل '{channel_name}' في VLC ({stream_url})...")
@@ -3289,12 +4058,12 @@ class StarsatRemote(QMainWindow):
     def play_selected_embedded(self):
         from PyQt6.QtWidgets import QApplication
     
-        selected_items = self.channel_table.selectedItems()
-        if not selected_items:
+        selected_rows = self.selected_channel_rows()
+        if not selected_rows:
             QMessageBox.warning(self, "تحذير", "يرجى اختيار قناة أولاً")
             return
     
-        url = self.channel_table.item(selected_items[0].row(), 3).text().strip()
+        url = self.channel_model.url(selected_rows[0]).strip()
         if not url:
             QMessageBox.warning(self, "تحذير", "رابط القناة فارغ")
             return
@@ -3338,16 +4107,13 @@ class StarsatRemote(QMainWindow):
     
         
     def record_channel(self):
-        current_row = self.channel_table.currentRow()
+        current_row = self.current_channel_row()
         if current_row < 0:
             QMessageBox.information(self, "تنبيه", "يرجى تحديد قناة للتسجيل.")
             return
 
-        channel_name_item = self.channel_table.item(current_row, 1)
-        url_item = self.channel_table.item(current_row, 3)
-
-        channel_name = channel_name_item.text() if channel_name_item else "غير معروف"
-        stream_url = url_item.text() if url_item and url_item.text() else ""
+        channel_name = self.channel_model.name(current_row)
+        stream_url = self.channel_model.url(current_row)
 
         if not stream_url:
             QMessageBox.information(self, "تنبيه", "لا يوجد رابط بث متاح للتسجيل.")
@@ -3381,7 +4147,7 @@ class StarsatRemote(QMainWindow):
 
 
     def recordMP4TS_channel(self):
-        current_row = self.channel_table.currentRow()
+        current_row = self.current_channel_row()
         if current_row < 0:
             QMessageBox.information(self, "تنبيه", "يرجى تحديد قناة للتسجيل.")
             return
@@ -3402,11 +4168,8 @@ class StarsatRemote(QMainWindow):
         
         selected_format = formats[format_choice]
     
-        channel_name_item = self.channel_table.item(current_row, 1)
-        url_item = self.channel_table.item(current_row, 3)
-    
-        channel_name = channel_name_item.text() if channel_name_item else "غير معروف"
-        stream_url = url_item.text() if url_item and url_item.text() else ""
+        channel_name = self.channel_model.name(current_row)
+        stream_url = self.channel_model.url(current_row)
     
         if not stream_url:
             QMessageBox.information(self, "تنبيه", "لا يوجد رابط بث متاح للتسجيل.")
@@ -3464,9 +4227,7 @@ class StarsatRemote(QMainWindow):
             return
 
         try:
-            msg_body = f'{{"array":[{{"KeyValue":"{key_value}"}}],"request":"1040"}}'
-            full_message = build_message(msg_body)
-            self.network_thread.send_command(full_message)
+            self.network_thread.send_command(key_message(key_value))
             self.update_output(f"↗️ إرسال مفتاح: {key_value}")
         except Exception as e:
             self.update_output(f"❌ خطأ إرسال مفتاح {key_value}: {e}")
@@ -3481,13 +4242,9 @@ class StarsatRemote(QMainWindow):
             QMessageBox.warning(self, "خطأ إدخال", "يرجى إدخال أرقام فقط.")
             return
 
-        for digit in digit_text:
-            if digit in self.DIGIT_COMMAND_MAP:
-                key_code = self.DIGIT_COMMAND_MAP[digit]
-                self.update_output(f"🔢 إرسال رقم '{digit}' (كود {key_code})...")
-                self.send_key(key_code)
-                QApplication.processEvents()
-                time.sleep(0.3)
+        keys = [self.DIGIT_COMMAND_MAP[digit] for digit in digit_text if digit in self.DIGIT_COMMAND_MAP]
+        self.update_output(f"🔢 إرسال الرقم '{digit_text}' ({', '.join(keys)})...")
+        self.network_thread.send_key_sequence(keys, 0.3)
 
     def send_custom_command(self):
         if not self.connected or not self.network_thread or not self.network_thread.isRunning():
@@ -3528,7 +4285,8 @@ class StarsatRemote(QMainWindow):
             self.settings_manager.save_device_settings(self.ip_input.text().strip(), self.port_input.text().strip())
             self.settings_manager.settings.setValue("vlc_path", self.vlc_path_input.text())
             self.settings_manager.settings.setValue("record_path", self.record_path_input.text())
-            self.settings_manager.save_channels(self.channels)
+            if self.channel_cache is None:  # وإلا فالقنوات محفوظة في ذاكرة القنوات
+                self.settings_manager.save_channels(self.channels.to_dicts())
             self.settings_manager.save_favorites(self.favorites)
             self.settings_manager.settings.setValue("connected_devices", self.connected_devices)
 
@@ -3558,7 +4316,6 @@ class StarsatRemote(QMainWindow):
             self.apply_ui_settings()
             self.update_stats()
             QMessageBox.information(self, "نجاح", "تم استعادة الإعدادات الافتراضية.")
-            self.setup_cell_tooltips()
 
     @pyqtSlot()
     def handle_connected(self):
@@ -3568,6 +4325,7 @@ class StarsatRemote(QMainWindow):
     def handle_disconnected(self):
         self.update_output("🔌 تم قطع الاتصال بالجهاز.")
         if self.network_thread and not self.network_thread.isRunning():
+            self.resume_state = None # لن تتم إعادة الاتصال بهذا الخيط
             self.network_thread.quit()
             self.network_thread.wait(500)
             self.network_thread = None
@@ -3648,26 +4406,12 @@ class StarsatRemote(QMainWindow):
     
     def get_favorite_group_names(self, fav_bit: int) -> list:
         """تحويل قيمة FavBit إلى أسماء المجموعات المفضلة"""
-        if not self.favorite_groups or fav_bit == 0:
-            return []
-        
-        group_names = []
-        # تحويل الرقم إلى ثنائي لتحديد المجموعات المختارة
-        # مثال: إذا كان fav_bit = 5 (ثنائي: 101) فهذا يعني المجموعتين 1 و 3
-        binary_str = bin(fav_bit)[2:]  # إزالة '0b' من البداية
-        binary_str = binary_str.zfill(len(self.favorite_groups))  # إضافة أصفار لجعل الطول متساوي
-        
-        # قراءة البتات من اليمين لليسار (أقل بت يمثل المجموعة الأولى)
-        for i, bit in enumerate(reversed(binary_str)):
-            if bit == '1' and i < len(self.favorite_groups):
-                group_names.append(self.favorite_groups[i])
-        
-        return group_names
+        return favorite_group_names(fav_bit, self.favorite_groups or [])
 
     def channel_selected_action(self):
-        current_item = self.channel_table.currentItem()
-        if current_item:
-            self.channel_selected(current_item)
+        current_index = self.channel_table.currentIndex()
+        if current_index.isValid():
+            self.channel_selected(current_index)
 
     def toggle_auto_reconnect(self, state):
         """تفعيل/تعطيل إعادة الاتصال التلقائي"""
@@ -3679,12 +4423,17 @@ class StarsatRemote(QMainWindow):
         
     @pyqtSlot()
     def on_connected(self):
+        if self.network_thread and self.network_thread.connect_count > 1:
+            return # إعادة اتصال: العمل المقطوع يُستأنف بدل السؤال من جديد
         if self.fetch_channels_checkbox.isChecked():  # تحقق من حالة QCheckBox
            QTimer.singleShot(5000, self.ask_to_fetch_channels)
 
            # QTimer.singleShot(5000, self.ask_to_fetch_channels)
 
     def ask_to_fetch_channels(self):
+        if self.sync_pipeline is not None or self.cache_serial and self.cache_serial == self.device_serial:
+            self.update_output("ℹ️ القنوات محملة من الذاكرة وتتم مزامنتها مع الجهاز في الخلفية.")
+            return
         reply = QMessageBox.question(
             self,
             "تأكيد جلب القنوات",
@@ -3723,7 +4472,6 @@ class StarsatRemote(QMainWindow):
             self.update_output("✅ تم جلب القنوات. بدء تحديث الروابط...")
             self.update_stats()
             self.start_updating_all_urls()
-            self.setup_cell_tooltips()
 
         self.fetch_all_btn.setEnabled(False)
         if hasattr(self, 'fetch_and_update_btn'):
@@ -3731,8 +4479,7 @@ class StarsatRemote(QMainWindow):
 
         self.is_fetching_all = True
         self.current_fetch_from = 0
-        self.channel_table.setRowCount(0)
-        self.channels = []
+        self.channel_model.clear()
 
         self.fetch_channels_btn.setEnabled(False)
         self.update_all_urls_btn.setEnabled(False)
@@ -3742,16 +4489,14 @@ class StarsatRemote(QMainWindow):
         self.progress_bar.setValue(0)
         self.progress_bar.setFormat("%p% - تحميل القنوات...")
         self.progress_bar.setVisible(True)
-        self.setup_cell_tooltips()
 
         def monitor_completion():
-            if not self.is_fetching_all:
+            if not self.is_fetching_all and not (self.resume_state and self.resume_state["fetch"]):
                 QTimer.singleShot(100, after_fetch_done)
             else:
                 QTimer.singleShot(500, monitor_completion)
 
-        self.fetch_next_batch()
-        self.setup_cell_tooltips()
+        self.start_fetch_pipeline()
 
         monitor_completion()
         
@@ -3772,6 +4517,15 @@ class StarsatRemote(QMainWindow):
             f"<b>🔹 الحد الأقصى للقنوات:</b> {device_info.get('MaxNumOfPrograms', '؟')}"
         )
         self.device_info_label.setText(info_html)
+        try:
+            self.device_channel_count = int(device_info.get('ChannelNum'))
+        except (TypeError, ValueError):
+            self.device_channel_count = None
+        serial = str(device_info.get('SerialNumber') or '').strip()
+        self.device_serial = serial or None
+        self.device_product = device_info.get('ProductName')
+        if self.channel_cache is not None and self.device_serial and self.channel_cache.count(self.device_serial):
+            self.start_channel_sync()
     
         # --- 2. تحديث التسمية والتلميح في شريط الحالة السفلي ---
     
@@ -3861,12 +4615,12 @@ class StarsatRemote(QMainWindow):
 
     def copy_cell_content(self, column: int):
         """نسخ محتوى خلية محددة"""
-        row = self.channel_table.currentRow()
+        row = self.current_channel_row()
         if row >= 0:
-            item = self.channel_table.item(row, column)
-            if item and item.text():
-                QApplication.clipboard().setText(item.text())
-                self.update_output(f"📋 تم نسخ: {item.text()}")
+            text = self.channel_model.text(row, column)
+            if text:
+                QApplication.clipboard().setText(text)
+                self.update_output(f"📋 تم نسخ: {text}")
             else:
                 self.update_output("⚠️ لا يوجد محتوى للنسخ في الخلية المحددة")
         else:
@@ -3874,7 +4628,7 @@ class StarsatRemote(QMainWindow):
     
     def copy_row_number(self):
         """نسخ رقم الصف المحدد"""
-        row = self.channel_table.currentRow()
+        row = self.current_channel_row()
         if row >= 0:
             QApplication.clipboard().setText(str(row + 1))  # +1 لأن الصفوف تبدأ من 0
             self.update_output(f"📋 تم نسخ رقم الصف: {row + 1}")
@@ -3887,18 +4641,12 @@ class StarsatRemote(QMainWindow):
             QMessageBox.warning(self, "خطأ", "الاتصال غير نشط!")
             return
     
-        row = self.channel_table.currentRow()
+        row = self.current_channel_row()
         if row < 0:
             return
     
-        service_id_item = self.channel_table.item(row, 2)
-        name_item = self.channel_table.item(row, 1)
-    
-        if not service_id_item or not name_item:
-            return
-    
-        old_name = name_item.text()
-        service_id = service_id_item.text()
+        old_name = self.channel_model.name(row)
+        service_id = self.channel_model.service_id(row)
     
         new_name, ok = QInputDialog.getText(
             self,
@@ -3912,23 +4660,10 @@ class StarsatRemote(QMainWindow):
             self._update_channel_name(service_id, new_name, row)
     
     def _update_channel_name(self, service_id: str, new_name: str, row: int):
-        """Update channel name locally and send to device"""
-        try:
-            self.channel_table.item(row, 1).setText(new_name)
-    
-            cmd = {
-                "array": [{
-                    "ProgramId": service_id,
-                    "ProgramName": new_name,
-                    "TvState": "0"
-                }],
-                "request": "1001"
-            }
-            self.network_thread.send_command(build_message(json.dumps(cmd)))
-            self.update_output(f"♻️ تم تحديث اسم القناة إلى: {new_name}")
-    
-        except Exception as e:
-            self.update_output(f"❌ فشل في تحديث الاسم: {str(e)}")
+        """Update channel name locally and queue it for the device (Request 1001)"""
+        self.channel_edits().rename(service_id, new_name)
+        self.channel_model.set_name(row, new_name)
+        self.update_output(f"♻️ تم تحديث اسم القناة إلى: {new_name}")
     
     def handle_delete_channel(self):
         """Handle channel deletion process"""
@@ -3936,7 +4671,7 @@ class StarsatRemote(QMainWindow):
             QMessageBox.warning(self, "خطأ", "الاتصال غير نشط!")
             return
     
-        row = self.channel_table.currentRow()
+        row = self.current_channel_row()
         if row < 0:
             return
     
@@ -3951,36 +4686,13 @@ class StarsatRemote(QMainWindow):
         if reply != QMessageBox.StandardButton.Yes:
             return
     
-        service_id_item = self.channel_table.item(row, 2)
-        channel_name_item = self.channel_table.item(row, 1)
-    
-        if not service_id_item or not channel_name_item:
-            return
-    
-        service_id = service_id_item.text()
-        channel_name = channel_name_item.text()
-    
-        try:
-            self._send_delete_command(service_id)
-            self.channel_table.removeRow(row)
-            self.update_output(f"🗑️ تم حذف القناة: {channel_name} (ID: {service_id})")
-            self.update_stats()
-        except Exception as e:
-            self.update_output(f"❌ فشل في حذف القناة: {str(e)}")
-            logging.error(f"Delete error: {str(e)}")
+        service_id = self.channel_model.service_id(row)
+        channel_name = self.channel_model.name(row)
     
-    def _send_delete_command(self, program_id: str):
-        """Send delete command to device (Request 1002)"""
-        delete_cmd = {
-            "request": "1002",
-            "TvState": "0",
-            "array": [{
-                "ProgramId": program_id
-            }],
-            "TotalNum": "1"
-        }
-        cmd_body = json.dumps(delete_cmd, ensure_ascii=False)
-        self.network_thread.send_command(build_message(cmd_body))
+        self.channel_edits().delete(service_id)
+        self.channel_model.remove_rows([row])
+        self.update_output(f"🗑️ تم حذف القناة: {channel_name} (ID: {service_id})")
+        self.update_stats()
     
     # def show_device_info(self, device_info: dict):
         # info_html = (
@@ -4005,7 +4717,7 @@ class StarsatRemote(QMainWindow):
             QMessageBox.warning(self, "خطأ", "الاتصال غير نشط!")
             return
     
-        row = self.channel_table.currentRow()
+        row = self.current_channel_row()
         if row < 0:
             return
     
@@ -4020,39 +4732,11 @@ class StarsatRemote(QMainWindow):
         if reply != QMessageBox.StandardButton.Yes:
             return
     
-        service_id_item = self.channel_table.item(row, 2)
-        channel_name_item = self.channel_table.item(row, 1)
-    
-        if not service_id_item or not channel_name_item:
-            return
-    
-        service_id = service_id_item.text()
-        channel_name = channel_name_item.text()
+        service_id = self.channel_model.service_id(row)
+        channel_name = self.channel_model.name(row)
     
-        try:
-
-            self._send_lock_command(service_id)
- 
-            self.channel_table.setItem(row, 7, QTableWidgetItem("نعم"))  # ← عدّل العمود حسب تصميمك 
-
-            self.update_output(f"🔒 تم قفل القناة: {channel_name} (ID: {service_id})")
-            self._request_channel_list()  # ← أضف هنا
-        except Exception as e:
-            self.update_output(f"❌ فشل في قفل القناة: {str(e)}")
-            logging.error(f"Lock error: {str(e)}")
-    
-    def _send_lock_command(self, program_id: str):
-        """Send lock command to device (Request 1003)"""
-        lock_cmd = {
-            "request": "1003",
-            "array": [{
-                "ProgramId": program_id,
-                "TvState": "0"  # ← القيمة الصحيحة للقفل
-            }],
-            "TotalNum": "1"
-        }
-        cmd_body = json.dumps(lock_cmd, ensure_ascii=False)
-        self.network_thread.send_command(build_message(cmd_body))
+        self._set_channel_locked(row, True)
+        self.update_output(f"🔒 تم قفل القناة: {channel_name} (ID: {service_id})")
     
     def handle_unlock_channel(self):
         """Handle channel unlock process"""
@@ -4060,7 +4744,7 @@ class StarsatRemote(QMainWindow):
             QMessageBox.warning(self, "خطأ", "الاتصال غير نشط!")
             return
     
-        row = self.channel_table.currentRow()
+        row = self.current_channel_row()
         if row < 0:
             return
     
@@ -4075,67 +4759,79 @@ class StarsatRemote(QMainWindow):
         if reply != QMessageBox.StandardButton.Yes:
             return
     
-        service_id_item = self.channel_table.item(row, 2)
-        channel_name_item = self.channel_table.item(row, 1)
-    
-        if not service_id_item or not channel_name_item:
+        service_id = self.channel_model.service_id(row)
+        channel_name = self.channel_model.name(row)
+    
+        self._set_channel_locked(row, False)
+        self.update_output(f"🔓 تم إلغاء قفل القناة: {channel_name} (ID: {service_id})")
+
+    def _set_channel_locked(self, row: int, locked: bool):
+        """Request 1003 يبدّل القفل على الجهاز؛ المعاملة ترسله فقط إذا تغيرت الحالة فعلاً"""
+        model = self.channel_model
+        self.channel_edits().set_locked(model.service_id(row), locked, model.store.has(row, ChannelStore.LOCKED))
+        model.set_locked(row, locked)
+
+    # --- معاملات تعديل القنوات على الجهاز ---
+    def channel_edits(self) -> EditTransaction:
+        """المعاملة المفتوحة؛ تُرسل بعد لحظة حتى تُجمع الإجراءات المتتالية في نفس الطلبات"""
+        self.edit_flush_timer.start()
+        return self.edit_queue.transaction()
+
+    def submit_edit_request(self, message: bytes, callback):
+        if self.network_thread is None:
+            future = Future()
+            future.set_exception(ConnectionError("not connected"))
+            callback(future)
             return
-    
-        service_id = service_id_item.text()
-        channel_name = channel_name_item.text()
-    
-        try:
-
-            self._send_unlock_command(service_id)
-
-            self.channel_table.setItem(row, 7, QTableWidgetItem("لا"))  # ← عدّل العمود حسب تصميمك 
+        self.network_thread.send_request(message, "ack", callback)
 
+    def handle_edit_transaction_done(self, transaction: EditTransaction):
+        if not transaction.sent:
+            return
+        self.edit_generation += 1
+        if not transaction.failed:
+            self.update_output(f"✅ أكد الجهاز التعديلات: {transaction.summary()}")
+            self.save_channel_cache()
+            return
+        unconfirmed = transaction.unconfirmed
+        if unconfirmed:
+            # قد يكون الجهاز نفذ التعديل دون أن يرد: قائمته هي المرجع وليس اللقطة المحفوظة
+            errors = "، ".join(f"{code}: {error}" for code, error in unconfirmed.items())
+            self.update_output(f"⚠️ لم يصل تأكيد الجهاز للتعديلات ({errors}) - إعادة مزامنة القائمة من الجهاز")
+            logging.warning(f"Edit transaction unconfirmed: {errors}")
+            self.resync_channels_from_receiver()
+            return
+        errors = "، ".join(f"{code}: {error}" for code, error in transaction.rejected.items())
+        self.update_output(f"❌ رفض الجهاز التعديلات ({errors}) - استعادة الحالة السابقة")
+        logging.error(f"Edit transaction rejected: {errors}")
+        model = self.channel_model
+        pending = self.edit_queue.pending
+        undo = EditUndo(transaction, transaction.rejected) # ما أكده الجهاز يبقى مطبقاً
+        if pending is not None:
+            undo.rebase(pending)
+        model.undo_edits(undo)
+        if pending is not None and undo.moves and pending.move_blocks:
+            # نقل المعاملة التالية حُسب فوق النقل المرفوض: يُعاد تطبيقه كما سينفذه الجهاز
+            model.replay_moves(pending.move_blocks)
+            pending.move_order = list(model.store.service_ids)
+        self.filter_channels()
+        self.update_stats()
 
-            self.update_output(f"🔓 تم إلغاء قفل القناة: {channel_name} (ID: {service_id})")
-           
-            self._request_channel_list()  # ← أضف هنا
-        except Exception as e:
-            self.update_output(f"❌ فشل في إلغاء قفل القناة: {str(e)}")
-            logging.error(f"Unlock error: {str(e)}")
-    
-    def _send_unlock_command(self, program_id: str):
-        """Send unlock command to device (Request 1003, TvState=1)"""
-        unlock_cmd = {
-            "request": "1003",
-            "array": [{
-                "ProgramId": program_id,
-                "TvState": "0"  # ← 1 تعني إلغاء القفل
-            }],
-            "TotalNum": "1"
-        }
-        cmd_body = json.dumps(unlock_cmd, ensure_ascii=False)
-        self.network_thread.send_command(build_message(cmd_body))
-    
-    def _request_channel_list(self):
-        """طلب تحديث قائمة القنوات من الجهاز"""
-        try:
-            request = {
-                "request": "0",
-                "FromIndex": "0",
-                "ToIndex": "99"  # غطِ كل القنوات المتاحة
-            }
-            cmd_body = json.dumps(request, ensure_ascii=False)
-            self.network_thread.send_command(build_message(cmd_body))
-            self.update_output("🔄 تم إرسال طلب تحديث القنوات إلى الجهاز.")
-        except Exception as e:
-            self.update_output(f"❌ فشل في طلب القنوات: {str(e)}")            
+    def resync_channels_from_receiver(self):
+        """استبدال الجدول بقائمة الجهاز الحالية (مزامنة في الخلفية إن أمكن، وإلا جلب كامل)"""
+        if self.channel_cache is not None and self.device_serial:
+            self.start_channel_sync(replace_all=True) # بدون اتصال: تُطبق في المزامنة بعد إعادة الاتصال
+        elif self.connected and not self.is_fetching_all:
+            self.start_fetching_all()
     def save_channel_as_m3u(self):
         """حفظ القناة المحددة كملف M3U"""
-        current_row = self.channel_table.currentRow()
+        current_row = self.current_channel_row()
         if current_row < 0:
             QMessageBox.information(self, "تنبيه", "يرجى تحديد قناة أولاً")
             return
     
-        channel_name_item = self.channel_table.item(current_row, 1)
-        url_item = self.channel_table.item(current_row, 3)
-    
-        channel_name = channel_name_item.text() if channel_name_item else "قناة غير معروفة"
-        stream_url = url_item.text() if url_item and url_item.text() else ""
+        channel_name = self.channel_model.name(current_row)
+        stream_url = self.channel_model.url(current_row)
     
         if not stream_url:
             QMessageBox.warning(self, "تنبيه", "لا يوجد رابط بث متاح للقناة المحددة")
@@ -4164,18 +4860,12 @@ class StarsatRemote(QMainWindow):
                 self.update_output(f"❌ فشل في حفظ ملف M3U: {str(e)}")
                 QMessageBox.critical(self, "خطأ", f"فشل في حفظ الملف:\n{str(e)}")
     def add_channel_to_favorite_group(self, group_name):
-        selected_items = self.channel_table.selectedItems()
-        if not selected_items:
+        selected_rows = self.selected_channel_rows()
+        if not selected_rows:
             QMessageBox.warning(self, "تنبيه", "يرجى تحديد قناة أولاً.")
             return
     
-        row = selected_items[0].row()
-        service_id_item = self.channel_table.item(row, 2)  # عمود معرف الخدمة
-        if not service_id_item:
-            QMessageBox.warning(self, "خطأ", "لا يمكن العثور على معرف الخدمة للقناة المحددة.")
-            return
-    
-        service_id = service_id_item.text()
+        service_id = self.channel_model.service_id(selected_rows[0])  # عمود معرف الخدمة
     
         # توليد الأمر وإرساله
         request_body = {
@@ -4193,45 +4883,27 @@ class StarsatRemote(QMainWindow):
             QMessageBox.warning(self, "خطأ", "الاتصال غير نشط!")
             return
     
-        current_row = self.channel_table.currentRow()
+        current_row = self.current_channel_row()
         if current_row < 0:
             return
     
-        # جلب ProgramId للقناة الحالية
-        source_program_id_item = self.channel_table.item(current_row, 2)
-        channel_name_item = self.channel_table.item(current_row, 1)
-    
-        if not source_program_id_item or not channel_name_item:
-            return
-    
-        source_program_id = source_program_id_item.text()
-        channel_name = channel_name_item.text()
+        channel_name = self.channel_model.name(current_row)
     
         new_row_index, ok = QInputDialog.getInt(
             self,
             "نقل القناة",
-            f"رقم الصف الجديد لـ {channel_name} (1-{self.channel_table.rowCount()}):",
+            f"رقم الصف الجديد لـ {channel_name} (1-{self.channel_model.rowCount()}):",
             value=current_row + 1,
             min=1,
-            max=self.channel_table.rowCount()
+            max=self.channel_model.rowCount()
         )
     
-        # تنفيذ النقل
+        # تنفيذ النقل (MoveToPosition = ProgramId القناة في الصف الهدف)
         if ok and (new_row_index - 1) != current_row:
-            # جلب ProgramId من الصف الهدف
-            target_program_id_item = self.channel_table.item(new_row_index - 1, 2)
-            if not target_program_id_item:
-                QMessageBox.warning(self, "خطأ", "تعذر الحصول على ProgramId في الصف الهدف.")
-                return
-    
-            target_program_id = target_program_id_item.text()
-    
-            self._perform_channel_move(
-                program_id=source_program_id,
-                old_pos=current_row,
-                new_pos=new_row_index - 1,
-                move_position_str=target_program_id  # نستخدم program_id كـ MoveToPosition
-            )    
+            batch = self.channel_model.move_batch()
+            batch.move_row(current_row, new_row_index - 1)
+            if self.apply_channel_moves(batch):
+                self.update_output(f"↕️ تم نقل القناة {channel_name} إلى الصف {new_row_index}")
     # def handle_move_channel(self):
         # if not self.connected:
             # QMessageBox.warning(self, "خطأ", "الاتصال غير نشط!")
@@ -4269,47 +4941,15 @@ class StarsatRemote(QMainWindow):
             # move_position_str = رقم_item.text().zfill(8)  # تأكد من أن القيمة 8 أرقام
             # self._perform_channel_move(service_id, current_row, new_row_index - 1, move_position_str)
     
-    def _perform_channel_move(self, program_id: str, old_pos: int, new_pos: int, move_position_str: str):
-        try:
-            move_cmd = {
-                "request": "1005",
-                "array": [{
-                    "ProgramId": program_id,
-                    "MoveToPosition": move_position_str,
-                    "TvState": "0"
-                }],
-                "TotalNum": "1"
-            }
-    
-            cmd_body = json.dumps(move_cmd, ensure_ascii=False)
-            self.update_output(f"📤 إرسال أمر نقل: {cmd_body}")
-            self.network_thread.send_command(build_message(cmd_body))
-    
-            self._move_table_row(old_pos, new_pos)
-            self.update_output(f"↕️ تم نقل القناة إلى الرقم {int(move_position_str)}")
-    
-        except Exception as e:
-            self.update_output(f"❌ فشل في نقل القناة: {str(e)}")
-            logging.error(f"Move error: {str(e)}")
-    
-    
-    def _move_table_row(self, old_row: int, new_row: int):
-        """Visually move row in the table"""
-        row_items = [self.channel_table.takeItem(old_row, col)
-                     for col in range(self.channel_table.columnCount())]
-    
-        self.channel_table.removeRow(old_row)
-        self.channel_table.insertRow(new_row)
-    
-        for col, item in enumerate(row_items):
-            if item:
-                self.channel_table.setItem(new_row, col, item)
-    
-        # تحديث أرقام الصفوف إن وُجدت في العمود رقم 23
-        for row in range(self.channel_table.rowCount()):
-            item = self.channel_table.item(row, 16)
-            if item:
-                item.setText(str(row + 1))
+    def apply_channel_moves(self, batch: ChannelMoveBatch, deselect: bool = False) -> bool:
+        """تطبيق الدفعة على الجدول كتبديل واحد وإضافة عناصرها إلى طلب 1005 في المعاملة المفتوحة"""
+        if not batch:
+            return False
+        edits = self.channel_edits() # اللقطة تُحفظ قبل تطبيق النقل
+        self.channel_model.apply_moves(batch, deselect)
+        edits.move(batch.blocks, self.channel_model.store.service_ids)
+        self.update_output(f"📤 إرسال أمر نقل لـ {len(batch)} قناة")
+        return True
 
     def save_channels_to_file(self):
         """حفظ قائمة القنوات إلى ملف"""
@@ -4317,26 +4957,33 @@ class StarsatRemote(QMainWindow):
             QMessageBox.warning(self, "تحذير", "لا توجد قنوات لحفظها!")
             return
     
-        file_path, _ = QFileDialog.getSaveFileName(
+        file_path, selected_filter = QFileDialog.getSaveFileName(
             self,
             "حفظ ملف القنوات",
             "",
-            "JSON Files (*.json);;All Files (*)"
+            f"JSON Files (*.json);;Starsat Snapshot (*{SNAPSHOT_EXTENSION});;All Files (*)"
         )
     
         if file_path:
-            if not file_path.lower().endswith('.json'):
+            # اللقطة الثنائية أصغر بكثير وتُفتح فوراً؛ JSON يبقى الصيغة الافتراضية للتبادل
+            snapshot = file_path.lower().endswith(SNAPSHOT_EXTENSION) or selected_filter.startswith("Starsat Snapshot")
+            if snapshot and not file_path.lower().endswith(SNAPSHOT_EXTENSION):
+                file_path += SNAPSHOT_EXTENSION
+            elif not snapshot and not file_path.lower().endswith('.json'):
                 file_path += '.json'
     
             try:
-                data = {
-                    "channels": self.channels,
-                    "favorites": self.favorites,
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
-                }
+                if snapshot:
+                    write_snapshot(file_path, self.channels, self.favorites)
+                else:
+                    data = {
+                        "channels": self.channels.to_dicts(),
+                        "favorites": self.favorites,
+                        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+                    }
     
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=4)
+                    with open(file_path, 'w', encoding='utf-8') as f:
+                        json.dump(data, f, ensure_ascii=False, indent=4)
     
                 self.update_output(f"✅ تم حفظ {len(self.channels)} قناة في الملف: {file_path}")
                 QMessageBox.information(self, "نجاح", f"تم حفظ القنوات بنجاح في:\n{file_path}")
@@ -4350,25 +4997,32 @@ class StarsatRemote(QMainWindow):
             self,
             "فتح ملف القنوات",
             "",
-            "JSON Files (*.json);;All Files (*)"
+            f"Channel Files (*.json *{SNAPSHOT_EXTENSION});;JSON Files (*.json);;"
+            f"Starsat Snapshot (*{SNAPSHOT_EXTENSION});;All Files (*)"
         )
     
         if file_path:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                if is_snapshot(file_path):
+                    # الصفوف تُفك من الملف المفتوح بـ mmap شريحةً شريحة أثناء تعبئة الجدول (كل الصفوف
+                    # تُنسخ إلى مخزن الجدول في النهاية؛ الفتح والشاشة الأولى فقط لا تنتظر الملف كاملاً)
+                    channels = ChannelSnapshot(file_path)
+                    self.favorites = channels.favorites
+                else:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
     
-                if "channels" not in data:
-                    raise ValueError("الملف لا يحتوي على بيانات قنوات صالحة")
+                    if "channels" not in data:
+                        raise ValueError("الملف لا يحتوي على بيانات قنوات صالحة")
     
-                self.channels = data.get("channels", [])
-                self.favorites = data.get("favorites", [])
+                    channels = data.get("channels", [])
+                    self.favorites = data.get("favorites", [])
                 
                 # تحديث الجدول
-                self.channel_table.setRowCount(0)
-                self.populate_channel_table(self.channels)
+                self.channel_model.clear()
+                self.populate_channel_table(channels)
                 
-                self.update_output(f"✅ تم تحميل {len(self.channels)} قناة من الملف: {file_path}")
+                self.update_output(f"✅ تم تحميل {len(channels)} قناة من الملف: {file_path}")
                 QMessageBox.information(self, "نجاح", f"تم تحميل القنوات بنجاح من:\n{file_path}")
                 
                 # تحديث الإحصائيات
@@ -4396,19 +5050,11 @@ class StarsatRemote(QMainWindow):
             QMessageBox.warning(self, "خطأ", "الاتصال غير نشط!")
             return
     
-        # 1. جمع القنوات المحددة ومعرفاتها
-        selected_channels_info = []
-        for row in range(self.channel_table.rowCount()):
-            selection_item = self.channel_table.item(row, 17) # عمود التحديد
-            if selection_item and selection_item.checkState() == Qt.CheckState.Checked:
-                service_id_item = self.channel_table.item(row, 2) # عمود معرف الخدمة
-                if service_id_item and service_id_item.text():
-                    selected_channels_info.append({
-                        "program_id": service_id_item.text(),
-                        "row": row
-                    })
+        # 1. جمع القنوات المحددة
+        selected_rows = [row for row in self.channel_model.selected_rows() # عمود التحديد
+                         if self.channel_model.service_id(row)]
     
-        if not selected_channels_info:
+        if not selected_rows:
             QMessageBox.information(self, "لا يوجد تحديد", "الرجاء تحديد قناة واحدة على الأقل لنقلها باستخدام خانة الاختيار.")
             return
     
@@ -4416,111 +5062,29 @@ class StarsatRemote(QMainWindow):
         new_row_index, ok = QInputDialog.getInt(
             self,
             "نقل القنوات المحددة",
-            f"سيتم نقل {len(selected_channels_info)} قناة.\nأدخل رقم الصف الجديد الذي تريد النقل إليه (1-{self.channel_table.rowCount()}):",
+            f"سيتم نقل {len(selected_rows)} قناة.\nأدخل رقم الصف الجديد الذي تريد النقل إليه (1-{self.channel_model.rowCount()}):",
             value=1,
             min=1,
-            max=self.channel_table.rowCount()
+            max=self.channel_model.rowCount()
         )
     
         if not ok:
             return
     
-        destination_row = new_row_index - 1
-    
-        # لا تسمح بنقل القنوات إلى موقعها الحالي أو ضمن التحديد نفسه
-        selected_rows = [info['row'] for info in selected_channels_info]
-        if destination_row in selected_rows:
-            QMessageBox.warning(self, "خطأ", "لا يمكن نقل القنوات المحددة إلى موقع ضمن التحديد نفسه.")
-            return
-    
-        # 3. الحصول على معرف القناة في الموقع الهدف الذي سيتم النقل قبله
-        target_program_id_item = self.channel_table.item(destination_row, 2)
-        if not target_program_id_item or not target_program_id_item.text():
-            QMessageBox.warning(self, "خطأ", "تعذر الحصول على معرف الخدمة في الصف الهدف.")
-            return
-        move_to_position_id = target_program_id_item.text()
-    
+        # 3. كل القنوات تُنقل قبل القناة في الصف الهدف: تبديل واحد للجدول وطلب 1005 واحد للجهاز
+        batch = self.channel_model.move_batch()
         try:
-            # 4. بناء وإرسال أمر النقل الجماعي
-            program_id_array = []
-            for channel_info in selected_channels_info:
-                program_id_array.append({
-                    "ProgramId": channel_info['program_id'],
-                    "MoveToPosition": move_to_position_id,
-                    "TvState": "0"
-                })
-    
-            move_cmd = {
-                "request": "1005",
-                "array": program_id_array,
-                "TotalNum": str(len(program_id_array))
-            }
-            cmd_body = json.dumps(move_cmd, ensure_ascii=False)
-            full_message = build_message(cmd_body)
-            self.network_thread.send_command(full_message)
-    
-            # 5. تحديث الجدول بصريًا
-            self._move_multiple_table_rows(selected_rows, destination_row)
+            batch.move(selected_rows, new_row_index - 1)
+        except ValueError as e:
+            QMessageBox.warning(self, "خطأ", f"{e}.")
+            return
     
-            self.update_output(f"↕️ تم إرسال أمر نقل لـ {len(selected_channels_info)} قناة إلى الموقع الجديد.")
+        if self.apply_channel_moves(batch, deselect=True):
+            self.update_output(f"↕️ تم إرسال أمر نقل لـ {len(selected_rows)} قناة إلى الموقع الجديد.")
             self.update_stats()
-    
-        except Exception as e:
-            error_msg = f"❌ فشل في إرسال أمر النقل الجماعي: {str(e)}"
-            self.update_output(error_msg)
-            logging.error(f"Bulk move error: {str(e)}")
-            QMessageBox.critical(self, "خطأ فادح", error_msg)
-    
-    
-    def _move_multiple_table_rows(self, source_rows: list, destination_row: int):
-        """
-        ينقل مجموعة من الصفوف بصريًا في الجدول.
-        """
-        self.channel_table.setSortingEnabled(False)
-    
-        # 1. استخراج بيانات الصفوف المراد نقلها وحذفها من موقعها القديم
-        moving_rows_data = []
-        # الحذف بترتيب عكسي لتجنب مشاكل تغير الفهارس
-        for row in sorted(source_rows, reverse=True):
-            row_data = [self.channel_table.takeItem(row, col) for col in range(self.channel_table.columnCount())]
-            moving_rows_data.insert(0, row_data) # الحفاظ على ترتيبها الأصلي
-            self.channel_table.removeRow(row)
-    
-        # تعديل مؤشر الوجهة إذا كانت الصفوف المحذوفة تقع قبل الموقع الهدف
-        final_destination = destination_row
-        num_rows_before_dest = len([r for r in source_rows if r < destination_row])
-        final_destination -= num_rows_before_dest
-    
-        # 2. إدراج الصفوف في الموقع الجديد
-        for i, row_data in enumerate(moving_rows_data):
-            insert_pos = final_destination + i
-            self.channel_table.insertRow(insert_pos)
-            for col, item in enumerate(row_data):
-                self.channel_table.setItem(insert_pos, col, item)
-                # مسح تحديد خانة الاختيار بعد النقل
-                if col == 18 and item:
-                    item.setCheckState(Qt.CheckState.Unchecked)
-    
-        # 3. إعادة ترقيم عمود "رقم" ليعكس الترتيب الجديد
-        for row in range(self.channel_table.rowCount()):
-            item = self.channel_table.item(row, 16) # العمود 16 هو "رقم"
-            if item:
-                item.setText(str(row + 1))
-    
-        self.channel_table.setSortingEnabled(True)
+        else:
+            QMessageBox.critical(self, "خطأ فادح", "❌ فشل في إرسال أمر النقل الجماعي.")
   
-    def _send_delete_command(self, program_id: str):
-        """Send delete command to device (Request 1002)"""
-        delete_cmd = {
-            "request": "1002",
-            "TvState": "0",
-            "array": [{
-                "ProgramId": program_id
-            }],
-            "TotalNum": "1"
-        }
-        cmd_body = json.dumps(delete_cmd, ensure_ascii=False)
-        self.network_thread.send_command(build_message(cmd_body)) 
     # --- بداية الدالة الجديدة ---
     def handle_delete_selected_channels(self):
         """
@@ -4534,13 +5098,11 @@ class StarsatRemote(QMainWindow):
         selected_ids = []
         rows_to_delete = []
         # العمود 18 هو خانة الاختيار، العمود 2 هو معرف الخدمة
-        for row in range(self.channel_table.rowCount()):
-            selection_item = self.channel_table.item(row, 17)
-            if selection_item and selection_item.checkState() == Qt.CheckState.Checked:
-                service_id_item = self.channel_table.item(row, 2)
-                if service_id_item and service_id_item.text():
-                    selected_ids.append(service_id_item.text())
-                    rows_to_delete.append(row)
+        for row in self.channel_model.selected_rows():
+            service_id = self.channel_model.service_id(row)
+            if service_id:
+                selected_ids.append(service_id)
+                rows_to_delete.append(row)
 
         if not selected_ids:
             QMessageBox.information(self, "لا يوجد تحديد", "الرجاء تحديد قناة واحدة على الأقل لحذفها باستخدام خانة الاختيار.")
@@ -4557,33 +5119,16 @@ class StarsatRemote(QMainWindow):
         if reply != QMessageBox.StandardButton.Yes:
             return
 
-        try:
-            # بناء حمولة الأمر
-            program_id_array = [{"ProgramId": pid} for pid in selected_ids]
-            delete_cmd = {
-                "request": "1002",
-                "TvState": "0",
-                "array": program_id_array,
-                "TotalNum": str(len(selected_ids))
-            }
-            cmd_body = json.dumps(delete_cmd, ensure_ascii=False)
-            full_message = build_message(cmd_body)
-
-            # إرسال الأمر
-            self.network_thread.send_command(full_message)
-
-            # تحديث واجهة المستخدم عن طريق حذف الصفوف بترتيب عكسي
-            for row_index in sorted(rows_to_delete, reverse=True):
-                self.channel_table.removeRow(row_index)
+        # كل القنوات في طلب 1002 واحد ضمن المعاملة المفتوحة
+        edits = self.channel_edits()
+        for service_id in selected_ids:
+            edits.delete(service_id)
 
-            self.update_output(f"🗑️ تم إرسال أمر حذف لـ {len(selected_ids)} قناة.")
-            self.update_stats()
+        # تحديث واجهة المستخدم بحذف الصفوف كنطاقات متصلة
+        self.channel_model.remove_rows(rows_to_delete)
 
-        except Exception as e:
-            error_msg = f"❌ فشل في إرسال أمر الحذف الجماعي: {str(e)}"
-            self.update_output(error_msg)
-            logging.error(f"Bulk delete error: {str(e)}")
-            QMessageBox.critical(self, "خطأ فادح", error_msg)
+        self.update_output(f"🗑️ تم إرسال أمر حذف لـ {len(selected_ids)} قناة.")
+        self.update_stats()
     # --- نهاية الدالة الجديدة --- 
                                                                                                                                                                                      
     def handle_send_direct_command(self):
@@ -4618,7 +5163,10 @@ def closeEvent(self, event):
         self.settings_manager.save_device_settings(self.ip_input.text().strip(), self.port_input.text().strip())
         self.settings_manager.settings.setValue("vlc_path", self.vlc_path_input.text())
         self.settings_manager.settings.setValue("record_path", self.record_path_input.text())
-        self.settings_manager.save_channels(self.channels)
+        if self.channel_cache is None:
+            self.settings_manager.save_channels(self.channels.to_dicts())
+        else:
+            self.save_channel_cache() # الصفوف المتغيرة فقط، بدل كتابة القائمة كاملة في QSettings
         self.settings_manager.save_favorites(self.favorites)
         self.settings_manager.settings.setValue("connected_devices", self.connected_devices)
 
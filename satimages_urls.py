@@ -0,0 +1,174 @@
+import http.client
+import socket
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+# ✅ تحديث روابط البث بدون تقليب الجهاز على كل القنوات:
+# 1) عينة صغيرة من القنوات تُطلب بالطريقة القديمة (1009) لمعرفة شكل الرابط
+# 2) استنتاج قالب الرابط (http://ip:8085/player.<id> أو rtsp://ip:554/?prognumber=<id>)
+# 3) التحقق من رابط كل قناة بطلبات HEAD / OPTIONS خفيفة ومتوازية
+# 4) القنوات التي فشل التحقق منها فقط تُطلب واحدة واحدة
+# لا يعتمد على Qt حتى يُستخدم من الواجهة ومن الأدوات بدون واجهة
+
+SAMPLE_COUNT = 3
+PROBE_WORKERS = 8
+PROBE_TIMEOUT = 2.0
+
+
+def _stripped(service_id: str) -> str:
+    return service_id.lstrip("0") or "0"
+
+
+def url_template(url: str, service_id: str, ip: str = "") -> str | None:
+    """تحويل رابط قناة معروفة إلى قالب فيه {ip} و {sid} (أو {sid_stripped} بدون الأصفار البادئة)"""
+    if not url:
+        return None
+    template = url.replace(ip, "{ip}") if ip else url
+    service_id = str(service_id)
+    for token, key in ((service_id, "{sid}"), (_stripped(service_id), "{sid_stripped}")):
+        position = template.rfind(token)  # المعرف يأتي في آخر الرابط عادة وليس في المنفذ
+        if position >= 0:
+            return template[:position] + key + template[position + len(token):]
+    return None
+
+
+def expand_template(template: str, service_id: str, ip: str = "") -> str:
+    service_id = str(service_id)
+    return (template.replace("{ip}", ip)
+            .replace("{sid_stripped}", _stripped(service_id))
+            .replace("{sid}", service_id))
+
+
+def infer_url_template(samples: dict, ip: str = "") -> str | None:
+    """القالب الذي تتفق عليه أغلب العينات (service_id -> الرابط المستلم من الجهاز)"""
+    templates = Counter(filter(None, (url_template(url, sid, ip) for sid, url in samples.items())))
+    if not templates:
+        return None
+    template, count = templates.most_common(1)[0]
+    return template if count >= min(2, len(samples)) else None
+
+
+def stream_url_from_reply(reply, service_id: str, ip: str = "") -> str | None:
+    """رابط البث من رد 1009؛ النجاح بدون رابط يعني أن الجهاز يبث عبر RTSP برقم البرنامج"""
+    if isinstance(reply, list) and reply:
+        reply = reply[0]
+    if not isinstance(reply, dict):
+        return None
+    url = reply.get("url") or ""
+    if not url and str(reply.get("success")) == "1" and ip:
+        url = f"rtsp://{ip}:554/?prognumber={_stripped(str(service_id))}"
+    return url or None
+
+
+def probe_stream_url(url: str, timeout: float = PROBE_TIMEOUT) -> bool:
+    """تحقق خفيف من وجود الرابط: HEAD لـ HTTP و OPTIONS لـ RTSP بدون تنزيل البث"""
+    parts = urlsplit(url)
+    try:
+        if parts.scheme in ("http", "https"):
+            connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+            connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+            try:
+                connection.request("HEAD", parts.path + (f"?{parts.query}" if parts.query else "") or "/")
+                status = connection.getresponse().status
+            finally:
+                connection.close()
+            return status < 400 or status == 405  # 405: المسار موجود لكن HEAD غير مدعوم
+        if parts.scheme == "rtsp":
+            with socket.create_connection((parts.hostname, parts.port or 554), timeout=timeout) as sock:
+                sock.sendall(f"OPTIONS {url} RTSP/1.0\r\nCSeq: 1\r\n\r\n".encode("ascii"))
+                return sock.recv(64).startswith(b"RTSP/1.0 200")
+    except (OSError, http.client.HTTPException, UnicodeError):
+        return False
+    return False
+
+
+def probe_all(candidates, probe=probe_stream_url, workers: int = PROBE_WORKERS, cancelled: threading.Event = None):
+    """فحص متوازٍ؛ يعيد (service_id, url, ok) بترتيب الانتهاء ويتوقف عند ضبط cancelled"""
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="satimages-probe")
+    try:
+        futures = {pool.submit(probe, url): (service_id, url) for service_id, url in candidates}
+        for future in as_completed(futures):
+            if cancelled is not None and cancelled.is_set():
+                return
+            service_id, url = futures[future]
+            yield service_id, url, bool(future.result())
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+class UrlRefreshPlan:
+    """
+    حالة تحديث الروابط لكل القنوات (تبقى بعد انقطاع الاتصال لاستئناف العمل):
+    phase = "sample" -> "probe" -> "zap" -> "done"
+    - sample / zap: next_zap() يعطي القناة التالية لطلبها من الجهاز، و record_zap() يسجل الرد
+    - probe: probe_candidates() الروابط المستنتجة، و record_probe() نتيجة التحقق
+    """
+
+    def __init__(self, service_ids, ip: str = "", sample_count: int = SAMPLE_COUNT):
+        self.service_ids = list(dict.fromkeys(service_ids))
+        self.ip = ip
+        self.total = len(self.service_ids)
+        self.done = 0
+        self.verified = 0  # روابط ثبتت بالتحقق بدون طلبها من الجهاز
+        self.template = None
+        self.samples = {}
+        self.failed = []
+        self._sampled = set()
+        self._pending_probe = {}
+        count = min(sample_count, self.total)
+        # عينات موزعة على القائمة (أول، وسط، آخر) حتى لا تكون كلها من قمر أو باقة واحدة
+        picks = sorted({round(i * (self.total - 1) / max(count - 1, 1)) for i in range(count)}) if count else []
+        self.sample_ids = [self.service_ids[i] for i in picks]
+        self._zap_queue = deque(self.sample_ids)
+        self.phase = "sample" if picks else "done"
+
+    def next_zap(self) -> str | None:
+        return self._zap_queue.popleft() if self._zap_queue else None
+
+    def retry(self, service_id: str):
+        """إعادة قناة طُلبت ولم يصل ردها (مثلاً بسبب انقطاع الاتصال) إلى أول الطابور"""
+        self._zap_queue.appendleft(service_id)
+
+    def record_zap(self, service_id: str, url: str | None):
+        self.done += 1
+        if self.phase == "sample":
+            self._sampled.add(service_id)
+            if url:
+                self.samples[service_id] = url
+            if not self._zap_queue:
+                self._begin_probe()
+        elif self.phase == "zap" and not self._zap_queue:
+            self.phase = "done"
+
+    def probe_candidates(self) -> list:
+        return list(self._pending_probe.items())
+
+    def record_probe(self, service_id: str, ok: bool):
+        if self._pending_probe.pop(service_id, None) is None:
+            return
+        if ok:
+            self.done += 1
+            self.verified += 1
+        else:
+            self.failed.append(service_id)  # تُحسب عند طلبها من الجهاز
+
+    def finish_probe(self):
+        """ما لم يُتحقق منه (فشل أو لم يُفحص) يُطلب من الجهاز"""
+        self.failed.extend(self._pending_probe)
+        self._pending_probe.clear()
+        self._begin_zap(self.failed)
+
+    def _begin_probe(self):
+        rest = [sid for sid in self.service_ids if sid not in self._sampled]
+        self.template = infer_url_template(self.samples, self.ip)
+        if self.template is None:
+            self._begin_zap(rest)  # لا نمط واضح: الطريقة القديمة لكل القنوات
+            return
+        self._pending_probe = {sid: expand_template(self.template, sid, self.ip) for sid in rest}
+        self.phase = "probe" if self._pending_probe else "done"
+
+    def _begin_zap(self, service_ids):
+        self._zap_queue = deque(service_ids)
+        self.phase = "zap" if self._zap_queue else "done"
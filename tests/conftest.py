@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# وحدات satimages_* في جذر المستودع وليست حزمة
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from satimages_mock_server import MockStarsatServer, generate_channels
+from satimages_sessions import ReceiverSession
+
+
+@pytest.fixture
+def mock_server(request):
+    """خادم جهاز محاكى على منفذ حر؛ خيارات حقن الأعطال عبر @pytest.mark.mock(...)"""
+    marker = request.node.get_closest_marker("mock")
+    options = dict(marker.kwargs) if marker else {}
+    channels = generate_channels(options.pop("channel_count", 600))
+    server = MockStarsatServer(("127.0.0.1", 0), channels, **options).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def session(mock_server):
+    session = ReceiverSession("127.0.0.1", mock_server.port, timeout=5)
+    session.open().result(timeout=5)
+    yield session
+    session.close()
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "mock(**options): MockStarsatServer options for the mock_server fixture")
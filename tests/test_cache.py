@@ -0,0 +1,28 @@
+from satimages_cache import ChannelCache
+from satimages_mock_server import generate_channels
+
+
+def test_cache_writes_only_changed_rows_and_diffs(tmp_path):
+    cache = ChannelCache(str(tmp_path / "cache" / "channels.sqlite"))
+    try:
+        channels = generate_channels(30)
+        assert cache.save("SN1", channels, "Mock") == 30
+        assert cache.load("SN1") == channels and cache.last_serial() == "SN1"
+        assert cache.save("SN1", channels) == 0
+        assert not cache.diff("SN1", channels)
+
+        playing = [dict(c, Playing=1) if i == 3 else c for i, c in enumerate(channels)]
+        assert not cache.diff("SN1", playing)  # Playing لا يُعد تغييراً
+
+        renamed = [dict(c, ServiceName="x") if i in (2, 7) else c for i, c in enumerate(channels)]
+        delta = cache.diff("SN1", renamed)
+        assert not delta.reordered and sorted(delta.changed) == [2, 7]
+        assert cache.save("SN1", renamed) == 2
+
+        moved = renamed[1:] + renamed[:1]
+        assert cache.diff("SN1", moved).reordered
+        assert cache.diff("SN1", renamed[:-1]).reordered
+        assert cache.save("SN1", renamed[:-1]) == 1
+        assert cache.count("SN1") == 29
+    finally:
+        cache.close()
@@ -0,0 +1,130 @@
+import random
+
+import pytest
+
+from satimages_channels import ChannelFilterIndex, ChannelMoveBatch, ChannelStore, normalize_name, rows_from_bits
+from satimages_mock_server import generate_channels
+
+
+@pytest.fixture
+def channels():
+    return generate_channels(40)
+
+
+def test_store_round_trips_receiver_dicts(channels):
+    extra = dict(channels[0], Satellite="Nilesat", AudioArray=[{"PID": 10, "Lang": "ara"}])
+    store = ChannelStore([extra] + channels[1:], favorites=[str(channels[1]["ServiceID"])])
+    assert store.to_dicts() == [extra] + channels[1:]
+    assert store.rows_with(ChannelStore.FAVORITE) == [1]
+
+
+def test_store_lookup_after_remove_and_reorder(channels):
+    store = ChannelStore(channels)
+    assert store.row_for_service_id(channels[5]["ServiceID"]) == 5
+    store.remove(2, 4)
+    assert store.row_for_service_id(channels[5]["ServiceID"]) == 2
+    assert store.row_for_service_id(channels[3]["ServiceID"]) == -1
+    assert store.to_dicts() == channels[:2] + channels[5:]
+    order = list(reversed(range(len(store))))
+    store.reorder(order)
+    assert store.to_dicts() == list(reversed(channels[:2] + channels[5:]))
+    assert store.row_for_service_index(channels[0]["ServiceIndex"]) == len(store) - 1
+
+
+def test_store_replace_keeps_local_state(channels):
+    store = ChannelStore(channels, favorites=[str(channels[1]["ServiceID"])])
+    store.set_url(1, "rtsp://x/1")
+    fresh = dict(channels[1], ServiceName="New", AudioArray=[{"PID": 1}, {"PID": 2}, {"PID": 3}, {"PID": 4}])
+    store.replace(1, fresh)
+    assert store.get(1) == fresh and store.get(2) == channels[2]
+    assert store.has(1, ChannelStore.FAVORITE) and store.urls[1] == "rtsp://x/1"
+
+
+def test_store_copy_restore(channels):
+    store = ChannelStore(channels)
+    snapshot = store.copy()
+    store.remove(0, 9)
+    store.set_name(0, "x")
+    store.restore(snapshot)
+    assert store.to_dicts() == channels
+    assert store.row_for_service_id(channels[9]["ServiceID"]) == 9
+
+
+@pytest.mark.parametrize("count", [0, 1, 7, 8, 9, 70])
+def test_rows_from_bits(count):
+    rows = [row for row in range(count) if row % 3 == 0]
+    assert rows_from_bits(sum(1 << row for row in rows), count) == rows
+
+
+def test_filter_index_matches_a_plain_scan(channels):
+    store = ChannelStore(channels)
+    index = ChannelFilterIndex(store)
+    for flag in (ChannelStore.RADIO, ChannelStore.HD, ChannelStore.SCRAMBLED, ChannelStore.EPG):
+        assert rows_from_bits(index.flag_bits(flag), len(store)) == store.rows_with(flag)
+    expected = [row for row in range(len(store))
+                if store.has(row, ChannelStore.HD) and not store.has(row, ChannelStore.SCRAMBLED)
+                and "sport" in store.names[row].lower()]
+    bits = index.match("SPORT", require=ChannelStore.HD, exclude=ChannelStore.SCRAMBLED)
+    assert rows_from_bits(bits, len(store)) == expected
+
+
+def test_filter_index_narrowing_and_store_changes(channels):
+    store = ChannelStore(channels)
+    index = ChannelFilterIndex(store)
+    for query in ("s", "sp", "spo", "sport"):
+        expected = [row for row, name in enumerate(store.names) if query in name.lower()]
+        assert rows_from_bits(index.name_bits(query), len(store)) == expected
+    store.set_name(0, "Sport Renamed")
+    store.append({"ServiceName": "Late Sport", "ServiceID": 9999})
+    rows = rows_from_bits(index.name_bits("sport"), len(store))
+    assert rows[0] == 0 and rows[-1] == len(store) - 1
+
+
+def test_normalize_name_folds_arabic_forms():
+    assert normalize_name("الأخبارُ") == normalize_name("الاخبار")
+    assert normalize_name("قناة") == normalize_name("قناه")
+
+
+def test_move_batch_random_permutations():
+    rng = random.Random(1)
+    for _ in range(200):
+        count = rng.randint(2, 12)
+        ids = [str(1000 + row) for row in range(count)]
+        batch = ChannelMoveBatch(ids)
+        expected = list(ids)
+        for _ in range(rng.randint(1, 4)):
+            if rng.random() < 0.5:
+                old_row, new_row = rng.randrange(count), rng.randrange(count)
+                batch.move_row(old_row, new_row)
+                expected.insert(new_row, expected.pop(old_row))
+            else:
+                rows = rng.sample(range(count), rng.randint(1, count - 1))
+                destination = rng.choice([row for row in range(count) if row not in rows])
+                anchor = expected[destination]
+                block = [expected[row] for row in sorted(rows)]
+                batch.move(rows, destination)
+                expected = [sid for sid in expected if sid not in block]
+                position = expected.index(anchor)
+                expected[position:position] = block
+        assert [ids[row] for row in batch.order] == expected
+        assert sorted(batch.order) == list(range(count))
+
+
+def test_move_batch_rejects_destination_inside_selection():
+    with pytest.raises(ValueError):
+        ChannelMoveBatch(["1", "2", "3"]).move([0, 1], 1)
+
+
+def test_filter_match_range_follows_renames_and_locks(channels):
+    store = ChannelStore(channels)
+    index = ChannelFilterIndex(store)
+    criteria = ("sport", 0, ChannelStore.LOCKED)
+    index.match(*criteria)
+    store.set_name(3, "Al Sport 4")
+    store.set_name(4, "Renamed")
+    store.set_flag(5, ChannelStore.LOCKED, True)
+    full = rows_from_bits(index.match(*criteria), len(store))
+    for first, last in ((0, len(store) - 1), (3, 5), (4, 4), (10, 20)):
+        assert index.match_range(first, last, *criteria) == [row for row in full if first <= row <= last]
+    assert 3 in full and 4 not in full and 5 not in full
+    assert index.match_range(0, len(store) - 1) == list(range(len(store)))
@@ -0,0 +1,57 @@
+import socket
+
+import pytest
+
+from satimages_cli import RECEIVERS_ENV, main
+from satimages_snapshot import ChannelSnapshot
+
+
+@pytest.fixture
+def receiver(mock_server):
+    return f"mock=127.0.0.1:{mock_server.port}"
+
+
+def closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_fetch_succeeds_with_exit_code_0(receiver, mock_server, tmp_path, capsys):
+    path = tmp_path / "{name}.ssnp"
+    assert main(["-r", receiver, "-q", "fetch", "--output", str(path)]) == 0
+    with ChannelSnapshot(str(tmp_path / "mock.ssnp")) as snapshot:
+        assert list(snapshot) == mock_server.receiver.channels
+    assert capsys.readouterr().out.startswith("✅ mock")
+
+
+def test_dry_run_sends_no_edits(receiver, mock_server, tmp_path, capsys):
+    ids = tmp_path / "ids.txt"
+    ids.write_text("1000\n1001  # تعليق\n\n", encoding="utf-8")
+    assert main(["-r", receiver, "-q", "delete", str(ids), "--dry-run"]) == 0
+    assert "1002" in capsys.readouterr().out
+    assert all(request["request"] != "1002" for request in mock_server.receiver.commands)
+
+
+def test_any_failed_receiver_gives_exit_code_1(receiver, capsys):
+    dead = f"dead=127.0.0.1:{closed_port()}"
+    assert main(["-r", receiver, "-r", dead, "-q", "--timeout", "2", "fetch"]) == 1
+    out = capsys.readouterr().out
+    assert "✅ mock" in out and "❌ dead" in out
+
+
+def test_usage_errors_give_exit_code_2(receiver, tmp_path, monkeypatch):
+    monkeypatch.delenv(RECEIVERS_ENV, raising=False)
+    with pytest.raises(SystemExit) as exit_info:
+        main(["fetch"])
+    assert exit_info.value.code == 2
+    assert main(["-r", receiver, "export", "--output", str(tmp_path / "list.unknown")]) == 2
+    moves = tmp_path / "moves.txt"
+    moves.write_text("1000 first\n", encoding="utf-8")
+    assert main(["-r", receiver, "move", str(moves)]) == 2
+    assert main(["-r", receiver, "delete", str(tmp_path / "missing.txt")]) == 2
+
+
+def test_receivers_from_environment(receiver, monkeypatch):
+    monkeypatch.setenv(RECEIVERS_ENV, receiver)
+    assert main(["-q", "fetch"]) == 0
@@ -0,0 +1,277 @@
+import json
+from concurrent.futures import Future
+
+import pytest
+
+from satimages_channels import ChannelMoveBatch, ChannelStore
+from satimages_edits import (
+    ChannelEditQueue, EditRejected, EditTransaction, EditUndo, EditUnconfirmed, receiver_move_order, reply_error
+)
+from satimages_mock_server import MockReceiver, generate_channels
+from satimages_sessions import delete_edit, lock_edit, move_edit, rename_edit
+
+
+def settled(result=None, error=None) -> Future:
+    future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+class RecordingSubmit:
+    """submit لـ ChannelEditQueue يحفظ الطلبات ليرد عليها الاختبار"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, message, callback):
+        self.calls.append((json.loads(message[15:]), callback))
+
+    def codes(self):
+        return [payload["request"] for payload, _ in self.calls]
+
+    def reply(self, index, result=None, error=None):
+        self.calls[index][1](settled(result, error))
+
+
+def test_transaction_coalesces_edits_per_channel():
+    transaction = EditTransaction()
+    transaction.rename("1", "a")
+    transaction.rename("1", "b")
+    transaction.set_locked("2", True, current=False)
+    transaction.set_locked("2", False, current=True)  # عاد لحالته الأصلية: لا 1003
+    transaction.rename("3", "gone")
+    transaction.delete("3")
+    requests = dict(transaction.requests())
+    assert list(requests) == ["1001", "1002"]
+    assert requests["1001"]["array"] == [{"ProgramId": "1", "ProgramName": "b", "TvState": "0"}]
+    assert requests["1002"]["array"] == [{"ProgramId": "3"}]
+
+
+def test_each_move_block_is_its_own_1005_request():
+    batch = ChannelMoveBatch([str(i) for i in range(6)])
+    batch.move([4, 5], 1)
+    batch.move([0], 3)
+    transaction = EditTransaction()
+    transaction.move(batch.blocks, [batch.service_ids[row] for row in batch.order])
+    requests = transaction.requests()
+    assert [code for code, _ in requests] == ["1005", "1005"]
+    assert [[item["ProgramId"] for item in payload["array"]] for _, payload in requests] == [["4", "5"], ["0"]]
+    assert {item["MoveToPosition"] for item in requests[0][1]["array"]} == {"1"}
+
+
+@pytest.mark.parametrize("reply, expected", [
+    ({"success": "1"}, None),
+    ([{"success": "1"}], None),
+    ({"success": "0"}, EditRejected),
+    ({"success": "0", "request": "1009"}, EditUnconfirmed),
+    ({"success": "0", "request": "1001"}, EditRejected),
+    ({"url": "x"}, EditUnconfirmed),
+    ("nope", EditUnconfirmed),
+])
+def test_reply_error(reply, expected):
+    error = reply_error("1001", reply)
+    assert error is None if expected is None else isinstance(error, expected)
+
+
+def test_queue_keeps_one_transaction_in_flight():
+    submit, done = RecordingSubmit(), []
+    queue = ChannelEditQueue(submit, on_done=done.append)
+    queue.transaction().rename("1", "a")
+    assert queue.flush()
+    queue.transaction().rename("2", "b")
+    assert not queue.flush()  # الأولى ما زالت بانتظار ردها
+    submit.reply(0, {"success": "1"})
+    assert len(done) == 1 and not done[0].failed
+    assert submit.codes() == ["1001", "1001"]  # الثانية أُرسلت بعد اكتمال الأولى
+
+
+def test_explicit_rejection_and_timeout_are_told_apart():
+    submit, done = RecordingSubmit(), []
+    queue = ChannelEditQueue(submit, on_done=done.append)
+    transaction = queue.transaction()
+    transaction.rename("1", "a")
+    transaction.set_locked("2", True, current=False)
+    transaction.delete("3")
+    queue.flush()
+    submit.reply(0, {"success": "1"})
+    submit.reply(1, {"success": "0"})
+    submit.reply(2, error=TimeoutError("late"))
+    assert done == [transaction]
+    assert transaction.acknowledged == ["1001"]
+    assert list(transaction.rejected) == ["1003"]
+    assert list(transaction.unconfirmed) == ["1002"]
+
+
+def test_snapshot_is_taken_when_transaction_opens():
+    snapshots = iter(["first", "second"])
+    queue = ChannelEditQueue(RecordingSubmit(), snapshot=lambda: next(snapshots))
+    assert queue.transaction().snapshot == "first"
+    assert queue.transaction().snapshot == "first"
+
+
+def edit_table(transaction, store):
+    """نفس ما تفعله الواجهة: التعديل في المعاملة ثم في الجدول فوراً"""
+    rename_edit({store.service_ids[0]: "Renamed"})(transaction, store)
+    store.set_name(0, "Renamed")
+    transaction.set_locked(store.service_ids[1], True, False)
+    store.set_flag(1, ChannelStore.LOCKED, True)
+    batch = ChannelMoveBatch(store.service_ids)
+    batch.move_row(2, 6)
+    transaction.move(batch.blocks, [store.service_ids[row] for row in batch.order])
+    store.reorder(batch.order)
+    deleted = store.service_ids[8]
+    transaction.delete(deleted)
+    store.remove(8, 8)
+
+
+def reject(submit, codes):
+    for index, (payload, _) in enumerate(submit.calls):
+        submit.reply(index, {"success": "0" if payload["request"] in codes else "1"})
+
+
+def test_rejected_edit_during_population_keeps_loaded_rows():
+    channels = generate_channels(40)
+    store = ChannelStore(channels[:20])
+    done = []
+    submit = RecordingSubmit()
+    queue = ChannelEditQueue(submit, snapshot=store.copy, on_done=done.append)
+    edit_table(queue.transaction(), store)
+    queue.flush()
+    store.extend(channels[20:30])  # دفعات التعبئة تصل أثناء انتظار الردود
+    reject(submit, {"1001", "1003", "1005", "1002"})
+    store.extend(channels[30:])
+    transaction, = done
+    EditUndo(transaction, transaction.rejected).apply(store)
+    assert store.to_dicts() == channels
+
+
+def test_only_rejected_requests_are_undone():
+    channels = generate_channels(12)
+    store = ChannelStore(channels)
+    done = []
+    submit = RecordingSubmit()
+    queue = ChannelEditQueue(submit, snapshot=store.copy, on_done=done.append)
+    edit_table(queue.transaction(), store)
+    expected_order = list(store.service_ids)
+    queue.flush()
+    reject(submit, {"1001", "1002"})
+    transaction, = done
+    EditUndo(transaction, transaction.rejected).apply(store)
+    assert store.names[store.row_for_service_id(channels[0]["ServiceID"])] == channels[0]["ServiceName"]
+    assert store.has(store.row_for_service_id(channels[1]["ServiceID"]), ChannelStore.LOCKED)
+    # الحذف المرفوض يعيد القناة بعد القناة التي سبقتها، والنقل المؤكد يبقى
+    expected_order.insert(expected_order.index(str(channels[7]["ServiceID"])) + 1, str(channels[8]["ServiceID"]))
+    assert list(store.service_ids) == expected_order
+
+
+def test_rebase_keeps_pending_edits_on_the_restored_base():
+    store = ChannelStore(generate_channels(6))
+    first, second = store.service_ids[:2]
+    submit = RecordingSubmit()
+    done = []
+    queue = ChannelEditQueue(submit, snapshot=store.copy, on_done=done.append)
+    queue.transaction().set_locked(first, True, False)
+    queue.transaction().rename(second, "A")
+    store.set_flag(0, ChannelStore.LOCKED, True)
+    store.set_name(1, "A")
+    queue.flush()
+    pending = queue.transaction()
+    pending.set_locked(first, False, True)  # يعيد القفل كما كان: لا شيء يُرسل بعد الرفض
+    pending.rename(second, "B")
+    store.set_flag(0, ChannelStore.LOCKED, False)
+    store.set_name(1, "B")
+    reject(submit, {"1001", "1003"})
+    undo = EditUndo(done[0], done[0].rejected)
+    undo.rebase(pending)
+    undo.apply(store)
+    assert store.names[1] == "B" and not store.has(0, ChannelStore.LOCKED)
+    assert pending.snapshot.names[1] == generate_channels(6)[1]["ServiceName"]
+    assert [code for code, _ in pending.requests()] == ["1001"]
+
+
+def test_receiver_move_order_matches_mock():
+    receiver = MockReceiver(generate_channels(8))
+    ids = [str(c["ServiceID"]) for c in receiver.channels]
+    batch = ChannelMoveBatch(ids)
+    batch.move([5, 6], 1)
+    batch.move_row(0, 7)
+    for block in batch.blocks:
+        receiver.handle({"request": "1005", "array": block})
+    order = receiver_move_order(ids, batch.blocks)
+    assert [ids[row] for row in order] == [str(c["ServiceID"]) for c in receiver.channels]
+
+
+def test_mock_moves_all_items_of_a_request_before_the_first_target():
+    receiver = MockReceiver(generate_channels(6))
+    ids = [str(c["ServiceID"]) for c in receiver.channels]
+    receiver.handle({"request": "1005", "array": [
+        {"ProgramId": ids[5], "MoveToPosition": ids[1]},
+        {"ProgramId": ids[4], "MoveToPosition": ids[1]},
+    ]})
+    assert [str(c["ServiceID"]) for c in receiver.channels] == [ids[0], ids[4], ids[5], ids[1], ids[2], ids[3]]
+
+
+def test_batched_moves_match_receiver_order():
+    receiver = MockReceiver(generate_channels(8))
+    store = ChannelStore(receiver.channels)
+    batch = ChannelMoveBatch(store.service_ids)
+    batch.move([6, 7], 2)
+    batch.move([0], 5)
+    batch.move([1, 3], 7)
+    for block in batch.blocks:
+        receiver.handle({"request": "1005", "array": block})
+    assert [str(c["ServiceID"]) for c in receiver.channels] == [store.service_ids[row] for row in batch.order]
+
+
+@pytest.mark.parametrize("old_row, new_row", [(2, 5), (0, 9), (8, 9), (0, 1), (3, 8), (9, 0), (5, 2)])
+def test_single_row_moves_match_receiver_order(old_row, new_row):
+    receiver = MockReceiver(generate_channels(10))
+    store = ChannelStore(receiver.channels)
+    batch = ChannelMoveBatch(store.service_ids)
+    batch.move_row(old_row, new_row)
+    expected = list(store.service_ids)
+    expected.insert(new_row, expected.pop(old_row))
+    assert [store.service_ids[row] for row in batch.order] == expected
+    for block in batch.blocks:
+        receiver.handle({"request": "1005", "array": block})
+    assert [str(c["ServiceID"]) for c in receiver.channels] == expected
+
+
+def test_downward_moves_keep_table_and_mock_in_step(session, mock_server):
+    store = session.fetch_channels().result(timeout=10)
+    last = len(store) - 1
+    for old_row, new_row in ((2, 5), (0, 9), (10, last), (last - 1, last), (0, 1)):
+        table = ChannelStore(mock_server.receiver.channels)
+        batch = ChannelMoveBatch(table.service_ids)
+        batch.move_row(old_row, new_row)
+        expected = [table.service_ids[row] for row in batch.order]
+        session.apply_edits(lambda transaction, _: transaction.move(batch.blocks, expected)).result(timeout=10)
+        assert [str(c["ServiceID"]) for c in mock_server.receiver.channels] == expected, (old_row, new_row)
+
+
+def test_session_edits_against_mock(session, mock_server):
+    store = session.fetch_channels().result(timeout=10)
+    first, second, third = store.service_ids[:3]
+    session.apply_edits(rename_edit({first: "Renamed"})).result(timeout=10)
+    session.apply_edits(lock_edit([second], True)).result(timeout=10)
+    session.apply_edits(move_edit([(third, 1)])).result(timeout=10)
+    session.apply_edits(delete_edit([first])).result(timeout=10)
+    channels = mock_server.receiver.channels
+    assert str(channels[0]["ServiceID"]) == third
+    assert str(channels[1]["ServiceID"]) == second and channels[1]["Lock"] == 1
+    assert all(str(c["ServiceID"]) != first for c in channels)
+
+
+def test_session_move_edit_matches_requested_positions(session, mock_server):
+    store = session.fetch_channels().result(timeout=10)
+    ids = list(store.service_ids[:10])
+    moves = [(ids[0], 5), (ids[9], 1), (ids[3], len(store))]
+    session.apply_edits(move_edit(moves)).result(timeout=10)
+    expected = list(store.service_ids)
+    for sid, position in moves:
+        expected.remove(sid)
+        expected.insert(position - 1, sid)
+    assert [str(c["ServiceID"]) for c in mock_server.receiver.channels] == expected
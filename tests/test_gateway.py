@@ -0,0 +1,159 @@
+import base64
+import io
+import json
+import os
+import socket
+import struct
+import urllib.error
+import urllib.request
+
+import pytest
+
+from satimages_gateway import StarsatGateway, WebSocketClient
+
+
+@pytest.fixture
+def gateway(mock_server):
+    gateway = StarsatGateway([{"name": "mock", "ip": "127.0.0.1", "port": mock_server.port}],
+                             ("127.0.0.1", 0), timeout=20).start()
+    yield gateway
+    gateway.stop()
+
+
+def http(gateway, method, path, body=None, headers=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(f"http://127.0.0.1:{gateway.port}{path}", data=data, method=method,
+                                     headers={"Content-Type": "application/json", **(headers or {})})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def websocket(gateway) -> socket.socket:
+    sock = socket.create_connection(("127.0.0.1", gateway.port), timeout=10)
+    key = base64.b64encode(os.urandom(16)).decode("ascii")
+    sock.sendall((f"GET /ws HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode("ascii"))
+    response = b""
+    while b"\r\n\r\n" not in response:
+        response += sock.recv(1)  # بايت بايت حتى لا تُقرأ إطارات البث بعد الرأس
+    assert response.startswith(b"HTTP/1.1 101")
+    return sock
+
+
+def recv_exact(sock, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        assert chunk, "connection closed"
+        data += chunk
+    return data
+
+
+def read_frame(sock) -> tuple:
+    first, second = recv_exact(sock, 2)
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack("!H", recv_exact(sock, 2))
+    elif length == 127:
+        length, = struct.unpack("!Q", recv_exact(sock, 8))
+    return first & 0x0F, recv_exact(sock, length)
+
+
+def test_non_loopback_bind_requires_token(mock_server):
+    with pytest.raises(ValueError):
+        StarsatGateway([], ("0.0.0.0", 0))
+    StarsatGateway([], ("0.0.0.0", 0), token="secret").server.server_close()
+
+
+def test_token_is_required_when_configured(mock_server):
+    gateway = StarsatGateway([], ("127.0.0.1", 0), token="secret").start()
+    try:
+        assert http(gateway, "GET", "/receivers")[0] == 401
+        assert http(gateway, "GET", "/receivers", headers={"Authorization": "Bearer wrong"})[0] == 401
+        assert http(gateway, "GET", "/receivers", headers={"Authorization": "Bearer secret"}) == (200, [])
+        assert http(gateway, "GET", "/receivers?token=secret") == (200, [])
+    finally:
+        gateway.stop()
+
+
+def test_unmasked_client_frame_is_rejected(gateway):
+    sock = websocket(gateway)
+    sock.sendall(struct.pack("!BB", 0x81, 2) + b"{}")
+    opcode, payload = read_frame(sock)
+    assert opcode == 0x8 and struct.unpack("!H", payload[:2])[0] == 1002
+    sock.close()
+
+
+def test_oversized_frame_is_rejected_before_reading_it(gateway):
+    sock = websocket(gateway)
+    sock.sendall(struct.pack("!BBQ", 0x81, 0x80 | 127, 1 << 62))
+    opcode, payload = read_frame(sock)
+    assert opcode == 0x8 and struct.unpack("!H", payload[:2])[0] == 1009
+    sock.close()
+
+
+def test_websocket_client_unmasks_payload():
+    payload, mask = b'{"op":"receivers"}', b"\x01\x02\x03\x04"
+    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    frame = struct.pack("!BB", 0x81, 0x80 | len(payload)) + mask + masked
+    client = WebSocketClient(io.BytesIO(frame), io.BytesIO())
+    assert client.receive() == payload
+
+
+def send_frame(sock, payload: bytes):
+    mask = os.urandom(4)
+    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    sock.sendall(struct.pack("!BB", 0x81, 0x80 | len(payload)) + mask + masked)
+
+
+def test_receiver_routes(gateway, mock_server):
+    status, receivers = http(gateway, "GET", "/receivers")
+    assert status == 200 and [r["name"] for r in receivers] == ["mock"]
+    key = receivers[0]["key"]
+    status, info = http(gateway, "GET", f"/receivers/{key}/info")
+    assert status == 200 and info["SerialNumber"] == "MOCK00000001"
+    assert http(gateway, "GET", "/receivers/mock/favorites")[1][:2] == ["أخبار", "رياضة"]
+    status, channels = http(gateway, "GET", "/receivers/mock/channels")
+    assert status == 200 and channels == mock_server.receiver.channels
+    status, reply = http(gateway, "POST", "/receivers/mock/command",
+                         {"message": {"request": "1009", "TvState": "0", "ProgramId": "1003"}, "reply": "stream_url"})
+    assert status == 200 and reply["url"].endswith("player.1003")
+    assert http(gateway, "POST", "/receivers/mock/command", {"message": {"request": "1040", "KeyValue": "1"}}) \
+        == (200, {"sent": True})
+
+
+def test_edits_route_updates_served_channels(gateway, mock_server):
+    http(gateway, "GET", "/receivers/mock/channels")
+    first, second = (str(c["ServiceID"]) for c in mock_server.receiver.channels[:2])
+    status, result = http(gateway, "POST", "/receivers/mock/edits", {"rename": {first: "Renamed"}, "delete": [second]})
+    assert status == 200 and sorted(result["sent"]) == ["1001", "1002"]
+    status, channels = http(gateway, "GET", "/receivers/mock/channels")
+    assert channels[0]["ServiceName"] == "Renamed"
+    assert [c["ServiceID"] for c in channels] == [c["ServiceID"] for c in mock_server.receiver.channels]
+
+
+def test_route_errors(gateway):
+    assert http(gateway, "GET", "/nowhere")[0] == 404
+    assert http(gateway, "GET", "/receivers/unknown/info")[0] == 404
+    assert http(gateway, "POST", "/receivers/mock/info")[0] == 404
+    assert http(gateway, "POST", "/receivers/mock/edits", {})[0] == 400
+    assert http(gateway, "POST", "/receivers/mock/command", {"message": "1009"})[0] == 400
+
+
+def ws_reply(sock, request_id) -> dict:
+    while True:
+        reply = json.loads(read_frame(sock)[1])
+        if reply.get("id") == request_id:  # أحداث البث (الحالة، القنوات) قد تسبق الرد
+            return reply
+
+
+def test_websocket_operations(gateway):
+    sock = websocket(gateway)
+    send_frame(sock, json.dumps({"id": 1, "op": "info", "receiver": "mock"}).encode("utf-8"))
+    assert ws_reply(sock, 1)["result"]["ProductName"] == "Starsat Mock"
+    send_frame(sock, json.dumps({"id": 2, "op": "info", "receiver": "unknown"}).encode("utf-8"))
+    assert ws_reply(sock, 2)["status"] == 404
+    sock.close()
@@ -0,0 +1,148 @@
+import json
+import zlib
+from concurrent.futures import Future
+
+import pytest
+
+from satimages_protocol import (
+    ChannelFetchPipeline, FrameDecoder, PayloadStream, build_gcdh_message, build_message, decode_payload
+)
+
+
+def frame_stream(builder, bodies) -> bytes:
+    return b"".join(builder(body) for body in bodies)
+
+
+@pytest.mark.parametrize("builder, bodies", [
+    (build_message, [b'{"request":"0"}', b"", b"[1, 2]"]),
+    (build_gcdh_message, [b'{"request":"0"}', b"x", b"[1, 2]"]),  # طول GCDH صفر يعني تدفقاً خاماً
+])
+@pytest.mark.parametrize("stream_payloads", [False, True])
+def test_frames_split_at_every_offset(builder, bodies, stream_payloads):
+    data = frame_stream(builder, bodies)
+    kind = "gcdh" if builder is build_gcdh_message else "start"
+    for first in range(len(data) + 1):
+        for second in range(first, len(data) + 1):
+            decoder = FrameDecoder(stream_payloads=stream_payloads)
+            frames = decoder.feed(data[:first]) + decoder.feed(data[first:second]) + decoder.feed(data[second:])
+            assert [frame.kind for frame in frames] == [kind] * len(bodies), (first, second)
+            if not stream_payloads:
+                assert [bytes(frame.payload) for frame in frames] == bodies
+
+
+@pytest.mark.parametrize("partial", [b"S", b"St", b"Sta", b"Star", b"G", b"GC", b"GCD"])
+def test_chunk_that_is_only_a_partial_header(partial):
+    decoder = FrameDecoder()
+    message = build_message(b"{}") if partial[:1] == b"S" else build_gcdh_message(b"{}")
+    assert decoder.feed(partial) == []
+    frames = decoder.feed(message[len(partial):])
+    assert [(frame.kind, bytes(frame.payload)) for frame in frames] == [(frames[0].kind, b"{}")]
+    assert frames[0].kind != "raw"
+
+
+def test_byte_at_a_time_compressed_channel_list():
+    channels = [{"ServiceName": f"Channel {i}", "ServiceID": 1000 + i} for i in range(50)]
+    data = build_message(zlib.compress(json.dumps(channels).encode("utf-8")))
+    decoder = FrameDecoder(stream_payloads=True)
+    frames = []
+    for offset in range(len(data)):
+        frames.extend(decoder.feed(data[offset:offset + 1]))
+    assert len(frames) == 1
+    assert frames[0].decoded[0] == "zlib_json"
+    assert frames[0].decoded[2] == channels
+
+
+def test_raw_data_before_header_is_passed_through():
+    decoder = FrameDecoder()
+    frames = decoder.feed(b"hello" + build_message(b"{}"))
+    assert [(frame.kind, bytes(frame.payload)) for frame in frames] == [("raw", b"hello"), ("start", b"{}")]
+
+
+@pytest.mark.parametrize("body", [
+    zlib.compress(json.dumps([{"ServiceName": "قناة", "ServiceID": 1}] * 20).encode("utf-8")),
+    json.dumps({"success": "1", "url": "http://x/player.1"}).encode("utf-8"),
+    b'<?xml version="1.0"?><Handshake/>',
+])
+@pytest.mark.parametrize("chunk", [1, 3, 64])
+def test_payload_stream_matches_whole_payload_decode(body, chunk):
+    stream = PayloadStream()
+    for offset in range(0, len(body), chunk):
+        stream.feed(body[offset:offset + chunk])
+    kind, _, parsed = stream.close()
+    whole_kind, _, whole_parsed = decode_payload(body)
+    assert (kind, parsed) == (whole_kind, whole_parsed)
+
+
+@pytest.mark.mock(fragment=7)
+def test_fetch_from_fragmenting_mock(session, mock_server):
+    store = session.fetch_channels(batch_size=100, window=3).result(timeout=30)
+    assert store.to_dicts() == mock_server.receiver.channels
+
+
+@pytest.mark.mock(framing="gcdh", channel_count=250)
+def test_fetch_from_gcdh_mock(session, mock_server):
+    store = session.fetch_channels(batch_size=60).result(timeout=10)
+    assert store.to_dicts() == mock_server.receiver.channels
+
+
+class RangeSubmit:
+    """submit لـ ChannelFetchPipeline يحفظ النطاقات المطلوبة ليرد عليها الاختبار بأي ترتيب"""
+
+    def __init__(self, channels):
+        self.channels = channels
+        self.pending = {}
+        self.requested = []
+
+    def __call__(self, message, callback):
+        request = json.loads(message[15:])
+        from_index, to_index = int(request["FromIndex"]), int(request["ToIndex"])
+        self.requested.append(from_index)
+        self.pending[from_index] = (to_index, callback)
+
+    def reply(self, from_index, error=None):
+        to_index, callback = self.pending.pop(from_index)
+        future = Future()
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(self.channels[from_index:to_index + 1])
+        callback(future)
+
+
+def run_pipeline(channels, total, order=min, **options):
+    submit = RangeSubmit(channels)
+    batches, done = [], []
+    pipeline = ChannelFetchPipeline(submit, total=total, on_batch=lambda c, i: batches.append((i, c)),
+                                    on_done=done.append, **options)
+    pipeline.start()
+    while submit.pending:
+        assert len(submit.pending) <= pipeline.window
+        submit.reply(order(submit.pending))
+    return submit, batches, done
+
+
+@pytest.mark.parametrize("order", [min, max])
+@pytest.mark.parametrize("total", [None, 23, 10, 40])
+def test_pipeline_delivers_in_order_whatever_the_reply_order(order, total):
+    channels = list(range(23))
+    submit, batches, done = run_pipeline(channels, total, order, batch_size=5, window=3)
+    assert [index for index, _ in batches] == [0, 5, 10, 15, 20]
+    assert [c for _, batch in batches for c in batch] == channels
+    assert done == [23]
+
+
+def test_pipeline_total_bounds_the_first_window():
+    submit = RangeSubmit(list(range(7)))
+    ChannelFetchPipeline(submit, batch_size=5, window=4, total=7).start()
+    assert {index: to_index for index, (to_index, _) in submit.pending.items()} == {0: 4, 5: 6}
+
+
+def test_pipeline_stops_on_error():
+    submit = RangeSubmit(list(range(20)))
+    errors, done = [], []
+    pipeline = ChannelFetchPipeline(submit, batch_size=5, window=2, on_done=done.append,
+                                    on_error=lambda error, index: errors.append(index))
+    pipeline.start()
+    submit.reply(5, TimeoutError())
+    submit.reply(0)
+    assert errors == [5] and done == [] and not pipeline.running
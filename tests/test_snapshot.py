@@ -0,0 +1,54 @@
+import pytest
+
+from satimages_channels import ChannelStore
+from satimages_mock_server import generate_channels
+from satimages_snapshot import ChannelSnapshot, SnapshotError, is_snapshot, write_snapshot
+
+
+def test_snapshot_round_trip(tmp_path):
+    channels = generate_channels(50)
+    channels[0] = dict(channels[0], ServiceID="0x1f", Satellite="Nilesat", ServiceName="قناة الأخبار")
+    store = ChannelStore(channels)
+    store.set_flag(3, ChannelStore.SELECTED, True)
+    path = str(tmp_path / "channels.ssnp")
+    assert write_snapshot(path, store, ["أخبار", "رياضة"]) == 50
+    assert is_snapshot(path)
+    with ChannelSnapshot(path) as snapshot:
+        assert len(snapshot) == 50
+        assert list(snapshot) == channels
+        assert snapshot[-1] == channels[-1] and snapshot[10:12] == channels[10:12]
+        assert snapshot.favorites == ["أخبار", "رياضة"]
+        assert snapshot.find("0x1f") == 0
+        assert snapshot.find(channels[42]["ServiceID"]) == 42
+        assert snapshot.find("missing") == -1
+        with pytest.raises(IndexError):
+            snapshot[50]
+
+
+def test_snapshot_rejects_other_files(tmp_path):
+    path = tmp_path / "channels.json"
+    path.write_text("[]")
+    assert not is_snapshot(str(path))
+    with pytest.raises(SnapshotError):
+        ChannelSnapshot(str(path))
+    empty = tmp_path / "empty.ssnp"
+    empty.write_bytes(b"")
+    with pytest.raises(SnapshotError):
+        ChannelSnapshot(str(empty))
+
+
+@pytest.mark.parametrize("slice_size", [1, 7, 50, 64])
+def test_snapshot_slices_load_into_store(tmp_path, slice_size):
+    channels = generate_channels(50)
+    channels[3] = dict(channels[3], Satellite="Nilesat", AudioArray=[])
+    path = str(tmp_path / "channels.ssnp")
+    write_snapshot(path, ChannelStore(channels, favorites=[str(channels[5]["ServiceID"])]))
+    store = ChannelStore(generate_channels(2, seed=1))
+    store.row_for_service_id("1000")  # الفهرس مبني قبل الإضافة
+    with ChannelSnapshot(path) as snapshot:
+        assert len(snapshot.store(50, 60)) == 0
+        for start in range(0, len(snapshot), slice_size):
+            store.extend_store(snapshot.store(start, start + slice_size))
+    assert store.to_dicts()[2:] == channels
+    assert store.rows_with(ChannelStore.FAVORITE) == [7]
+    assert store.row_for_service_id(channels[10]["ServiceID"]) == 12
@@ -0,0 +1,136 @@
+from concurrent.futures import Future
+
+import pytest
+
+from satimages_protocol import RequestTracker, TimerHandle, build_message, stream_url_matcher, stream_url_request
+
+
+class FakeTransport:
+    """نقل بدون مقبس: الاستدعاءات تُنفذ فوراً والمؤقتات تُشغل يدوياً"""
+
+    def __init__(self):
+        self.written = []
+        self.timers = []
+
+    def call_soon_threadsafe(self, callback):
+        callback()
+
+    def call_later(self, delay, callback):
+        handle = TimerHandle(delay, callback)
+        self.timers.append(handle)
+        return handle
+
+    def write(self, data):
+        self.written.append(data)
+
+    def expire(self, future_index: int):
+        handle = self.timers[future_index]
+        if not handle.cancelled:
+            handle.callback()
+
+
+def url_reply(service_id) -> dict:
+    return {"success": "1", "url": f"http://127.0.0.1:8085/player.{service_id}"}
+
+
+@pytest.fixture
+def tracker():
+    return RequestTracker(FakeTransport())
+
+
+def test_replies_are_matched_in_order_per_kind(tracker):
+    info = tracker.submit(build_message('{"request":"16"}'), "device_info")
+    first = tracker.submit(build_message('{"request":"0"}'), "channel_list")
+    second = tracker.submit(build_message('{"request":"0"}'), "channel_list")
+    assert tracker.resolve([{"ServiceName": "a"}])
+    assert tracker.resolve({"ProductName": "p", "SoftwareVersion": "s", "SerialNumber": "n"})
+    assert tracker.resolve([{"ServiceName": "b"}])
+    assert first.result()[0]["ServiceName"] == "a"
+    assert second.result()[0]["ServiceName"] == "b"
+    assert info.result()["ProductName"] == "p"
+    assert tracker.pending() == 0
+
+
+def test_unsolicited_reply_is_not_consumed(tracker):
+    assert not tracker.resolve({"favGroupNames": []})
+
+
+def test_any_observes_without_consuming(tracker):
+    probe = tracker.submit(build_message('{"request":"12"}'), "any")
+    assert not tracker.resolve({"request": "12", "TvState": "0"})
+    assert probe.done() and probe.round_trip >= 0
+
+
+def test_timeout_fails_request(tracker):
+    future = tracker.submit(build_message('{"request":"16"}'), "device_info")
+    tracker.transport.expire(0)
+    assert isinstance(future.exception(), TimeoutError)
+
+
+def test_success_without_url_goes_to_pending_stream_url(tracker):
+    future = tracker.submit(stream_url_request("1000"), "stream_url")
+    assert tracker.resolve({"success": "1"})
+    assert future.result() == {"success": "1"}
+
+
+def test_ack_reply_goes_to_oldest_of_ack_and_stream_url(tracker):
+    zap = tracker.submit(stream_url_request("1000"), "stream_url")
+    edit = tracker.submit(build_message('{"request":"1001"}'), "ack")
+    assert tracker.resolve({"success": "0"})
+    assert zap.result() == {"success": "0"}
+    assert not edit.done()
+    assert tracker.resolve({"success": "1"})
+    assert edit.result() == {"success": "1"}
+
+
+def test_late_stream_url_reply_is_dropped_by_service_id(tracker):
+    first = tracker.submit(stream_url_request("1000"), "stream_url", match=stream_url_matcher("1000"))
+    tracker.transport.expire(0)
+    assert isinstance(first.exception(), TimeoutError)
+    second = tracker.submit(stream_url_request("1001"), "stream_url", match=stream_url_matcher("1001"))
+    assert tracker.resolve(url_reply(1000))
+    assert not second.done()
+    assert tracker.dropped == 1
+    assert tracker.resolve(url_reply(1001))
+    assert second.result()["url"].endswith("player.1001")
+
+
+def test_reply_for_the_waiting_request_is_kept_when_late_reply_never_came(tracker):
+    tracker.submit(stream_url_request("1000"), "stream_url", match=stream_url_matcher("1000"))
+    tracker.transport.expire(0)
+    second = tracker.submit(stream_url_request("1001"), "stream_url", match=stream_url_matcher("1001"))
+    assert tracker.resolve(url_reply(1001))
+    assert second.result()["url"].endswith("player.1001")
+
+
+def test_late_reply_without_identity_is_dropped_by_count(tracker):
+    tracker.submit(build_message('{"request":"1001"}'), "ack")
+    tracker.transport.expire(0)
+    second = tracker.submit(build_message('{"request":"1003"}'), "ack")
+    assert tracker.resolve({"success": "1"})  # الرد المتأخر للطلب الأول
+    assert not second.done()
+    assert tracker.resolve({"success": "1"})
+    assert second.result() == {"success": "1"}
+
+
+def test_stream_url_matcher():
+    match = stream_url_matcher("0001000")
+    assert match(url_reply(1000)) is True
+    assert match({"url": "rtsp://10.0.0.2:554/?prognumber=1000"}) is True
+    assert match(url_reply(1001)) is False
+    assert match({"success": "0"}) is None
+
+
+def test_fail_all_fails_pending_and_later_submits(tracker):
+    future = tracker.submit(build_message('{"request":"16"}'), "device_info")
+    error = ConnectionError("gone")
+    tracker.fail_all(error)
+    assert future.exception() is error
+    assert tracker.submit(build_message('{"request":"16"}'), "device_info").exception() is error
+
+
+def test_callback_receives_future(tracker):
+    seen = []
+    tracker.submit(build_message('{"request":"16"}'), "device_info", callback=seen.append)
+    tracker.resolve({"ProductName": "p", "SoftwareVersion": "s", "SerialNumber": "n"})
+    assert len(seen) == 1 and isinstance(seen[0], Future)
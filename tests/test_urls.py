@@ -0,0 +1,55 @@
+from satimages_urls import UrlRefreshPlan, expand_template, infer_url_template, stream_url_from_reply, url_template
+
+IP = "192.168.1.50"
+
+
+def test_url_template_round_trip():
+    template = url_template(f"http://{IP}:8085/player.1234", "1234", IP)
+    assert template == "http://{ip}:8085/player.{sid}"
+    assert expand_template(template, "77", IP) == f"http://{IP}:8085/player.77"
+    assert url_template(f"rtsp://{IP}:554/?prognumber=12", "0012", IP) == "rtsp://{ip}:554/?prognumber={sid_stripped}"
+    assert infer_url_template({"1": "http://a/1", "2": "http://b/x"}, "") is None
+
+
+def test_stream_url_from_reply_without_url_uses_rtsp():
+    assert stream_url_from_reply({"success": "1"}, "0042", IP) == f"rtsp://{IP}:554/?prognumber=42"
+    assert stream_url_from_reply([{"success": "0"}], "42", IP) is None
+
+
+def run_plan(plan, receiver_url, probe_ok):
+    zapped = []
+    while plan.phase != "done":
+        if plan.phase == "probe":
+            for service_id, url in plan.probe_candidates():
+                plan.record_probe(service_id, probe_ok(service_id, url))
+            plan.finish_probe()
+            continue
+        service_id = plan.next_zap()
+        zapped.append(service_id)
+        plan.record_zap(service_id, receiver_url(service_id))
+    return zapped
+
+
+def test_plan_probes_inferred_urls_and_zaps_failures_only():
+    ids = [str(1000 + i) for i in range(20)]
+    plan = UrlRefreshPlan(ids, IP)
+    assert plan.sample_ids == ["1000", "1010", "1019"]
+    zapped = run_plan(plan, lambda sid: f"http://{IP}:8085/player.{sid}", lambda sid, url: sid != "1005")
+    assert zapped == ["1000", "1010", "1019", "1005"]
+    assert plan.template == "http://{ip}:8085/player.{sid}"
+    assert (plan.done, plan.verified, plan.total) == (20, 16, 20)
+
+
+def test_plan_without_common_template_zaps_everything():
+    ids = [str(i) for i in range(6)]
+    plan = UrlRefreshPlan(ids + ids[:2], IP)  # المكرر يُطلب مرة واحدة
+    zapped = run_plan(plan, lambda sid: None, lambda sid, url: True)
+    assert sorted(zapped) == ids and plan.template is None and plan.done == 6
+
+
+def test_plan_retry_and_empty_list():
+    plan = UrlRefreshPlan(["1", "2"], IP, sample_count=1)
+    first = plan.next_zap()
+    plan.retry(first)
+    assert plan.next_zap() == first
+    assert UrlRefreshPlan([], IP).phase == "done"